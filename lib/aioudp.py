@@ -24,6 +24,7 @@
 import asyncio
 import socket
 from collections import deque
+from contextlib import suppress
 
 
 class aioUDPServer():
@@ -44,12 +45,21 @@ class aioUDPServer():
     def run(self, host, port, loop):
         self.loop = loop
         self._sock.bind((host, port))
-        self._run_future(self._recv_periodically())
+        self._task = asyncio.ensure_future(self._recv_periodically(), loop=self.loop)
 
     def stop(self):
         self._sock.close()
         self._subscribers = {}
 
+    def shutdown(self):
+        # stop the server from within the thread of its (still running) event loop
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        with suppress(ValueError, OSError):
+            self.loop.remove_reader(self._sock.fileno())
+        self.stop()
+
     def subscribe(self, fut):
         self._subscribers[id(fut)] = fut
 
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+"""
+This library provides the shared asyncio event loop of the SmartHomeNG core.
+
+The loop runs in a single thread ('asyncio.core'), that is started on first use. After the loop
+has been stopped (on shutdown of SmartHomeNG), it is not started again on use. Coroutines
+are submitted from other threads with ``run_coroutine()``, which returns a
+``concurrent.futures.Future``. Coroutines, that are waiting (e.g. for an item value or for
+``asyncio.sleep()``), do not occupy a thread, so any number of them can be in flight.
+
+Besides async logics, components can use the loop instead of running an own event loop in an
+own thread (opt-in): Tcp_server and Udp_server of lib.network, asyncio plugins
+(SmartPlugin.start_asyncio()) and the websocket module. Code running on the loop must not block
+it. The lag of the loop (the delay of a periodic timer) is measured, a lag above LAG_WARNING
+is logged.
+
+The coroutines in flight are counted by kind (e.g. 'logic'). The counts, the components using
+the loop and the lag are reported through ``get_statistics()``.
+
+:Warning: This library is part of the core of SmartHomeNG. It **should not be called directly** from plugins!
+"""
+
+import asyncio
+import collections
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+THREAD_NAME = 'asyncio.core'
+
+LAG_INTERVAL = 1.0          # interval of the lag measurement (in seconds)
+LAG_WARNING = 0.5           # lag, that is logged as a warning (in seconds)
+LAG_WARNING_INTERVAL = 60   # minimum time between two lag warnings (in seconds)
+
+_core_loop = None
+_core_loop_lock = threading.Lock()
+
+
+class CoreEventLoop():
+    """
+    Shared asyncio event loop, running in its own thread
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._in_flight = collections.Counter()     # kind -> number of coroutines in flight
+        self._started = collections.Counter()       # kind -> number of coroutines started
+        self._components = collections.Counter()    # components using the loop
+        self._lag_last = 0.0
+        self._lag_max = 0.0
+        self._lag_period_max = 0.0                  # maximum lag since the last call of get_lag()
+        self._lag_warned = None
+        self._stopped = False                       # stop() has been called, the loop is not started on use
+
+    @property
+    def loop(self):
+        """
+        The asyncio event loop (the loop thread is started, if it is not running)
+
+        :raises: RuntimeError, if the loop has been stopped
+        """
+        loop = self._loop
+        if loop is None or self._thread is None or not self._thread.is_alive():
+            if self._stopped:
+                raise RuntimeError("The core event loop has been stopped")
+            loop = self.start()
+        return loop
+
+    def is_running(self):
+        """
+        Returns True, if the thread of the event loop is running
+
+        :rtype: bool
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Start the thread of the event loop (if it is not running)
+
+        An explicit call of start() starts a loop, that has been stopped, again.
+
+        :return: the event loop
+        """
+        with self._lock:
+            self._stopped = False
+            if self._thread is not None and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(loop, started), name=THREAD_NAME, daemon=True)
+            self._loop = loop
+            self._thread.start()
+            started.wait()
+        logger.info("Core event loop started")
+        return loop
+
+    def _run(self, loop, started):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        loop.create_task(self._monitor_lag(), name='monitor_lag')
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                tasks = asyncio.all_tasks(loop)
+                for task in tasks:
+                    task.cancel()
+                if tasks:
+                    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+
+    async def _monitor_lag(self):
+        """
+        Measure how late a timer of the loop fires (the lag of the loop)
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = max(loop.time() - expected, 0.0)
+            with self._lock:
+                self._lag_last = lag
+                self._lag_max = max(self._lag_max, lag)
+                self._lag_period_max = max(self._lag_period_max, lag)
+            if lag > LAG_WARNING and (self._lag_warned is None or loop.time() - self._lag_warned > LAG_WARNING_INTERVAL):
+                self._lag_warned = loop.time()
+                logger.warning(f"Core event loop lagged {lag * 1000:.0f} ms behind - a coroutine or callback is blocking the loop (components: {', '.join(self._components) or '-'})")
+
+    def stop(self, timeout=5):
+        """
+        Stop the event loop, the coroutines in flight are cancelled
+
+        The loop is not started again on use (only by an explicit call of start()).
+
+        :param timeout: time to wait for the thread of the event loop to finish (in seconds)
+        """
+        with self._lock:
+            self._stopped = True
+            thread, loop = self._thread, self._loop
+            self._thread = None
+            self._loop = None
+        if thread is None or not thread.is_alive():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"Core event loop did not stop within {timeout} seconds")
+        else:
+            logger.info("Core event loop stopped")
+
+    def run_coroutine(self, coro, kind=None):
+        """
+        Run a coroutine on the event loop (may be called from any thread but the loop thread itself)
+
+        :param coro: coroutine object
+        :param kind: kind of the coroutine for the statistics (e.g. 'logic')
+        :type kind: str
+
+        :return: future for the result of the coroutine
+        :rtype: concurrent.futures.Future
+        :raises: RuntimeError, if the loop has been stopped
+        """
+        try:
+            loop = self.loop
+        except RuntimeError:
+            coro.close()
+            raise
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        if kind is not None:
+            with self._lock:
+                self._in_flight[kind] += 1
+                self._started[kind] += 1
+            future.add_done_callback(lambda f: self._finished(kind))
+        return future
+
+    def _finished(self, kind):
+        with self._lock:
+            self._in_flight[kind] -= 1
+
+    def run_coroutine_wait(self, coro, timeout=None):
+        """
+        Run a coroutine on the event loop and wait for its result
+
+        :param coro: coroutine object
+        :param timeout: maximum time to wait (in seconds, None: wait without limit)
+
+        :return: result of the coroutine
+        :raises: RuntimeError, if called in the thread of the event loop (which would dead-lock)
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("run_coroutine_wait() cannot be called in the thread of the core event loop")
+        return self.run_coroutine(coro).result(timeout)
+
+    def run_in_loop(self, func, *args, timeout=None):
+        """
+        Call a function in the thread of the event loop and wait for its result
+
+        If called in the thread of the event loop, the function is called directly.
+
+        :return: result of the function
+        """
+        if self.in_loop_thread():
+            return func(*args)
+
+        async def call():
+            return func(*args)
+
+        return self.run_coroutine(call()).result(timeout)
+
+    def call_soon(self, callback, *args):
+        """
+        Schedule a callback to be called in the thread of the event loop
+        """
+        return self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_later(self, delay, callback, *args):
+        """
+        Schedule a callback to be called in the thread of the event loop after delay seconds
+        """
+        loop = self.loop
+        loop.call_soon_threadsafe(loop.call_later, delay, callback, *args)
+
+    def in_loop_thread(self):
+        """
+        Returns True, if called in the thread of the event loop
+
+        :rtype: bool
+        """
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def add_component(self, name):
+        """
+        Register a component, that uses the event loop (for the statistics)
+
+        :param name: name of the component (e.g. 'Tcp_server (knx_0.0.0.0:3671)')
+        """
+        with self._lock:
+            self._components[name] += 1
+
+    def remove_component(self, name):
+        """
+        Unregister a component, that does not use the event loop anymore
+        """
+        with self._lock:
+            self._components[name] -= 1
+            if self._components[name] <= 0:
+                del self._components[name]
+
+    def get_lag(self):
+        """
+        Returns the maximum lag of the event loop since the last call of this method (in seconds)
+
+        :rtype: float
+        """
+        with self._lock:
+            lag, self._lag_period_max = self._lag_period_max, 0.0
+        return lag
+
+    def in_flight(self, kind=None):
+        """
+        Returns the number of coroutines in flight
+
+        :param kind: kind of the coroutines (None: all coroutines submitted with a kind)
+        :type kind: str
+
+        :rtype: int
+        """
+        with self._lock:
+            if kind is None:
+                return sum(self._in_flight.values())
+            return self._in_flight[kind]
+
+    def get_statistics(self):
+        """
+        Returns the statistics of the event loop (serializable to json)
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'in_flight': dict(self._in_flight),
+                'started': dict(self._started),
+                'components': sorted(self._components),
+                'lag_last': round(self._lag_last, 6),
+                'lag_max': round(self._lag_max, 6),
+            }
+
+
+def get_core_loop():
+    """
+    Returns the shared event loop of the SmartHomeNG core
+
+    :rtype: CoreEventLoop
+    """
+    global _core_loop
+    if _core_loop is None:
+        with _core_loop_lock:
+            if _core_loop is None:
+                _core_loop = CoreEventLoop()
+    return _core_loop
+
+
+def stop_core_loop(timeout=5):
+    """
+    Stop the shared event loop (if it has been started)
+    """
+    if _core_loop is not None:
+        _core_loop.stop(timeout)
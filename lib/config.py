@@ -28,10 +28,13 @@ This library does the handling and parsing of the configuration of SmartHomeNG.
 """
 
 import copy
+import hashlib
 import logging
 import collections
 import keyword
 import os
+import pickle
+import sys
 
 from lib.utils import Utils
 import lib.shyaml as shyaml
@@ -73,7 +76,7 @@ def parse_basename(basename, configtype=''):
     return config
 
 
-def parse_itemsdir(itemsdir, item_conf, addfilenames=False, struct_dict={}):
+def parse_itemsdir(itemsdir, item_conf, addfilenames=False, struct_dict={}, processes=None):
     """
     Load and parse item configurations and merge it to the configuration tree
     The configuration is only specified by the name of the directory.
@@ -84,28 +87,158 @@ def parse_itemsdir(itemsdir, item_conf, addfilenames=False, struct_dict={}):
     :param item_conf:     Optional OrderedDict tree, into which the configuration should be merged
     :param addfilenames:
     :param struct_dict:   dict with all defined structs (from /etc/structs.yaml and from loaded plugins)
+    :param processes:     number of processes to parse the yaml files in parallel (default: number of CPUs, 1: no parallel parsing)
     :type itemsdir:       str
     :type item_conf:      OrderedDict
     :type addfilenames:
     :type struct_dict:    dict / OrderedDict
+    :type processes:      int
 
     :return: The resulting merged OrderedDict tree
     :rtype: OrderedDict
     """
     logger.info(f"parse_itemsdir: Beginning to parse items directory {itemsdir}")
+    item_files = itemsdir_files(itemsdir)
+    preload_itemsdir(itemsdir, processes)
+    for item_file in item_files:
+        try:
+            item_conf = parse(itemsdir + item_file, item_conf, addfilenames, parseitems=True, struct_dict=struct_dict)
+        except Exception as e:
+            logger.exception(f"Problem reading {item_file}: {e}")
+            continue
+    # do not keep the parsed trees of files, that have not been merged
+    shyaml.yaml_preload_discard([itemsdir + f for f in item_files])
+    logger.info(f"parse_itemsdir: Finished parsing items directory {itemsdir}")
+    return item_conf
+
+
+def preload_itemsdir(itemsdir, processes=None):
+    """
+    Parse the yaml files of an items directory in parallel, for a following parse_itemsdir()
+
+    Parsing the yaml files is independent, only the merge into the item tree has to be done in order.
+    The files are only preloaded, while no other threads are running (see lib.shyaml.yaml_preload()).
+
+    :param itemsdir:  Name of folder containing the configuration files
+    :param processes: number of processes to parse the yaml files in parallel (default: number of CPUs, 1: no parallel parsing)
+
+    :return: number of files preloaded
+    :rtype: int
+    """
+    if not os.path.isdir(itemsdir):
+        return 0
+    return shyaml.yaml_preload([itemsdir + f for f in itemsdir_files(itemsdir) if f.endswith(YAML_FILE)], ordered=True, processes=processes)
+
+
+def itemsdir_files(itemsdir):
+    """
+    Return the names of the item definition files in a directory, in the order they are parsed
+
+    :param itemsdir: Name of folder containing the configuration files
+    :type itemsdir: str
+
+    :return: sorted list of filenames
+    :rtype: list
+    """
+    result = []
     for item_file in sorted(os.listdir(itemsdir)):
         if not item_file.startswith('.'):
             if item_file.endswith(CONF_FILE) or item_file.endswith(YAML_FILE):
                 if item_file == 'logic' + YAML_FILE and itemsdir.find(os.path.join('lib', 'env')) > -1:
                     logger.info(f"parse_itemsdir: skipping logic definition file = {itemsdir + item_file}")
                 else:
-                    try:
-                        item_conf = parse(itemsdir + item_file, item_conf, addfilenames, parseitems=True, struct_dict=struct_dict)
-                    except Exception as e:
-                        logger.exception(f"Problem reading {item_file}: {e}")
-                        continue
-    logger.info(f"parse_itemsdir: Finished parsing items directory {itemsdir}")
-    return item_conf
+                    result.append(item_file)
+    return result
+
+
+# --------------------------------------------------------------------------------------
+# Cache for the parsed item configuration (item tree with resolved structs)
+
+ITEMS_CACHE_FORMAT = 1
+
+
+def items_cache_key(itemsdirs, struct_dict, settings=None):
+    """
+    Build the key, that identifies a parsed item configuration
+
+    The key changes, if an item definition file is added, removed or changed (mtime or size), if a
+    struct definition (from ../etc, ../structs or the metadata of a plugin) changes, or if one of the
+    settings that influence parsing changes.
+
+    :param itemsdirs: list of tuples (itemsdir, addfilenames) in the order the directories are parsed
+    :param struct_dict: dict with all defined structs (from /etc/structs.yaml and from loaded plugins)
+    :param settings: Optional dict with settings that influence parsing (e.g. version, struct handling)
+    :type itemsdirs: list
+    :type struct_dict: dict
+    :type settings: dict
+
+    :return: key (sha256 hex digest)
+    :rtype: str
+    """
+    key = hashlib.sha256()
+    key.update(f"format={ITEMS_CACHE_FORMAT}, python={sys.version}, settings={sorted((settings or {}).items())}".encode())
+    for itemsdir, addfilenames in itemsdirs:
+        key.update(f"\ndir={itemsdir}, addfilenames={addfilenames}".encode())
+        for item_file in itemsdir_files(itemsdir):
+            stat = os.stat(itemsdir + item_file)
+            key.update(f"\n{item_file}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    # repr() instead of pickle, because pickle output depends on which equal strings are the same object
+    key.update(f"\nstructs={struct_dict!r}".encode())
+    return key.hexdigest()
+
+
+def load_items_cache(filename, key):
+    """
+    Load the parsed item configuration from the cache file
+
+    :param filename: Name of the cache file
+    :param key: key of the current configuration (from items_cache_key())
+    :type filename: str
+    :type key: str
+
+    :return: tuple (item_conf, reason): item_conf is None, if the cache could not be used. reason tells why
+    :rtype: tuple
+    """
+    try:
+        with open(filename, 'rb') as f:
+            cache = pickle.load(f)
+    except FileNotFoundError:
+        return None, 'no cache file'
+    except Exception as e:
+        return None, f"cache file unreadable: {e}"
+    if not isinstance(cache, dict) or cache.get('key') != key:
+        return None, 'configuration changed'
+    return cache.get('item_conf'), ''
+
+
+def save_items_cache(filename, key, item_conf):
+    """
+    Write the parsed item configuration to the cache file
+
+    :param filename: Name of the cache file
+    :param key: key of the configuration (from items_cache_key())
+    :param item_conf: parsed item configuration
+    :type filename: str
+    :type key: str
+    :type item_conf: OrderedDict
+
+    :return: True, if the cache file has been written
+    :rtype: bool
+    """
+    tmp_filename = filename + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(tmp_filename, 'wb') as f:
+            pickle.dump({'key': key, 'item_conf': item_conf}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, filename)
+    except Exception as e:
+        logger.warning(f"Could not write item configuration cache {filename}: {e}")
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
+        return False
+    return True
 
 
 def parse(filename, config=None, addfilenames=False, parseitems=False, struct_dict={}):
@@ -487,12 +620,89 @@ def set_attr_for_subtree(subtree, attr, value, indent=0):
     for k, v in subtree.items():
         if isinstance(v, dict):
             v[attr] = value
-            spc = " " * 2 * indent
-            logger.debug(f"set_attr_for_subtree:{spc} node: {k} => {v}")
+            if logger.isEnabledFor(logging.DEBUG):
+                spc = " " * 2 * indent
+                logger.debug(f"set_attr_for_subtree:{spc} node: {k} => {v}")
             set_attr_for_subtree(v, attr, value, indent + 1)
     return
 
 
+# Cache for the expanded struct templates used by add_struct_to_item_template()
+#   key:   (struct_name, instance, strip_name)
+#   value: (struct definition, template without instance, template with instance)
+_struct_templates = {}
+
+
+def clear_struct_templates():
+    """
+    Clear the cache of expanded struct templates (after the item tree has been loaded)
+    """
+    _struct_templates.clear()
+
+
+def copy_tree(node):
+    """
+    Copy a (configuration) tree of dicts and lists
+
+    Faster than copy.deepcopy(), the leaves of the tree (strings, numbers, ...) are immutable
+    and are not copied.
+
+    :param node: tree to copy
+    :return: copy of the tree
+    """
+    if isinstance(node, dict):
+        new_node = node.__class__()
+        for key, value in node.items():
+            if isinstance(value, (dict, list)):
+                value = copy_tree(value)
+            new_node[key] = value
+        return new_node
+    if isinstance(node, list):
+        return [copy_tree(value) if isinstance(value, (dict, list)) else value for value in node]
+    return node
+
+
+def get_struct_template(struct_name, struct, instance, strip_name):
+    """
+    Return the expanded template for a struct
+
+    The struct is prepared once for every instance and cached: The attributes for internal
+    use are removed, the name is stripped (if configured), '_struct_name' is set for all items
+    and the values are normalized the way merge() does it. The template with instance has
+    '@instance' in attribute names replaced by the instance.
+
+    The returned trees are shared, they have to be copied (copy_tree) before they are changed.
+
+    :param struct_name: Name of the struct
+    :param struct: struct definition from struct_dict
+    :param instance: instance for the items created by the struct ('' for no instance)
+    :param strip_name: remove the 'name' attribute from the struct
+
+    :return: template without instance replacement, template with instance replacement
+    :rtype: tuple
+    """
+    key = (struct_name, instance, strip_name)
+    cached = _struct_templates.get(key)
+    if cached is not None and cached[0] is struct:
+        return cached[1], cached[2]
+
+    tmp_struct = copy.deepcopy(struct)
+    if '__struct_is_optional' in tmp_struct:
+        del tmp_struct['__struct_is_optional']
+    if 'name' in tmp_struct and isinstance(struct["name"], str) and strip_name:
+        del tmp_struct['name']
+        logger.debug(f'removed "name" attribute from struct {struct_name}')
+    # remember the struct for the items created by it (used for the memory report of the item tree)
+    set_attr_for_subtree(tmp_struct, '_struct_name', sys.intern(struct_name))
+    # normalize the values like nested_put() does, when adding the struct to an empty subtree
+    template = merge(tmp_struct, collections.OrderedDict(), 'struct-tree', 'sub-tree')
+    instance_template = copy_tree(template)
+    replace_struct_instance('', instance_template, instance)
+
+    _struct_templates[key] = (struct, template, instance_template)
+    return template, instance_template
+
+
 def add_struct_to_item_template(path, struct_name, template, struct_dict, instance):
     """
     Add the referenced struct to the items_template subtree
@@ -505,7 +715,8 @@ def add_struct_to_item_template(path, struct_name, template, struct_dict, instan
 
     :return:
     """
-    logger.info(f"add_struct_to_item_template: path (parent)={path}, struct_name={struct_name}, template={dict(template)}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"add_struct_to_item_template: path (parent)={path}, struct_name={struct_name}, template={dict(template)}")
     struct = struct_dict.get(struct_name, None)
     if struct is None:
         # no struct/template with this name
@@ -516,28 +727,30 @@ def add_struct_to_item_template(path, struct_name, template, struct_dict, instan
         logger.error(f"add_struct_to_item_template: Struct definition for '{struct_name}' not found (referenced in item {path})")
     else:
         # add struct/template to temporary item(template) tree
-        #logger.debug("- add_struct_to_item_template: struct_dict = {}".format(dict(struct_dict)))
-        #logger.debug("- add_struct_to_item_template: struct '{}' to item '{}'".format(struct_name, path))
-        tmp_struct = copy.deepcopy(struct)
-        if '__struct_is_optional' in tmp_struct:
-            del tmp_struct['__struct_is_optional']
-        if 'name' in tmp_struct and isinstance(struct["name"], str):
+        strip_name = False
+        if 'name' in struct and isinstance(struct["name"], str):
             from lib.smarthome import SmartHome
             _sh = SmartHome.get_instance()
-            if Utils.to_bool(getattr(_sh, '_struct_strip_name', False)):
-                del tmp_struct['name']
-                logger.debug(f'removed "name" attribute from struct {struct_name}')
-        nested_put(template, path, tmp_struct)
+            strip_name = Utils.to_bool(getattr(_sh, '_struct_strip_name', False))
+        struct_template, instance_template = get_struct_template(struct_name, struct, instance, strip_name)
 
-        if instance != '' or True:
+        if nested_get(template, path) is None:
+            # first struct for this item: the expanded template (with instance) only has to be copied
+            nested_put(template, path, collections.OrderedDict())
+            subtree = nested_get(template, path)
+            subtree.update(copy_tree(instance_template))
+        else:
+            # further struct for this item: merge it with the structs added before
+            nested_put(template, path, copy_tree(struct_template))
             # add instance to items added by template struct
             subtree = nested_get(template, path)
-            # logger.info(f"add_struct_to_item_template: Adding 'instance: {instance}' to template for subtree '{path}'")
             # add instance name to attributes which carry '@instance'
-            logger.debug(f"- add_struct_to_item_template: Add instance={instance} to subtree={subtree}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"- add_struct_to_item_template: Add instance={instance} to subtree={subtree}")
             replace_struct_instance(path, subtree, instance)
 
-    logger.info(f"- add_struct_to_item_template: - after add - template={dict(template)}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"- add_struct_to_item_template: - after add - template={dict(template)}")
     return
 
 
@@ -32,6 +32,7 @@ visu_websocket
 
 """
 import logging
+import re
 import socket
 import collections
 import threading
@@ -45,6 +46,7 @@ logger = logging.getLogger(__name__)
 # =====================================================================================
 
 import lib.utils
+import lib.connectionstatistics
 import sys
 
 dep_id_list = []
@@ -190,10 +192,16 @@ class Connections(Base):
     Additionally the filenumber is used for either epoll or kqueue depending
     on the environment found for select.
     A filenumber of value -1 is an error value.
+
+    poll() blocks until a connection has an event, the wakeup socket is written
+    (wakeup(), e.g. on shutdown) or _poll_timeout has passed. A connection is only
+    watched for writability, while data is waiting in its outbuffer: trigger()
+    sets the write interest, it is removed when the outbuffer has been sent.
     """
 
     _connections = {}
     _servers = {}
+    _poll_timeout = 10      # maximum time poll() blocks (in seconds)
     if hasattr(select, 'epoll'):
         _ro = select.EPOLLIN | select.EPOLLHUP | select.EPOLLERR
         _rw = _ro | select.EPOLLOUT
@@ -202,14 +210,20 @@ class Connections(Base):
         Base.__init__(self)
         Base._poller = self
         _deprecated_warning('', 'class Connections')
+        self._wakeup_in, self._wakeup_out = socket.socketpair()
+        self._wakeup_in.setblocking(False)
+        self._wakeup_out.setblocking(False)
         if hasattr(select, 'epoll'):
             self._epoll = select.epoll()
+            self._epoll.register(self._wakeup_in.fileno(), select.EPOLLIN)
         elif hasattr(select, 'kqueue'):
             self._kqueue = select.kqueue()
+            self._kqueue.control([select.kevent(self._wakeup_in.fileno(), filter=select.KQ_FILTER_READ, flags=select.KQ_EV_ADD)], 0, 0)
         else:
             logger.debug("Init connections using IOWait")
             self._connections_found = 0
             self._waitobj = IOWait()
+            self._waitobj.watch(self._wakeup_in.fileno(), read=True)
 
     def register_server(self, fileno, obj):
         if fileno == -1:
@@ -282,135 +296,106 @@ class Connections(Base):
                 obj.connect()
 
     def trigger(self, fileno):
+        """
+        Watch a connection for writability, because data is waiting in its outbuffer
+
+        :param fileno: file number of the connection
+        """
         if fileno == -1:
             logger.error("tried to trigger a connection with filenumber == -1")
             return
-        if self._connections[fileno].outbuffer:
+        con = self._connections.get(fileno)
+        if con is not None and con.outbuffer:
+            self._set_write_interest(fileno, True)
+            if not hasattr(select, 'epoll') and not hasattr(select, 'kqueue'):
+                # a blocking IOWait.wait() does not see the changed watch
+                self.wakeup()
+
+    def _set_write_interest(self, fileno, write):
+        try:
             if hasattr(select, 'epoll'):
-                self._epoll.modify(fileno, self._rw)
+                self._epoll.modify(fileno, self._rw if write else self._ro)
             elif hasattr(select, 'kqueue'):
-                event = [
-                    select.kevent(fileno,
-                           filter=select.KQ_FILTER_WRITE,
-                           flags=select.KQ_EV_ADD | KQ_EV_ONESHOT)
-                ]
-                self._kqueue.control(event, 0, 0)
+                if write:
+                    event = [
+                        select.kevent(fileno,
+                               filter=select.KQ_FILTER_WRITE,
+                               flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT)
+                    ]
+                    self._kqueue.control(event, 0, 0)
             else:
-                logger.error("trigger: Operating System without epoll or kqueue is currently not supported, please report this error")
+                self._waitobj.watch(fileno, read=True, write=write)
+        except (OSError, ValueError) as e:
+            # the socket has been closed in between
+            logger.debug("setting the write interest of fileno {} failed: {}".format(fileno, e))
 
-    def poll(self):
-        time.sleep(0.0000000001)  # give epoll.modify a chance
-        if not self._connections:
-            time.sleep(1)
+    def wakeup(self):
+        """
+        Wake up a blocking poll() (e.g. on shutdown)
+        """
+        try:
+            self._wakeup_out.send(b'\0')
+        except OSError:
+            pass    # the wakeup socket is full, poll() is woken up anyway
+
+    def _clear_wakeup(self):
+        try:
+            while self._wakeup_in.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _handle_event(self, fileno, read, write, hangup):
+        """
+        Handle an event reported by epoll, kqueue or IOWait
+        """
+        if fileno == self._wakeup_in.fileno():
+            self._clear_wakeup()
+            return
+        if fileno in self._servers:
+            self._servers[fileno].handle_connection()
+            return
+        con = self._connections.get(fileno)
+        if con is None:
+            return
+        try:
+            if read:
+                con._in()
+            if write and con.connected:
+                con._out()
+                if not con.outbuffer and fileno in self._connections:
+                    self._set_write_interest(fileno, False)
+                    # Stream.send() of another thread may have filled the outbuffer and called trigger() in between
+                    if con.outbuffer:
+                        self._set_write_interest(fileno, True)
+        except Exception as e:  # noqa
+            con.close()
             return
+        if hangup and con.connected:
+            con.close()
+
+    def poll(self):
+        """
+        Wait for events of the connections and handle them
 
+        Blocks for up to _poll_timeout seconds, if there are no events.
+        """
         if -1 in self._connections:
             logger.error("fileno -1 was found, please report to SmartHomeNG team")
             del( self._connections[-1])
 
-        if hasattr(select, 'epoll') or hasattr(select, 'kqueue'):
-            for fileno in self._connections:
-            # Fix for: "RuntimeError: dictionary changed size during iteration"
-            #connections_keys = self._connections.keys()
-            #for fileno in connections_keys:
-                if fileno not in self._servers:
-                    if hasattr(select, 'epoll'):
-                        if self._connections[fileno].outbuffer:
-                            try:
-                                self._epoll.modify(fileno, self._rw)
-                            except OSError as e:
-                                # as with python 3.6 an OSError will be raised when a socket is already closed like with a settimeout
-                                # the socket will need to be recreated then
-                                logger.error("OSError {} for epoll.modify(RW) with fileno {} for object {}, please report to SmartHomeNG team".format(e, fileno, self._connections[fileno]))
-                                # here we could try to get rid of the connection that causes the headache
-                            except PermissionError as e:
-                                logger.error("PermissionError {} for epoll.modify(RW) with fileno {} for object {}, please report to SmartHomeNG team".format(e, fileno, self._connections[fileno]))
-                                # here we could try to get rid of the connection that causes the headache
-                            except FileNotFoundError as e:
-                                logger.error("FileNotFoundError {} for epoll.modify(RW) with fileno {} for object {}, please report to SmartHomeNG team".format(e, fileno, self._connections[fileno]))
-                                # here we could try to get rid of the connection that causes the headache
-                        else:
-                            try:
-                                self._epoll.modify(fileno, self._ro)
-                            except OSError as e:
-                                # as with python 3.6 an OSError will be raised when a socket is already closed like with a settimeout
-                                # the socket will need to be recreated then
-                                logger.error("OSError {} for epoll.modify(RO) with fileno {} for object {}, please report to SmartHomeNG team".format(e, fileno, self._connections[fileno]))
-                                # here we could try to get rid of the connection that causes the headache
-                            except PermissionError as e:
-                                logger.error("PermissionError {} for epoll.modify(RO) with fileno {} for object {}, please report to SmartHomeNG team".format(e, fileno, self._connections[fileno]))
-                                # here we could try to get rid of the connection that causes the headache
-                            except FileNotFoundError as e:
-                                logger.error("FileNotFoundError {} for epoll.modify(RO) with fileno {} for object {}, please report to SmartHomeNG team".format(e, fileno, self._connections[fileno]))
-                                # here we could try to get rid of the connection that causes the headache
-
-                    elif hasattr(select, 'kqueue'):
-                        event = []
-                        if self._connections[fileno].outbuffer:
-                            event.append(select.kevent(fileno,
-                                                filter=select.KQ_FILTER_WRITE,
-                                                flags=select.KQ_EV_ADD | KQ_EV_ONESHOT))
-                        else:
-                            event.append(select.kevent(fileno,
-                                                filter=select.KQ_FILTER_READ,
-                                                flags=select.KQ_EV_ADD))
-                        self._kqueue.control(event, 0, 0)
-
-            if hasattr(select, 'epoll'):
-                for fileno, event in self._epoll.poll(timeout=1):
-                    if fileno in self._servers:
-                        server = self._servers[fileno]
-                        server.handle_connection()
-                    else:
-                        if event & select.EPOLLIN:
-                            try:
-                                con = self._connections[fileno]
-                                con._in()
-                            except Exception as e:
-                                con.close()
-                                continue
-                            if event & select.EPOLLOUT:
-                                try:
-                                    con = self._connections[fileno]
-                                    con._out()
-                                except Exception as e:
-                                    con.close()
-                                    continue
-                            if event & (select.EPOLLHUP | select.EPOLLERR):
-                                try:
-                                    con = self._connections[fileno]
-                                    con.close()
-                                    continue
-                                except:
-                                    pass
-            elif hasattr(select, 'kqueue'):
-                for event in self._kqueue.control(None, 1):
-                    fileno = event.ident
-                    if fileno in self._servers:
-                        server = self._servers[fileno]
-                        server.handle_connection()
-                    else:
-                        if event.filter == select.KQ_FILTER_READ:
-                            try:
-                                con = self._connections[fileno]
-                                con._in()
-                            except Exception as e:  # noqa
-                                con.close()
-                                continue
-                            if event.filter == select.KQ_FILTER_WRITE:
-                                try:
-                                    con = self._connections[fileno]
-                                    con._out()
-                                except Exception as e:  # noqa
-                                    con.close()
-                                    continue
-                            if event.flags & select.KQ_EV_EOF:
-                                try:
-                                    con = self._connections[fileno]
-                                    con.close()
-                                    continue
-                                except:
-                                    pass
+        if hasattr(select, 'epoll'):
+            for fileno, event in self._epoll.poll(timeout=self._poll_timeout):
+                self._handle_event(fileno, event & select.EPOLLIN, event & select.EPOLLOUT, event & (select.EPOLLHUP | select.EPOLLERR))
+        elif hasattr(select, 'kqueue'):
+            for event in self._kqueue.control(None, 16, self._poll_timeout):
+                fileno = event.ident
+                write = event.filter == select.KQ_FILTER_WRITE
+                self._handle_event(fileno, not write, write, event.flags & select.KQ_EV_EOF)
+                con = self._connections.get(fileno)
+                if write and con is not None and con.outbuffer:
+                    # the write filter is a one-shot filter
+                    self._set_write_interest(fileno, True)
         else:
             # not using  epoll or kqueue
             n_connections = len(self._connections)
@@ -418,47 +403,23 @@ class Connections(Base):
                 logger.debug("lib/connection.py poll() for len(self._connections)={}".format(n_connections))
                 self._connections_found = n_connections
 
-            watched = self._waitobj.get_watched()
-            nwatched = len(watched)
-            logger.debug("iowait in alpha status with {} watched connections".format(nwatched))
-            events = self._waitobj.wait()
-            nevents = len(events)
-            logger.debug("iowait reports {} events".format(nevents))
-            for fileno, read, write in events:
-                logger.debug("event for fileno={}, read={}, write={}".format(fileno, read, write))
-                if fileno in self._servers:
-                    server = self._servers[fileno]
-                    server.handle_connection()
-                else:
-                    logger.debug("fileno {} not in self._servers".format(fileno))
-                    if read:
-                        try:
-                            con = self._connections[fileno]
-                            con._in()
-                        except Exception as e:  # noqa
-                            con.close()
-                            continue
-                        if write:
-                            try:
-                                con = self._connections[fileno]
-                                con._out()
-                            except Exception as e:  # noqa
-                                con.close()
-                                continue
-
+            events = self._waitobj.wait(self._poll_timeout)
+            for fileobj, read, write in events:
+                self._handle_event(fileobj, read, write, False)
 
     def close(self):
         if -1 in self._connections:
             logger.error("Connections.close() tried to close a filenumber == -1")
 
         try:
-            for fileno in self._connections:
+            for fileno in list(self._connections):
                 try:
                     self._connections[fileno].close()
                 except:
                     pass
         except:
             pass
+        self.wakeup()
 
 
 class Server(Base):
@@ -523,6 +484,21 @@ class Server(Base):
 
 
 class Stream(Base):
+    """
+    Stream connection, that splits the received data into frames
+
+    A frame ends with the terminator (bytes), has a fixed length (terminator is an int) or, if no
+    terminator is set, is a balanced block of brackets (see balance()).
+
+    The received data is kept in a single bytearray (inbuffer), frames are consumed by moving a read
+    offset. The consumed data is removed once per receive, and the search for a terminator or for
+    the end of a balanced block resumes where the last search stopped.
+
+    found_terminator() and found_balance() get a copy of the frame as a bytearray. If frame_views is
+    True, they get a memoryview into the inbuffer instead, which is only valid during the call.
+    """
+
+    frame_views = False
 
     def __init__(self, sock=None, address=None, monitor=False):
         Base.__init__(self, monitor=monitor)
@@ -536,7 +512,14 @@ class Stream(Base):
         self.terminator = b'\r\n'
         self._balance_open = False
         self._balance_close = False
+        self._balance_pattern = None
         self._close_after_send = False
+        self._recv_buffer = bytearray(self._frame_size_in)
+        self._in_offset = 0         # start of the unconsumed data in inbuffer
+        self._scan_pos = 0          # position, where the search for the end of the next frame resumes
+        self._scan_terminator = None
+        self._balance_depth = 0
+        self._statistics = lib.connectionstatistics.register('lib.connection', self._name)
         if sock is not None:
             self.socket = sock
             self._connected()
@@ -544,62 +527,109 @@ class Stream(Base):
     def _connected(self):
             self._poller.register_connection(self.socket.fileno(), self)
             self.connected = True
+            self._statistics.name = self.address or self._name
+            self._statistics.connected()
             self.handle_connect()
 
     def _in(self):
-        max_size = self._frame_size_in
+        if len(self._recv_buffer) != self._frame_size_in:
+            self._recv_buffer = bytearray(self._frame_size_in)
         try:
-            data = self.socket.recv(max_size)
+            size = self.socket.recv_into(self._recv_buffer)
         except Exception as e:  # noqa
             self.close()
             return
-        if data == b'':
+        if size == 0:
             self.close()
             return
-        self.inbuffer.extend(data)
+        with memoryview(self._recv_buffer) as view:
+            self.inbuffer += view[:size]
+        frames = self._process_input()
+        self._statistics.received(size, frames)
+
+    def _process_input(self):
+        """
+        Hand all complete frames of the inbuffer to found_terminator() / found_balance()
+
+        :return: number of frames
+        """
+        frames = 0
         while True:
             terminator = self.terminator
-            buffer_len = len(self.inbuffer)
+            start = self._in_offset
             if not terminator:
                 if not self._balance_open:
                     break
-                index = self._is_balanced()
-                if index:
-                    data = self.inbuffer[:index]
-                    self.inbuffer = self.inbuffer[index:]
-                    self.found_balance(data)
-                else:
+                end = self._is_balanced()
+                if not end:
                     break
+                self._consume(end, end, self.found_balance)
+                frames += 1
             elif isinstance(terminator, int):
-                if buffer_len < terminator:
+                end = start + terminator
+                if len(self.inbuffer) < end:
                     break
-                else:
-                    data = self.inbuffer[:terminator]
-                    self.inbuffer = self.inbuffer[terminator:]
-                    self.terminator = 0
-                    self.found_terminator(data)
+                self.terminator = 0
+                self._consume(end, end, self.found_terminator)
+                frames += 1
             else:
-                if terminator not in self.inbuffer:
+                if self._scan_terminator != terminator:
+                    self._scan_terminator = terminator
+                    self._scan_pos = start
+                index = self.inbuffer.find(terminator, max(self._scan_pos, start))
+                if index < 0:
+                    # the terminator may begin in the last bytes of the buffer
+                    self._scan_pos = max(len(self.inbuffer) - len(terminator) + 1, start)
                     break
-                index = self.inbuffer.find(terminator)
-                data = self.inbuffer[:index]
-                cut = index + len(terminator)
-                self.inbuffer = self.inbuffer[cut:]
-                self.found_terminator(data)
+                self._consume(index, index + len(terminator), self.found_terminator)
+                frames += 1
+        if self._in_offset:
+            del self.inbuffer[:self._in_offset]
+            self._scan_pos = max(self._scan_pos - self._in_offset, 0)
+            self._in_offset = 0
+        return frames
+
+    def _consume(self, end, cut, callback):
+        """
+        Hand the frame inbuffer[offset:end] to the callback and move the read offset to cut
+        """
+        start = self._in_offset
+        self._in_offset = cut
+        self._scan_pos = cut
+        self._balance_depth = 0
+        if self.frame_views:
+            frame = memoryview(self.inbuffer)[start:end]
+            try:
+                callback(frame)
+            finally:
+                frame.release()
+        else:
+            callback(self.inbuffer[start:end])
 
     def _is_balanced(self):
-        stack = []
-        for index, char in enumerate(self.inbuffer):
-            if char == self._balance_open:
-                stack.append(char)
-            elif char == self._balance_close:
-                stack.append(char)
-                if stack.count(self._balance_open) < stack.count(self._balance_close):
-                    logger.warning("{}: unbalanced input!".format(self._name))
-                    logger.close()
-                    return False
-                if stack.count(self._balance_open) == stack.count(self._balance_close):
-                    return index + 1
+        """
+        Search the end of the balanced block of brackets at the read offset
+
+        The search resumes where the last search stopped, the nesting depth is kept in between.
+
+        :return: end of the balanced block (index after the closing bracket) or False
+        """
+        pos = max(self._scan_pos, self._in_offset)
+        depth = self._balance_depth
+        for match in self._balance_pattern.finditer(self.inbuffer, pos):
+            if match.group()[0] == self._balance_open:
+                depth += 1
+                continue
+            depth -= 1
+            if depth < 0:
+                logger.warning("{}: unbalanced input!".format(self._name))
+                self.close()
+                self.discard_buffers()
+                return False
+            if depth == 0:
+                return match.end()
+        self._scan_pos = len(self.inbuffer)
+        self._balance_depth = depth
         return False
 
     def _out(self):
@@ -632,11 +662,15 @@ class Stream(Base):
     def balance(self, bopen, bclose):
         self._balance_open = ord(bopen)
         self._balance_close = ord(bclose)
+        self._balance_pattern = re.compile(b'[' + re.escape(bytes([self._balance_open, self._balance_close])) + b']')
+        self._scan_pos = self._in_offset
+        self._balance_depth = 0
 
     def close(self):
         if self.connected:
             logger.debug("{}: closing socket {}".format(self._name, self.address))
             self.connected = False
+            self._statistics.disconnected()
             try:
                 self._poller.unregister_connection(self.socket.fileno())
             except:
@@ -660,6 +694,9 @@ class Stream(Base):
 
     def discard_buffers(self):
         self.inbuffer = bytearray()
+        self._in_offset = 0
+        self._scan_pos = 0
+        self._balance_depth = 0
         self.outbuffer.clear()
 
     def found_terminator(self, data):
@@ -678,6 +715,7 @@ class Stream(Base):
         self._close_after_send = close
         if not self.connected:
             return False
+        self._statistics.sent(len(data))
         frame_size = self._frame_size_out
         if len(data) > frame_size:
             for i in range(0, len(data), frame_size):
@@ -685,6 +723,9 @@ class Stream(Base):
         else:
             self.outbuffer.appendleft(data)
         self._out()
+        if self.outbuffer and self.connected:
+            # the rest is sent, when the socket is writable again
+            self._poller.trigger(self.socket.fileno())
         return True
 
 
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+
+"""
+This library records traffic statistics of network and serial connections.
+
+Every connection of lib.network (Tcp_client, the clients of a Tcp_server, Udp_server), of
+lib.connection (Stream) and of the SmartDevicePlugin (SDPConnection) registers a
+ConnectionStatistics object. The connection counts the bytes and messages received and sent,
+connects and disconnects, and records the time of the last receive. Connections with a send
+queue (Tcp_client in send queue mode) report the depth of the queue. Connections with a
+request/response pairing (e.g. SDPConnectionNetTcpRequest) record the latency from sending a
+request to receiving its reply.
+
+The registry keeps weak references, the statistics of a connection disappear with the connection
+object. All statistics can be read with ``get_all_statistics()`` (e.g. through the admin API).
+
+:Warning: This library is part of the core of SmartHomeNG. It **should not be called directly** from plugins!
+"""
+
+import threading
+import time
+import weakref
+from datetime import datetime
+
+
+_registry = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+class ConnectionStatistics:
+    """
+    Traffic statistics of a connection
+
+    :param kind: kind of the connection (e.g. 'Tcp_client')
+    :param name: name of the connection (e.g. '(knx_192.168.1.10:6720)')
+    """
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self._lock = threading.Lock()
+        self._since = datetime.now()
+        self._connected = False
+        self._connects = 0
+        self._disconnects = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._messages_in = 0
+        self._messages_out = 0
+        self._last_receive = None       # time.time() of the last receive
+        self._last_send = None
+        self._latency_count = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latency_last = None
+        self._queue_messages = 0
+        self._queue_bytes = 0
+        self._queue_bytes_max = 0
+
+    def connected(self):
+        """
+        Record, that the connection has been established
+        """
+        with self._lock:
+            if not self._connected:
+                self._connected = True
+                self._connects += 1
+
+    def disconnected(self):
+        """
+        Record, that the connection has been closed or lost
+        """
+        with self._lock:
+            if self._connected:
+                self._connected = False
+                self._disconnects += 1
+
+    def received(self, size, messages=1):
+        """
+        Record received data
+
+        :param size: number of bytes received
+        :param messages: number of messages (frames, lines, datagrams) received
+        """
+        with self._lock:
+            self._bytes_in += size
+            self._messages_in += messages
+            self._last_receive = time.time()
+
+    def sent(self, size, messages=1):
+        """
+        Record sent data
+
+        :param size: number of bytes sent
+        :param messages: number of messages sent
+        """
+        with self._lock:
+            self._bytes_out += size
+            self._messages_out += messages
+            self._last_send = time.time()
+
+    def queued(self, messages, size):
+        """
+        Record the depth of the send queue
+
+        :param messages: number of messages in the send queue
+        :param size: number of bytes in the send queue
+        """
+        with self._lock:
+            self._queue_messages = messages
+            self._queue_bytes = size
+            if size > self._queue_bytes_max:
+                self._queue_bytes_max = size
+
+    def record_latency(self, latency):
+        """
+        Record the time from sending a request to receiving its reply
+
+        :param latency: latency in seconds
+        """
+        with self._lock:
+            self._latency_count += 1
+            self._latency_total += latency
+            self._latency_last = latency
+            if latency > self._latency_max:
+                self._latency_max = latency
+
+    def get_statistics(self):
+        """
+        Returns the statistics (serializable to json)
+
+        :rtype: dict
+        """
+        now = time.time()
+        with self._lock:
+            count = self._latency_count
+            return {
+                'kind': self.kind,
+                'name': self.name,
+                'since': self._since.isoformat(),
+                'connected': self._connected,
+                'connects': self._connects,
+                'reconnects': max(self._connects - 1, 0),
+                'disconnects': self._disconnects,
+                'bytes_in': self._bytes_in,
+                'bytes_out': self._bytes_out,
+                'messages_in': self._messages_in,
+                'messages_out': self._messages_out,
+                'since_last_receive': round(now - self._last_receive, 3) if self._last_receive is not None else None,
+                'since_last_send': round(now - self._last_send, 3) if self._last_send is not None else None,
+                'latency_last': round(self._latency_last, 6) if self._latency_last is not None else None,
+                'latency_avg': round(self._latency_total / count, 6) if count else None,
+                'latency_max': round(self._latency_max, 6),
+                'queue_messages': self._queue_messages,
+                'queue_bytes': self._queue_bytes,
+                'queue_bytes_max': self._queue_bytes_max,
+            }
+
+
+def register(kind, name):
+    """
+    Create the statistics of a connection and add them to the registry
+
+    The registry only keeps a weak reference, the connection has to keep the returned object.
+
+    :param kind: kind of the connection (e.g. 'Tcp_client')
+    :param name: name of the connection
+
+    :rtype: ConnectionStatistics
+    """
+    statistics = ConnectionStatistics(kind, name)
+    with _registry_lock:
+        _registry.add(statistics)
+    return statistics
+
+
+def get_all_statistics(kind=None):
+    """
+    Returns the statistics of all registered connections (serializable to json)
+
+    :param kind: only return the connections of this kind
+
+    :return: list of statistics, sorted by kind and name
+    :rtype: list
+    """
+    with _registry_lock:
+        connections = list(_registry)
+    result = [statistics.get_statistics() for statistics in connections if kind is None or statistics.kind == kind]
+    return sorted(result, key=lambda s: (s['kind'], str(s['name'])))
+
+
+def data_size(data):
+    """
+    Returns the size of sent or received data (0 for objects without a length)
+    """
+    return len(data) if isinstance(data, (bytes, bytearray, memoryview, str)) else 0
+
+
+def get_totals():
+    """
+    Returns the number of registered connections and the sum of their traffic
+
+    :rtype: dict
+    """
+    totals = {'connections': 0, 'connected': 0, 'bytes_in': 0, 'bytes_out': 0, 'messages_in': 0, 'messages_out': 0}
+    for statistics in get_all_statistics():
+        totals['connections'] += 1
+        totals['connected'] += statistics['connected']
+        for key in ('bytes_in', 'bytes_out', 'messages_in', 'messages_out'):
+            totals[key] += statistics[key]
+    return totals
@@ -5,11 +5,15 @@
 import os
 import sys
 import shutil
-import ephem
+import importlib.metadata
 import psutil
+import lib.logicstatistics
+import lib.asyncloop
+import lib.connectionstatistics
 
 if sh.env.system.libs.ephem_version is not None:
-    sh.env.system.libs.ephem_version(ephem.__version__, logic.lname)
+    # read the version from the package metadata, ephem itself is only imported for calculations
+    sh.env.system.libs.ephem_version(importlib.metadata.version('ephem'), logic.lname)
 
 
 # lib/env/statistic.py
@@ -29,6 +33,16 @@ sh.env.core.threads(threading.activeCount(), logic.lname)
 sh.env.core.scheduler.worker_threads(sh.scheduler.get_worker_count(), logic.lname)
 sh.env.core.scheduler.idle_threads(sh.scheduler.get_idle_worker_count(), logic.lname)
 sh.env.core.scheduler.worker_names(sh.scheduler.get_worker_names(), logic.lname)
+sh.env.core.scheduler.logic_coroutines(sh.scheduler.get_logic_coroutine_count(), logic.lname)
+
+# maximum lag of the core event loop since the last run (in ms)
+core_loop = lib.asyncloop.get_core_loop()
+if core_loop.is_running():
+    sh.env.core.eventloop_lag(round(core_loop.get_lag() * 1000, 1), logic.lname)
+
+# traffic statistics of the connections (optional)
+if sh._connection_statistics_items:
+    sh.env.core.connections({s['kind'] + ' ' + str(s['name']): s for s in lib.connectionstatistics.get_all_statistics()}, logic.lname)
 
 # Memory
 p = psutil.Process(os.getpid())
@@ -67,4 +81,5 @@ if sys.version_info > (3, 3):
 if sh.moon:
     sh.env.location.moonlight(sh.moon.light(), logic.lname)
 
-
+# Logic statistics (for logics with the attribute 'statistics_item')
+lib.logicstatistics.write_statistics_items(logics, items)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+"""
+--------------------------------------------------------------------------------------------
+---
+---  Differences between two item configurations (for reloading the item tree)
+---
+
+For every item of the loaded configuration a fingerprint of its own attributes (without the
+child items) is kept. A newly parsed configuration is compared against these fingerprints to
+find the items that have to be created, recreated or removed.
+
+An item is recreated, if its own attributes have changed. An unchanged item under a recreated
+parent is recreated as well, if one of its attributes references an attribute of a parent item
+(e.g. '..:name'), because these references are resolved when the item is created.
+"""
+
+import re
+
+
+# reference to an attribute of a parent item, e.g. '..:name' or 'Light {..:name}'
+_PARENT_REFERENCE = re.compile(r'(?:^|\{)\s*\.\.+:')
+
+
+def config_fingerprint(conf):
+    """
+    Returns the fingerprint of the own attributes of an item configuration (child items are ignored)
+
+    :param conf: configuration of an item
+    :type conf: dict
+
+    :rtype: int
+    """
+    return hash(repr([(attr, value) for attr, value in conf.items() if not isinstance(value, dict)]))
+
+
+def references_parent(conf):
+    """
+    Returns True, if an attribute of an item configuration references an attribute of a parent item
+
+    :param conf: configuration of an item
+    :type conf: dict
+
+    :rtype: bool
+    """
+    for value in conf.values():
+        if isinstance(value, str) and _PARENT_REFERENCE.search(value):
+            return True
+    return False
+
+
+def build_fingerprints(item_conf, prefix='', fingerprints=None):
+    """
+    Returns the fingerprints of all items of an item configuration
+
+    :param item_conf: item configuration (tree)
+    :param prefix: path prefix of the items in item_conf (e.g. 'living.')
+
+    :return: dict item path -> fingerprint
+    :rtype: dict
+    """
+    if fingerprints is None:
+        fingerprints = {}
+    for name, conf in item_conf.items():
+        if isinstance(conf, dict):
+            path = prefix + name
+            fingerprints[path] = config_fingerprint(conf)
+            build_fingerprints(conf, path + '.', fingerprints)
+    return fingerprints
+
+
+class ItemConfigDiff():
+    """
+    Changes between the loaded and a newly parsed item configuration
+
+    :param fingerprints: fingerprints of the loaded item configuration (from build_fingerprints())
+    :param item_conf: newly parsed item configuration
+    """
+
+    def __init__(self, fingerprints, item_conf):
+        self.changes = []           # (action, path) in the order of the tree, action is 'create' or 'replace'
+        self.removed = []           # paths of the removed items (only the topmost item of a removed branch)
+        self.fingerprints = {}      # fingerprints of the new configuration
+
+        self._compare(fingerprints, item_conf, '', False)
+
+        removed = set(fingerprints) - set(self.fingerprints)
+        self.removed = [path for path in fingerprints if path in removed and path.rpartition('.')[0] not in removed]
+
+    def _compare(self, fingerprints, item_conf, prefix, parent_replaced):
+        for name, conf in item_conf.items():
+            if not isinstance(conf, dict):
+                continue
+            path = prefix + name
+            if path not in fingerprints:
+                # new item: the item is created with all its children
+                self.changes.append(('create', path))
+                build_fingerprints({name: conf}, prefix, self.fingerprints)
+                continue
+            fingerprint = config_fingerprint(conf)
+            self.fingerprints[path] = fingerprint
+            replaced = fingerprint != fingerprints[path] or (parent_replaced and references_parent(conf))
+            if replaced:
+                self.changes.append(('replace', path))
+            self._compare(fingerprints, conf, path + '.', replaced)
+
+    @property
+    def created(self):
+        """
+        Paths of the new items (only the topmost item of a new branch)
+        """
+        return [path for action, path in self.changes if action == 'create']
+
+    @property
+    def replaced(self):
+        """
+        Paths of the items, that are recreated
+        """
+        return [path for action, path in self.changes if action == 'replace']
+
+    def __bool__(self):
+        return bool(self.changes or self.removed)
+
+
+def get_item_config(item_conf, path):
+    """
+    Returns the configuration of an item from an item configuration (tree)
+
+    :param item_conf: item configuration (tree)
+    :param path: path of the item
+
+    :return: configuration of the item or None
+    """
+    conf = item_conf
+    for name in path.split('.'):
+        conf = conf.get(name)
+        if not isinstance(conf, dict):
+            return None
+    return conf
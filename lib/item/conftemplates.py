@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+"""
+--------------------------------------------------------------------------------------------
+---
+---  Shared (copy-on-write) attribute dicts for item configurations
+---
+
+Items created from the same struct usually end up with identical plugin specific attributes
+(``Item.conf``). Instead of keeping a separate dict for each of these items, the items share
+one dict (a template). The first write to the configuration of an item gives that item its
+own copy.
+
+``Item.conf`` of an item sharing a template is an ItemConf mapping instead of a dict (API change
+for plugins): ``isinstance(item.conf, dict)`` is False and ``json.dumps()`` needs ``dict(item.conf)``.
+Configurations, that can not be shared, are kept as plain dicts.
+"""
+
+import sys
+import collections.abc
+
+
+class ItemConf(collections.abc.MutableMapping):
+    """
+    Plugin specific attributes of an item (``Item.conf``)
+
+    Behaves like a dict. As long as the configuration is shared with other items, the
+    underlying dict is copied before it is changed.
+    """
+
+    __slots__ = ('_data', '_shared')
+
+    def __init__(self, data=None, shared=False):
+        self._data = {} if data is None else data
+        self._shared = shared
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if self._shared:
+            self._unshare()
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        if self._shared:
+            self._unshare()
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __eq__(self, other):
+        if isinstance(other, ItemConf):
+            other = other._data
+        return self._data == other
+
+    def __repr__(self):
+        return repr(self._data)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def keys(self):
+        return self._data.keys()
+
+    def items(self):
+        return self._data.items()
+
+    def values(self):
+        return self._data.values()
+
+    def copy(self):
+        return dict(self._data)
+
+    __copy__ = copy
+
+    def __or__(self, other):
+        result = dict(self._data)
+        result.update(other)
+        return result
+
+    def __ror__(self, other):
+        result = dict(other)
+        result.update(self._data)
+        return result
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def _unshare(self):
+        self._data = dict(self._data)
+        self._shared = False
+
+    @property
+    def shared(self):
+        """
+        True, if the attribute dict is shared with other items
+        """
+        return self._shared
+
+
+# Only configurations with immutable values are shared, changes to a (mutable) value could
+# not be detected and would change the configuration of all items sharing the template
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
+
+class ConfTemplates:
+    """
+    Pool of the attribute dicts, that are shared by items
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._lookups = 0
+        self._hits = 0
+
+    def share(self, conf):
+        """
+        Returns a shared ItemConf for a dict of item attributes
+
+        Attribute names and string values are interned. If the pool already contains a dict with
+        the same content, the returned ItemConf uses that dict. A dict with mutable values is not
+        shared, it is returned as a dict with the interned names and values.
+
+        :param conf: dict with the plugin specific attributes of an item
+        :return: ItemConf instance or dict
+        """
+        if isinstance(conf, ItemConf):
+            return conf
+        data = {}
+        shareable = True
+        for key, value in conf.items():
+            if isinstance(value, str):
+                value = sys.intern(value)
+            elif not isinstance(value, _IMMUTABLE_TYPES):
+                shareable = False
+            data[sys.intern(key) if isinstance(key, str) else key] = value
+        if not shareable:
+            return data
+
+        # the type is part of the key, because 1 == 1.0 == True
+        key = tuple((k, type(v), v) for k, v in data.items())
+        self._lookups += 1
+        template = self._templates.get(key)
+        if template is None:
+            self._templates[key] = data
+            template = data
+        else:
+            self._hits += 1
+        return ItemConf(template, shared=True)
+
+    def clear(self):
+        self._templates = {}
+        self._lookups = 0
+        self._hits = 0
+
+    def get_statistics(self):
+        """
+        Returns the number of templates and how often an existing template was reused
+        """
+        return {'templates': len(self._templates), 'lookups': self._lookups, 'reused': self._hits}
+
+
+_templates = ConfTemplates()
+
+
+def share_conf(conf):
+    """
+    Returns a shared ItemConf (or a dict, if it can not be shared) for a dict of item attributes
+
+    :param conf: dict with the plugin specific attributes of an item
+    """
+    return _templates.share(conf)
+
+
+def get_conf_templates():
+    """
+    Returns the pool of shared attribute dicts
+    """
+    return _templates
@@ -24,6 +24,7 @@
 from __future__ import annotations
 from typing import Any
 
+import asyncio
 import logging
 import datetime
 import os
@@ -32,6 +33,7 @@ import json
 import threading
 import ast
 import re
+import sys
 
 import inspect
 
@@ -56,6 +58,8 @@ from lib.constants import (ITEM_DEFAULTS, FOO, KEY_ENFORCE_UPDATES, KEY_ENFORCE_
 from lib.utils import Utils
 
 from .property import Property
+from .logchange import LogChangeRules, write_log_change
+from .conftemplates import share_conf
 from .helpers import (  # noqa - cast_foo methods are accessed via globals()
     cast_str, cast_list, cast_dict, cast_foo, cast_bool, cast_scene, cast_num,
     split_duration_value_string, cache_read, cache_write, fadejob)
@@ -70,6 +74,12 @@ logger = logging.getLogger(__name__)
 items_count = 0
 
 
+def _resolve_waiter(future, value):
+    # called in the thread of the event loop of a coroutine waiting in Item.wait_for()
+    if not future.done():
+        future.set_result(value)
+
+
 #####################################################################
 # Item Class
 #####################################################################
@@ -297,10 +307,13 @@ class Item():
         self._log_mapping = {}
         self._log_rules = {}
         self._log_rules_cache = {}
+        self._log_rules_compiled = None
         self._log_text = None
         self._fading = False
         self._fadingdetails = {}
         self._items_to_trigger = []
+        self._waiters = []              # coroutines waiting for a value of the item: (loop, future, value)
+        self._update_routine = self.__update     # -> update routine selected by _select_update_routine()
         self.__last_change = self.shtime.now()
         self.__last_update = self.__last_change
         self.__last_trigger = self.__last_change
@@ -315,7 +328,7 @@ class Item():
         self._name = path
         self.__methods_to_trigger = []
         self.__parent = parent
-        self._path = path
+        self._path = sys.intern(path)
         self._sh = smarthome
         self._threshold = False
         self._threshold_data = [0, 0, False]
@@ -344,8 +357,10 @@ class Item():
         #  if 'item_change_log' is set in etc/smarthome.yaml, set loglevel for logging every item change to INFO (instead of DEBUG)
         if hasattr(smarthome, '_item_change_log'):
             self._change_logger = logger.info
+            self._change_log_level = logging.INFO
         else:
             self._change_logger = logger.debug
+            self._change_log_level = logging.DEBUG
 
         if not self._sh._ignore_item_collision:
             if self._path.split('.')[-1] in _items_instance._item_methods:
@@ -367,6 +382,7 @@ class Item():
                 ATTRIB_COMPAT_DEFAULT = ATTRIB_COMPAT_DEFAULT_FALLBACK
 
         self._filename = dict(config.items()).get('_filename', None)
+        self._struct_name = dict(config.items()).get('_struct_name', None)     # struct, the item was created from
 
         #############################################################
         # Item Attribute 'Type'
@@ -505,8 +521,8 @@ class Item():
                     pass
                 elif attr == KEY_INSTANCE:
                     pass
-                elif attr == '_filename':
-                    # name of file, which defines this item
+                elif attr in ['_filename', '_struct_name']:
+                    # name of file, which defines this item / name of struct, the item was created from
                     # setattr(self, attr, value)    # assignment moved to top (before for loop)
                     pass
                 else:
@@ -563,6 +579,8 @@ class Item():
             if hasattr(self.plugins, 'meta'):
                 self.conf[attr] = self.plugins.meta.check_itemattribute(self, attr.split('@')[0], self.conf[attr], self._filename)
 
+        # items with the same attributes (e.g. created from the same struct) share the attribute dict until it is changed
+        self.conf = share_conf(self.conf)
 
         self.property.init_dynamic_properties()
 
@@ -572,7 +590,7 @@ class Item():
         #############################################################
         for attr, value in config.items():
             if isinstance(value, dict):
-                child_path = self._path + '.' + attr
+                child_path = sys.intern(self._path + '.' + attr)
                 try:
                     child = Item(smarthome, self, child_path, value)
                 except Exception as e:
@@ -690,6 +708,96 @@ class Item():
 
         return True
 
+    # -----------------------------------------------------------------------------------------
+    #   Following methods are used by Items.reload_itemdefinitions() to change the item tree
+    # -----------------------------------------------------------------------------------------
+
+    def _unlink(self):
+        """
+        Remove the references to this item from the scheduler and from the items triggering it
+
+        Called before the item is removed from the item tree or replaced by a new item
+        """
+        if self._crontab is not None or self._cycle_time is not None:
+            self._sh.scheduler.remove(self._itemname_prefix + self._path)
+        for timer in ('-Timer', '-UpTimer', '-LoTimer'):
+            self._sh.scheduler.remove_timer(self._itemname_prefix + self._path + timer)
+
+        if self._trigger:
+            for trigger in self._trigger:
+                for item in _items_instance.match_items(trigger):
+                    if self in item._items_to_trigger:
+                        item._items_to_trigger.remove(self)
+        if self._hysteresis_input:
+            triggering_item = _items_instance.return_item(self._hysteresis_input)
+            if triggering_item is not None and self in triggering_item._hysteresis_items_to_trigger:
+                triggering_item._hysteresis_items_to_trigger.remove(self)
+
+    def _take_over(self, old, plugins=()):
+        """
+        Take over the state and the triggers of the item this item replaces
+
+        The value and its timestamps are only taken over, if the type of the item has not changed.
+        Method triggers of plugins are not taken over, the plugins bind the new item through parse_item().
+
+        :param old: item that is replaced by this item
+        :param plugins: list of the loaded plugins
+        """
+        if old._type == self._type:
+            self._value = old._value
+            self.__last_value = old.__last_value
+            self.__prev_value = old.__prev_value
+            self.__last_change = old.__last_change
+            self.__last_update = old.__last_update
+            self.__last_trigger = old.__last_trigger
+            self.__prev_change = old.__prev_change
+            self.__prev_update = old.__prev_update
+            self.__prev_trigger = old.__prev_trigger
+            self.__changed_by = old.__changed_by
+            self.__updated_by = old.__updated_by
+            self.__triggered_by = old.__triggered_by
+            self.__prev_change_by = old.__prev_change_by
+            self.__prev_update_by = old.__prev_update_by
+            self.__prev_trigger_by = old.__prev_trigger_by
+
+        for item in old._items_to_trigger:
+            if item not in self._items_to_trigger:
+                self._items_to_trigger.append(item)
+        self._waiters.extend(old._waiters)
+        for item in old._hysteresis_items_to_trigger:
+            if item not in self._hysteresis_items_to_trigger:
+                self._hysteresis_items_to_trigger.append(item)
+        for logic in old.__logics_to_trigger:
+            if logic not in self.__logics_to_trigger:
+                self.__logics_to_trigger.append(logic)
+        for method in old.__methods_to_trigger:
+            if getattr(method, '__self__', None) not in plugins and method not in self.__methods_to_trigger:
+                self.__methods_to_trigger.append(method)
+
+    def _add_child(self, name, child):
+        """
+        Add an existing item as a child of this item
+        """
+        vars(self)[name] = child
+        self.__children.append(child)
+        child.__parent = self
+
+    def _replace_child(self, name, old, new):
+        """
+        Replace a child item by a new item
+        """
+        vars(self)[name] = new
+        self.__children[self.__children.index(old)] = new
+
+    def _remove_child(self, name, child):
+        """
+        Remove a child item from this item
+        """
+        if vars(self).get(name) is child:
+            del vars(self)[name]
+        if child in self.__children:
+            self.__children.remove(child)
+
     def _get_attribute_value(self, attr_ref: str, current_attr: str, default: str = '', ignore_current_item: bool = False) -> str:
         """
         Get the value of an other attribute using a relative reference
@@ -1564,7 +1672,7 @@ class Item():
             args = {'value': value, 'caller': caller, 'source': source, 'dest': dest}
             self._sh.trigger(name=self._path + '-eval', obj=self.__run_eval, value=args, by=caller, source=source, dest=dest)
         else:
-            self.__update(value, caller, source, dest, key, index)
+            self._update_routine(value, caller, source, dest, key, index)
 
 
     def __iter__(self):
@@ -1748,6 +1856,23 @@ class Item():
                         logger.notice(f"_init_prerun: Adding to triggering_item {self}")
                     triggering_item._hysteresis_items_to_trigger.append(self)
 
+        self._select_update_routine()
+
+
+    def _select_update_routine(self):
+        """
+        Select the routine that handles updates of the item's value
+
+        Items that use none of the features which need special handling on an update (hysteresis,
+        threshold, cache, on_update, on_change, autotimer, scene type) are updated by a leaner routine.
+        Has to be called again, if one of these features is changed at runtime.
+        """
+        if (self._hysteresis_input is None and self._type != 'scene' and not self._threshold and not self._cache
+                and not self._on_update and not self._on_change and not self._autotimer_time):
+            self._update_routine = self.__update_simple
+        else:
+            self._update_routine = self.__update
+
 
     def _init_start_scheduler(self):
         """
@@ -1921,17 +2046,17 @@ class Item():
         lower = self.__run_attribute_eval(self._hysteresis_lower_threshold)
 
         if self._hysteresis_upper_timer_active and (value <= upper):
-            self._sh.scheduler.remove(self._itemname_prefix + self.id() + '-UpTimer')
+            self._sh.scheduler.remove_timer(self._itemname_prefix + self.id() + '-UpTimer')
             self._hysteresis_upper_timer_active = False
             self._hysteresis_active_timer_ends = None
         if self._hysteresis_lower_timer_active and (value >= lower):
-            self._sh.scheduler.remove(self._itemname_prefix + self.id() + '-LoTimer')
+            self._sh.scheduler.remove_timer(self._itemname_prefix + self.id() + '-LoTimer')
             self._hysteresis_lower_timer_active = False
             self._hysteresis_active_timer_ends = None
 
         if value > upper:
             if self._hysteresis_upper_timer is None:
-                self.__update(True, caller, source, dest)
+                self._update_routine(True, caller, source, dest)
             else:
                 if not self._hysteresis_upper_timer_active and (self._value is False):  # ms value = self._value
                     timer = self.__run_attribute_eval(self._hysteresis_upper_timer)
@@ -1943,12 +2068,12 @@ class Item():
                     self.active_timer_ends = next
                     # next = self.shtime.now() + datetime.timedelta(seconds=self._hysteresis_upper_timer)
                     if self._hysteresis_log:
-                        logger.notice(f"__run_hysteresis {self._path}: scheduler.add {self._path}-UpTimer")
-                    self._sh.scheduler.add(self._itemname_prefix + self.id() + '-UpTimer', self.__call__, value={'value': True, 'caller': 'Hysteresis'}, next=next)
+                        logger.notice(f"__run_hysteresis {self._path}: scheduler.add_timer {self._path}-UpTimer")
+                    self._sh.scheduler.add_timer(self._itemname_prefix + self.id() + '-UpTimer', self.__call__, timer, value={'value': True, 'caller': 'Hysteresis'})
 
         if value < lower:
             if self._hysteresis_lower_timer is None:
-                self.__update(False, caller, source, dest)
+                self._update_routine(False, caller, source, dest)
             else:
                 if not self._hysteresis_lower_timer_active and (self._value is True):
                     timer = self.__run_attribute_eval(self._hysteresis_lower_timer)
@@ -1960,8 +2085,8 @@ class Item():
                     self._hysteresis_active_timer_ends = next
                     # next = self.shtime.now() + datetime.timedelta(seconds=self._hysteresis_lower_timer)
                     if self._hysteresis_log:
-                        logger.notice(f"__run_hysteresis {self._path}: scheduler.add {self._path}-LoTimer")
-                    self._sh.scheduler.add(self._itemname_prefix + self.id() + '-LoTimer', self.__call__, value={'value': False, 'caller': 'Hysteresis'}, next=next)
+                        logger.notice(f"__run_hysteresis {self._path}: scheduler.add_timer {self._path}-LoTimer")
+                    self._sh.scheduler.add_timer(self._itemname_prefix + self.id() + '-LoTimer', self.__call__, timer, value={'value': False, 'caller': 'Hysteresis'})
         return
 
     def _onoff(self, value: bool) -> str:
@@ -2166,7 +2291,7 @@ class Item():
                     if value is None:
                         logger.debug(f"Item {self._path}: evaluating {self._eval} returns None")
                     else:
-                        self.__update(value, caller, source, dest)
+                        self._update_routine(value, caller, source, dest)
 
 
     # New for on_update / on_change
@@ -2220,7 +2345,7 @@ class Item():
                 if on_dest != '':
                     dest_item = _items_instance.return_item(on_dest)
                     if dest_item is not None:
-                        dest_item.__update(dest_value, caller=attr, source=self._path)
+                        dest_item._update_routine(dest_value, caller=attr, source=self._path)
                         logger.debug(" - : '{}' finally evaluating {} = {}, result={}".format(attr, on_dest, on_eval, dest_value))
                     else:
                         logger.error(f"Item {self._path}: '{attr}' has not found dest_item '{on_dest}' = {on_eval}, result={dest_value}")
@@ -2298,10 +2423,10 @@ class Item():
         now = str(shtime.now())
 
         items = _items_instance
+        rules = self._get_log_rules()
         try:
-            entry = self._log_rules.get('itemvalue', None)
-            if entry is not None:
-                item = self.get_absolutepath(entry.strip().replace("sh.", ""), KEY_LOG_CHANGE)
+            item = rules.itemvalue_path
+            if item is not None:
                 itemvalue = str(_items_instance.return_item(item).property.value)
             else:
                 itemvalue = None
@@ -2315,46 +2440,28 @@ class Item():
         self._log_text = self._log_text.replace("'", '"')
         try:
             # logger.warning(f"self._log_text: {self._log_text}, type={type(self._log_text)}")
-            txt = eval(f"f'{self._log_text}'")
+            txt = eval(rules.get_template(self._log_text))
         except Exception as e:
             logger.error(f"{id}: Invalid log_text template '{self._log_text}' - Exception: {e}")
             txt = self._log_text
         return txt
 
 
+    def _get_log_rules(self):
+        """
+        Returns the compiled log_rules of the item
+
+        The rules are compiled on first use and compiled again, if the attributes log_rules or log_level
+        have been changed
+        """
+        rules = self._log_rules_compiled
+        if rules is None or not rules.compiled_from(self):
+            rules = LogChangeRules(self, _items_instance)
+            self._log_rules_compiled = rules
+        return rules
+
     def _get_rule(self, rule_entry):
-        def convert_entry(entry, to):
-            returnvalue = entry
-            if isinstance(returnvalue, str) and to != "str":
-                try:
-                    # try to get value from item
-                    item = self.get_absolutepath(entry.strip().replace("sh.", ""), KEY_LOG_CHANGE)
-                    returnvalue = _items_instance.return_item(item).property.value
-                except Exception:
-                    if to == "list":
-                        returnvalue = [entry]
-            if isinstance(returnvalue, (str, int)) and to == "num":
-                try:
-                    returnvalue = float(returnvalue)
-                except ValueError:
-                    returnvalue = None
-            elif isinstance(entry, list):
-                entry = [convert_entry(val, self._type) for val in entry]
-            elif not isinstance(returnvalue, list) and to == "list":
-                returnvalue = [returnvalue]
-            elif isinstance(returnvalue, (float, int)) and to == "str":
-                returnvalue = str(returnvalue)
-            if returnvalue is None:
-                returnvalue = {'value': None, 'issue': f"Given log_rules entry '{entry}' for {rule_entry} is invalid"}
-            return returnvalue
-
-        defaults = {'filter': [], 'exclude': [], 'lowlimit': None, 'highlimit': None}
-        types = {'filter': 'list', 'exclude': 'list', 'lowlimit': 'num', 'highlimit': 'num'}
-        entry = self._log_rules.get(rule_entry, defaults.get(rule_entry))
-        if entry is not None and entry != []:
-            entry = convert_entry(entry, types.get(rule_entry) or self._type)
-
-        return entry
+        return self._get_log_rules().get_rule(rule_entry)
 
     def _log_on_change(self, value, caller, source=None, dest=None):
         """
@@ -2362,116 +2469,42 @@ class Item():
         :return:
         """
         if self._log_change_logger is not None:
-            issue_list = []
-            low_limit = self._get_rule('lowlimit')
-            if isinstance(low_limit, dict):
-                issue = low_limit.get('issue')
-                issue_list.append(issue)
-                low_limit = None
-            high_limit = self._get_rule('highlimit')
-            if isinstance(high_limit, dict):
-                issue = high_limit.get('issue')
-                issue_list.append(issue)
-                high_limit = None
-            if self._type != 'num' and low_limit:
-                issue = f"Low limit {low_limit} given, however item is not num type - ignoring"
-                issue_list.append(issue)
-                low_limit = None
-            if self._type != 'num' and high_limit:
-                issue = f"High limit {high_limit} given, however item is not num type - ignoring"
-                issue_list.append(issue)
-                high_limit = None
-            if low_limit is not None and high_limit is not None and low_limit >= high_limit:
-                issue = f"Low limit {low_limit} >= High limit {high_limit} - ignoring high limit"
-                issue_list.append(issue)
-                high_limit = None
-            filter_list = self._get_rule('filter')
-            if isinstance(filter_list, dict):
-                issue = filter_list.get('issue')
-                issue_list.append(issue)
-                filter_list = []
-            f_list = []
-            for f in filter_list:
-                if type(value) is not type(f):
-                    issue = f"Filter entry {f} is type {type(f)}, item is {self._type} - ignoring"
-                    issue_list.append(issue)
-                else:
-                    f_list.append(f)
-            filter_list = f_list
-            exclude_list = self._get_rule('exclude')
-            if isinstance(exclude_list, dict):
-                issue = exclude_list.get('issue')
-                issue_list.append(issue)
-                exclude_list = []
-            e_list = []
-            for e in exclude_list:
-                if type(value) is not type(e):
-                    issue = f"Exclude entry {e} is type {type(e)}, item is {self._type} - ignoring"
-                    issue_list.append(issue)
-                else:
-                    e_list.append(e)
-            exclude_list = e_list
-            if filter_list != [] and exclude_list != []:
-                issue = "Defining filter AND exclude does not work - ignoring exclude list"
-                issue_list.append(issue)
-                exclude_list = []
+            rules = self._get_log_rules()
+            cache = rules.get_cache(value)
+            issue_list = cache['issues']
+            low_limit = cache['lowlimit']
+            high_limit = cache['highlimit']
+            filter_list = cache['filter']
+            exclude_list = cache['exclude']
             if issue_list and self._log_rules_cache.get('issues') != issue_list:
                 logger.warning(f"Item {self._path} log_rules has issues: {', '.join(issue_list)}. "
                                f"Cleaned log_rules: lowlimit = {low_limit}, highlimit = {high_limit}, filter = {filter_list}, exclude = {exclude_list}")
 
-            self._log_rules_cache = {'issues': issue_list, 'filter': filter_list, 'exclude': exclude_list, 'lowlimit': low_limit, 'highlimit': high_limit}
-
-            if self._type == 'num':
-                if low_limit is not None:
-                    if low_limit > float(value):
-                        return
-                if high_limit is not None:
-                    if high_limit <= float(value):
-                        return
-                if filter_list != []:
-                    if not float(value) in filter_list:
-                        return
-                elif exclude_list != []:
-                    if float(value) in exclude_list:
-                        return
-            else:
-                if filter_list != []:
-                    if value not in filter_list:
-                        return
-                elif exclude_list != []:
-                    if value in exclude_list:
-                        return
+            self._log_rules_cache = cache
+
+            if not rules.accepts(value, cache):
+                return
             if self._log_text is None:
                 txt = self._log_build_standardtext(value, caller, source, dest)
             else:
                 txt = self._log_build_text(value, caller, source, dest)
 
-            # log_src = ''
-            # if source is not None:
-            #     log_src += ' (' + source + ')'
-            # log_dst = ''
-            # if dest is not None:
-            #     log_dst += ', dest: ' + dest
-            # self._log_change_logger.log(self._log_level, "Item Change: {} = {}  -  caller: {}{}{}".format(self._path, value, caller, log_src, log_dst))
-            try:
-                val = self._log_level_attrib.replace("'", '"')
-                log_level = eval(f"f'{val}'")
-            except Exception as e:
-                log_level = self._log_level_attrib
-                logger.error(f"Item {self._path}: Invalid log_level template '{log_level}' - (Exception: {e})")
-            level = log_level.upper()
-            level_name = level
-            if Utils.is_int(level):
-                level = int(level)
-                level_name = logging.getLevelName(level)
-            if logging.getLevelName(level) == 'Level ' + str(level):
+            if rules.log_level_code is None:
+                log_level = rules.log_level_value
+            else:
+                try:
+                    log_level = eval(rules.log_level_code)
+                except Exception as e:
+                    log_level = self._log_level_attrib
+                    logger.error(f"Item {self._path}: Invalid log_level template '{log_level}' - (Exception: {e})")
+            level = rules.get_level(log_level)
+            if level is None:
                 logger.warning(f"Item {self._path}: Invalid loglevel '{log_level}' defined in attribute '{KEY_LOG_LEVEL}' - Level 'INFO' will be used instead")
-                setattr(self, '_log_level_name', 'INFO')
-                setattr(self, '_log_level', logging.getLevelName('INFO'))
+                self._log_level_name = 'INFO'
+                self._log_level = logging.getLevelName('INFO')
             else:
-                setattr(self, '_log_level_name', level_name)
-                setattr(self, '_log_level', logging.getLevelName(level_name))
-            self._log_change_logger.log(self._log_level, txt)
+                self._log_level_name, self._log_level = level
+            write_log_change(self._log_change_logger, self._log_level, txt)
 
 
     def __trigger_logics(self, source_details=None):
@@ -2510,17 +2543,22 @@ class Item():
 
         self.__prev_change_by = self.__changed_by
         self.__prev_update_by = self.__updated_by
-        self.__changed_by = "{0}:{1}".format(caller, source)
-        self.__updated_by = "{0}:{1}".format(caller, source)
-        self.__triggered_by = "{0}:{1}".format(caller, source)
+        changed_by = f"{caller}:{source}"
+        self.__changed_by = changed_by
+        self.__updated_by = changed_by
+        self.__triggered_by = changed_by
 
         if caller != "Fader":
             # log every item change to standard logger, if level is DEBUG
             # log with level INFO, if 'item_change_log' is set in etc/smarthome.yaml
-            self._change_logger("Item {} = {} via {} {} {}".format(self._path, value, caller, source, dest))
+            if logger.isEnabledFor(self._change_log_level):
+                self._change_logger("Item {} = {} via {} {} {}".format(self._path, value, caller, source, dest))
 
             # Write item value to log, if Item has attribute log_change set
             self._log_on_change(value, caller, source, dest)
+
+        if self._waiters:
+            self._notify_waiters(value)
         return
 
 
@@ -2665,8 +2703,57 @@ class Item():
 
                 # logger.notice(f"Item {self._path} __update: _time={_time}, _value={_value}")
 
-                next = self.shtime.now() + datetime.timedelta(seconds=_time)
-                self._sh.scheduler.add(self._itemname_prefix + self.id() + '-Timer', self, value={'value': _value, 'caller': 'Autotimer'}, next=next)
+                self._sh.scheduler.add_timer(self._itemname_prefix + self.id() + '-Timer', self, _time, value={'value': _value, 'caller': 'Autotimer'})
+
+    def __update_simple(self, value, caller='Logic', source=None, dest=None, key=None, index=None):
+        """
+        Update routine for items without hysteresis, threshold, cache, on_update, on_change and autotimer
+
+        Elements of complex types and updates while the item is fading are handled by the full routine
+        """
+        if key is not None or index is not None:
+            self.__update(value, caller, source, dest, key, index)
+            return
+        try:
+            value = self.cast(value)
+        except Exception:
+            try:
+                logger.warning(f'Item {self._path}: value "{value}" does not match type {self._type}. Via caller {caller}, source {source}')
+            except Exception:
+                pass
+            return
+
+        self._lock.acquire()
+        if self._fading:
+            # the full routine checks the fading again under the lock
+            self._lock.release()
+            self.__update(value, caller, source, dest)
+            return
+        _changed = value != self._value or self._enforce_change
+        if _changed:
+            self._set_value(value, caller, source, dest, prev_change=None, last_change=None)
+            trigger_source_details = self.__changed_by
+        else:
+            trigger_source_details = self.__updated_by
+            self.__prev_update = self.__last_update
+            self.__last_update = self.shtime.now()
+            self.__prev_update_by = trigger_source_details
+            self.__updated_by = f"{caller}:{source}"
+        self._lock.release()
+        if _changed or self._enforce_updates:
+            for method in self.__methods_to_trigger:
+                try:
+                    method(self, caller, source, dest)
+                except Exception as e:
+                    logger.exception("Item {}: problem running {}: {}".format(self._path, method, e))
+            if self.__logics_to_trigger:
+                self.__trigger_logics(trigger_source_details)
+            for item in self._items_to_trigger:
+                args = {'value': value, 'source': self._path}
+                self._sh.trigger(name='items.' + item.property.path, obj=item.__run_eval, value=args, by=caller, source=source, dest=dest)
+            for item in self._hysteresis_items_to_trigger:
+                args = {'value': value, 'source': self._path}
+                self._sh.trigger(name='items.' + item.property.path, obj=item.__run_hysteresis, value=args, by=caller, source=source, dest=dest)
 
     def add_logic_trigger(self, logic):
         """
@@ -2726,6 +2813,52 @@ class Item():
         return self._hysteresis_items_to_trigger
 
 
+    async def wait_for(self, value=None, timeout=None):
+        """
+        Wait for a value of the item (for use in async logics)
+
+        The coroutine does not block a thread while waiting. If the item already has the
+        value, the value is returned immediately.
+
+        :param value: value to wait for (None: wait for the next change of the item's value)
+        :param timeout: maximum time to wait (in seconds, None: wait without limit)
+
+        :return: value of the item
+        :raises: asyncio.TimeoutError, if the value has not been set within the timeout
+        """
+        if value is not None:
+            value = self.cast(value)
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future.get_loop(), future, value)
+        with self._lock:
+            if value is not None and self._value == value:
+                return self._value
+            self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def _notify_waiters(self, value):
+        """
+        Wake up the coroutines waiting for the new value of the item (called with the lock of the item held)
+        """
+        waiters = []
+        for waiter in self._waiters:
+            loop, future, wanted = waiter
+            if wanted is None or wanted == value:
+                try:
+                    loop.call_soon_threadsafe(_resolve_waiter, future, value)
+                except RuntimeError:
+                    # the event loop of the waiting coroutine has been closed
+                    pass
+            else:
+                waiters.append(waiter)
+        self._waiters = waiters
+
+
     def timer(self, time, value, auto=False, caller=None, source=None, compat=ATTRIB_COMPAT_LATEST):
         """
         Starts a timer for this item
@@ -2744,13 +2877,13 @@ class Item():
                 caller = 'Autotimer'
                 self._autotimer_time = time
                 self._autotimer_value = value
+                self._select_update_routine()
             else:
                 caller = 'Timer'
-        next = self.shtime.now() + datetime.timedelta(seconds=time)
         if source is None:
-            self._sh.scheduler.add(self._itemname_prefix + self.id() + '-Timer', self.__call__, value={'value': value, 'caller': caller}, next=next)
+            self._sh.scheduler.add_timer(self._itemname_prefix + self.id() + '-Timer', self.__call__, time, value={'value': value, 'caller': caller})
         else:
-            self._sh.scheduler.add(self._itemname_prefix + self.id() + '-Timer', self.__call__, value={'value': value, 'caller': caller, 'source': source}, next=next)
+            self._sh.scheduler.add_timer(self._itemname_prefix + self.id() + '-Timer', self.__call__, time, value={'value': value, 'caller': caller, 'source': source})
         return
 
 
@@ -2758,7 +2891,7 @@ class Item():
         """
         Remove a running timer for this item from the scheduler
         """
-        self._sh.scheduler.remove(self._itemname_prefix + self.id() + '-Timer')
+        self._sh.scheduler.remove_timer(self._itemname_prefix + self.id() + '-Timer')
         return
 
 
@@ -2781,6 +2914,7 @@ class Item():
         else:
             self._autotimer_time = None
             self._autotimer_value = None
+        self._select_update_routine()
 
 
     def fade(self, dest, step=1, delta=1, caller=None, stop_fade=None, continue_fade=None, instant_set=True, update=False):
@@ -2891,7 +3025,7 @@ class Item():
                 "name": self._name,
                 "value": self._value,
                 "type": self._type,
-                "attributes": self.conf,
+                "attributes": dict(self.conf),
                 "children": self.get_children_path()
                 }
 
@@ -51,16 +51,28 @@ They can be used the following way: To call eg. **get_toplevel_items()**, use th
 
 """
 import logging
+import os
 import re
+import sys
+import threading
+import time
 
+import lib.config
+import lib.startupprofile
 import lib.utils
 
 from .item import Item
+from .conftemplates import ItemConf, get_conf_templates
+from .configdiff import ItemConfigDiff, build_fingerprints, get_item_config
+from .logchange import stop_log_change_writer
+from .property import Property
 from .structs import Structs
 
 
 _items_instance = None    # Pointer to the initialized instance of the Items class (for use by static methods)
 
+ITEMS_CACHE_FILE = 'items_config.cache'     # cache file for the parsed item configuration (in ../var/run)
+
 
 class Items():
     """
@@ -84,6 +96,9 @@ class Items():
 
     structs = None
 
+    _itemdirs = None                 # (env_dir, items_dir) the item definitions have been loaded from
+    _config_fingerprints = {}        # fingerprints of the loaded item configuration (for reload_itemdefinitions)
+
     _item_methods = [name for name in dir(Item) if name[0] != '_']
 
     def __init__(self, smarthome):
@@ -101,6 +116,7 @@ class Items():
         self.structs = Structs(self._sh)
 
         self._sh._ignore_item_collision = getattr(self._sh, '_ignore_item_collision', 'False') == 'True'
+        self._reload_lock = threading.Lock()
 
 
     # -----------------------------------------------------------------------------------------
@@ -174,31 +190,35 @@ class Items():
         # and from ../etc/struct.yaml
         #
         # Read in item structs from ../etc/struct.yaml
+        profiler = lib.startupprofile.get_startup_profiler()
         self._sh.shng_status['details'] = 'Structs'
-        self.structs.load_struct_definitions()
+        with profiler.phase('structs', parent='items'):
+            self.structs.load_struct_definitions()
 
 
         # --------------------------------------------------------------------
         # Read in item definitions
         #
         self._sh.shng_status['details'] = 'Items'
-        item_conf = None
-        item_conf = lib.config.parse_itemsdir(env_dir, item_conf)
-        item_conf = lib.config.parse_itemsdir(items_dir, item_conf, addfilenames=True, struct_dict=self.structs._struct_definitions)
-
-        for attr, value in item_conf.items():
-            if isinstance(value, dict):
-                child_path = attr
-                try:
-                    # (smarthome, parent, path, config):
-                    child = Item(self._sh, self, child_path, value, items_instance=_items_instance)
-                except Exception as e:
-                    self.logger.error("load_itemdefinitions: Item {}: problem creating: {}".format(child_path, e))
-                else:
-                    vars(self)[attr] = child
-                    vars(self._sh)[attr] = child
-                    self.add_item(child_path, child)
-                    self._children.append(child)
+        with profiler.phase('items_parse', parent='items'):
+            item_conf = self._load_itemconfig(env_dir, items_dir)
+            self._itemdirs = (env_dir, items_dir)
+            self._config_fingerprints = build_fingerprints(item_conf)
+
+        with profiler.phase('items_create', parent='items'):
+            for attr, value in item_conf.items():
+                if isinstance(value, dict):
+                    child_path = attr
+                    try:
+                        # (smarthome, parent, path, config):
+                        child = Item(self._sh, self, child_path, value, items_instance=_items_instance)
+                    except Exception as e:
+                        self.logger.error("load_itemdefinitions: Item {}: problem creating: {}".format(child_path, e))
+                    else:
+                        vars(self)[attr] = child
+                        vars(self._sh)[attr] = child
+                        self.add_item(child_path, child)
+                        self._children.append(child)
         del(item_conf)  # clean up
 
         # Test if all used attributes are defined in configuread plugins
@@ -213,31 +233,20 @@ class Items():
         self._sh.shng_status = {'code': 14, 'text': 'Starting: Preparing loaded items', 'details': 'prerun'}
 
         # Build eval expressions from special functions and triggers before first run
-        for item in self.return_items():
-            item._init_prerun()
+        with profiler.phase('items_prerun', parent='items'):
+            for item in self.return_items():
+                item._init_prerun()
 
         self._sh.shng_status = {'code': 14, 'text': 'Starting: Preparing loaded items', 'details': 'start scheduler'}
         # Start schedulers of the items which have a crontab or a cycle attribute
-        for item in self.return_items():
-            item._init_start_scheduler()
+        with profiler.phase('items_scheduler', parent='items'):
+            for item in self.return_items():
+                item._init_start_scheduler()
         self._sh.shng_status = {'code': 14, 'text': 'Starting: Preparing loaded items', 'details': 'eval-run'}
         # Run initial eval to set an initial value for the item
-        #import time
-        #gstart = time.time()
-        #gduration = 0.0
-        #gcount = 0
-        for item in self.return_items():
-            item._init_run()
-            #start = time.time()
-            #calculated = item._init_run()
-            #end = time.time()
-            #if calculated:
-            #    duration = end - start
-            #    self.logger.warning(f"_init_run: {item._path}, execution time = {duration}")
-            #    gduration += duration
-            #    gcount += 1
-        #gend = time.time()
-        #self.logger.warning(f"_init_run: Totals: duration {gend-gstart}, eval execution time = {gduration} for {gcount} items")
+        with profiler.phase('items_init_eval', parent='items'):
+            for item in self.return_items():
+                item._init_run()
 
         self._sh.shng_status = {'code': 14, 'text': 'Starting: Preparing loaded items'}
 #        self.item_count = len(self.__items)
@@ -249,6 +258,296 @@ class Items():
 
 
 
+    def reload_itemdefinitions(self):
+        """
+        Reload the item definitions without restarting SmartHomeNG
+
+        The item definition files are parsed again and compared with the loaded item configuration.
+        Only the items, that have been added, changed or removed are touched:
+
+        - new items are created (with their children) and bound to the plugins (parse_item)
+        - changed items are replaced by a new item, which is bound to the plugins. The new item takes
+          over the value of the replaced item (if the type is unchanged), its children and the items
+          and logics triggered by it
+        - removed items are removed from the plugins, the scheduler and the item tree
+
+        Only the new items are prepared for the run phase (eval triggers, scheduler, initial eval).
+        Plugins, that have been stopped to remove items, are started again. Struct definitions are
+        not reloaded.
+
+        :return: dict with the paths of the created, replaced and removed items and the duration (None, if no items are loaded)
+        :rtype: dict
+        """
+        if self._itemdirs is None:
+            self.logger.warning("reload_itemdefinitions: Item definitions have not been loaded yet")
+            return None
+
+        with self._reload_lock:
+            start = time.perf_counter()
+            item_conf = self._load_itemconfig(*self._itemdirs)
+            diff = ItemConfigDiff(self._config_fingerprints, item_conf)
+            result = {'created': diff.created, 'replaced': diff.replaced, 'removed': diff.removed}
+            failed = []
+
+            if diff:
+                plugins = list(self._sh.plugins.return_plugins())
+                running = [plugin for plugin in plugins if getattr(plugin, 'alive', False)]
+
+                self.logger.info(f"Reloading items, step 1: remove {len(diff.removed)} item(s)")
+                for path in diff.removed:
+                    self._reload_remove(path)
+
+                self.logger.info(f"Reloading items, step 2: create {len(diff.created)} and replace {len(diff.replaced)} item(s)")
+                created = []
+                replaced = {}
+                for action, path in diff.changes:
+                    conf = get_item_config(item_conf, path)
+                    if action == 'create':
+                        item = self._reload_create(path, conf)
+                        if item is not None:
+                            created.extend(self._get_subtree(item))
+                    else:
+                        old = self.return_item(path)
+                        item = self._reload_replace(path, conf, plugins)
+                        if item is not None:
+                            replaced[old] = item
+                    if item is None:
+                        failed.append(path)
+                new_items = created + list(replaced.values())
+
+                self.logger.info(f"Reloading items, step 3: bind {len(new_items)} new item(s)")
+                for item in new_items:
+                    # triggers taken over from replaced items, which have been replaced themselves
+                    item._items_to_trigger = [i for i in item._items_to_trigger if i not in replaced]
+                    item._hysteresis_items_to_trigger = [i for i in item._hysteresis_items_to_trigger if i not in replaced]
+                self._bind_new_items(created)
+                for item in new_items:
+                    item._init_prerun()
+                for item in new_items:
+                    item._init_start_scheduler()
+                for item in new_items:
+                    item._init_run()
+
+                for plugin in running:
+                    if not getattr(plugin, 'alive', False):
+                        self.logger.info(f"Reloading items, step 4: start plugin {plugin.get_shortname()}")
+                        try:
+                            plugin.run()
+                        except Exception as e:
+                            self.logger.warning(f"Reloading items: error on starting plugin {plugin.get_shortname()}: {e}")
+
+            # items, that could not be created, are created on the next reload
+            for path in failed:
+                for failed_path in [p for p in diff.fingerprints if p == path or p.startswith(path + '.')]:
+                    del diff.fingerprints[failed_path]
+            self._config_fingerprints = diff.fingerprints
+            result['time'] = round(time.perf_counter() - start, 6)
+            self.logger.notice(f"Reloaded item definitions in {result['time']:.3f} sec: {len(diff.created)} new, {len(diff.replaced)} changed, {len(diff.removed)} removed item(s)")
+            return result
+
+
+    def _get_subtree(self, item):
+        """
+        Returns a list with the item and all its descendants
+        """
+        result = [item]
+        for child in item.return_children():
+            result.extend(self._get_subtree(child))
+        return result
+
+
+    def _attach_item(self, parent, name, item):
+        """
+        Add a (new) item to its parent item or to the top level of the item tree
+        """
+        if parent is self:
+            vars(self)[name] = item
+            vars(self._sh)[name] = item
+            self._children.append(item)
+        else:
+            parent._add_child(name, item)
+
+
+    def _reload_remove(self, path):
+        """
+        Remove an item and its children from the item tree (for reload_itemdefinitions)
+        """
+        item = self.return_item(path)
+        if item is None:
+            return
+        for removed_item in reversed(self._get_subtree(item)):
+            removed_item._unlink()
+            self.remove_item(removed_item)
+
+        parent_path, __, name = path.rpartition('.')
+        if parent_path:
+            parent = self.return_item(parent_path)
+            if parent is not None:
+                parent._remove_child(name, item)
+        else:
+            if item in self._children:
+                self._children.remove(item)
+            for obj in (self, self._sh):
+                if vars(obj).get(name) is item:
+                    del vars(obj)[name]
+
+
+    def _reload_create(self, path, conf):
+        """
+        Create a new item with its children (for reload_itemdefinitions)
+
+        :return: the new item or None, if it could not be created
+        """
+        parent_path, __, name = path.rpartition('.')
+        parent = self.return_item(parent_path) if parent_path else self
+        if parent is None:
+            self.logger.error(f"reload_itemdefinitions: Item {path}: parent item not found")
+            return None
+        if self.return_item(path) is not None:
+            # an item with this path has been added at runtime
+            self._reload_remove(path)
+        try:
+            item = Item(self._sh, parent, sys.intern(path), conf, items_instance=self)
+        except Exception as e:
+            self.logger.error(f"reload_itemdefinitions: Item {path}: problem creating: {e}")
+            return None
+        self.add_item(item._path, item)
+        self._attach_item(parent, name, item)
+        return item
+
+
+    def _reload_replace(self, path, conf, plugins):
+        """
+        Replace an item by a new item with the changed configuration (for reload_itemdefinitions)
+
+        The children of the old item are moved to the new item.
+
+        :return: the new item or None, if it could not be created
+        """
+        old = self.return_item(path)
+        if old is None:
+            return self._reload_create(path, conf)
+        parent_path, __, name = path.rpartition('.')
+        parent = self.return_item(parent_path) if parent_path else self
+
+        # the plugins have to release the old item before they bind the new item with the same path
+        old._unlink()
+        old.remove()
+        own_conf = {attr: value for attr, value in conf.items() if not isinstance(value, dict)}
+        try:
+            item = Item(self._sh, parent, old._path, own_conf, items_instance=self)
+        except Exception as e:
+            self.logger.error(f"reload_itemdefinitions: Item {path}: problem creating: {e} - removing the item")
+            self._reload_remove(path)
+            return None
+
+        item._take_over(old, plugins)
+        for child in list(old.return_children()):
+            item._add_child(child._path.rpartition('.')[2], child)
+        self.add_item(item._path, item)
+        if parent is self:
+            vars(self)[name] = item
+            vars(self._sh)[name] = item
+            self._children[self._children.index(old)] = item
+        else:
+            parent._replace_child(name, old, item)
+        return item
+
+
+    def _bind_new_items(self, items):
+        """
+        Register new items with the unchanged items and logics, which are triggered by them
+
+        :param items: list of new items
+        """
+        if not items:
+            return
+        new = set(items)
+        for item in self.return_items():
+            if item._trigger and item not in new:
+                for trigger in item._trigger:
+                    for new_item in self._filter_items(trigger, items):
+                        if new_item is not item and item not in new_item._items_to_trigger:
+                            new_item._items_to_trigger.append(item)
+
+        logics = getattr(self._sh, 'logics', None)
+        if logics is None:
+            return
+        for name in logics.return_loaded_logics():
+            logic = logics.return_logic(name)
+            watch_items = getattr(logic, 'watch_item', [])
+            if isinstance(watch_items, str):
+                watch_items = [watch_items]
+            for entry in watch_items:
+                for new_item in self._filter_items(entry, items):
+                    new_item.add_logic_trigger(logic)
+
+
+    def _filter_items(self, regex, items):
+        """
+        Returns the items of a list, which match a regular expression (like match_items())
+        """
+        regex, __, attr = regex.partition(':')
+        regex = re.compile(regex.replace('.', r'\.').replace('*', '.*') + '$')
+        attr, __, val = attr.partition('[')
+        val = val.rstrip(']')
+        result = []
+        for item in items:
+            if not regex.match(item._path):
+                continue
+            if attr != '':
+                if attr not in item.conf:
+                    continue
+                if val != '':
+                    value = item.conf[attr]
+                    if not ((type(value) in [list, dict] and val in value) or val == value):
+                        continue
+            result.append(item)
+        return result
+
+
+    def _load_itemconfig(self, env_dir, items_dir):
+        """
+        Load the item configuration (with resolved structs) from the cache or parse the item definition files
+
+        The cache file in ../var/run is used, if no item definition file, struct definition or parsing
+        setting has changed since it was written. Otherwise the files are parsed and the cache file is
+        rewritten.
+
+        :param env_dir: path to the directory containing the core's environment item definition files
+        :param items_dir: path to the directory containing the user's item definition files
+
+        :return: item configuration tree
+        :rtype: OrderedDict
+        """
+        start = time.perf_counter()
+        struct_dict = self.structs._struct_definitions
+        cache_file = os.path.join(self._sh.get_vardir(), 'run', ITEMS_CACHE_FILE)
+        settings = {'version': getattr(self._sh, 'version', ''),
+                    'struct_strip_name': str(getattr(self._sh, '_struct_strip_name', False))}
+        try:
+            key = lib.config.items_cache_key([(env_dir, False), (items_dir, True)], struct_dict, settings)
+        except Exception as e:
+            self.logger.warning(f"Item configuration cache not used: {e}")
+            key = None
+
+        item_conf = None
+        reason = 'no cache key'
+        if key is not None:
+            item_conf, reason = lib.config.load_items_cache(cache_file, key)
+        if item_conf is not None:
+            self.logger.notice(f"Item configuration cache hit: Loaded item configuration in {time.perf_counter() - start:.3f} sec")
+            return item_conf
+
+        item_conf = lib.config.parse_itemsdir(env_dir, None)
+        item_conf = lib.config.parse_itemsdir(items_dir, item_conf, addfilenames=True, struct_dict=struct_dict)
+        lib.config.clear_struct_templates()
+        if key is not None:
+            lib.config.save_items_cache(cache_file, key, item_conf)
+        self.logger.notice(f"Item configuration cache miss ({reason}): Parsed item definition files in {time.perf_counter() - start:.3f} sec")
+        return item_conf
+
+
     def add_item(self, path, item):
         """
         Function to to add an item to the dictionary of items.
@@ -465,16 +764,69 @@ class Items():
         return len(self.__items)
 
 
+    def get_memory_report(self):
+        """
+        Return the memory used by the item tree, broken down by the struct the items were created from
+
+        The sizes include the item objects, their attributes and the attribute values. Objects that
+        are shared by several items (like shared attribute dicts or interned strings) are counted
+        only once (for the first item that uses them). Items which have not been created from a
+        struct are reported with the struct name ''.
+
+        :return: dict with the totals and a dict with the values for each struct
+        :rtype: dict
+        """
+        seen = set()
+
+        def getsize(obj):
+            if id(obj) in seen or isinstance(obj, Item):
+                return 0
+            seen.add(id(obj))
+            size = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                for key, value in obj.items():
+                    size += getsize(key) + getsize(value)
+            elif isinstance(obj, (list, tuple, set)):
+                for value in obj:
+                    size += getsize(value)
+            elif isinstance(obj, ItemConf):
+                size += getsize(obj._data)
+            elif isinstance(obj, Property):
+                size += getsize(vars(obj))
+            return size
+
+        # objects shared by all items are not part of the report
+        seen.update(id(obj) for obj in (self._sh, self, getattr(self._sh, 'plugins', None), getattr(self._sh, 'shtime', None)))
+
+        structs = {}
+        total = {'items': 0, 'bytes': 0, 'shared_conf': 0}
+        for path in self.__items:
+            item = self.__item_dict[path]
+            entry = structs.setdefault(item._struct_name or '', {'items': 0, 'bytes': 0, 'shared_conf': 0})
+            size = sys.getsizeof(item) + getsize(vars(item)) + getsize(path)
+            shared = int(isinstance(item.conf, ItemConf) and item.conf.shared)
+            for counter in (entry, total):
+                counter['items'] += 1
+                counter['bytes'] += size
+                counter['shared_conf'] += shared
+
+        result = dict(total)
+        result['conf_templates'] = get_conf_templates().get_statistics()
+        result['structs'] = dict(sorted(structs.items(), key=lambda s: s[1]['bytes'], reverse=True))
+        return result
+
+
     def stop(self, signum=None, frame=None):
         """
         Stop what all items are doing
 
-        At the moment, it stops fading of all items
+        At the moment, it stops fading of all items and writes the pending log_change entries
         """
         for item in self.__items:
             self.__item_dict[item]._fading = False
             with self.__item_dict[item]._lock:
                 self.__item_dict[item]._lock.notify_all()
+        stop_log_change_writer()
 
 
     def add_plugin_attribute(self, plugin_name, attribute_name, attribute):
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+"""
+--------------------------------------------------------------------------------------------
+---
+---  Precompiled log_change rules and the writer thread for item change logging
+---
+"""
+
+import logging
+import queue
+import threading
+
+from lib.constants import KEY_LOG_CHANGE
+from lib.utils import Utils
+
+
+logger = logging.getLogger(__name__)
+
+
+_STATIC = 0         # rule entry is a constant, converted at compile time
+_ITEMREF = 1        # rule entry is a string, that may reference an item (resolved on every change)
+
+
+class LogChangeRules:
+    """
+    Compiled form of the attributes ``log_rules`` and ``log_level`` of an item
+
+    The rules are validated and converted once when the item is loaded (or when the attributes are
+    changed). Rules that reference other items keep the (absolute) path of the referenced item,
+    which is looked up on every change to use the current value of that item.
+
+    An instance of this class is created by the item class (method ``_get_log_rules()``)
+    """
+
+    rule_types = {'filter': 'list', 'exclude': 'list', 'lowlimit': 'num', 'highlimit': 'num'}
+    rule_defaults = {'filter': [], 'exclude': [], 'lowlimit': None, 'highlimit': None}
+
+    def __init__(self, item, items):
+        self._items = items
+        self._type = item._type
+
+        # the attribute values this instance has been compiled from
+        self.log_rules = item._log_rules
+        self.log_level_attrib = item._log_level_attrib
+
+        self._rules = {}
+        for rule_entry in self.rule_types:
+            self._rules[rule_entry] = self._compile_rule(item, rule_entry)
+        self._static = all(rule[0] == _STATIC for rule in self._rules.values())
+        self._cache_by_type = {}
+
+        entry = self.log_rules.get('itemvalue', None)
+        if isinstance(entry, str):
+            self.itemvalue_path = item.get_absolutepath(entry.strip().replace("sh.", ""), KEY_LOG_CHANGE)
+        else:
+            self.itemvalue_path = entry
+
+        # log_level is a f-string template, which only needs to be evaluated on every change if it contains a field
+        template = self.log_level_attrib.replace("'", '"')
+        source = f"f'{template}'"
+        self.log_level_value = None
+        self.log_level_code = None
+        try:
+            code = compile(source, '<log_level>', 'eval')
+        except Exception:
+            # evaluating the source raises the error again, it is logged on every change
+            self.log_level_code = source
+        else:
+            if '{' in template:
+                self.log_level_code = code
+            else:
+                self.log_level_value = eval(code, {}, {})
+        self._levels = {}
+        self._templates = {}
+
+    def compiled_from(self, item):
+        """
+        Test if this instance has been compiled from the current attributes of the item
+        """
+        return item._log_rules is self.log_rules and item._log_level_attrib is self.log_level_attrib and item._type == self._type
+
+    def _compile_rule(self, item, rule_entry):
+        to = self.rule_types.get(rule_entry) or self._type
+        entry = self.log_rules.get(rule_entry, self.rule_defaults.get(rule_entry))
+        if entry is None or entry == []:
+            return (_STATIC, entry, None, to)
+        if isinstance(entry, str) and to != 'str':
+            try:
+                path = item.get_absolutepath(entry.strip().replace("sh.", ""), KEY_LOG_CHANGE)
+            except Exception:
+                path = None
+            return (_ITEMREF, entry, path, to)
+        return (_STATIC, self._convert(entry, entry, to, rule_entry), None, to)
+
+    @staticmethod
+    def _convert(value, entry, to, rule_entry):
+        if isinstance(value, (str, int)) and to == "num":
+            try:
+                value = float(value)
+            except ValueError:
+                value = None
+        elif isinstance(entry, list):
+            pass
+        elif not isinstance(value, list) and to == "list":
+            value = [value]
+        elif isinstance(value, (float, int)) and to == "str":
+            value = str(value)
+        if value is None:
+            value = {'value': None, 'issue': f"Given log_rules entry '{entry}' for {rule_entry} is invalid"}
+        return value
+
+    def get_rule(self, rule_entry):
+        """
+        Returns the current value of a rule
+
+        :param rule_entry: 'filter', 'exclude', 'lowlimit' or 'highlimit'
+        :return: value of the rule or a dict with the key 'issue', if the rule is invalid
+        """
+        kind, entry, path, to = self._rules[rule_entry]
+        if kind == _STATIC:
+            return entry
+        value = entry
+        item = None
+        if path is not None:
+            item = self._items.return_item(path)
+        if item is not None:
+            value = item.property.value
+        elif to == "list":
+            value = [entry]
+        return self._convert(value, entry, to, rule_entry)
+
+    def _build_cache(self, value):
+        issue_list = []
+        low_limit = self.get_rule('lowlimit')
+        if isinstance(low_limit, dict):
+            issue_list.append(low_limit.get('issue'))
+            low_limit = None
+        high_limit = self.get_rule('highlimit')
+        if isinstance(high_limit, dict):
+            issue_list.append(high_limit.get('issue'))
+            high_limit = None
+        if self._type != 'num' and low_limit:
+            issue_list.append(f"Low limit {low_limit} given, however item is not num type - ignoring")
+            low_limit = None
+        if self._type != 'num' and high_limit:
+            issue_list.append(f"High limit {high_limit} given, however item is not num type - ignoring")
+            high_limit = None
+        if low_limit is not None and high_limit is not None and low_limit >= high_limit:
+            issue_list.append(f"Low limit {low_limit} >= High limit {high_limit} - ignoring high limit")
+            high_limit = None
+        filter_list = self.get_rule('filter')
+        if isinstance(filter_list, dict):
+            issue_list.append(filter_list.get('issue'))
+            filter_list = []
+        f_list = []
+        for f in filter_list:
+            if type(value) is not type(f):
+                issue_list.append(f"Filter entry {f} is type {type(f)}, item is {self._type} - ignoring")
+            else:
+                f_list.append(f)
+        filter_list = f_list
+        exclude_list = self.get_rule('exclude')
+        if isinstance(exclude_list, dict):
+            issue_list.append(exclude_list.get('issue'))
+            exclude_list = []
+        e_list = []
+        for e in exclude_list:
+            if type(value) is not type(e):
+                issue_list.append(f"Exclude entry {e} is type {type(e)}, item is {self._type} - ignoring")
+            else:
+                e_list.append(e)
+        exclude_list = e_list
+        if filter_list != [] and exclude_list != []:
+            issue_list.append("Defining filter AND exclude does not work - ignoring exclude list")
+            exclude_list = []
+        return {'issues': issue_list, 'filter': filter_list, 'exclude': exclude_list, 'lowlimit': low_limit, 'highlimit': high_limit}
+
+    def get_cache(self, value):
+        """
+        Returns the cleaned rules (and the issues found) for a value
+
+        The result only depends on the type of the value, as long as no rule references an item.
+
+        :return: dict with the keys 'issues', 'filter', 'exclude', 'lowlimit' and 'highlimit'
+        """
+        if not self._static:
+            return self._build_cache(value)
+        cache = self._cache_by_type.get(type(value))
+        if cache is None:
+            cache = self._build_cache(value)
+            self._cache_by_type[type(value)] = cache
+        return cache
+
+    def accepts(self, value, cache):
+        """
+        Test if a value passes the cleaned rules and is to be logged
+        """
+        if self._type == 'num':
+            if cache['lowlimit'] is not None:
+                if cache['lowlimit'] > float(value):
+                    return False
+            if cache['highlimit'] is not None:
+                if cache['highlimit'] <= float(value):
+                    return False
+            if cache['filter'] != []:
+                if not float(value) in cache['filter']:
+                    return False
+            elif cache['exclude'] != []:
+                if float(value) in cache['exclude']:
+                    return False
+        else:
+            if cache['filter'] != []:
+                if value not in cache['filter']:
+                    return False
+            elif cache['exclude'] != []:
+                if value in cache['exclude']:
+                    return False
+        return True
+
+    def get_level(self, level):
+        """
+        Returns the name and the numeric value of a log level given as a string
+
+        :return: tuple (level_name, level) or None, if the string is not a valid log level
+        """
+        result = self._levels.get(level)
+        if result is None and level not in self._levels:
+            level_name = level.upper()
+            levelno = level_name
+            if Utils.is_int(levelno):
+                levelno = int(levelno)
+                level_name = logging.getLevelName(levelno)
+            if logging.getLevelName(levelno) == 'Level ' + str(levelno):
+                result = None
+            else:
+                result = (level_name, logging.getLevelName(level_name))
+            self._levels[level] = result
+        return result
+
+    def get_template(self, text):
+        """
+        Returns the compiled code of a log_text template
+
+        :param text: template (with single quotes replaced by double quotes)
+        :return: code object to be evaluated in the namespace of the log text
+        """
+        code = self._templates.get(text)
+        if code is None:
+            code = compile(f"f'{text}'", '<log_text>', 'eval')
+            self._templates[text] = code
+        return code
+
+
+class LogChangeWriter(threading.Thread):
+    """
+    Thread that writes the log records of item changes
+
+    The log records are created in the thread that changes the item (so time and thread information
+    stay the same), the handlers of the loggers (file, memory, database, ...) are called by this thread.
+    """
+
+    def __init__(self):
+        threading.Thread.__init__(self, name='Items.log_change', daemon=True)
+        self._queue = queue.SimpleQueue()
+        self.alive = True
+
+    def put(self, change_logger, record):
+        self._queue.put((change_logger, record))
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            change_logger, record = entry
+            try:
+                change_logger.handle(record)
+            except Exception as e:
+                logger.warning(f"Could not write log_change record to logger '{change_logger.name}': {e}")
+
+    def stop(self, timeout=5):
+        """
+        Write all queued records and stop the thread
+        """
+        self.alive = False
+        self._queue.put(None)
+        self.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def write_log_change(change_logger, level, msg):
+    """
+    Write an item change log entry through the log_change writer thread
+
+    :param change_logger: logger configured by the item attribute log_change
+    :param level: numeric log level
+    :param msg: text to log
+    """
+    global _writer
+    if not change_logger.isEnabledFor(level):
+        return
+    fn, lno, func, sinfo = change_logger.findCaller(False, 2)
+    record = change_logger.makeRecord(change_logger.name, level, fn, lno, msg, (), None, func, None, sinfo)
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogChangeWriter()
+                _writer.start()
+    if _writer.alive:
+        _writer.put(change_logger, record)
+    else:
+        change_logger.handle(record)
+
+
+def stop_log_change_writer():
+    """
+    Stop the log_change writer thread after all queued records have been written
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer.alive:
+            _writer.stop()
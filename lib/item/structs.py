@@ -42,8 +42,9 @@ class Structs():
     struct_merge_lists = True
 
     _struct_definitions = collections.OrderedDict()     # definitions of item structures
-    _finalized_structs = []                             # struct names are appended to this list, if they do not
+    _finalized_structs = set()                          # struct names are added to this set, if they do not
                                                         # contain any 'struct' attributes any more
+    _resolving_structs = set()                          # structs which are being resolved (to detect loops)
 
     def __init__(self, smarthome):
         self.logger = logging.getLogger(__name__)
@@ -177,29 +178,14 @@ class Structs():
 
         # Now that all structs have been loaded,
         # resolve struct references in structs and fill in the content of the struct
+        # (substructs are resolved before they are merged, so every struct is resolved only once)
+        start = time.perf_counter()
+        for struct_name in list(self._struct_definitions):
+            self.resolve_struct(struct_name)
 
-        do_resolve = True
-        run = 0
-        while do_resolve:
-            do_resolve = False
-            run += 1
-            self.logger.dbghigh(f"load_struct_definitions: {run}. run of struct resolve")
-
-            import time
-            start = time.perf_counter()
-            for struct_name in self._struct_definitions:
-                if struct_name not in self._finalized_structs:
-                    # self.logger.dbghigh(f"- processing struct '{struct_name}'")
-
-                    if self.traverse_struct(struct_name):
-                        do_resolve = True
-                    else:
-                        self._finalized_structs.append(struct_name)
-                        self.logger.dbghigh(f"load_struct_definitions: Finalized struct '{struct_name}'")
-
-            end = time.perf_counter()
-            duration = end - start
-            self.logger.dbghigh(f"load_struct_definitions: time traverse all structs: Duration={duration}")
+        end = time.perf_counter()
+        duration = end - start
+        self.logger.dbghigh(f"load_struct_definitions: time traverse all structs: Duration={duration}")
 
 
         # for Testing: Save structure of joined item structs
@@ -293,6 +279,34 @@ class Structs():
 #   after loading all struct definitions from file(s)
 
 
+    def resolve_struct(self, struct_name):
+        """
+        Resolve all struct references in a struct, if it has not been resolved before
+
+        The resolved struct replaces the definition in _struct_definitions and is used for
+        all further references to the struct.
+
+        :param struct_name: Name of the struct to resolve
+
+        :return: False, if the struct references itself (directly or through other structs)
+        """
+        if struct_name in self._finalized_structs:
+            return True
+        if struct_name in self._resolving_structs:
+            self.logger.error(f"resolve_struct: struct '{struct_name}' references itself (directly or through other structs) - reference is ignored")
+            return False
+
+        self._resolving_structs.add(struct_name)
+        try:
+            while self.traverse_struct(struct_name):
+                pass
+        finally:
+            self._resolving_structs.discard(struct_name)
+        self._finalized_structs.add(struct_name)
+        self.logger.dbghigh(f"resolve_struct: Finalized struct '{struct_name}'")
+        return True
+
+
     def traverse_struct(self, struct_name):
         """
         Traverses through a struct to find struct-attributes and replace them with the references struct(s)
@@ -397,6 +411,10 @@ class Structs():
         if substruct_name.startswith('.'):
             # referencing a struct from same definition file
             substruct_name = key_prefix + substruct_name
+        if substruct_name in self._struct_definitions and not self.resolve_struct(substruct_name):
+            # merging a struct into itself would never end
+            return
+        # merge the resolved struct (without struct references)
         substruct = self._struct_definitions.get(substruct_name, None)
         if substruct is None:
             self.logger.error(f"struct '{substruct_name}' not found in structdefinitions (used in struct '{main_struct_name}') - key_prefix={key_prefix}")
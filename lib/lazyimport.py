@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+"""
+This library imports heavy libraries, which are rarely needed, on first use.
+
+``lazy_import()`` returns a placeholder for a library. The library is imported, when an
+attribute of the placeholder is accessed for the first time (e.g. ``ephem.Observer()``).
+The time it took to import the library and the growth of the resident memory are recorded
+and added to the startup profile.
+
+:Warning: This library is part of the core of SmartHomeNG. It **should not be called directly** from plugins!
+"""
+
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+import types
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_loaded = []        # libraries imported through this module (in the order they were imported)
+
+
+def get_rss():
+    """
+    Returns the resident memory of the SmartHomeNG process (in bytes)
+
+    :return: resident memory or None, if it cannot be determined
+    :rtype: int | None
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # peak resident memory, in kilobytes on Linux and in bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def import_library(name):
+    """
+    Import a library and record the time and the memory it took
+
+    :param name: name of the library (e.g. 'ephem' or 'lib.cpuinfo')
+    :type name: str
+
+    :return: the imported module
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        rss = get_rss()
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        duration = time.perf_counter() - start
+        entry = {'name': name, 'time': round(duration, 6), 'version': getattr(module, '__version__', None)}
+        if rss is not None:
+            entry['rss'] = get_rss() - rss
+        _loaded.append(entry)
+    logger.info(f"Library '{name}' imported on first use in {duration * 1000:.1f} ms")
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """
+    Placeholder for a library, that is imported on first access to one of its attributes
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            module = import_library(self.__name__)
+            self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'imported' if self.__dict__['_lazy_module'] is not None else 'not imported yet'
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Returns a placeholder for a library, that is imported on first use
+
+    If the library has already been imported, the library itself is returned.
+
+    :param name: name of the library (e.g. 'ephem' or 'lib.cpuinfo')
+    :type name: str
+
+    :return: placeholder for the library or None, if the library is not installed
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        if importlib.util.find_spec(name) is None:
+            return None
+    except (ImportError, ValueError):
+        return None
+    return LazyModule(name)
+
+
+def is_imported(module):
+    """
+    Returns True, if a library returned by lazy_import() has been imported
+
+    :param module: library or placeholder returned by lazy_import()
+    :rtype: bool
+    """
+    if isinstance(module, LazyModule):
+        return module.__dict__['_lazy_module'] is not None
+    return module is not None
+
+
+def get_loaded_libraries():
+    """
+    Returns the libraries, that have been imported on first use
+
+    :return: list of dicts with name, version, import time (in seconds) and growth of the resident memory (in bytes)
+    :rtype: list
+    """
+    with _lock:
+        return [dict(entry) for entry in _loaded]
+
+
+def get_imported_packages():
+    """
+    Returns the names of all imported packages, that are not part of the Python standard library
+
+    :return: sorted list of top level package names
+    :rtype: list
+    """
+    stdlib = getattr(sys, 'stdlib_module_names', frozenset())
+    names = set()
+    for name, module in list(sys.modules.items()):
+        if module is None or isinstance(module, LazyModule):
+            continue
+        top = name.split('.')[0]
+        if top in stdlib or top in sys.builtin_module_names or top.startswith('_'):
+            continue
+        names.add(top)
+    return sorted(names)
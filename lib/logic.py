@@ -46,10 +46,19 @@ They can be used the following way: To call eg. **enable_logic(name)**, use the
 :Note: This library is part of the core of SmartHomeNG. Regular plugins should not need to use this API.  It is manily implemented for plugins near to the core like **backend** or **blockly**!
 
 """
+import dis
+import hashlib
+import importlib.util
+import inspect
 import logging
+import marshal
 import os
+import sys
+import threading
+import time
+import types
 
-from collections import OrderedDict
+from collections import OrderedDict, deque
 
 import ast
 
@@ -62,14 +71,152 @@ from lib.constants import PLUGIN_PARSE_LOGIC
 from lib.constants import (YAML_FILE, CONF_FILE, DIR_LOGICS, DIR_ETC, BASE_LOGIC, BASE_ADMIN)
 
 from lib.item import Items
+from lib.logicstatistics import LogicStatistics
 from lib.plugin import Plugins
-from lib.scheduler import Scheduler
+from lib.scheduler import Scheduler, ASYNC_ENTRY_POINT
 
 logger = logging.getLogger(__name__)
 
 
 _logics_instance = None    # Pointer to the initialized instance of the Logics class (for use by static methods)
 
+LOGICS_BYTECODE_DIR = 'logics_bytecode'     # directory in ../var/run for the compiled code of the logics
+
+COALESCE_POLICIES = ('queue', 'drop', 'latest')     # handling of triggers, while max_concurrency runs are active
+
+# --------------------------------------------------------------------------------------
+# Cache for the compiled code of the logics
+#
+# Like __pycache__ for modules, the code object of a logic is stored (marshalled) in a file in
+# ../var/run/logics_bytecode. The file is only used, if the path, modification time and size of
+# the logic file and the bytecode version of Python match.
+
+_bytecode_statistics = {'loads': 0, 'hits': 0, 'saved': 0.0}
+
+
+def _bytecode_filename(vardir, pathname):
+    name = os.path.splitext(os.path.basename(pathname))[0]
+    path_hash = hashlib.sha1(os.path.abspath(pathname).encode()).hexdigest()[:8]
+    return os.path.join(vardir, 'run', LOGICS_BYTECODE_DIR, f"{name}-{path_hash}.{sys.implementation.cache_tag}.marshal")
+
+
+def _read_bytecode(filename, pathname, signature):
+    """
+    Returns the cached code of a logic and the time it took to compile it or (None, 0), if the cache file is missing or stale
+    """
+    try:
+        with open(filename, 'rb') as f:
+            magic, cached_pathname, cached_signature, compile_time, code = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None, 0
+    if (magic, cached_pathname, cached_signature) != (importlib.util.MAGIC_NUMBER, os.path.abspath(pathname), signature):
+        return None, 0
+    return code, compile_time
+
+
+def _write_bytecode(filename, pathname, signature, compile_time, code):
+    tmp_filename = filename + '.tmp'
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(tmp_filename, 'wb') as f:
+            f.write(marshal.dumps((importlib.util.MAGIC_NUMBER, os.path.abspath(pathname), signature, compile_time, code)))
+        os.replace(tmp_filename, filename)
+    except Exception as e:
+        logger.info(f"Could not write compiled code of logic file {pathname}: {e}")
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
+
+
+def load_logic_bytecode(pathname, vardir=None):
+    """
+    Returns the compiled code of a logic file (from the bytecode cache, if the file is unchanged)
+
+    :param pathname: path of the logic file
+    :param vardir: var directory of SmartHomeNG (None: do not use the cache)
+    :type pathname: str
+    :type vardir: str
+
+    :return: code object of the logic
+    :raises: OSError, if the file cannot be read, SyntaxError, if the code cannot be compiled
+    """
+    start = time.perf_counter()
+    _bytecode_statistics['loads'] += 1
+    filename = None
+    signature = None
+    if vardir is not None:
+        try:
+            stat = os.stat(pathname)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        else:
+            filename = _bytecode_filename(vardir, pathname)
+            code, compile_time = _read_bytecode(filename, pathname, signature)
+            if code is not None:
+                _bytecode_statistics['hits'] += 1
+                _bytecode_statistics['saved'] += compile_time - (time.perf_counter() - start)
+                return code
+
+    with open(pathname, encoding='UTF-8') as f:
+        source = f.read()
+    source = source.lstrip('\ufeff')  # remove BOM
+    code = compile(source, pathname, 'exec', flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+    if filename is not None:
+        _write_bytecode(filename, pathname, signature, time.perf_counter() - start, code)
+    return code
+
+
+def get_async_mode(code):
+    """
+    Returns, how the compiled code of a logic is run on the core event loop
+
+    A logic is an async logic, if it contains top-level 'await' statements or if it defines an
+    'async def main()' entry point, that is not called by the logic itself (e.g. through
+    'asyncio.run(main())').
+
+    :param code: code object of the logic
+
+    :return: 'await' (top-level await), 'main' (entry point) or None (no async logic)
+    :rtype: str | None
+    """
+    if code.co_flags & inspect.CO_COROUTINE:
+        return 'await'
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType) and const.co_name == ASYNC_ENTRY_POINT and const.co_flags & inspect.CO_COROUTINE:
+            for instruction in dis.get_instructions(code):
+                if instruction.opname == 'LOAD_NAME' and instruction.argval == ASYNC_ENTRY_POINT:
+                    return None
+            return 'main'
+    return None
+
+
+def get_bytecode_cache_statistics():
+    """
+    Returns the number of loaded logic files, the number of cache hits and the estimated time saved (in seconds)
+
+    :rtype: dict
+    """
+    return {'loads': _bytecode_statistics['loads'], 'hits': _bytecode_statistics['hits'],
+            'saved': round(max(_bytecode_statistics['saved'], 0.0), 6)}
+
+
+def uses_process_pool(*conf_basenames):
+    """
+    Returns True, if a logic in the configuration files is executed in a worker process (logic attribute 'run_in_process')
+
+    :param conf_basenames: basenames of the logic configuration files
+
+    :rtype: bool
+    """
+    for conf_basename in conf_basenames:
+        config = lib.config.parse_basename(conf_basename, configtype='logics')
+        for attributes in config.values():
+            if isinstance(attributes, dict) and Utils.to_bool(attributes.get('run_in_process', False), default=False):
+                return True
+    return False
+
 
 class Logics():
     """
@@ -345,8 +492,10 @@ class Logics():
         are not loaded from the configuration, so the triggers that where active before the
         reload remain active.
         """
+        hits = _bytecode_statistics['hits']
         for logic in self:
             self[logic]._generate_bytecode()
+        logger.info(f"Reloaded logics: {_bytecode_statistics['hits'] - hits} of {len(self._logics)} compiled logics read from cache")
 
 
     def is_logic_loaded(self, name):
@@ -1000,6 +1149,16 @@ class Logic():
         self._last_run = None
         self._trigger_dict = None
         self._watch_item = []
+        self._namespace = None            # base namespace for the execution of the logic (built by the scheduler)
+        self._statistics = LogicStatistics()  # execution statistics (recorded by the scheduler)
+        self._max_concurrency = None      # maximum number of concurrent runs (None: unlimited)
+        self._coalesce = None             # policy for triggers, while max_concurrency runs are active
+        self._run_lock = threading.Lock()
+        self._running = 0                 # number of active runs
+        self._pending = deque()           # triggers waiting for the end of an active run
+        self._run_in_process = False      # execute the logic in a worker process (lib.logicprocess)
+        self._process_items = None        # items in the snapshot for the worker process (None: all items)
+        self._async_mode = None           # run on the core event loop: 'await', 'main' or None (see get_async_mode())
         self._conf = attributes
         self.scheduler = Logics.get_instance().scheduler
         self.__methods_to_trigger = []
@@ -1023,9 +1182,19 @@ class Logic():
                     vars(self)['_cycle'] = attributes[attribute]
                 elif attribute == 'crontab':
                     vars(self)['_crontab'] = attributes[attribute]
+                elif attribute == 'max_concurrency':
+                    vars(self)['_max_concurrency'] = attributes[attribute]
+                elif attribute == 'coalesce':
+                    vars(self)['_coalesce'] = attributes[attribute]
+                elif attribute == 'run_in_process':
+                    vars(self)['_run_in_process'] = Utils.to_bool(attributes[attribute], default=False)
+                elif attribute == 'process_items':
+                    process_items = attributes[attribute]
+                    vars(self)['_process_items'] = [process_items] if isinstance(process_items, str) else list(process_items)
                 elif attribute != 'enabled':
                     vars(self)[attribute] = attributes[attribute]
             self._prio = int(self._prio)
+            self._check_concurrency_attributes()
             self._generate_bytecode()
         else:
             self.logger.error("Logic {} is not configured correctly (configuration has no attibutes)".format(self._name))
@@ -1317,6 +1486,82 @@ class Logic():
         self._last_run = self.shtime.now()
 
 
+    def _check_concurrency_attributes(self):
+        """
+        Check the attributes 'max_concurrency' and 'coalesce'
+
+        If only a coalescing policy is configured, the logic runs at most once at a time.
+        """
+        if self._max_concurrency is not None:
+            try:
+                self._max_concurrency = int(self._max_concurrency)
+                if self._max_concurrency < 1:
+                    raise ValueError
+            except (ValueError, TypeError):
+                self.logger.warning(f"Logic '{self._name}': Invalid value '{self._max_concurrency}' for attribute 'max_concurrency' - the number of concurrent runs is not limited")
+                self._max_concurrency = None
+        if self._coalesce is not None:
+            self._coalesce = str(self._coalesce).lower()
+            if self._coalesce not in COALESCE_POLICIES:
+                self.logger.warning(f"Logic '{self._name}': Invalid value '{self._coalesce}' for attribute 'coalesce' (valid: {', '.join(COALESCE_POLICIES)}) - using 'queue'")
+                self._coalesce = 'queue'
+            if self._max_concurrency is None:
+                self._max_concurrency = 1
+        elif self._max_concurrency is not None:
+            self._coalesce = 'queue'
+
+    def _begin_run(self, task):
+        """
+        Start a run of the logic, if the maximum number of concurrent runs is not reached
+
+        Otherwise the trigger is handled according to the coalescing policy of the logic:
+
+        - 'queue': the trigger is kept and the logic runs for it after an active run has finished
+        - 'drop': the trigger is skipped
+        - 'latest': only the latest trigger is kept and the logic runs once more for it after an active run has finished
+
+        This method is called by the scheduler
+
+        :param task: trigger of the run (by, source, dest, value and the time the trigger was queued)
+        :type task: tuple
+
+        :return: True, if the logic may run now
+        :rtype: bool
+        """
+        if self._max_concurrency is None:
+            return True
+        with self._run_lock:
+            if self._running < self._max_concurrency:
+                self._running += 1
+                return True
+            if self._coalesce == 'drop':
+                self._statistics.count_trigger('skipped')
+                return False
+            if self._coalesce == 'latest' and self._pending:
+                self._pending.clear()
+                self._statistics.count_trigger('coalesced')
+            else:
+                self._statistics.count_trigger('queued')
+            self._pending.append(task)
+            return False
+
+    def _end_run(self):
+        """
+        Finish a run of the logic
+
+        This method is called by the scheduler
+
+        :return: the next pending trigger, which the caller has to run instead of finishing the run, or None
+        :rtype: tuple | None
+        """
+        if self._max_concurrency is None:
+            return None
+        with self._run_lock:
+            if self._pending:
+                return self._pending.popleft()
+            self._running -= 1
+            return None
+
     def trigger(self, by='Logic', source=None, value=None, dest=None, dt=None):
         if self._enabled:
             self.scheduler.trigger(self._logicname_prefix+self._name, self, prio=self._prio, by=by, source=source, dest=dest, value=value, dt=dt)
@@ -1329,11 +1574,12 @@ class Logic():
                 self.logger.warning("{}: Could not access logic file ({}) => ignoring.".format(self._name, self._pathname))
                 return
             try:
-                f = open(self._pathname, encoding='UTF-8')
-                code = f.read()
-                f.close()
-                code = code.lstrip('\ufeff')  # remove BOM
-                self._bytecode = compile(code, self._pathname, 'exec')
+                vardir = self.sh.get_vardir() if hasattr(self.sh, 'get_vardir') else None
+                self._bytecode = load_logic_bytecode(self._pathname, vardir)
+                self._async_mode = get_async_mode(self._bytecode)
+                if self._async_mode is not None and self._run_in_process:
+                    self.logger.warning(f"Logic {self._name}: Async logics are run on the core event loop, the attribute 'run_in_process' is ignored")
+                    self._run_in_process = False
             except Exception as e:
                 self.logger.exception("Exception: {}".format(e))
         else:
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+
+"""
+This library executes logics in a pool of worker processes.
+
+Logics, that do real computations, hold the GIL for a long time and delay item evals and
+other logics running in the worker threads of the scheduler. A logic with the attribute
+``run_in_process: True`` is executed in a worker process instead. The worker thread of the
+scheduler waits for the result without holding the GIL.
+
+A logic running in a worker process has no access to the objects of SmartHomeNG. It gets:
+
+- ``sh.<item path>()`` and ``items.return_item(<path>)()``: the value of an item from a snapshot,
+  that is taken when the logic starts (the items of the logic attribute ``process_items`` or
+  all items)
+- ``sh.<item path>(value)``: set the value of an item. The values are set in the order they
+  have been set by the logic, after the logic has finished
+- ``<item>.property.path``, ``.value``, ``.type``, ``.last_change``, ``.last_update`` and ``.prev_value``
+- ``logger``: log messages are logged after the logic has finished
+- ``trigger``, ``logic.name`` and the user parameters of the logic (``logic.<parameter>``)
+- ``LeaveLogic`` and the modules math, time, datetime and random (other modules can be imported)
+
+Everything else (e.g. ``sh.scheduler``, ``logics``, ``shtime``, ``item.timer()``) raises
+a ``ProcessLogicError``.
+
+:Warning: This library is part of the core of SmartHomeNG. It **should not be called directly** from plugins!
+"""
+
+import concurrent.futures
+import datetime
+import logging
+import marshal
+import math
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+
+
+logger = logging.getLogger(__name__)
+
+# types of item values, that are passed to the worker processes (values of other types are not in the snapshot)
+SNAPSHOT_TYPES = (bool, int, float, str, list, dict, tuple, type(None), datetime.datetime, datetime.date, datetime.time, datetime.timedelta)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ProcessLogicError(Exception):
+    """
+    Raised, if a logic running in a worker process uses an object, that is not available there
+    """
+    pass
+
+
+class LogicProcessException(Exception):
+    """
+    Raised in SmartHomeNG, if a logic running in a worker process raised an exception
+
+    :param info: dict with the exception ('exception'), file, line and function of the error and the traceback
+    """
+
+    def __init__(self, info):
+        super().__init__(info['exception'])
+        self.info = info
+
+
+class LeaveLogic(Exception):
+    """
+    'raise LeaveLogic(reason)' within a logic running in a worker process
+    """
+    pass
+
+
+# --------------------------------------------------------------------------------------
+# Objects available to a logic in the worker process
+
+class _Property:
+
+    def __init__(self, item):
+        self._item = item
+
+    def __getattr__(self, name):
+        entry = self._item._entry()
+        if name == 'path':
+            return self._item._path
+        if name == 'value':
+            return entry[0]
+        if name in ('type', 'last_change', 'last_update', 'prev_value'):
+            return entry[('value', 'type', 'last_change', 'last_update', 'prev_value').index(name)]
+        raise ProcessLogicError(f"item.property.{name} is not available in a logic running in a worker process")
+
+
+class _Item:
+
+    def __init__(self, context, path):
+        self._context = context
+        self._path = path
+
+    def _entry(self):
+        entry = self._context.snapshot.get(self._path)
+        if entry is None:
+            raise ProcessLogicError(f"Item '{self._path}' is not in the snapshot of the logic (check the logic attribute 'process_items')")
+        return entry
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        path = self._path + '.' + name
+        if self._context.is_path(path):
+            return _Item(self._context, path)
+        raise ProcessLogicError(f"'{path}' is not available in a logic running in a worker process")
+
+    @property
+    def property(self):
+        return _Property(self)
+
+    def __call__(self, value=None, caller='Logic', source=None, dest=None, key=None, index=None, default=None):
+        entry = self._entry()
+        if value is None:
+            if key is not None:
+                return entry[0].get(key, default)
+            if index is not None:
+                return entry[0][index]
+            return entry[0]
+        if key is not None or index is not None:
+            raise ProcessLogicError(f"Item '{self._path}': setting a key or index is not available in a logic running in a worker process")
+        self._context.writes.append((self._path, value, caller, source, dest))
+        self._context.snapshot[self._path] = (value,) + entry[1:]
+        return None
+
+    def __repr__(self):
+        return self._path
+
+
+class _Sh:
+
+    def __init__(self, context):
+        self._context = context
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if self._context.is_path(name):
+            return _Item(self._context, name)
+        raise ProcessLogicError(f"sh.{name} is not available in a logic running in a worker process")
+
+    def return_item(self, path):
+        if path in self._context.snapshot:
+            return _Item(self._context, path)
+        return None
+
+
+class _Items:
+
+    def __init__(self, context):
+        self._context = context
+
+    def __getattr__(self, name):
+        raise ProcessLogicError(f"items.{name} is not available in a logic running in a worker process")
+
+    def return_item(self, path):
+        if path in self._context.snapshot:
+            return _Item(self._context, path)
+        return None
+
+
+class _Logger:
+
+    def __init__(self, context):
+        self._context = context
+
+    def _log(self, level, msg, *args, exc_info=False, **kwargs):
+        text = str(msg) % args if args else str(msg)
+        if exc_info:
+            text += '\n' + traceback.format_exc()
+        self._context.records.append((level, text))
+
+    def debug(self, msg, *args, **kwargs):
+        self._log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self._log(logging.INFO, msg, *args, **kwargs)
+
+    def notice(self, msg, *args, **kwargs):
+        self._log(29, msg, *args, **kwargs)
+
+    def warning(self, msg, *args, **kwargs):
+        self._log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, *args, **kwargs):
+        self._log(logging.ERROR, msg, *args, **kwargs)
+
+    def exception(self, msg, *args, **kwargs):
+        self._log(logging.ERROR, msg, *args, exc_info=True)
+
+    def critical(self, msg, *args, **kwargs):
+        self._log(logging.CRITICAL, msg, *args, **kwargs)
+
+    def __getattr__(self, name):
+        raise ProcessLogicError(f"logger.{name} is not available in a logic running in a worker process")
+
+
+class _Logic:
+
+    def __init__(self, name, parameters):
+        self._name = name
+        self._parameters = parameters
+
+    @property
+    def name(self):
+        return self._name
+
+    def __getattr__(self, name):
+        if name in self._parameters:
+            return self._parameters[name]
+        raise ProcessLogicError(f"logic.{name} is not available in a logic running in a worker process")
+
+
+class _Context:
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.writes = []
+        self.records = []
+        self._prefixes = None
+
+    def is_path(self, path):
+        """
+        True, if path is an item or the parent of an item in the snapshot
+        """
+        if path in self.snapshot:
+            return True
+        if self._prefixes is None:
+            self._prefixes = set()
+            for item_path in self.snapshot:
+                parts = item_path.split('.')
+                for i in range(1, len(parts)):
+                    self._prefixes.add('.'.join(parts[:i]))
+        return path in self._prefixes
+
+
+def _run(name, bytecode, parameters, trigger, snapshot):
+    """
+    Execute a logic (in a worker process)
+
+    :return: dict with the item writes, the log records, the reason of a LeaveLogic, the exception info and the CPU time
+    """
+    start = time.process_time()
+    context = _Context(snapshot)
+    namespace = {'__name__': '__main__', 'sh': _Sh(context), 'items': _Items(context), 'logger': _Logger(context),
+                 'trigger': trigger, 'logic': _Logic(name, parameters), 'LeaveLogic': LeaveLogic,
+                 'math': math, 'time': time, 'datetime': datetime, 'random': random}
+    result = {'writes': context.writes, 'records': context.records, 'left': None, 'exception': None}
+    try:
+        exec(marshal.loads(bytecode), namespace)
+    except LeaveLogic as e:
+        result['left'] = str(e)
+    except SystemExit:
+        pass
+    except Exception as e:
+        tb = traceback.extract_tb(sys.exc_info()[2])[-1]
+        result['exception'] = {'exception': f"{e.__class__.__name__}: {e}", 'file': tb[0], 'line': tb[1], 'function': tb[2],
+                               'traceback': traceback.format_exc()}
+    result['cpu'] = time.process_time() - start
+    return result
+
+
+# --------------------------------------------------------------------------------------
+# Execution of logics in SmartHomeNG
+
+def get_process_pool(processes=None):
+    """
+    Returns the pool of worker processes for logics (the pool is created on the first call)
+
+    :param processes: number of worker processes (default: number of CPUs)
+    :type processes: int
+
+    :rtype: concurrent.futures.ProcessPoolExecutor
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            processes = max(1, int(processes or os.cpu_count() or 1))
+            # the worker processes are forked, because a spawned process would import the main script of SmartHomeNG
+            context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+            _pool = concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context)
+            logger.info(f"Created pool of {processes} worker processes for logics")
+        return _pool
+
+
+def start_process_pool(processes=None):
+    """
+    Create the pool of worker processes and fork the worker processes
+
+    This has to be called while SmartHomeNG is still single threaded (before the scheduler and
+    the plugins start their threads), because forking a multithreaded process may deadlock the
+    worker processes. A pool created later by get_process_pool() (e.g. after a worker process died)
+    forks the worker processes on the first run of a logic.
+
+    :param processes: number of worker processes (default: number of CPUs)
+    :type processes: int
+    """
+    pool = get_process_pool(processes)
+    # the worker processes of a 'fork' pool are all started by the first submit
+    pool.submit(os.getpid).result()
+
+
+def shutdown_process_pool():
+    """
+    Shut the pool of worker processes down (when SmartHomeNG stops)
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        if sys.version_info >= (3, 9):
+            pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            # Python 3.8 does not cancel the pending runs on shutdown
+            pool.shutdown(wait=False)
+
+
+def create_snapshot(items, patterns=None):
+    """
+    Create the snapshot of the item values for a logic running in a worker process
+
+    :param items: instance of lib.item.Items
+    :param patterns: list of item paths (may contain '*', like watch_item) or None for all items
+
+    :return: dict item path -> (value, type, last_change, last_update, prev_value)
+    :rtype: dict
+    """
+    if patterns:
+        selected = {}
+        for pattern in patterns:
+            for item in items.match_items(pattern):
+                selected[item._path] = item
+        selected = selected.values()
+    else:
+        selected = items.return_items()
+    snapshot = {}
+    for item in selected:
+        value = item._value
+        if not isinstance(value, SNAPSHOT_TYPES):
+            continue
+        snapshot[item._path] = (value, item._type, item.last_change(), item.last_update(), item.prev_value())
+    return snapshot
+
+
+def get_logic_parameters(logic):
+    """
+    Returns the user parameters of a logic (the attributes with simple values)
+    """
+    return {name: value for name, value in vars(logic).items()
+            if not name.startswith('_') and isinstance(value, SNAPSHOT_TYPES)}
+
+
+def execute_logic(logic, logic_globals, processes=None):
+    """
+    Execute a logic in a worker process and wait for the result
+
+    The item values set by the logic are set and the messages logged by the logic are logged
+    after the logic has finished.
+
+    :param logic: logic object
+    :param logic_globals: namespace of the logic (built by the scheduler)
+    :param processes: number of worker processes, if the pool has to be created
+
+    :return: CPU time of the logic in the worker process (in seconds)
+    :rtype: float
+
+    :raises: LeaveLogic (of lib.scheduler), if the logic has been left, LogicProcessException, if the logic raised an exception
+             (the CPU time of the logic is in the attribute 'process_cpu' of the exception)
+    """
+    items = logic_globals['items']
+    logic_logger = logic_globals['logger']
+    snapshot = create_snapshot(items, getattr(logic, '_process_items', None))
+    bytecode = getattr(logic, '_marshalled_bytecode', None)
+    if bytecode is None or bytecode[0] is not logic._bytecode:
+        bytecode = (logic._bytecode, marshal.dumps(logic._bytecode))
+        logic._marshalled_bytecode = bytecode
+
+    future = get_process_pool(processes).submit(_run, logic.name, bytecode[1], get_logic_parameters(logic),
+                                                logic_globals['trigger'], snapshot)
+    try:
+        result = future.result()
+    except concurrent.futures.process.BrokenProcessPool as e:
+        # a worker process died, a new pool is created for the next run
+        shutdown_process_pool()
+        raise LogicProcessException({'exception': f"Worker process terminated: {e}", 'file': getattr(logic, '_pathname', ''),
+                                     'line': 0, 'function': '<module>', 'traceback': ''})
+
+    for level, text in result['records']:
+        logic_logger.log(level, text)
+    for path, value, caller, source, dest in result['writes']:
+        item = items.return_item(path)
+        if item is not None:
+            item(value, caller=caller, source=source, dest=dest)
+    if result['left'] is not None:
+        e = logic_globals['LeaveLogic'](result['left'])
+    elif result['exception'] is not None:
+        e = LogicProcessException(result['exception'])
+    else:
+        return result['cpu']
+    e.process_cpu = result['cpu']
+    raise e
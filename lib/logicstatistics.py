@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+
+"""
+This library records execution statistics of logics.
+
+For every run of a logic, the scheduler records the duration (wall and CPU time of the worker
+thread), the time the logic waited in the run queue and the trigger source. Exceptions raised
+by the logic are counted, as well as triggers, that have been queued, coalesced or skipped
+because the logic reached its maximum number of concurrent runs. For async logics, the number
+of coroutines in flight is counted (their CPU time is not recorded). The statistics can be read
+through the admin API and written to an item, that is configured with the logic attribute
+``statistics_item``.
+
+Additionally the next runs of a logic can be profiled with cProfile (opt-in, e.g. through the
+admin API). The result of the profiling is stored as text with the statistics.
+
+:Warning: This library is part of the core of SmartHomeNG. It **should not be called directly** from plugins!
+"""
+
+import bisect
+import cProfile
+import collections
+import io
+import logging
+import pstats
+import threading
+import time
+from datetime import datetime
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.01, 0.1, 1.0, 10.0)   # upper bounds of the duration histogram (in seconds)
+MAX_SOURCES = 100                           # maximum number of different trigger sources, that are counted
+PROFILE_LINES = 30                          # number of functions in the result of a profiling
+
+
+def _bucket_name(index):
+    if index == 0:
+        return f"<{DURATION_BUCKETS[0]}s"
+    if index == len(DURATION_BUCKETS):
+        return f">={DURATION_BUCKETS[-1]}s"
+    return f"<{DURATION_BUCKETS[index]}s"
+
+
+class LogicStatistics:
+    """
+    Execution statistics of a logic
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._coroutines = 0            # number of coroutines of the (async) logic in flight
+        self.reset()
+        self._profile = None
+        self._profile_runs = 0          # number of runs, that are still to be profiled
+        self._profiled_runs = 0
+        self._profile_active = False
+        self._profile_result = None
+        self._profile_time = None
+
+    def reset(self):
+        """
+        Reset the statistics (the result of a profiling is kept)
+        """
+        with self._lock:
+            self._since = datetime.now()
+            self._runs = 0
+            self._exceptions = 0
+            self._wall_total = 0.0
+            self._wall_max = 0.0
+            self._cpu_total = 0.0
+            self._wait_total = 0.0
+            self._wait_max = 0.0
+            self._wait_count = 0
+            self._histogram = [0] * (len(DURATION_BUCKETS) + 1)
+            self._sources = collections.Counter()
+            self._last_duration = None
+            self._triggers = {'queued': 0, 'coalesced': 0, 'skipped': 0}
+
+    def record_run(self, wall, cpu, wait=None, by=None, source=None, exception=False):
+        """
+        Record a run of the logic
+
+        :param wall: duration of the run (in seconds)
+        :param cpu: CPU time of the worker thread (and of the worker process of the logic) during the run (in seconds)
+        :param wait: time the logic waited in the run queue (in seconds)
+        :param by: caller, that triggered the logic (e.g. 'Item' or 'Scheduler')
+        :param source: source of the trigger (e.g. the path of the triggering item)
+        :param exception: True, if the logic raised an exception
+        """
+        index = bisect.bisect_right(DURATION_BUCKETS, wall)
+        trigger = (by, source)
+        with self._lock:
+            self._runs += 1
+            self._wall_total += wall
+            if wall > self._wall_max:
+                self._wall_max = wall
+            self._cpu_total += cpu
+            self._histogram[index] += 1
+            self._last_duration = wall
+            if exception:
+                self._exceptions += 1
+            if wait is not None:
+                self._wait_count += 1
+                self._wait_total += wait
+                if wait > self._wait_max:
+                    self._wait_max = wait
+            if trigger in self._sources or len(self._sources) < MAX_SOURCES:
+                self._sources[trigger] += 1
+
+    def count_trigger(self, action):
+        """
+        Count a trigger, that could not be run immediately because of the concurrency limit of the logic
+
+        :param action: 'queued', 'coalesced' (replaced by a later trigger) or 'skipped'
+        :type action: str
+        """
+        with self._lock:
+            self._triggers[action] += 1
+
+    def count_coroutine(self, delta):
+        """
+        Count a coroutine of an async logic, that has been started (delta=1) or has finished (delta=-1)
+        """
+        with self._lock:
+            self._coroutines += delta
+
+    def get_statistics(self, top=5):
+        """
+        Returns the statistics (serializable to json)
+
+        :param top: number of trigger sources to return (the ones that caused the most runs)
+        :type top: int
+
+        :return: statistics of the logic
+        :rtype: dict
+        """
+        with self._lock:
+            runs = self._runs
+            result = {
+                'since': self._since.isoformat(),
+                'runs': runs,
+                'exceptions': self._exceptions,
+                'duration_avg': round(self._wall_total / runs, 6) if runs else None,
+                'duration_max': round(self._wall_max, 6),
+                'duration_last': round(self._last_duration, 6) if self._last_duration is not None else None,
+                'duration_total': round(self._wall_total, 6),
+                'cpu_total': round(self._cpu_total, 6),
+                'wait_avg': round(self._wait_total / self._wait_count, 6) if self._wait_count else None,
+                'wait_max': round(self._wait_max, 6),
+                'histogram': {_bucket_name(i): count for i, count in enumerate(self._histogram)},
+                'triggers_queued': self._triggers['queued'],
+                'triggers_coalesced': self._triggers['coalesced'],
+                'triggers_skipped': self._triggers['skipped'],
+                'coroutines_in_flight': self._coroutines,
+                'top_triggers': [(f"{by}:{source}" if source else str(by), count)
+                                 for (by, source), count in self._sources.most_common(top)],
+                'profiling': self._profile_runs > 0,
+            }
+            if self._profile_result is not None:
+                result['profile'] = {'time': self._profile_time.isoformat(), 'runs': self._profiled_runs,
+                                     'result': self._profile_result}
+        return result
+
+    # -----------------------------------------------------------------------------------------
+    #   Profiling of the next runs of a logic with cProfile
+    # -----------------------------------------------------------------------------------------
+
+    def start_profiling(self, runs=1):
+        """
+        Profile the next runs of the logic
+
+        :param runs: number of runs to profile
+        :type runs: int
+        """
+        with self._lock:
+            self._profile = cProfile.Profile()
+            self._profile_runs = max(int(runs), 1)
+            self._profiled_runs = 0
+            self._profile_result = None
+        logger.info(f"Profiling of the next {self._profile_runs} run(s) of the logic started")
+
+    def get_profiler(self):
+        """
+        Returns the profiler for the next run or None, if the run is not to be profiled
+
+        If the logic is already executed by another worker thread with the profiler, None is
+        returned. The profiler has to be returned with end_profiled_run() after the run.
+        """
+        if self._profile_runs == 0:
+            return None
+        with self._lock:
+            if self._profile_runs == 0 or self._profile_active:
+                return None
+            self._profile_active = True
+            return self._profile
+
+    def end_profiled_run(self, profile):
+        """
+        Finish a run, that has been profiled
+
+        :param profile: the profiler returned by get_profiler()
+        """
+        with self._lock:
+            self._profile_active = False
+            if profile is not self._profile:
+                # profiling has been restarted meanwhile
+                return
+            self._profiled_runs += 1
+            self._profile_runs -= 1
+            if self._profile_runs > 0:
+                return
+            self._profile = None
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        with self._lock:
+            self._profile_result = stream.getvalue()
+            self._profile_time = datetime.now()
+
+
+def write_statistics_items(logics, items):
+    """
+    Write the statistics of the logics to the items configured with the logic attribute 'statistics_item'
+
+    :param logics: instance of lib.logic.Logics
+    :param items: instance of lib.item.Items
+
+    :return: number of updated items
+    :rtype: int
+    """
+    count = 0
+    for name in logics.return_loaded_logics():
+        logic = logics.return_logic(name)
+        path = getattr(logic, 'statistics_item', None)
+        if not path or logic._statistics is None:
+            continue
+        item = items.return_item(path)
+        if item is None:
+            logger.warning(f"Logic '{name}': statistics_item '{path}' not found")
+            continue
+        statistics = logic._statistics.get_statistics()
+        statistics.pop('profile', None)
+        item(statistics, 'Logic', 'statistics')
+        count += 1
+    return count
@@ -22,6 +22,9 @@
 import logging
 import os
 import sys
+import time
+import pickle
+import threading
 import collections
 
 from lib.utils import Utils
@@ -51,6 +54,231 @@ all_itemprefixdefinitions = {}
 all_prefixes_tuple = None
 
 
+# --------------------------------------------------------------------------------------
+# Cache for the parsed metadata files (plugin.yaml / module.yaml)
+
+METADATA_CACHE_FILE = 'metadata.cache'     # cache file for the parsed metadata files (in ../var/run)
+METADATA_CACHE_FORMAT = 1
+
+
+def _file_signature(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class MetadataCache():
+    """
+    Cache for the parsed metadata files of plugins and modules
+
+    The parsed content of every metadata file is stored (pickled) together with the mtime and size
+    of the file and the time it took to parse the file. An entry is only used, if the file has not
+    been changed. The whole cache is discarded, if the version of SmartHomeNG or Python changes.
+
+    The cache file is read on the first lookup and written by save() (after the plugins are loaded).
+    """
+
+    def __init__(self, filename=None, key=''):
+        self._lock = threading.Lock()
+        self._filename = filename
+        self._key = key
+        self._entries = None        # filename -> (signature, parse time, pickled data)
+        self._changed = False
+        self._lookups = 0
+        self._hits = 0
+        self._saved = 0.0
+
+    def _load(self):
+        self._entries = {}
+        if self._filename is None:
+            return
+        try:
+            with open(self._filename, 'rb') as f:
+                cache = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.info(f"Metadata cache {self._filename} is unreadable and is rebuilt: {e}")
+            return
+        if isinstance(cache, dict) and cache.get('key') == self._key:
+            self._entries = cache.get('entries', {})
+        else:
+            logger.info(f"Metadata cache {self._filename} is outdated and is rebuilt")
+
+    def is_cached(self, filename):
+        """
+        Returns True, if the cache contains the unchanged content of a metadata file
+
+        :param filename: name of the metadata file
+        :type filename: str
+        :rtype: bool
+        """
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            entry = self._entries.get(filename)
+        return entry is not None and entry[0] == _file_signature(filename)
+
+    def get(self, filename):
+        """
+        Returns the parsed content of a metadata file from the cache
+
+        Every call returns a new copy of the data, because the Metadata instances change it.
+
+        :param filename: name of the metadata file
+        :type filename: str
+
+        :return: parsed content or None, if the file is not in the cache or has been changed
+        :rtype: OrderedDict | None
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self._lookups += 1
+            entry = self._entries.get(filename)
+        if entry is None or entry[0] != _file_signature(filename):
+            return None
+        try:
+            data = pickle.loads(entry[2])
+        except Exception:
+            return None
+        with self._lock:
+            self._hits += 1
+            self._saved += entry[1] - (time.perf_counter() - start)
+        return data
+
+    def put(self, filename, signature, data, parse_time):
+        """
+        Store the parsed content of a metadata file
+
+        :param filename: name of the metadata file
+        :param signature: (mtime, size) of the file before it was parsed
+        :param data: parsed content
+        :param parse_time: time it took to parse the file (in seconds)
+        """
+        try:
+            pickled = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.info(f"Metadata of {filename} cannot be cached: {e}")
+            return
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self._entries[filename] = (signature, parse_time, pickled)
+            self._changed = True
+
+    def save(self):
+        """
+        Write the cache file, if the cache has been changed
+
+        :return: True, if the cache file has been written
+        :rtype: bool
+        """
+        with self._lock:
+            if self._filename is None or not self._changed:
+                return False
+            cache = {'key': self._key, 'entries': self._entries}
+            self._changed = False
+        tmp_filename = self._filename + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self._filename), exist_ok=True)
+            with open(tmp_filename, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_filename, self._filename)
+        except Exception as e:
+            logger.warning(f"Could not write metadata cache {self._filename}: {e}")
+            try:
+                os.remove(tmp_filename)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def get_statistics(self):
+        """
+        Returns the number of lookups, the number of cache hits and the estimated time saved (in seconds)
+        """
+        with self._lock:
+            return {'lookups': self._lookups, 'hits': self._hits, 'saved': round(max(self._saved, 0.0), 6)}
+
+
+_metadata_cache = None
+
+
+def get_metadata_cache(sh=None):
+    """
+    Returns the cache for parsed metadata files
+
+    On the first call, the cache is set up for the var directory and the version of SmartHomeNG.
+
+    :param sh: SmartHomeNG main object
+    """
+    global _metadata_cache
+    if _metadata_cache is None:
+        filename = None
+        if sh is not None and hasattr(sh, 'get_vardir'):
+            filename = os.path.join(sh.get_vardir(), 'run', METADATA_CACHE_FILE)
+        key = f"format={METADATA_CACHE_FORMAT}, version={getattr(sh, 'version', '?')}, python={sys.version}"
+        _metadata_cache = MetadataCache(filename, key)
+    return _metadata_cache
+
+
+def load_metadata_file(sh, filename):
+    """
+    Returns the parsed content of a metadata file (from the cache, if the file is unchanged)
+
+    :param sh: SmartHomeNG main object
+    :param filename: name of the metadata file
+
+    :return: parsed content or None, if the file could not be loaded
+    :rtype: OrderedDict | None
+    """
+    cache = get_metadata_cache(sh)
+    data = cache.get(filename)
+    if data is None:
+        signature = _file_signature(filename)
+        start = time.perf_counter()
+        data = shyaml.yaml_load(filename, ordered=True)
+        if data is not None and signature is not None:
+            cache.put(filename, signature, data, time.perf_counter() - start)
+    return data
+
+
+# --------------------------------------------------------------------------------------
+# Results of the checks of item attributes
+#
+# Many items have the same attribute with the same value (e.g. items created from structs).
+# The result of check_itemattribute() is kept for an (attribute, type of value, value), if
+# the check did not log anything and the result is immutable.
+
+_checked_attributes = {}
+_check_statistics = {'checks': 0, 'memoized': 0, 'time': 0.0}
+_value_warnings = 0
+
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
+
+def clear_attribute_checks():
+    """
+    Forget the results of item attribute checks (e.g. after the definitions have been changed)
+    """
+    _checked_attributes.clear()
+
+
+def get_attribute_check_statistics():
+    """
+    Returns the number of item attribute checks, how many results were reused and the estimated time saved (in seconds)
+    """
+    checks = _check_statistics['checks']
+    memoized = _check_statistics['memoized']
+    computed = checks - memoized
+    saved = _check_statistics['time'] / computed * memoized if computed else 0.0
+    return {'checks': checks, 'memoized': memoized, 'saved': round(saved, 6)}
+
+
 class Metadata():
 
     _version = '?'
@@ -92,7 +320,7 @@ class Metadata():
 
         # read complete definitions from metadata file
         filename = os.path.join(self._sh.get_basedir(), self.relative_filename)
-        self.meta = shyaml.yaml_load(filename, ordered=True)
+        self.meta = load_metadata_file(self._sh, filename)
 
         self.parameters = None
         self._paramlist = []
@@ -186,6 +414,10 @@ class Metadata():
             else:
                 logger.debug(self._log_premsg + "has no item definitions in metadata")
 
+            if self.itemdefinitions is not None or self.itemprefixdefinitions is not None:
+                # results of earlier checks may depend on replaced definitions
+                clear_attribute_checks()
+
             # build dict for checking of item attributes and their values
             if self.itemdefinitions is not None:
                 for attr_name in self.itemdefinitions:
@@ -227,6 +459,8 @@ class Metadata():
             if self.plugin_functions is not None:
                 # self._test_definitions(self._plugin_functionlist, self.plugin_functions)
                 pass
+            if self.plugin_functions is not None and logger.isEnabledFor(logging.INFO):
+                # the definition strings are only logged here, they are built on demand (e.g. for the admin interface)
                 dummy = self.get_plugin_function_defstrings(with_type=False, with_default=False)
                 dummy = self.get_plugin_function_defstrings(with_type=True, with_default=False)
                 dummy = self.get_plugin_function_defstrings(with_type=False, with_default=True)
@@ -748,6 +982,7 @@ class Metadata():
         """
         Returns the value converted to the parameters type
         """
+        global _value_warnings
         result = False
         if definition is not None:
             typ = definition.get('type', 'foo')
@@ -761,6 +996,7 @@ class Metadata():
                 if is_default:
                     logger.error(self._log_premsg+f"Invalid default '{orig}' in metadata file '{self.relative_filename}' for {definition['_type']} '{definition['_name']}' -> using '{result}' instead")
                 else:
+                    _value_warnings += 1
                     logger.warning(self._log_premsg+f"Invalid value '{orig}' for {definition['_type']} '{definition['_name']}' -> using '{result}' instead {definition.get('_def_in', '')}")
         return result
 
@@ -1215,6 +1451,34 @@ class Metadata():
         :param value:
         :return:
         """
+        _check_statistics['checks'] += 1
+        try:
+            # the type is part of the key, because 1 == 1.0 == True
+            key = (attribute, value.__class__, value)
+            checked = _checked_attributes.get(key)
+        except TypeError:
+            # unhashable value (e.g. a list)
+            key = checked = None
+        if checked is not None:
+            _check_statistics['memoized'] += 1
+            return checked[0]
+
+        start = time.perf_counter()
+        warnings = _value_warnings
+        result, definition_found = self._check_itemattribute(item, attribute, value, defined_in_file)
+        _check_statistics['time'] += time.perf_counter() - start
+        if key is not None and definition_found and warnings == _value_warnings and isinstance(result, _IMMUTABLE_TYPES):
+            _checked_attributes[key] = (result,)
+        return result
+
+
+    def _check_itemattribute(self, item, attribute, value, defined_in_file):
+        """
+        Checks the value of an item attribute (see check_itemattribute)
+
+        :return: tuple (checked value, True if the attribute is defined and the value could be converted)
+        :rtype: tuple
+        """
         global all_prefixes_tuple
 
         self._log_premsg = "Item '{}', attribute '{}': ".format(item.property.path, attribute)
@@ -1238,7 +1502,7 @@ class Metadata():
             if not(attribute.startswith(all_prefixes_tuple)):
                 if not (item.property.path.startswith('env.core.') or item.property.path.startswith('env.system.')):
                     logger.notice(f"Item '{item.property.path}', attribute '{attribute}': Attribute is undefined and has value '{value}' {def_in}")
-                return value
+                return value, False
 
         attr_definition['_def_in'] = def_in
         attr_type = attr_definition.get('type', 'foo')
@@ -1248,7 +1512,9 @@ class Metadata():
         # test if value can be converted into defined type
         if self._test_value(value, attr_definition):
             value = self._convert_value(value, attr_definition)
+            converted = True
         else:
+            converted = False
             # handle invalid value that cannot be converted to defined type
             additional_text = ''
             default_value = attr_definition.get('default', None)
@@ -1260,7 +1526,7 @@ class Metadata():
             else:
                 value = default_value
 
-        return value
+        return value, converted
 
 
     def _compare_versions(self, vers1, vers2, operator, res_old=None):
@@ -36,9 +36,10 @@ from contextlib import contextmanager
 from importlib import import_module
 from queue import SimpleQueue
 from threading import Lock, Thread
-from time import sleep, time
+from time import sleep, time, perf_counter
 from typing import Any, Generator
 
+import lib.connectionstatistics
 from lib.network import Tcp_client
 from lib.model.sdp.globals import (
     sanitize_param, CONN_NET_TCP_REQ, CONN_NULL, CONN_SER_DIR, CONNECTION_TYPES,
@@ -120,6 +121,11 @@ class SDPConnection(object):
         # check if some of the arguments are usable
         self._set_connection_params()
 
+        # traffic statistics
+        if name is None and hasattr(self._plugin, 'get_fullname'):
+            name = self._plugin.get_fullname()
+        self._statistics = lib.connectionstatistics.register('SDP', f'{self.__class__.__name__} {name or ""}'.strip())
+
         # tell someone about our actual class
         if not kwargs.get('done', True):
             self.logger.debug(f'connection initialized from {self.__class__.__name__}')
@@ -135,6 +141,7 @@ class SDPConnection(object):
 
             if self._open():
                 self._is_connected = True
+                self._statistics.connected()
                 self._send_init_on_open()
         except Exception:
             raise
@@ -149,6 +156,7 @@ class SDPConnection(object):
         self.logger.debug('close method called for connection')
         self._close()
         self._is_connected = False
+        self._statistics.disconnected()
 
     def send(self, data_dict: dict, **kwargs) -> Any:
         """
@@ -178,7 +186,13 @@ class SDPConnection(object):
                 self._send_lock.acquire()
 
             if self._send_init_on_send():
+                self._statistics.sent(lib.connectionstatistics.data_size(data))
+                start = perf_counter()
                 response = self._send(data_dict, **kwargs)
+                if response is not None:
+                    # request / reply
+                    self._statistics.record_latency(perf_counter() - start)
+                    self._statistics.received(lib.connectionstatistics.data_size(response))
         except Exception:
             raise
         finally:
@@ -195,6 +209,7 @@ class SDPConnection(object):
     def on_data_received(self, by: str | None, data: Any, command: str | None = None):
         """ callback for on_data_received event """
         if data:
+            self._statistics.received(lib.connectionstatistics.data_size(data))
             self.logger.debug(f'received raw data "{data}" from "{by}"')
             if self._data_received_callback:
                 self._data_received_callback(by, data)
@@ -202,6 +217,7 @@ class SDPConnection(object):
     def on_connect(self, by: str | None = None):
         """ callback for on_connect event """
         self._is_connected = True
+        self._statistics.connected()
         self.logger.info(f'on_connect called by {by}')
         if self._params[PLUGIN_ATTR_CB_ON_CONNECT]:
             self._params[PLUGIN_ATTR_CB_ON_CONNECT](by)
@@ -210,6 +226,7 @@ class SDPConnection(object):
         """ callback for on_disconnect event """
         self.logger.debug(f'on_disconnect called by {by}')
         self._is_connected = False
+        self._statistics.disconnected()
         if self._params[PLUGIN_ATTR_CB_ON_DISCONNECT]:
             self._params[PLUGIN_ATTR_CB_ON_DISCONNECT](by)
 
@@ -26,6 +26,7 @@ from lib.module import Modules
 import lib.shyaml as shyaml
 from lib.utils import Utils
 from lib.translation import translate as lib_translate
+import lib.asyncloop
 
 import logging
 import os
@@ -88,6 +89,8 @@ class SmartPlugin(SmartObject, Utils):
     _asyncio_state = 'unused'   # stored state of the asyncio use of the plugin
     _used_plugin_coro = None    # plugin coro used when calling start_asyncio (to be able to used by a generic 'restart asyncio' method
     _run_queue = None           # queue to send commends to the main-coro/plugin-coro
+    _asyncio_core_loop = False  # run the plugin coro on the shared core event loop instead of an own thread
+    _asyncio_future = None      # future of the main coro, if it runs on the core event loop
 
 #
 # the following methods need to be overwritten / implemented
@@ -140,6 +143,8 @@ class SmartPlugin(SmartObject, Utils):
         self._asyncio_state = 'unused'  # stored state of the asyncio use of the plugin
         self._used_plugin_coro = None   # plugin coro used when calling start_asyncio (to be able to used by a generic 'restart asyncio' method
         self._run_queue = None          # queue to send commends to the main-coro/plugin-coro
+        self._asyncio_core_loop = False # run the plugin coro on the shared core event loop instead of an own thread
+        self._asyncio_future = None     # future of the main coro, if it runs on the core event loop
 
 #
 # the following methods should be overwritten
@@ -1097,18 +1102,24 @@ class SmartPlugin(SmartObject, Utils):
         """
         return self._asyncio_state
 
-    def start_asyncio(self, plugin_coro: Coroutine) -> None:
+    def start_asyncio(self, plugin_coro: Coroutine, core_loop: bool = False) -> None:
         """
         Start the thread for the asyncio loop
 
         The started asyncio thread sets up the asyncio environment and starts the eventloop.
         The given plugin_coro is added as the main task to the eventloop.
 
+        With core_loop=True no thread is started: The plugin_coro runs on the shared event loop of
+        the SmartHomeNG core. It must not block the loop (no blocking I/O, no time.sleep()) and must
+        not stop or close the loop.
+
         This routine is to be called from the plugin's run() method
 
         :param plugin_coro: The asyncio coroutine which implements the async part of the plugin
+        :param core_loop: Run the plugin_coro on the shared core event loop
         """
         self._used_plugin_coro = plugin_coro
+        self._asyncio_core_loop = core_loop
         self._start_known_asyncio_coro()
 
     def _start_known_asyncio_coro(self) -> None:
@@ -1122,6 +1133,13 @@ class SmartPlugin(SmartObject, Utils):
             self.logger.error("Called '_start_known_asyncio_coro()' without known plugin_coro")
             return
 
+        if self._asyncio_core_loop:
+            self.logger.info("Starting asyncio plugin coroutine on the core event loop...")
+            core_loop = lib.asyncloop.get_core_loop()
+            self._asyncio_future = core_loop.run_coroutine(self._asyncio_main(self._used_plugin_coro), kind='plugin')
+            core_loop.add_component('plugins.'+self.get_fullname())
+            return
+
         threadname = 'plugins.'+self.get_fullname()+'.asyncio'
         try:
             self.pluginThread = threading.Thread(target=self._asyncio_loop_thread, name=threadname, daemon=False, kwargs={'plugin_coro': self._used_plugin_coro})
@@ -1141,6 +1159,19 @@ class SmartPlugin(SmartObject, Utils):
 
         self.put_command_to_run_queue('STOP')
         time.sleep(3)
+        if self._asyncio_future is not None:
+            future, self._asyncio_future = self._asyncio_future, None
+            try:
+                future.result(timeout=5)
+                self.logger.debug("_asyncio_main of plugin stopped")
+            except Exception as err:
+                # the plugin coro did not terminate: cancel it
+                future.cancel()
+                self._asyncio_loop = None
+                self.logger.notice(f"Error stopping _asyncio_main on the core event loop: {err!r}")
+            lib.asyncloop.get_core_loop().remove_component('plugins.'+self.get_fullname())
+            self._asyncio_state = 'stopped'
+            return
         try:
             self.pluginThread.join()
             self.logger.debug("_asyncio_loop_thread of plugin stopped")
@@ -1196,6 +1227,10 @@ class SmartPlugin(SmartObject, Utils):
 
         This method waits for the coroutine to be finished, to be able to return the result of the coroutine.
 
+        If the plugin runs on the shared core event loop and this method is called in the thread of
+        that loop (e.g. an async logic sets an item of the plugin), waiting would block the core event
+        loop. The coroutine is only scheduled then and None is returned.
+
         :param coro: A coroutine that should be run in the eventloop of the asyncio-thread
         :param return_exeption: If set to True, run_asyncio_coro returns exceptions instead of handling (logging) them itself
 
@@ -1204,6 +1239,15 @@ class SmartPlugin(SmartObject, Utils):
         if self._asyncio_loop is None:
             self.logger.error(f"run_asyncio_coro: Cannot run coro '{coro}' because no eventloop is active")
             return
+        if self._asyncio_core_loop and lib.asyncloop.get_core_loop().in_loop_thread():
+            self.logger.debug(f"run_asyncio_coro: Called in the thread of the core event loop, coro '{coro}' is scheduled without waiting for the result")
+            task = asyncio.ensure_future(coro, loop=self._asyncio_loop)
+
+            def log_exception(task):
+                if not task.cancelled() and task.exception() is not None:
+                    self.logger.error(f"run_asyncio_coro: Exception in coro '{coro}': {task.exception()}")
+            task.add_done_callback(log_exception)
+            return
         future = asyncio.run_coroutine_threadsafe(coro, self._asyncio_loop)
         # try:
         #     future = asyncio.run_coroutine_threadsafe(coro, self._asyncio_loop)
@@ -29,7 +29,7 @@ These classes, functions and methods are mainly meant to be used by plugin devel
 
 - class Network provides utility methods for network-related tasks
 - class Html provides methods for communication with resp. requests to a HTTP server
-- class Tcp_client provides a two-way TCP client implementation
+- class Tcp_client provides a two-way TCP client implementation (receiving in a thread per connection or in a shared reactor thread, optionally sending through a send queue)
 - class Tcp_server provides a TCP listener with connection / data callbacks
 - class Udp_server provides a UDP listener with data callbacks
 """
@@ -40,22 +40,35 @@ import traceback
 from inspect import signature
 import re
 import asyncio
+import concurrent.futures
 import logging
+import os
 import requests
 from iowait import IOWait
+import selectors
 import socket
 import struct
 import subprocess
 import threading
 import time
+from collections import deque
 from contextlib import suppress
+from itertools import islice
 from . import aioudp
+import lib.asyncloop
+import lib.connectionstatistics
 
 
 # Turn off ssl warnings from urllib
 requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
 logging.getLogger('urllib3').setLevel(logging.WARNING)
 
+# maximum number of queued messages written by Tcp_client with one vectored send
+try:
+    SEND_BUFFERS_MAX = min(os.sysconf('SC_IOV_MAX'), 256)
+except (AttributeError, ValueError, OSError):
+    SEND_BUFFERS_MAX = 64
+
 
 class Network(object):
     """
@@ -549,6 +562,9 @@ class Tcp_client(object):
     :param binary: Switch between binary and text mode. Text will be encoded / decoded using encoding parameter.
     :param terminator: Terminator to use to split received data into chunks (split lines <cr> for example). If integer then split into n bytes. Default is None means process chunks as received.
     :param timeout: Timeout to set for connected socket. Don't change without reason
+    :param shared_reactor: Receive in the shared reactor thread instead of a receive thread for this connection. If None, the default set in smarthome.yaml (``tcp_shared_reactor``) is used
+    :param send_queue: Queue sent messages and write them in the shared reactor thread, when the socket is writable (send() does not block). If None, the default set in smarthome.yaml (``tcp_send_queue``) is used
+    :param send_queue_limit: Maximum number of bytes in the send queue, messages exceeding the limit are rejected (a larger message is accepted, if the queue is empty)
 
     :type host: str
     :type port: int
@@ -563,13 +579,20 @@ class Tcp_client(object):
     :type binary: bool
     :type terminator: int | bytes | str
     :type timeout: int
+    :type shared_reactor: bool
+    :type send_queue: bool
+    :type send_queue_limit: int
     """
 
+    shared_reactor_default = False      # receive in the shared reactor thread, if shared_reactor is None
+    send_queue_default = False          # send through a send queue, if send_queue is None
+
     def __init__(self, host, port, name=None,
                  autoreconnect=True, autoconnect=None, connect_retries=5,
                  connect_cycle=5, retry_cycle=30, retry_abort=0,
                  abort_callback=None, binary=False, terminator=False, timeout=1,
-                 rate_limit=1, max_rate_connects=10):
+                 rate_limit=1, max_rate_connects=10, shared_reactor=None,
+                 send_queue=None, send_queue_limit=1048576):
         self.logger = logging.getLogger(__name__)
 
         # public properties
@@ -603,6 +626,21 @@ class Tcp_client(object):
         self._connect_counter = 0
         self._retry_round_counter = 0
         self._binary = binary
+        self._shared_reactor = Tcp_client.shared_reactor_default if shared_reactor is None else shared_reactor
+
+        # receive buffer for terminator mode
+        self._rx_buffer = bytearray()
+        self._rx_scanned = 0            # number of bytes at the start of the buffer, that have been searched for the terminator
+        self._rx_terminator = None      # terminator of the last search
+
+        # send queue: entries are [unsent part of the message (memoryview), future, size of the message]
+        self._send_queue_enabled = Tcp_client.send_queue_default if send_queue is None else send_queue
+        self._send_queue_limit = send_queue_limit
+        self._send_queue = deque()
+        self._send_queue_bytes = 0
+        self._send_lock = threading.Lock()
+        self._send_queue_empty = threading.Condition(self._send_lock)     # notified, when the send queue becomes empty
+        self._send_watched = False      # the shared reactor waits for the socket to become writable
 
         self._connected_callback = None
         self._receiving_callback = None
@@ -626,6 +664,7 @@ class Tcp_client(object):
             self.logger.info(f'{self._id} Initializing a connection to {self._host} on TCP port {self._port} {"with" if self._autoreconnect else "without"} autoreconnect')
         else:
             self.logger.error(f'{self._id} Connection to {self._host} not possible, invalid address')
+        self._statistics = lib.connectionstatistics.register('Tcp_client', self._id)
 
     def set_callbacks(self, connected=None, receiving=None, data_received=None, disconnected=None):
         """
@@ -725,28 +764,22 @@ class Tcp_client(object):
         """
         Send a message to the server. Can be a string, bytes or a bytes array.
 
-        :return: True if message has been successfully sent, else False.
+        In send queue mode the message is added to the send queue and send() returns without waiting
+        for the socket.
+
+        :return: True if message has been successfully sent (or queued), else False.
         :rtype: bool
         """
-        if not isinstance(message, (bytes, bytearray)):
-            try:
-                message = message.encode('utf-8')
-            except Exception:
-                self.logger.warning(f'{self._id} error encoding message for client')
-                return False
-
-        # automatically (re)connect on send attempt
-        if not self._is_connected:
-            if self._autoconnect:
-                self.logger.debug(f'{self._id} autoconnecting on send attempt, message is {message}')
-                self.connect()
-            else:
-                self.logger.warning(f'{self._id} trying to send {message}, but not connected and autoconnect not active. Aborting.')
-                return False
+        message = self._prepare_send(message)
+        if message is None:
+            return False
+        if self._send_queue_enabled:
+            return self._queue_message(message, None)
 
         try:
             if self._is_connected:
                 bytes_sent = self._socket.send(message)
+                self._statistics.sent(bytes_sent)
                 if bytes_sent != len(message):
                     self.logger.warning(f'{self._id} error sending message {message}: message truncated, sent {bytes_sent} of {len(message)} bytes')
             else:
@@ -759,10 +792,12 @@ class Tcp_client(object):
             else:
                 self.logger.warning(f'{self._id} detected disconnect, send failed.')
             self._is_connected = False
+            self._statistics.disconnected()
             try:
                 self._socket.shutdown()
             except Exception:
                 pass
+            self._clear_send_queue('connection lost')
             if self._disconnected_callback:
                 self._disconnected_callback(self)
             if self._autoreconnect:
@@ -776,6 +811,186 @@ class Tcp_client(object):
 
         return True
 
+    def send_async(self, message):
+        """
+        Send a message to the server and return a future for the completion of the send.
+
+        In send queue mode the message is added to the send queue and written in the shared reactor
+        thread, when the socket is writable. Messages queued while the socket is busy are written
+        together with one system call. Without send queue the message is sent by send().
+
+        :return: Future, the result is the number of bytes sent, when the message has been written to the socket completely. If the message cannot be sent, the exception of the future is set (ConnectionError or BufferError, if the send queue is full)
+        :rtype: concurrent.futures.Future
+        """
+        future = concurrent.futures.Future()
+        future.set_running_or_notify_cancel()
+        prepared = self._prepare_send(message)
+        if prepared is None:
+            future.set_exception(ConnectionError(f'{self._id} cannot send message'))
+        elif self._send_queue_enabled:
+            self._queue_message(prepared, future)
+        elif self.send(prepared):
+            future.set_result(len(prepared))
+        else:
+            future.set_exception(ConnectionError(f'{self._id} sending message failed'))
+        return future
+
+    def flush(self, timeout=None):
+        """
+        Wait until the messages in the send queue have been sent
+
+        :param timeout: maximum time to wait (in seconds, None: wait without limit)
+
+        :return: True, if the send queue is empty
+        :rtype: bool
+        """
+        with self._send_queue_empty:
+            if Tcp_reactor.in_reactor_thread():
+                # the queue is written by the reactor thread, waiting would block it
+                return not self._send_queue
+            return self._send_queue_empty.wait_for(lambda: not self._send_queue, timeout)
+
+    def send_queue_depth(self):
+        """
+        Returns the number of messages and the number of bytes in the send queue
+
+        :return: tuple (messages, bytes)
+        :rtype: tuple
+        """
+        with self._send_lock:
+            return len(self._send_queue), self._send_queue_bytes
+
+    def _prepare_send(self, message):
+        """
+        Encode a message for sending and connect automatically, if autoconnect is active
+
+        :return: the encoded message or None, if it cannot be sent
+        """
+        if not isinstance(message, (bytes, bytearray)):
+            try:
+                message = message.encode('utf-8')
+            except Exception:
+                self.logger.warning(f'{self._id} error encoding message for client')
+                return None
+
+        # automatically (re)connect on send attempt
+        if not self._is_connected:
+            if self._autoconnect:
+                self.logger.debug(f'{self._id} autoconnecting on send attempt, message is {message}')
+                self.connect()
+            else:
+                self.logger.warning(f'{self._id} trying to send {message}, but not connected and autoconnect not active. Aborting.')
+                return None
+        return message
+
+    def _queue_message(self, message, future):
+        """
+        Add a message to the send queue and let the shared reactor write it
+
+        :return: True, if the message has been queued
+        """
+        size = len(message)
+        error = None
+        watch = False
+        with self._send_lock:
+            if not self._is_connected or self._socket is None:
+                error = ConnectionError(f'{self._id} not connected')
+            elif self._send_queue and self._send_queue_bytes + size > self._send_queue_limit:
+                error = BufferError(f'{self._id} send queue full ({self._send_queue_bytes} bytes queued, limit is {self._send_queue_limit} bytes)')
+            elif size:
+                # a bytearray may be changed by the caller after send() returns
+                self._send_queue.append([memoryview(bytes(message) if isinstance(message, bytearray) else message), future, size])
+                self._send_queue_bytes += size
+                self._statistics.queued(len(self._send_queue), self._send_queue_bytes)
+                watch = not self._send_watched
+                self._send_watched = True
+                sock = self._socket
+        if error is not None:
+            self.logger.warning(f'{error}, message not sent')
+            if future is not None:
+                future.set_exception(error)
+            return False
+        if watch:
+            Tcp_reactor.get_instance().watch_write(sock, self)
+        elif not size and future is not None:
+            future.set_result(0)
+        return True
+
+    def _reactor_send(self, sock):
+        """
+        Write the queued messages, when the socket is writable (called in the shared reactor thread)
+
+        The unsent parts of the first messages in the queue are written with one vectored send.
+
+        :return: True, if data is left in the send queue
+        """
+        completed = []
+        error = None
+        with self._send_lock:
+            if sock is not self._socket:
+                # socket of a lost connection
+                return False
+            buffers = [entry[0] for entry in islice(self._send_queue, SEND_BUFFERS_MAX)]
+            try:
+                if hasattr(sock, 'sendmsg'):
+                    sent = sock.sendmsg(buffers)
+                else:
+                    sent = sock.send(b''.join(buffers))
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError as e:
+                sent = 0
+                error = e
+            remaining = sent
+            while remaining:
+                entry = self._send_queue[0]
+                if len(entry[0]) > remaining:
+                    entry[0] = entry[0][remaining:]
+                    break
+                remaining -= len(entry[0])
+                self._send_queue.popleft()
+                completed.append(entry)
+            self._send_queue_bytes -= sent
+            self._statistics.queued(len(self._send_queue), self._send_queue_bytes)
+            more = bool(self._send_queue) and error is None
+            if not more:
+                self._send_watched = False
+            if not self._send_queue:
+                self._send_queue_empty.notify_all()
+        if sent:
+            self._statistics.sent(sent, len(completed))
+        for view, future, size in completed:
+            if future is not None:
+                future.set_result(size)
+        if error is not None:
+            self.logger.warning(f'{self._id} detected disconnect, send failed: {error}')
+            # the receiving side detects the lost connection and handles it
+            with suppress(OSError):
+                sock.shutdown(socket.SHUT_RDWR)
+            self._clear_send_queue('connection lost')
+        return more
+
+    def _clear_send_queue(self, reason):
+        """
+        Discard the queued messages, the futures of the messages are set to a ConnectionError
+        """
+        with self._send_lock:
+            entries = list(self._send_queue)
+            self._send_queue.clear()
+            self._send_queue_bytes = 0
+            self._send_queue_empty.notify_all()
+            self._statistics.queued(0, 0)
+            watched = self._send_watched
+            self._send_watched = False
+            sock = self._socket
+        if watched and sock is not None:
+            Tcp_reactor.get_instance().unwatch_write(sock)
+        if entries:
+            self.logger.warning(f'{self._id} {len(entries)} queued messages not sent: {reason}')
+        for view, future, size in entries:
+            if future is not None:
+                future.set_exception(ConnectionError(f'{self._id} message not sent: {reason}'))
+
     def _connect_thread_worker(self):
         """
         Thread worker to handle connection.
@@ -796,12 +1011,15 @@ class Tcp_client(object):
                         self._last_connect = time.time()
                         if self._connected_callback:
                             self._connected_callback(self)
-                        name = f'TCP_Client {self._id}'
-                        self.__receive_thread = threading.Thread(target=self.__receive_thread_worker, name=name)
-                        self.__receive_thread.daemon = True
-                        self.__receive_thread.start()
+                        if self._shared_reactor:
+                            self._start_reactor_receive()
+                        else:
+                            name = f'TCP_Client {self._id}'
+                            self.__receive_thread = threading.Thread(target=self.__receive_thread_worker, name=name)
+                            self.__receive_thread.daemon = True
+                            self.__receive_thread.start()
                     except Exception:
-                        self.logger.error(f"could not start __receive_thread_worker for {self.name}")
+                        self.logger.error(f"could not start receiving for {self.name}")
                         raise
                     return True
                 else:
@@ -833,6 +1051,7 @@ class Tcp_client(object):
             self._socket.connect((f'{self._hostip}', int(self._port)))
             self._socket.settimeout(self._timeout)
             self._is_connected = True
+            self._statistics.connected()
             self.logger.info(f'{self._id} connected')
         # Connection error
         except Exception as err:
@@ -847,7 +1066,7 @@ class Tcp_client(object):
         self.logger.debug(f'{self._id} started receive thread')
         waitobj = IOWait()
         waitobj.watch(self._socket, read=True)
-        __buffer = b''
+        self._reset_receive_buffer()
 
         self._is_receiving = True
         if self._receiving_callback:
@@ -861,6 +1080,9 @@ class Tcp_client(object):
                         timeout = False
                         try:
                             msg = self._socket.recv(4096)
+                        except ConnectionResetError:
+                            # handled like a connection closed by the peer
+                            msg = None
                         except (TimeoutError, OSError) as e:
                             if isinstance(e, OSError) and e.errno not in (60, 65):
                                 raise
@@ -878,40 +1100,13 @@ class Tcp_client(object):
                             # # if not self._binary:
                             # #     msg = str.rstrip(str(msg, 'utf-8')).encode('utf-8')
 
-                            # If we work in line mode (with a terminator) slice buffer into single chunks based on terminator
-                            if self.terminator:
-                                __buffer += msg
-                                while True:
-                                    # terminator = int means fixed size chunks
-                                    if isinstance(self.terminator, int):
-                                        i = self.terminator
-                                        if i > len(__buffer):
-                                            break
-                                    # terminator is str or bytes means search for it
-                                    else:
-                                        i = __buffer.find(self.terminator)
-                                        if i == -1:
-                                            break
-                                        i += len(self.terminator)
-                                    line = __buffer[:i]
-                                    __buffer = __buffer[i:]
-                                    if self._data_received_callback is not None:
-                                        try:
-                                            self._data_received_callback(self, line if self._binary else str(line, 'utf-8').strip())
-                                        except Exception as iex:
-                                            self._log_exception(iex, f'lib.network {self._id} receive in terminator mode calling data_received_callback {self._data_received_callback} failed: {iex}')
-                            # If not in terminator mode just forward what we received
-                            else:
-                                if self._data_received_callback is not None:
-                                    try:
-                                        self._data_received_callback(self, msg)
-                                    except Exception as iex:
-                                        self._log_exception(iex, f'lib.network {self._id} calling data_received_callback {self._data_received_callback} failed: {iex}')
+                            self._process_received(msg)
                         # If empty peer has closed the connection
                         else:
                             if self.__running:
                                 self._is_receiving = False
                                 self._is_connected = False
+                                self._statistics.disconnected()
                                 try:
                                     self._socket.shutdown()
                                 except Exception:
@@ -923,6 +1118,7 @@ class Tcp_client(object):
                                     # default state, peer closed connection
                                     self.logger.warning(f'{self._id} connection closed by peer')
                                 waitobj.unwatch(self._socket)
+                                self._clear_send_queue('connection lost')
                                 if self._disconnected_callback is not None:
                                     try:
                                         self._disconnected_callback(self)
@@ -947,6 +1143,131 @@ class Tcp_client(object):
                 self._log_exception(ex, f'lib.network {self._id} receive thread died with unexpected error: {ex}. Go tell...')
         self._is_receiving = False
 
+    def _reset_receive_buffer(self):
+        self._rx_buffer = bytearray()
+        self._rx_scanned = 0
+        self._rx_terminator = None
+
+    def _process_received(self, msg):
+        """
+        Pass received data to the data_received_callback
+
+        In terminator mode the data is collected in a bytearray and split into chunks. The chunks
+        are framed one at a time, so a callback may change the terminator for the following chunks.
+        The search for the terminator continues after the part of the buffer, that has already been
+        searched. The consumed chunks are removed from the buffer once per received block.
+        """
+        # If not in terminator mode just forward what we received
+        if not self.terminator:
+            self._statistics.received(len(msg))
+            if self._data_received_callback is not None:
+                try:
+                    self._data_received_callback(self, msg)
+                except Exception as iex:
+                    self._log_exception(iex, f'lib.network {self._id} calling data_received_callback {self._data_received_callback} failed: {iex}')
+            return
+
+        # If we work in line mode (with a terminator) slice buffer into single chunks based on terminator
+        buffer = self._rx_buffer
+        buffer += msg
+        start = 0
+        chunks = 0
+        try:
+            while True:
+                terminator = self.terminator
+                if not terminator:
+                    break
+                # terminator = int means fixed size chunks
+                if isinstance(terminator, int):
+                    end = start + terminator
+                    if end > len(buffer):
+                        break
+                # terminator is str or bytes means search for it
+                else:
+                    if isinstance(terminator, str):
+                        terminator = terminator.encode('utf-8')
+                    if terminator != self._rx_terminator:
+                        self._rx_terminator = terminator
+                        self._rx_scanned = 0
+                    i = buffer.find(terminator, start + self._rx_scanned)
+                    if i == -1:
+                        # a terminator may begin in the last bytes of the buffer
+                        self._rx_scanned = max(len(buffer) - start - len(terminator) + 1, 0)
+                        break
+                    end = i + len(terminator)
+                    self._rx_scanned = 0
+                with memoryview(buffer) as view:
+                    line = bytes(view[start:end])
+                start = end
+                chunks += 1
+                if self._data_received_callback is not None:
+                    try:
+                        self._data_received_callback(self, line if self._binary else str(line, 'utf-8').strip())
+                    except Exception as iex:
+                        self._log_exception(iex, f'lib.network {self._id} receive in terminator mode calling data_received_callback {self._data_received_callback} failed: {iex}')
+        finally:
+            del buffer[:start]
+            self._statistics.received(len(msg), chunks)
+
+    def _start_reactor_receive(self):
+        """
+        Start receiving in the shared reactor thread
+        """
+        self.logger.debug(f'{self._id} receiving in shared reactor thread')
+        self._reset_receive_buffer()
+        self._is_receiving = True
+        if self._receiving_callback:
+            self._receiving_callback(self)
+        Tcp_reactor.get_instance().register(self._socket, self)
+
+    def _reactor_receive(self):
+        """
+        Receive data, when the socket is readable (called in the shared reactor thread)
+        """
+        timeout = False
+        try:
+            msg = self._socket.recv(4096)
+        except ConnectionResetError:
+            # handled like a connection closed by the peer
+            msg = None
+        except (TimeoutError, OSError) as e:
+            if isinstance(e, OSError) and e.errno not in (60, 65):
+                raise
+            msg = None
+            timeout = True
+
+        if msg:
+            self._process_received(msg)
+            return
+
+        # If empty peer has closed the connection
+        Tcp_reactor.get_instance().unregister(self._socket)
+        self._is_receiving = False
+        self._is_connected = False
+        self._statistics.disconnected()
+        if not self.__running:
+            # socket shut down by self.close, no error
+            self.logger.debug(f'{self._id} connection shut down by call to close method')
+            return
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+        if timeout:
+            self.logger.warning(f'{self._id} connection timed out, disconnecting.')
+        else:
+            self.logger.warning(f'{self._id} connection closed by peer')
+        self._clear_send_queue('connection lost')
+        if self._disconnected_callback is not None:
+            try:
+                self._disconnected_callback(self)
+            except Exception as iex:
+                self._log_exception(iex, f'lib.network {self._id} calling disconnected_callback {self._disconnected_callback} failed: {iex}')
+        if self._autoreconnect:
+            self.logger.debug(f'{self._id} autoreconnect enabled')
+            # connect() may wait for the rate limit, which would block the other clients of the reactor
+            threading.Thread(target=self.connect, name=f'TCP_Reconnect {self._id}', daemon=True).start()
+
     def _log_exception(self, ex, msg):
         self.logger.error(msg + ' -- If stack trace is necessary, enable/check debug log')
 
@@ -986,8 +1307,14 @@ class Tcp_client(object):
         """
         Close the current client socket.
         """
+        if self._send_queue_enabled and self._is_connected and not self.flush(self._timeout):
+            self.logger.warning(f'{self._id} send queue not empty after {self._timeout} seconds')
         self.__running = False
         self.logger.info(f'{self._id} closing connection')
+        if self._shared_reactor and self._socket is not None:
+            Tcp_reactor.get_instance().unregister(self._socket)
+            self._is_receiving = False
+        self._clear_send_queue('connection closed')
         if self._is_connected:
             try:
                 self._socket.shutdown(socket.SHUT_RD)
@@ -1009,6 +1336,7 @@ class Tcp_client(object):
         self.__connect_threadlock = threading.Lock()
         self.__receive_threadlock = threading.Lock()
         self._is_connected = False
+        self._statistics.disconnected()
 
     def __str__(self):
         if self.name:
@@ -1017,6 +1345,180 @@ class Tcp_client(object):
             return super().__str__()
 
 
+class Tcp_reactor(object):
+    """
+    Shared reactor, that receives the data of all Tcp_client instances in shared reactor mode in one thread
+
+    The reactor thread waits with a selector for the sockets of the registered clients to become
+    readable and lets the client receive the data. Clients in send queue mode let the reactor write
+    their queued messages, when the socket becomes writable. Sockets are registered and
+    unregistered by the reactor thread: other threads queue the change and wake up the reactor
+    through a socket pair.
+
+    This class is used by Tcp_client and should not be used by plugins directly.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self._selector.register(self._wakeup_receiver, selectors.EVENT_READ, None)
+        self._selector_map = self._selector.get_map()
+        self._changes = deque()
+        self._thread = threading.Thread(target=self._run, name='TCP_Reactor', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the shared reactor (the reactor thread is started on first use)
+
+        :rtype: Tcp_reactor
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def in_reactor_thread(cls):
+        """
+        Returns True, if called in the reactor thread
+
+        :rtype: bool
+        """
+        return cls._instance is not None and threading.current_thread() is cls._instance._thread
+
+    def register(self, sock, client):
+        """
+        Watch the socket of a client, client._reactor_receive() is called when the socket is readable
+        """
+        self._change(self._update, sock, client, True, None)
+
+    def unregister(self, sock):
+        """
+        Stop watching a socket (when this method returns, the client is not called anymore)
+        """
+        self._change(self._unregister, sock)
+
+    def watch_write(self, sock, client):
+        """
+        Call client._reactor_send() when the socket is writable, until it returns False
+
+        This method does not wait for the reactor to process the change.
+        """
+        self._change(self._update, sock, client, None, True, wait=False)
+
+    def unwatch_write(self, sock):
+        """
+        Stop waiting for a socket to become writable (does not wait for the reactor to process the change)
+        """
+        self._change(self._update, sock, None, None, False, wait=False)
+
+    def client_count(self):
+        """
+        Returns the number of sockets watched by the reactor
+
+        :rtype: int
+        """
+        return len(self._selector.get_map()) - 1
+
+    def _change(self, method, *args, wait=True):
+        if threading.current_thread() is self._thread:
+            method(*args)
+            return
+        done = threading.Event() if wait else None
+        self._changes.append((method, args, done))
+        try:
+            self._wakeup_sender.send(b'\0')
+        except OSError:
+            # socket buffer full: the reactor has not yet processed the pending wakeups
+            pass
+        if wait and not done.wait(5):
+            self.logger.warning(f"Tcp_reactor: {method.__name__} of {args[0]} not processed within 5 seconds")
+
+    def _update(self, sock, client, read, write):
+        """
+        Change the events watched for a socket (read/write: True to watch, False to stop watching, None for no change)
+        """
+        try:
+            key = self._selector.get_key(sock)
+        except KeyError:
+            key = None
+        except ValueError:
+            # socket has been closed
+            key = None
+            if not read and not write:
+                return
+        events = key.events if key is not None else 0
+        if read is not None:
+            events = events | selectors.EVENT_READ if read else events & ~selectors.EVENT_READ
+        if write is not None:
+            events = events | selectors.EVENT_WRITE if write else events & ~selectors.EVENT_WRITE
+        try:
+            if key is None:
+                if events:
+                    self._selector.register(sock, events, client)
+            elif not events:
+                self._selector.unregister(sock)
+            elif events != key.events:
+                self._selector.modify(sock, events, key.data)
+        except (KeyError, ValueError, OSError) as e:
+            client = client or key.data
+            self.logger.warning(f"Tcp_reactor: cannot watch socket of {client._id}: {e}")
+            if write:
+                client._clear_send_queue(f'cannot watch socket: {e}')
+
+    def _unregister(self, sock):
+        with suppress(KeyError, ValueError):
+            self._selector.unregister(sock)
+
+    def _process_changes(self):
+        with suppress(BlockingIOError):
+            while self._wakeup_receiver.recv(4096):
+                pass
+        while self._changes:
+            method, args, done = self._changes.popleft()
+            method(*args)
+            if done is not None:
+                done.set()
+
+    def _watched(self, sock, client, event):
+        # the socket may have been unregistered by a callback of another client in this round
+        key = self._selector_map.get(sock)
+        return key is not None and key.data is client and key.events & event
+
+    def _run(self):
+        while True:
+            for key, events in self._selector.select():
+                client = key.data
+                if client is None:
+                    self._process_changes()
+                    continue
+                sock = key.fileobj
+                if events & selectors.EVENT_WRITE and self._watched(sock, client, selectors.EVENT_WRITE):
+                    more = False
+                    try:
+                        more = client._reactor_send(sock)
+                    except Exception as ex:
+                        client._log_exception(ex, f'lib.network {client._id} send in shared reactor thread failed with unexpected error: {ex}. Go tell...')
+                    if not more:
+                        self._update(sock, client, None, False)
+                if events & selectors.EVENT_READ and self._watched(sock, client, selectors.EVENT_READ):
+                    try:
+                        client._reactor_receive()
+                    except Exception as ex:
+                        self._unregister(sock)
+                        client._is_receiving = False
+                        client._log_exception(ex, f'lib.network {client._id} receive in shared reactor thread failed with unexpected error: {ex}. Go tell...')
+
+
 class ConnectionClient(object):
     """
     Client object that represents a connected client returned by a Tcp_server instance on incoming connection.
@@ -1043,10 +1545,13 @@ class ConnectionClient(object):
 
         self._data_received_callback = None
         self._will_close_callback = None
+        self._loop = None           # event loop of the connection, if it is shared with other threads (core event loop)
         self.__server = server
         self.__socket = socket
 
         self._id = f'({self.name if self.name else "Connection"}_{self.ip}:{self.port})'
+        self._statistics = lib.connectionstatistics.register('Tcp_server', f'{server._id if server else ""} {self.ip}:{self.port}')
+        self._statistics.connected()
 
     @property
     def socket(self):
@@ -1072,6 +1577,29 @@ class ConnectionClient(object):
         with suppress(ConnectionResetError):
             await self.writer.drain()
 
+    def _in_other_thread(self):
+        """
+        Return True, if the event loop of the connection is shared and running in another thread.
+
+        The writer must then be used via loop.call_soon_threadsafe()
+        """
+        if self._loop is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is not self._loop
+        except RuntimeError:
+            return True
+
+    def __write(self, message):
+        try:
+            self.writer.write(message)
+            self._statistics.sent(len(message))
+            asyncio.ensure_future(self.__drain_writer())
+        except Exception as e:
+            self.logger.warning(f'{self._id} error sending data: {e}')
+            return False
+        return True
+
     def send(self, message):
         """
         Send a string to connected client.
@@ -1088,14 +1616,14 @@ class ConnectionClient(object):
             except Exception:
                 self.logger.warning(f'{self._id} error encoding data')
                 return False
-        try:
-
-            self.writer.write(message)
-            asyncio.ensure_future(self.__drain_writer())
-        except Exception as e:
-            self.logger.warning(f'{self._id} error sending data: {e}')
-            return False
-        return True
+        if self._in_other_thread():
+            try:
+                self._loop.call_soon_threadsafe(self.__write, message)
+            except Exception as e:
+                self.logger.warning(f'{self._id} error sending data: {e}')
+                return False
+            return True
+        return self.__write(message)
 
     def send_echo_off(self):
         """
@@ -1134,7 +1662,12 @@ class ConnectionClient(object):
         if self._will_close_callback:
             self._will_close_callback(self)
         self.set_callbacks(data_received=None, will_close=None)
-        self.writer.close()
+        self._statistics.disconnected()
+        if self._in_other_thread():
+            with suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self.writer.close)
+        else:
+            self.writer.close()
         return True
 
     def _iac_to_string(self, msg):
@@ -1164,13 +1697,19 @@ class Tcp_server(object):
     - ``data_received(server, client, data)`` where ``server`` ist the ``Tcp_server`` instance, ``client`` is a ``ConnectionClient`` for the current connection, and ``data`` is a string containing received data
     - ``disconnected(server, client)`` where ``server`` ist the ``Tcp_server`` instance and ``client`` is a ``ConnectionClient`` for the closed connection
 
+    If ``core_loop`` is True, the server runs on the shared event loop of the SmartHomeNG core instead
+    of an own event loop in an own thread. The callbacks are then called in the thread of the core
+    event loop and must not block.
+
     :param host: Local host name or ip address (v4 or v6). Default is '::' which listens on all IPv4 and all IPv6 addresses available.
     :param port: Local port to connect to
     :param name: Name of this connection (mainly for logging purposes)
+    :param core_loop: Run the server on the shared core event loop
 
     :type host: str
     :type port: int
     :type name: str
+    :type core_loop: bool
     """
 
     MODE_TEXT = 1
@@ -1178,7 +1717,7 @@ class Tcp_server(object):
     MODE_BINARY = 3
     MODE_FIXED_LENGTH = 4
 
-    def __init__(self, port, host='', name=None, mode=MODE_BINARY, terminator=None):
+    def __init__(self, port, host='', name=None, mode=MODE_BINARY, terminator=None, core_loop=False):
         self.logger = logging.getLogger(__name__)
 
         # public properties
@@ -1191,6 +1730,8 @@ class Tcp_server(object):
         self._port = port
         self._is_listening = False
         self._timeout = 1
+        self._close_timeout = 2
+        self._core_loop = core_loop
 
         self._ipaddr = None
         self._family = socket.AF_INET
@@ -1205,6 +1746,7 @@ class Tcp_server(object):
         self.__server = None
         self.__listening_thread = None
         self.__running = True
+        self.__connections = {}         # client -> handler task (on the core event loop)
 
         # Test if host is an ip address or a host name
         self._id = f'({self.name if self.name else "TCP_Server"}_{self._host}:{self._port})'
@@ -1244,6 +1786,13 @@ class Tcp_server(object):
             return False
         try:
             self.logger.info(f'{self._id} starting up TCP server socket')
+            if self._core_loop:
+                core_loop = lib.asyncloop.get_core_loop()
+                self.__loop = core_loop.loop
+                self.__server = core_loop.run_coroutine_wait(asyncio.start_server(self.__handle_connection, self._ipaddr, self._port), timeout=10)
+                core_loop.add_component(f'Tcp_server {self._id}')
+                self._is_listening = True
+                return True
             self.__loop = asyncio.new_event_loop()
             asyncio.set_event_loop(self.__loop)
             self.__coroutine = asyncio.start_server(self.__handle_connection, self._ipaddr, self._port)
@@ -1292,7 +1841,20 @@ class Tcp_server(object):
         client.family = socket.AF_INET6 if Utils.is_ipv6(client.ip) else socket.AF_INET
         client.name = Network.ip_port_to_socket(client.ip, client.port)
         client.writer = writer
+        if self._core_loop:
+            client._loop = self.__loop
+            self.__connections[client] = asyncio.current_task()
+            try:
+                await self.__serve_client(reader, client, peer_socket)
+            finally:
+                self.__connections.pop(client, None)
+        else:
+            await self.__serve_client(reader, client, peer_socket)
 
+    async def __serve_client(self, reader, client, peer_socket):
+        """
+        Receive data from a client, until the connection is closed.
+        """
         self.logger.info(f'{self._id} incoming connection from {peer_socket}')
         if self._incoming_connection_callback:
             self._incoming_connection_callback(self, client)
@@ -1307,6 +1869,8 @@ class Tcp_server(object):
             except Exception:
                 data = None
 
+            if data:
+                client._statistics.received(len(data))
             if data and data[0] == 0xFF and client.process_iac:
                 data = client._process_IAC(data)
             if data:
@@ -1335,10 +1899,22 @@ class Tcp_server(object):
         :type client: lib.network.ConnectionClient
         """
         self.logger.info(f'{self._id} connection to client {client.name} closed')
+        client._statistics.disconnected()
         if self._disconnected_callback:
             self._disconnected_callback(self, client)
         client.writer.close()
 
+    async def __shutdown(self):
+        """
+        Close the server and its client connections (on the core event loop).
+        """
+        self.__server.close()
+        for client, task in list(self.__connections.items()):
+            client.writer.close()
+            task.cancel()
+        await self.__server.wait_closed()
+        self._is_listening = False
+
     def listening(self):
         """
         Return the current listening state.
@@ -1379,6 +1955,23 @@ class Tcp_server(object):
         Close running listening socket.
         """
         self.logger.info(f'{self._id} shutting down listening socket')
+        if self._core_loop:
+            self.__running = False
+            if self.__server is None:
+                return
+            if self.__connections:
+                self.logger.info(f'{self._id} still has {len(self.__connections)} active connection(s), cleaning up')
+            core_loop = lib.asyncloop.get_core_loop()
+            if core_loop.in_loop_thread():
+                asyncio.ensure_future(self.__shutdown())
+            else:
+                try:
+                    core_loop.run_coroutine_wait(self.__shutdown(), timeout=self._close_timeout)
+                except Exception as e:
+                    self.logger.warning(f'{self._id} error shutting down server: {e}')
+            self.__server = None
+            core_loop.remove_component(f'Tcp_server {self._id}')
+            return
         asyncio.set_event_loop(self.__loop)
         try:
             active_connections = len([task for task in asyncio.all_tasks(self.__loop) if not task.done()])
@@ -1411,16 +2004,22 @@ class Udp_server(object):
 
     - ``data_received(addr, data)`` where ``addr`` is a tuple with ``('<remote_ip>', remote_port)`` and ``data`` is the received data as string
 
+    If ``core_loop`` is True, the server runs on the shared event loop of the SmartHomeNG core instead
+    of an own event loop in an own thread. The callback is then called in the thread of the core
+    event loop and must not block.
+
     :param host: Local hostname or ip address (v4 or v6). Default is '' which listens on all IPv4 addresses available.
     :param port: Local port to connect to
     :param name: Name of this connection (mainly for logging purposes)
+    :param core_loop: Run the server on the shared core event loop
 
     :type host: str
     :type port: int
     :type name: str
+    :type core_loop: bool
     """
 
-    def __init__(self, port, host='', name=None):
+    def __init__(self, port, host='', name=None, core_loop=False):
         self.logger = logging.getLogger(__name__)
 
         # Public properties
@@ -1439,11 +2038,15 @@ class Udp_server(object):
 
         # provide a shutdown timeout for the server loop. emergency fallback only
         self._close_timeout = 2
+        self._core_loop = core_loop
 
         # private properties
         self.__coroutine = None
-        self.__loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.__loop)
+        if core_loop:
+            self.__loop = None
+        else:
+            self.__loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.__loop)
 
         self.__server = aioudp.aioUDPServer()
         self.__listening_thread = None
@@ -1461,6 +2064,7 @@ class Udp_server(object):
                 self.name = self.__our_socket
         else:
             self.__running = False
+        self._statistics = lib.connectionstatistics.register('Udp_server', self._id)
 
     def start(self):
         """
@@ -1477,6 +2081,14 @@ class Udp_server(object):
             return False
         try:
             self.logger.info(f'{self._id} starting up UDP server socket')
+            if self._core_loop:
+                core_loop = lib.asyncloop.get_core_loop()
+                self.__loop = core_loop.loop
+                core_loop.run_coroutine_wait(self.__start_server(), timeout=10)
+                core_loop.add_component(f'Udp_server {self._id}')
+                self._is_listening = True
+                self._statistics.connected()
+                return True
             self.__coroutine = self.__start_server()
             self.__loop.run_until_complete(self.__coroutine)
 
@@ -1486,6 +2098,7 @@ class Udp_server(object):
         except Exception as e:
             self.logger.error(f'{self._id} error {e} setting up udp server')
             return False
+        self._statistics.connected()
         return True
 
     def set_callbacks(self, data_received=None):
@@ -1512,6 +2125,19 @@ class Udp_server(object):
         Close running listening socket.
         """
         self.logger.info(f'{self._id} shutting down listening socket')
+        self._statistics.disconnected()
+        if self._core_loop:
+            self.__running = False
+            if not self._is_listening:
+                return
+            core_loop = lib.asyncloop.get_core_loop()
+            try:
+                core_loop.run_in_loop(self.__server.shutdown, timeout=self._close_timeout)
+            except Exception as e:
+                self.logger.warning(f'{self._id} error shutting down server: {e}')
+            core_loop.remove_component(f'Udp_server {self._id}')
+            self._is_listening = False
+            return
         asyncio.set_event_loop(self.__loop)
         self.__running = False
         self.__server.stop()
@@ -1580,6 +2206,7 @@ class Udp_server(object):
             port = 0
 
         self.logger.info(f'{self._id} incoming datagram from {host}:{port}')
+        self._statistics.received(len(data) if data else 0)
 
         if data:
             try:
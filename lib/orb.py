@@ -29,13 +29,12 @@ import dateutil.relativedelta
 from dateutil.tz import tzutc
 
 from lib.shtime import Shtime
+from lib.lazyimport import lazy_import
 
 logger = logging.getLogger(__name__)
 
-try:
-    import ephem
-except ImportError:
-    ephem = None  # noqa
+# ephem is imported on first calculation (None, if it is not installed)
+ephem = lazy_import('ephem')
 
 
 """
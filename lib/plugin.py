@@ -52,16 +52,21 @@ import sys
 import json
 import logging
 import threading
+import time
 import collections
 import os.path		# until Backend is modified
 
 from importlib import import_module, reload
 
 import lib.config
+import lib.shyaml as shyaml
+import lib.startupprofile
 import lib.translation as translation
 from lib.model.smartplugin import SmartPlugin
 from lib.constants import (KEY_CLASS_NAME, KEY_CLASS_PATH, KEY_INSTANCE, YAML_FILE, CONF_FILE, DIR_PLUGINS, PLUGIN_PARSE_ITEM)
+import lib.metadata
 from lib.metadata import Metadata
+from lib.utils import Utils
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +74,99 @@ logger = logging.getLogger(__name__)
 _plugins_instance = None    # Pointer to the initialized instance of the Plugins class (for use by static methods)
 _SH = None
 
+STARTORDERS = ['early', 'normal', 'late']
+
+
+def run_with_dependencies(names, dependencies, func, max_workers, timeout, description='job', on_finished=None):
+    """
+    Call func(name) for all names in a bounded number of threads
+
+    A name is processed after all names it depends on have been processed (or have timed out).
+    If the dependencies contain a loop, the remaining names are processed without waiting.
+
+    :param names: list of names to process (in order of preference)
+    :param dependencies: dict: name -> set of names it depends on
+    :param func: function to call for every name
+    :param max_workers: max. number of threads running at the same time
+    :param timeout: max. duration of a single call (in seconds)
+    :param description: used for the names of the threads and in log messages
+    :param on_finished: called with name and result of func, when a call finishes within timeout (before the names depending on it are processed)
+
+    :return: dict with the results (name -> result of func) and set of names, which did not finish within timeout
+    :rtype: tuple
+    """
+    results = {}
+    finished = set()
+    abandoned = set()
+    pending = list(names)
+    running = {}
+    condition = threading.Condition()
+
+    def worker(name):
+        try:
+            result = func(name)
+        except Exception as e:
+            logger.exception(f"{description} of '{name}' failed: {e}")
+            result = None
+        with condition:
+            if name in abandoned:
+                logger.warning(f"{description} of '{name}' finished after the timeout of {timeout} seconds - the result is ignored")
+                return
+            results[name] = result
+            if on_finished is not None:
+                try:
+                    on_finished(name, result)
+                except Exception as e:
+                    logger.exception(f"{description} of '{name}' failed: {e}")
+            finished.add(name)
+            running.pop(name, None)
+            condition.notify_all()
+
+    with condition:
+        while pending or running:
+            ready = [name for name in pending if not (dependencies.get(name, set()) - finished - abandoned)]
+            if not ready and not running:
+                logger.error(f"Loop in the dependencies of {pending} - {description} without waiting for dependencies")
+                ready = list(pending)
+            for name in ready:
+                if len(running) >= max_workers:
+                    break
+                pending.remove(name)
+                running[name] = time.monotonic()
+                threading.Thread(target=worker, args=(name,), name=f'{description}.{name}', daemon=True).start()
+
+            # wait for a job to finish or for the next timeout
+            now = time.monotonic()
+            for name, started in list(running.items()):
+                if now - started >= timeout:
+                    del running[name]
+                    abandoned.add(name)
+            if running:
+                condition.wait(min(started + timeout for started in running.values()) - now)
+    return results, abandoned
+
+
+def dependency_order(names, dependencies):
+    """
+    Sort names, so that every name follows the names it depends on (otherwise the order is kept)
+
+    :param names: list of names
+    :param dependencies: dict: name -> set of names it depends on
+    :return: sorted list of names
+    """
+    result = []
+    remaining = list(names)
+    while remaining:
+        for name in remaining:
+            if not (dependencies.get(name, set()) & set(remaining)):
+                break
+        else:
+            # loop in dependencies: keep the original order
+            name = remaining[0]
+        remaining.remove(name)
+        result.append(name)
+    return result
+
 
 def namestr(obj, namespace):
     return [name for name in namespace if namespace[name] is obj]
@@ -123,10 +221,23 @@ class Plugins():
         self.threads_early = []
         self.threads_late = []
 
-        # for every section (plugin) in the plugin.yaml file
-        for plugin in _conf:
-            logger.debug(f'Plugins, section: {plugin}')
-            self.load_plugin(plugin, _conf[plugin])
+        # parse the metadata files of the configured plugins in parallel (consumed by the Metadata instances),
+        # unchanged files are read from the metadata cache instead
+        metadata_cache = lib.metadata.get_metadata_cache(self._sh)
+        metadata_files = [self._get_metadata_filename(_conf[plugin]) for plugin in _conf if isinstance(_conf[plugin], dict)]
+        shyaml.yaml_preload([filename for filename in metadata_files if not metadata_cache.is_cached(filename)], ordered=True)
+
+        if Utils.to_bool(getattr(self._sh, '_plugins_parallel_init', False)):
+            # opt-in: create the plugins of a startorder group in parallel
+            self._load_plugins_parallel(_conf)
+        else:
+            # for every section (plugin) in the plugin.yaml file
+            profiler = lib.startupprofile.get_startup_profiler()
+            for plugin in _conf:
+                logger.debug(f'Plugins, section: {plugin}')
+                plugin_name = _conf[plugin].get('plugin_name', '') if isinstance(_conf[plugin], dict) else ''
+                with profiler.phase(plugin, parent='plugins_init', plugin_name=plugin_name):
+                    self.load_plugin(plugin, _conf[plugin])
 
         # join the start_early and start_late lists with the main thread list
         self._threads = self.threads_early + self._threads + self.threads_late
@@ -135,6 +246,8 @@ class Plugins():
         self.threads_early = self.threads_late = []
 
         logger.info('Load of plugins finished')
+        metadata_cache.save()
+        shyaml.yaml_preload_discard(metadata_files)
         del _conf  # clean up
         os.chdir((self._sh._base_dir))
 
@@ -150,6 +263,28 @@ class Plugins():
                     self.logic_parameters[param]['plugin'] = self._plugins[i]._shortname
 
 
+    def _get_metadata_filename(self, plg_conf):
+        """
+        Return the name of the metadata file for a plugin (the same file the Metadata instance reads)
+
+        :param plg_conf: loaded section of the plugin.yaml for the actual plugin
+        :type plg_conf: dict
+
+        :return: filename of the metadata file
+        :rtype: str
+        """
+        plugin_name = plg_conf.get('plugin_name', '').lower()
+        plugin_version = plg_conf.get('plugin_version', '').lower()
+        if plugin_version != '':
+            plugin_version = '._pv_' + plugin_version.replace('.', '_')
+        if plugin_name != '':
+            relative_filename = os.path.join(DIR_PLUGINS, (plugin_name + plugin_version).replace('.', os.sep), 'plugin' + YAML_FILE)
+        else:
+            classpath = plg_conf.get(KEY_CLASS_PATH, '')
+            relative_filename = os.path.join((classpath + plugin_version).replace('.', os.sep), 'plugin' + YAML_FILE)
+        return os.path.join(self._sh.get_basedir(), relative_filename)
+
+
     def _get_pluginname_and_metadata(self, plg_section, plg_conf):
         """
         Return the actual plugin name and the metadata instance
@@ -419,6 +554,19 @@ class Plugins():
 
         return True if plugin was loaded successfully, False if not (even if disabled)
         """
+        job = self._prepare_plugin(configname, conf)
+        if job is None:
+            return False
+        return self._register_plugin(job, self._create_pluginthread(job))
+
+
+    def _prepare_plugin(self, configname: str, conf: dict):
+        """
+        Read the metadata of a plugin and register its item attributes and structs
+
+        :return: dict with the data needed to create the plugin (None, if the plugin is not to be loaded)
+        :rtype: dict
+        """
         logger.debug(f'Attempting to load plugin "{conf.get("plugin_name", "(unknown)")}" from section {configname}')
         plugin_name, self.meta = self._get_pluginname_and_metadata(configname, conf)
         self._sh.shng_status['details'] = plugin_name   # Namen des Plugins übertragen
@@ -463,41 +611,172 @@ class Plugins():
                     plugin_version = 'v' + plugin_version
                 except Exception:
                     plugin_version = 'version unknown'
-                self._test_duplicate_pluginconfiguration(configname, classname, instance)
-                os.chdir((self._sh._base_dir))
                 try:
-                    plugin_thread = PluginWrapper(self._sh, configname, classname, classpath, args, instance, self.meta, self._configfile)
-                    if plugin_thread._init_complete:
-                        try:
-                            try:
-                                startorder = self.meta.pluginsettings.get('startorder', 'normal').lower()
-                            except Exception as e:
-                                logger.warning(f'Plugin {str(classpath).split(".")[1]} error on getting startorder: {e}')
-                                startorder = 'normal'
-                            self._plugins.append(plugin_thread.plugin)  # type: ignore (plugin is set via eval)
-                            # dict to get a handle to the plugin code by plugin name:
-                            if self._plugindict.get(classpath.split('.')[1], None) is None:
-                                self._plugindict[classpath.split('.')[1]] = plugin_thread.plugin  # type: ignore
-                            self._plugindict[classpath.split('.')[1] + '#' + instance] = plugin_thread.plugin  # type: ignore
-                            if startorder == 'early':
-                                self.threads_early.append(plugin_thread)
-                            elif startorder == 'late':
-                                self.threads_late.append(plugin_thread)
-                            else:
-                                self._threads.append(plugin_thread)
-                            if instance == '':
-                                logger.info(f"Initialized plugin '{str(classpath).split('.')[1]}' from section '{configname}'")
-                            else:
-                                logger.info(f"Initialized plugin '{str(classpath).split('.')[1]}' instance '{instance}' from section '{configname}'")
-                            return True
-                        except Exception as e:
-                            logger.warning(f"Plugin '{str(classpath).split('.')[1]}' from section '{configname}' not loaded - exception {e}")
+                    startorder = self.meta.pluginsettings.get('startorder', 'normal').lower()
                 except Exception as e:
-                    logger.exception(f"Plugin '{str(classpath).split('.')[1]}' {plugin_version} from section '{configname}'\nException: {e}\nrunning SmartHomeNG {self._sh.version} / plugins {self._sh.plugins_version}")
+                    logger.warning(f'Plugin {str(classpath).split(".")[1]} error on getting startorder: {e}')
+                    startorder = 'normal'
+                if startorder not in STARTORDERS:
+                    startorder = 'normal'
+                self._test_duplicate_pluginconfiguration(configname, classname, instance)
+                return {'configname': configname, 'classname': classname, 'classpath': classpath, 'args': args,
+                        'instance': instance, 'meta': self.meta, 'plugin_version': plugin_version,
+                        'shortname': str(classpath).split('.')[1], 'startorder': startorder,
+                        'depends_on': self._get_dependencies(self.meta)}
+        return None
+
+
+    def _get_dependencies(self, meta):
+        """
+        Return the names of the plugins a plugin depends on ('depends_on' in the plugin section of the metadata)
+
+        :return: list of plugin names
+        :rtype: list
+        """
+        try:
+            depends_on = meta.pluginsettings.get('depends_on', [])
+        except Exception:
+            return []
+        if depends_on is None:
+            return []
+        if isinstance(depends_on, str):
+            depends_on = depends_on.replace(',', ' ').split()
+        return [str(name).lower() for name in depends_on]
+
 
+    def _create_pluginthread(self, job):
+        """
+        Create the PluginWrapper (and thereby the instance of the plugin class) for a prepared plugin
+
+        :param job: dict returned by _prepare_plugin()
+        :return: PluginWrapper instance or None, if an exception occured
+        """
+        os.chdir((self._sh._base_dir))
+        try:
+            return PluginWrapper(self._sh, job['configname'], job['classname'], job['classpath'], job['args'], job['instance'], job['meta'], self._configfile)
+        except Exception as e:
+            logger.exception(f"Plugin '{job['shortname']}' {job['plugin_version']} from section '{job['configname']}'\nException: {e}\nrunning SmartHomeNG {self._sh.version} / plugins {self._sh.plugins_version}")
+        return None
+
+
+    def _register_plugin(self, job, plugin_thread) -> bool:
+        """
+        Add a created plugin to the lists of loaded plugins and plugin threads
+
+        :param job: dict returned by _prepare_plugin()
+        :param plugin_thread: PluginWrapper instance returned by _create_pluginthread()
+        :return: True, if the plugin has been loaded successfully
+        """
+        if plugin_thread is None or not plugin_thread._init_complete:
+            return False
+        configname = job['configname']
+        classpath = job['classpath']
+        instance = job['instance']
+        try:
+            self._plugins.append(plugin_thread.plugin)  # type: ignore (plugin is set via eval)
+            # dict to get a handle to the plugin code by plugin name:
+            if self._plugindict.get(classpath.split('.')[1], None) is None:
+                self._plugindict[classpath.split('.')[1]] = plugin_thread.plugin  # type: ignore
+            self._plugindict[classpath.split('.')[1] + '#' + instance] = plugin_thread.plugin  # type: ignore
+            if job['startorder'] == 'early':
+                self.threads_early.append(plugin_thread)
+            elif job['startorder'] == 'late':
+                self.threads_late.append(plugin_thread)
+            else:
+                self._threads.append(plugin_thread)
+            if instance == '':
+                logger.info(f"Initialized plugin '{str(classpath).split('.')[1]}' from section '{configname}'")
+            else:
+                logger.info(f"Initialized plugin '{str(classpath).split('.')[1]}' instance '{instance}' from section '{configname}'")
+            return True
+        except Exception as e:
+            logger.warning(f"Plugin '{str(classpath).split('.')[1]}' from section '{configname}' not loaded - exception {e}")
         return False
 
 
+    def _load_plugins_parallel(self, _conf):
+        """
+        Load the configured plugins, plugins of the same startorder are created in parallel
+
+        The metadata of all plugins is read first (sequentially). Then the plugins of each startorder
+        group (early, normal, late) are created in a pool of threads. A plugin is created after the plugins
+        it depends on ('depends_on' in the metadata), if they are in the same group. A plugin is registered
+        as soon as it has been created, so the plugins it depends on and the plugins of earlier groups
+        can be found (e.g. with get_plugin()) in the __init__ method of a plugin. After all plugins have been
+        created, the lists of plugins and plugin threads are sorted in the order of the configuration.
+
+        :param _conf: plugin configuration (content of etc/plugin.yaml)
+        """
+        max_workers = max(1, int(getattr(self._sh, '_plugins_parallel_workers', 8)))
+        timeout = float(getattr(self._sh, '_plugins_init_timeout', 120))
+        profiler = lib.startupprofile.get_startup_profiler()
+
+        jobs = collections.OrderedDict()
+        for plugin in _conf:
+            logger.debug(f'Plugins, section: {plugin}')
+            job = self._prepare_plugin(plugin, _conf[plugin])
+            if job is not None:
+                jobs[plugin] = job
+
+        def create(configname):
+            job = jobs[configname]
+            with profiler.phase(configname, parent='plugins_init', plugin_name=job['shortname']):
+                return self._create_pluginthread(job)
+
+        def register(configname, plugin_thread):
+            # called before the plugins depending on this plugin are created
+            self._register_plugin(jobs[configname], plugin_thread)
+
+        dependencies = self._get_plugin_dependencies(jobs)
+        plugin_threads = {}
+        for startorder in STARTORDERS:
+            group = [configname for configname in jobs if jobs[configname]['startorder'] == startorder]
+            if not group:
+                continue
+            logger.info(f"Initializing {len(group)} plugins with startorder '{startorder}' in parallel (max. {max_workers} at a time)")
+            # plugins of earlier startorder groups are already initialized and registered
+            group_dependencies = {configname: dependencies[configname] & set(group) for configname in group}
+            results, timed_out = run_with_dependencies(group, group_dependencies, create, max_workers, timeout, 'init', on_finished=register)
+            plugin_threads.update(results)
+            for configname in timed_out:
+                logger.error(f"Plugin '{jobs[configname]['shortname']}' from section '{configname}' did not finish its initialization within {timeout} seconds - plugin not loaded")
+
+        # sort the plugins in the order of the configuration, but after the plugins they depend on
+        # (the plugin threads of a startorder group are started in this order)
+        order = {}
+        for configname in dependency_order(list(jobs), dependencies):
+            plugin_thread = plugin_threads.get(configname)
+            if plugin_thread is not None:
+                order[id(plugin_thread)] = order[id(getattr(plugin_thread, "plugin", None))] = len(order)
+        for registered in (self._plugins, self._threads, self.threads_early, self.threads_late):
+            registered.sort(key=lambda obj: order.get(id(obj), -1))
+        return
+
+
+    def _get_plugin_dependencies(self, jobs):
+        """
+        Return the dependencies between the configured plugins
+
+        Dependencies on plugins with a later startorder can not be honored and are ignored.
+
+        :param jobs: dict of all prepared plugins (configname -> job)
+        :return: dict: configname -> set of confignames of the plugins it depends on
+        """
+        dependencies = {}
+        for configname, job in jobs.items():
+            dependencies[configname] = set()
+            for name in job['depends_on']:
+                sections = [section for section in jobs if jobs[section]['shortname'] == name and section != configname]
+                if not sections:
+                    logger.info(f"Plugin '{job['shortname']}' (section '{configname}') depends on plugin '{name}', which is not configured")
+                for section in sections:
+                    if STARTORDERS.index(jobs[section]['startorder']) > STARTORDERS.index(job['startorder']):
+                        logger.warning(f"Plugin '{job['shortname']}' (section '{configname}') depends on plugin '{name}' (section '{section}'), which has a later startorder - dependency is ignored")
+                    else:
+                        dependencies[configname].add(section)
+        return dependencies
+
+
     def unload_plugin(self, configname: str) -> bool:
         """
         Unloads (the object of) one loaded plugin with given configname
@@ -663,6 +942,7 @@ class Plugins():
 
     def start(self):
         logger.info('Start plugins')
+        profiler = lib.startupprofile.get_startup_profiler()
         for plugin in self._threads:
             try:
                 instance = plugin.get_implementation().get_instance_name()
@@ -671,7 +951,8 @@ class Plugins():
                 logger.debug(f"Starting plugin '{plugin.get_implementation().get_shortname()}'{instance}")
             except Exception:
                 logger.debug(f"Starting classic-plugin from section '{plugin.name}'")
-            plugin.start()
+            with profiler.phase(plugin.name, parent='plugins_start'):
+                plugin.start()
         logger.info('Start of plugins finished')
 
 
@@ -894,7 +1175,9 @@ class PluginWrapper(threading.Thread):
         Starts this plugin instance
         """
         try:
-            self.plugin.run()
+            # the duration of run() is recorded, if it returns during the startup of SmartHomeNG
+            with lib.startupprofile.get_startup_profiler().phase(self.name, parent='plugins_run'):
+                self.plugin.run()
         except Exception as e:
             logger.exception(f"Plugin '{self.plugin.get_shortname()}' exception in run() method: {e}")
 
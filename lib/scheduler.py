@@ -31,7 +31,9 @@ import threading
 import random
 import inspect
 
+import lib.asyncloop
 import lib.env
+import lib.logicprocess
 
 from lib.shtime import Shtime
 from lib.item import Items
@@ -39,6 +41,7 @@ from lib.model.smartplugin import SmartPlugin
 from lib.triggertimes import TriggerTimes
 
 # following modules) are imported to have those functions available during logic execution
+import asyncio  # noqa
 import gc  # noqa
 import os  # noqa
 import math  # noqa
@@ -59,6 +62,8 @@ tasks_logger = logging.getLogger(__name__ + '.tasks')
 
 _scheduler_instance = None    # Pointer to the initialized instance of the scheduler class  (for use by static methods)
 
+ASYNC_ENTRY_POINT = 'main'    # name of the 'async def' entry point of an async logic
+
 
 class LeaveLogic(Exception):
     pass  # declare a label for 'raise LeaveLogic'
@@ -88,21 +93,25 @@ class _PriorityQueue:
                 hi = mid
             else:
                 lo = mid + 1
-        self.queue.insert(lo, (priority, data))
+        self.queue.insert(lo, (priority, data, time.monotonic()))
         self.lock.release()
 
-    def get(self):
+    def get(self, with_time=False):
         """
         Returns the first tuple of the queue
+        :param with_time: if True, the time the entry has been inserted (time.monotonic()) is returned as third element
         :return: tuple with priority and data or None if no entry is available in the queue
         """
         self.lock.acquire()
         try:
-            return self.queue.pop(0)
+            entry = self.queue.pop(0)
         except IndexError:
             raise
         finally:
             self.lock.release()
+        if with_time:
+            return entry
+        return entry[:2]
 
     def qsize(self):
         """
@@ -119,11 +128,140 @@ class _PriorityQueue:
         queue_list = []
         self.lock.acquire()
         for entry in self.queue:
-            queue_list.append(entry)
+            queue_list.append(entry[:2])
         self.lock.release()
         return queue_list
 
 
+class _Timer:
+    """
+    A one-shot timer entry of the timer wheel
+    """
+    __slots__ = ('name', 'obj', 'value', 'prio', 'next', 'tick')
+
+    def __init__(self, name, obj, value, prio, next, tick):
+        self.name = name
+        self.obj = obj
+        self.value = value
+        self.prio = prio
+        self.next = next
+        self.tick = tick
+
+    def as_dict(self):
+        """
+        Returns the timer in the format of a scheduler entry (for the admin interface and scheduler.get())
+        """
+        return {'prio': self.prio, 'obj': self.obj, 'source': {'source': 'timer', 'details': None}, 'cron': None,
+                'cycle': None, 'value': self.value, 'next': self.next, 'active': True}
+
+
+class _TimerWheel:
+    """
+    Implements a hashed timing wheel for one-shot timers (item timers, autotimers and hysteresis timers)
+
+    Each timer is hashed into a slot by the tick it becomes due. Adding, re-arming and removing a timer is O(1),
+    advancing the wheel only visits the slots of the ticks that have passed since the last call.
+    """
+    def __init__(self, tick=0.5, slots=512):
+        """
+        :param tick: resolution of the wheel in seconds
+        :param slots: number of slots of the wheel (one revolution = tick * slots seconds)
+        """
+        self._tick = tick
+        self._slots = [{} for i in range(slots)]
+        self._timers = {}                   # name -> _Timer
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._current = 0                   # last tick that has been processed
+
+    def _now_tick(self):
+        return int((time.monotonic() - self._start) / self._tick)
+
+    def add(self, name, obj, delay, value=None, prio=3, next=None):
+        """
+        Add a timer or re-arm an existing timer with the same name
+
+        :param name: name of the timer
+        :param obj: item or method to call when the timer is due
+        :param delay: delay in seconds
+        :param value: value to hand to the scheduler task
+        :param prio: priority for the run queue
+        :param next: datetime the timer is due (only informational)
+        """
+        tick = int(math.ceil((time.monotonic() - self._start + max(delay, 0)) / self._tick))
+        with self._lock:
+            # a timer must never be hashed into a slot that has already been processed
+            tick = max(tick, self._current + 1)
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = _Timer(name, obj, value, prio, next, tick)
+                self._timers[name] = timer
+            else:
+                del self._slots[timer.tick % len(self._slots)][name]
+                timer.obj = obj
+                timer.value = value
+                timer.prio = prio
+                timer.next = next
+                timer.tick = tick
+            self._slots[tick % len(self._slots)][name] = timer
+
+    def remove(self, name):
+        """
+        Remove the timer with the given name
+
+        :return: True, if a timer has been removed
+        """
+        with self._lock:
+            timer = self._timers.pop(name, None)
+            if timer is None:
+                return False
+            del self._slots[timer.tick % len(self._slots)][name]
+            return True
+
+    def get(self, name):
+        """
+        Returns the timer with the given name or None
+        """
+        return self._timers.get(name)
+
+    def pop_due(self):
+        """
+        Advance the wheel to the current time and return all timers that became due
+
+        :return: list of due timers
+        """
+        due = []
+        now_tick = self._now_tick()
+        with self._lock:
+            if now_tick <= self._current:
+                return due
+            first = self._current + 1
+            if now_tick - first >= len(self._slots):
+                # more than one revolution has passed: every slot has to be visited exactly once
+                first = now_tick - len(self._slots) + 1
+            for tick in range(first, now_tick + 1):
+                slot = self._slots[tick % len(self._slots)]
+                if slot:
+                    for name in [name for name, timer in slot.items() if timer.tick <= now_tick]:
+                        due.append(slot.pop(name))
+                        del self._timers[name]
+            self._current = now_tick
+        return due
+
+    def qsize(self):
+        """
+        Returns the number of armed timers
+        """
+        return len(self._timers)
+
+    def dump(self):
+        """
+        Returns all armed timers as a list of tuples (name, scheduler entry dict)
+        """
+        with self._lock:
+            return [(timer.name, timer.as_dict()) for timer in self._timers.values()]
+
+
 class Scheduler(threading.Thread):
 
     _workers = []
@@ -146,6 +284,7 @@ class Scheduler(threading.Thread):
         self._lock = threading.Lock()
         self._runc = threading.Condition()
         self._cycle_items = {}          # store items for dynamic cycles {'item2.property.path': {name1, name2, ...}}
+        self._timers = _TimerWheel()    # one-shot timers of items (timer, autotimer, hysteresis timers)
 
         global _scheduler_instance
         if _scheduler_instance is not None:
@@ -276,6 +415,12 @@ class Scheduler(threading.Thread):
                 else:  # put last entry back and break while loop
                     self._triggerq.insert((dt, prio), (name, obj, by, source, dest, value))
                     break
+
+            for timer in self._timers.pop_due():
+                self._runc.acquire()
+                self._runq.insert(timer.prio, (timer.name, timer.obj, 'Scheduler', {'source': 'timer', 'details': None}, None, timer.value))
+                self._runc.notify()
+                self._runc.release()
             # For debugging
             # task_count = 0
             # for name in self._scheduler:
@@ -384,6 +529,46 @@ class Scheduler(threading.Thread):
             logger.error(f"Exception {e}: Could not remove scheduler entry for {name}")
         finally:
             self._lock.release()
+        self._timers.remove(name)
+
+
+    def add_timer(self, name, obj, delay, value=None, prio=3):
+        """
+        Adds a one-shot timer or re-arms an existing timer with the same name
+
+        One-shot timers (item timers, autotimers and hysteresis timers) are kept in a timing wheel instead
+        of the scheduler table, so arming and re-arming them does not need to rebuild a scheduler entry.
+        They are shown together with the scheduler entries and can be removed by remove() or remove_timer().
+
+        :param name: Name of the timer
+        :param obj: Item or method to call when the timer is due
+        :param delay: Time in seconds until the timer is due
+        :param value: Value that the item should be set to or dict with parameters for the method
+        :param prio: a priority with default of 3 having 1 as most important and higher numbers less important
+        """
+        if self.shtime is None:
+            self.shtime = Shtime.get_instance()
+        next = self.shtime.now() + datetime.timedelta(seconds=delay)
+        self._timers.add(name, obj, delay, value=value, prio=prio, next=next)
+
+
+    def remove_timer(self, name):
+        """
+        Removes a one-shot timer
+
+        :param name: Name of the timer
+        :return: True, if a timer was armed and has been removed
+        """
+        return self._timers.remove(name)
+
+
+    def get_timers(self):
+        """
+        Returns all armed one-shot timers
+
+        :return: list of tuples (name, entry) where entry is a dict in the format of a scheduler entry
+        """
+        return self._timers.dump()
 
 
     def check_caller(self, name, from_smartplugin=False):
@@ -429,6 +614,9 @@ class Scheduler(threading.Thread):
         # name = self.check_caller(name, from_smartplugin)   # ms
         if name in self._scheduler:
             return self._scheduler[name]['next']
+        timer = self._timers.get(name)
+        if timer is not None:
+            return timer.next
 
     @staticmethod
     def __get_first(d):
@@ -603,8 +791,10 @@ class Scheduler(threading.Thread):
         name = self.check_caller(name, from_smartplugin)
         if name in self._scheduler:
             return self._scheduler[name]
-        else:
-            return None
+        timer = self._timers.get(name)
+        if timer is not None:
+            return timer.as_dict()
+        return None
 
     def change(self, name, from_smartplugin=False, **kwargs):
         """changes a scheduler entry for a given name to settings given in kwargs"""
@@ -755,21 +945,21 @@ class Scheduler(threading.Thread):
             self._runc.acquire()
             self._runc.wait(timeout=1)
             try:
-                prio, (name, obj, by, source, dest, value) = self._runq.get()
+                prio, (name, obj, by, source, dest, value), inserted = self._runq.get(with_time=True)
             except IndexError:
                 continue
             finally:
                 self._runc.release()
-            self._task(name, obj, by, source, dest, value)
+            self._task(name, obj, by, source, dest, value, wait=time.monotonic() - inserted)
 
 
-    def _task(self, name, obj, by, source, dest, value):
+    def _task(self, name, obj, by, source, dest, value, wait=None):
         threading.current_thread().name = name
         #logger = logging.getLogger('_task.' + name)
 
         # logger.warning(f'task {obj} ({obj.__class__.__name__}) with {value} by {by} source {source}')
         if obj.__class__.__name__ == 'Logic':
-            self._execute_logic_task(obj, by, source, dest, value)
+            self._run_logic(obj, by, source, dest, value, wait)
 
         elif obj.__class__.__name__ == 'Item':
             try:
@@ -816,16 +1006,202 @@ class Scheduler(threading.Thread):
         threading.current_thread().name = 'idle'
 
 
-    def _execute_logic_task(self, logic, by, source, dest, value):
+    def _run_logic(self, logic, by, source, dest, value, wait=None):
+        """
+        Run a logic from _task method, observing the concurrency limit of the logic
+
+        If the maximum number of concurrent runs of the logic is reached, the logic decides
+        whether the trigger is kept for later, coalesced or skipped. Kept triggers are run by
+        the worker thread, that finishes an active run of the logic.
+
+        :param wait: time the task waited in the run queue (in seconds)
+        """
+        task = (by, source, dest, value, time.monotonic() - (wait or 0))
+        if not logic._begin_run(task):
+            return
+        self._continue_logic_runs(logic, task)
+
+    def _continue_logic_runs(self, logic, task):
+        """
+        Execute a run of a logic and the triggers, that the logic kept for later
+
+        The run of an async logic ends, when its coroutine has finished on the core event loop.
+        The kept triggers of an async logic are started from the thread of the event loop.
+        The run is finished on every path, otherwise the logic would keep a concurrency slot forever.
+        """
+        while task is not None:
+            by, source, dest, value, queued = task
+            future = None
+            try:
+                future = self._execute_logic_task(logic, by, source, dest, value, time.monotonic() - queued)
+            except Exception as e:
+                tasks_logger.exception(f"Logic {logic.name} exception: {e}")
+            except BaseException:
+                # the kept triggers are dropped and the slot of the run is released
+                while logic._end_run() is not None:
+                    pass
+                raise
+            if future is not None:
+                future.add_done_callback(lambda f: self._continue_logic_runs(logic, logic._end_run()))
+                return
+            task = logic._end_run()
+
+    def _get_logic_namespace(self, logic):
+        """
+        Returns the base namespace ("globals") for the execution of a logic
+
+        The namespace contains the globals of this module and the objects that are available
+        in logics (sh, logger, mqtt, shtime, env, items, logic, logics). It is built on the
+        first run of the logic and reused for the following runs. It is rebuilt, if the
+        mqtt module has become available since.
+
+        :param logic: logic object
+
+        :return: base namespace of the logic
+        :rtype: dict
+        """
+        namespace = getattr(logic, '_namespace', None)
+        if namespace is None or namespace['mqtt'] is not self.mqtt:
+            namespace = dict(globals())
+            namespace['sh'] = self._sh
+            namespace['logger'] = logging.getLogger('logics.' + logic.name)
+            namespace['mqtt'] = self.mqtt
+            namespace['shtime'] = self.shtime
+            namespace['env'] = lib.env
+            namespace['items'] = self.items
+            namespace['logic'] = logic
+            namespace['logics'] = logic._logics
+            logic._namespace = namespace
+        return namespace
+
+    def _exec_logic(self, logic, logic_globals):
+        """
+        Execute the code of a logic in this thread or, if configured for the logic, in a worker process
+
+        :return: CPU time of the logic in a worker process (in seconds)
+        :rtype: float
+        """
+        if getattr(logic, '_run_in_process', False):
+            return lib.logicprocess.execute_logic(logic, logic_globals, getattr(self._sh, '_logic_processes', None))
+        exec(logic._bytecode, logic_globals)
+        return 0.0
+
+    def _execute_logic_code(self, logic, logic_globals, statistics, wait, by, source):
+        """
+        Execute the code of a logic and record the run in the statistics of the logic
+
+        Exceptions raised by the logic are counted and passed on to the caller.
+        """
+        profile = statistics.get_profiler()
+        exception = False
+        process_cpu = 0.0
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            if profile is None:
+                process_cpu = self._exec_logic(logic, logic_globals)
+            else:
+                process_cpu = profile.runcall(self._exec_logic, logic, logic_globals)
+        except (LeaveLogic, SystemExit) as e:
+            process_cpu = getattr(e, 'process_cpu', 0.0)
+            raise
+        except Exception as e:
+            exception = True
+            process_cpu = getattr(e, 'process_cpu', 0.0)
+            raise
+        finally:
+            cpu = time.thread_time() - cpu_start + process_cpu
+            statistics.record_run(time.perf_counter() - start, cpu, wait, by, source, exception)
+            if profile is not None:
+                statistics.end_profiled_run(profile)
+
+    def _start_async_logic(self, logic, logic_globals, logger, trigger, statistics, wait):
+        """
+        Start the coroutine of an async logic on the core event loop
+
+        :return: future of the coroutine
+        :rtype: concurrent.futures.Future
+        """
+        if logic._async_mode == 'await':
+            # evaluating code with top-level await returns a coroutine
+            coro = eval(logic._bytecode, logic_globals)
+        else:
+            exec(logic._bytecode, logic_globals)
+            coro = logic_globals[ASYNC_ENTRY_POINT]()
+        future = lib.asyncloop.get_core_loop().run_coroutine(
+            self._run_logic_coroutine(logic, coro, logger, trigger, statistics, wait), kind='logic')
+        if statistics is not None:
+            statistics.count_coroutine(1)
+            future.add_done_callback(lambda f: statistics.count_coroutine(-1))
+        return future
+
+    async def _run_logic_coroutine(self, logic, coro, logger, trigger, statistics, wait):
+        """
+        Run the coroutine of an async logic and handle its end like the end of a logic run in a worker thread
+
+        The CPU time of async logics is not recorded, because the event loop thread is shared.
+        """
+        exception = False
+        start = time.perf_counter()
+        try:
+            await coro
+            logic.set_last_run()
+            for method in logic.get_method_triggers():
+                try:
+                    method(logic, trigger['by'], trigger['source'], trigger['dest'])
+                except Exception as e:
+                    logger.exception(f"Logic: Trigger {method} for {logic.name} failed: {e}")
+        except LeaveLogic as e:
+            if str(e) != '':
+                logger.info(f"Die Logik '{logic.name}' wurde verlassen. Grund: {e}")
+        except SystemExit:
+            pass
+        except Exception as e:
+            exception = True
+            self._log_logic_exception(logic, logger, e)
+        finally:
+            if statistics is not None:
+                statistics.record_run(time.perf_counter() - start, 0.0, wait, trigger['by'], trigger['source'], exception)
+
+    def _log_logic_exception(self, logic, logger, e):
+        """
+        Log an exception raised by a logic with the position in the logic, where it was raised
+        """
+        tb = traceback.extract_tb(e.__traceback__)[-1]
+        if tb[2] == '<module>':
+            logic_method = 'Hauptroutine der Logik'
+        else:
+            logic_method = 'function ' + tb[2] + '()'
+        logger.error(f"In der Logik ist ein Fehler aufgetreten:\n   Logik '{logic.name}', Datei '{tb[0]}', Zeile {tb[1]}\n   {logic_method}, Exception: {e}")
+
+    def get_logic_coroutine_count(self):
+        """
+        Get the number of coroutines of async logics, that are in flight on the core event loop
+
+        :return: number of coroutines
+        """
+        return lib.asyncloop.get_core_loop().in_flight('logic')
+
+    def _execute_logic_task(self, logic, by, source, dest, value, wait=None):
         """
         Execute a logic from _task method
 
+        Async logics are started on the core event loop. For them, the future of the coroutine
+        is returned and the run of the logic ends, when the future is done.
+
         :param logic:
-        :return:
+        :param wait: time the task waited in the run queue (in seconds)
+        :return: future of the coroutine of an async logic or None
         """
-        # get logger for the logic
-        name = 'logics.' + logic.name
-        logger = logging.getLogger(name)
+        if not self.mqtt:
+            if _lib_modules_found:
+                self.mqtt = Modules.get_instance().get_module('mqtt')
+        #mqtt = self.mqtt
+        logic.mqtt = self.mqtt
+
+        # base namespace and logger of the logic
+        namespace = self._get_logic_namespace(logic)
+        logger = namespace['logger']
 
         source_details = None
         if isinstance(source, dict):
@@ -854,32 +1230,27 @@ class Scheduler(threading.Thread):
         # logic.trigger_dict = trigger  # logic.trigger has naming conflict with method logic.trigger of lib.item
         # logics = logic._logics
 
-        if not self.mqtt:
-            if _lib_modules_found:
-                self.mqtt = Modules.get_instance().get_module('mqtt')
-        #mqtt = self.mqtt
-        logic.mqtt = self.mqtt
-
         try:
             if logic._enabled:
                 if self._sh.shng_status['code'] < 20:
                     logger.warning(f"Logik ignoriert, SmartHomeNG ist noch nicht vollständig initialisiert - Logik wurde getriggert durch {trigger}")
                 else:
-                    # set up "globals" environment for the logic
-                    logic_globals = dict(globals())
-                    logic_globals['sh'] = self._sh
-                    logic_globals['logger'] = logger
-                    logic_globals['mqtt'] = self.mqtt
-                    logic_globals['shtime'] = self.shtime
-                    logic_globals['env'] = lib.env
-                    logic_globals['items'] = self.items
+                    # set up "globals" environment for the logic: every run gets a fresh copy of
+                    # the base namespace, names assigned by a run do not leak into the next run
+                    logic_globals = namespace.copy()
                     logic_globals['trigger'] = trigger  # logic.trigger_dict
-                    logic_globals['logic'] = logic
-                    logic_globals['logics'] = logic._logics
 
                     # execute logic
-                    logger.debug(f"Getriggert durch: {trigger}")
-                    exec(logic._bytecode, logic_globals)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Getriggert durch: {trigger}")
+                    statistics = getattr(logic, '_statistics', None)
+                    if getattr(logic, '_async_mode', None) is not None:
+                        # the worker is not blocked while the coroutine of the logic is waiting
+                        return self._start_async_logic(logic, logic_globals, logger, trigger, statistics, wait)
+                    if statistics is None:
+                        self._exec_logic(logic, logic_globals)
+                    else:
+                        self._execute_logic_code(logic, logic_globals, statistics, wait, by, source)
                     # store timestamp of last run
                     logic.set_last_run()
                     for method in logic.get_method_triggers():
@@ -894,14 +1265,12 @@ class Scheduler(threading.Thread):
         except SystemExit:
             # ignore exit() call from logic.
             pass
+        except lib.logicprocess.LogicProcessException as e:
+            info = e.info
+            logger.error(f"In der Logik ist ein Fehler aufgetreten (Ausführung in einem Worker-Prozess):\n   Logik '{logic.name}', Datei '{info['file']}', Zeile {info['line']}\n   {info['function']}, Exception: {e}")
+            logger.debug(info['traceback'])
         except Exception as e:
-            tb = sys.exc_info()[2]
-            tb = traceback.extract_tb(tb)[-1]
-            if tb[2] == '<module>':
-                logic_method = 'Hauptroutine der Logik'
-            else:
-                logic_method = 'function ' + tb[2] + '()'
-            logger.error(f"In der Logik ist ein Fehler aufgetreten:\n   Logik '{logic.name}', Datei '{tb[0]}', Zeile {tb[1]}\n   {logic_method}, Exception: {e}")
+            self._log_logic_exception(logic, logger, e)
             #logger.exception(f"In der Logik ist ein Fehler aufgetreten:\n   Logik '{logic.name}', Datei '{tb[0]}', Zeile {tb[1]}\n   {logic_method}, Exception: '{e}'\n ")
 
         return
@@ -19,11 +19,11 @@
 #  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
 #########################################################################
 
-try:
-    import holidays
-    HOLIDAYS_imported = True
-except:
-    HOLIDAYS_imported = False
+from lib.lazyimport import lazy_import
+
+# holidays is imported, when the holidays are initialized on first use
+holidays = lazy_import('holidays')
+HOLIDAYS_imported = holidays is not None
 
 
 #try:
@@ -31,9 +31,14 @@ are implemented in this library.
 
 """
 
+import concurrent.futures
+import datetime
 import logging
+import multiprocessing
 import os
+import re
 import shutil
+import threading
 
 from collections import OrderedDict
 
@@ -63,6 +68,191 @@ def editing_is_enabled():
     return(EDITING_ENABLED == True)
 
 
+# ==================================================================================
+#   Backends for read-only loading of yaml data
+#
+#   'ruamel':  SafeLoader of ruamel.yaml (pure Python) - always available
+#   'libyaml': parser of the C library libyaml (through PyYAML), if it is installed. Scalars are
+#              resolved and constructed the way ruamel.yaml does it (YAML 1.2), so the loaded data
+#              is the same. If the data cannot be loaded, ruamel.yaml loads it again to get the
+#              same result and the same error messages.
+#
+#   Round-trip loading and saving (yaml_load_roundtrip, yaml_save_roundtrip, ...) always uses ruamel.yaml
+#
+
+try:
+    import yaml as pyyaml
+    from yaml.cyaml import CParser as _CParser
+except (ImportError, AttributeError):
+    pyyaml = None
+
+
+class _FallbackError(Exception):
+    """
+    The data has to be loaded by ruamel.yaml to get the same result
+    """
+    pass
+
+
+if pyyaml is not None:
+
+    class _LibyamlResolver(pyyaml.resolver.BaseResolver):
+        """
+        Implicit resolvers of ruamel.yaml for YAML 1.2
+        """
+        pass
+
+    for _tag, _regexp, _first in [
+            ('tag:yaml.org,2002:bool', r'''^(?:true|True|TRUE|false|False|FALSE)$''', 'tTfF'),
+            ('tag:yaml.org,2002:float', r'''^(?:
+             [-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+]?[0-9]+)?
+            |[-+]?(?:[0-9][0-9_]*)(?:[eE][-+]?[0-9]+)
+            |[-+]?\.[0-9_]+(?:[eE][-+][0-9]+)?
+            |[-+]?\.(?:inf|Inf|INF)
+            |\.(?:nan|NaN|NAN))$''', '-+0123456789.'),
+            ('tag:yaml.org,2002:int', r'''^(?:[-+]?0b[0-1_]+
+            |[-+]?0o?[0-7_]+
+            |[-+]?[0-9_]+
+            |[-+]?0x[0-9a-fA-F_]+)$''', '-+0123456789'),
+            ('tag:yaml.org,2002:merge', r'''^(?:<<)$''', '<'),
+            ('tag:yaml.org,2002:null', r'''^(?: ~
+            |null|Null|NULL
+            | )$''', ['~', 'n', 'N', '']),
+            ('tag:yaml.org,2002:timestamp', r'''^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+            |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
+            (?:[Tt]|[ \t]+)[0-9][0-9]?
+            :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
+            (?:[ \t]*(?:Z|[-+][0-9][0-9]?(?::[0-9][0-9])?))?)$''', '0123456789'),
+            ('tag:yaml.org,2002:value', r'''^(?:=)$''', '='),
+            ]:
+        _LibyamlResolver.add_implicit_resolver(_tag, re.compile(_regexp, re.X), list(_first))
+
+    class _LibyamlConstructor(pyyaml.constructor.SafeConstructor):
+        """
+        Constructor, that builds scalars like the SafeConstructor of ruamel.yaml does for YAML 1.2
+        """
+
+        def construct_mapping(self, node, deep=False):
+            # ruamel.yaml refuses duplicate keys in (unordered) mappings, leave the error message to ruamel.yaml
+            keys = [key_node.value for key_node, value_node in node.value
+                    if isinstance(key_node, pyyaml.ScalarNode) and key_node.tag != 'tag:yaml.org,2002:merge']
+            if len(keys) != len(set(keys)):
+                raise _FallbackError('duplicate key')
+            return pyyaml.constructor.SafeConstructor.construct_mapping(self, node, deep)
+
+        def construct_yaml_int(self, node):
+            value_s = self.construct_scalar(node).replace('_', '')
+            sign = +1
+            if value_s[0] == '-':
+                sign = -1
+            if value_s[0] in '+-':
+                value_s = value_s[1:]
+            if value_s == '0':
+                return 0
+            elif value_s.startswith('0b'):
+                return sign * int(value_s[2:], 2)
+            elif value_s.startswith('0x'):
+                return sign * int(value_s[2:], 16)
+            elif value_s.startswith('0o'):
+                return sign * int(value_s[2:], 8)
+            return sign * int(value_s)
+
+        def construct_yaml_float(self, node):
+            value_s = self.construct_scalar(node).replace('_', '').lower()
+            sign = +1
+            if value_s[0] == '-':
+                sign = -1
+            if value_s[0] in '+-':
+                value_s = value_s[1:]
+            if value_s == '.inf':
+                return sign * self.inf_value
+            elif value_s == '.nan':
+                return self.nan_value
+            return sign * float(value_s)
+
+        def construct_yaml_timestamp(self, node):
+            # like ruamel.yaml: timestamps with a timezone are converted to naive datetimes in UTC
+            data = pyyaml.constructor.SafeConstructor.construct_yaml_timestamp(self, node)
+            if isinstance(data, datetime.datetime) and data.tzinfo is not None:
+                data = (data - data.utcoffset()).replace(tzinfo=None)
+            return data
+
+    _LibyamlConstructor.add_constructor('tag:yaml.org,2002:int', _LibyamlConstructor.construct_yaml_int)
+    _LibyamlConstructor.add_constructor('tag:yaml.org,2002:float', _LibyamlConstructor.construct_yaml_float)
+    _LibyamlConstructor.add_constructor('tag:yaml.org,2002:timestamp', _LibyamlConstructor.construct_yaml_timestamp)
+
+    class _LibyamlLoader(_CParser, _LibyamlConstructor, _LibyamlResolver):
+
+        def __init__(self, stream):
+            _CParser.__init__(self, stream)
+            _LibyamlConstructor.__init__(self)
+            _LibyamlResolver.__init__(self)
+
+    class _LibyamlOrderedLoader(_LibyamlLoader):
+
+        def construct_ordered_mapping(self, node):
+            self.flatten_mapping(node)
+            return OrderedDict(self.construct_pairs(node))
+
+    _LibyamlOrderedLoader.add_constructor('tag:yaml.org,2002:map', _LibyamlOrderedLoader.construct_ordered_mapping)
+
+
+_load_backend = 'ruamel' if pyyaml is None else 'libyaml'
+
+
+def get_load_backends():
+    """
+    Return the names of the available backends for read-only loading of yaml data
+
+    :return: list of backend names
+    :rtype: list
+    """
+    return ['ruamel'] if pyyaml is None else ['ruamel', 'libyaml']
+
+
+def get_load_backend():
+    """
+    Return the name of the backend used for read-only loading of yaml data
+
+    :rtype: str
+    """
+    return _load_backend
+
+
+def set_load_backend(backend):
+    """
+    Select the backend for read-only loading of yaml data
+
+    :param backend: 'ruamel' or 'libyaml'
+    :type backend: str
+    """
+    global _load_backend
+    if backend not in get_load_backends():
+        raise ValueError(f"yaml load backend '{backend}' is not available")
+    _load_backend = backend
+
+
+def _safe_load(sdata, ordered):
+    """
+    Load yaml data (read-only) with the selected backend
+
+    :param sdata: yaml data
+    :param ordered: load to an OrderedDict?
+
+    :return: loaded data
+    """
+    if _load_backend == 'libyaml' and not sdata.lstrip().startswith('%'):
+        # documents with directives (e.g. %YAML 1.1) are left to ruamel.yaml, which handles YAML versions
+        try:
+            return pyyaml.load(sdata, _LibyamlOrderedLoader if ordered else _LibyamlLoader)
+        except Exception:
+            # ruamel.yaml loads the data again, to get the same result or the same error message
+            pass
+    if ordered:
+        return _ordered_load(sdata, yaml.SafeLoader)
+    return yaml.load(sdata, yaml.SafeLoader)
+
+
 # ==================================================================================
 #   Routines to handle yaml files
 #
@@ -103,6 +293,10 @@ def yaml_load(filename, ordered=False, ignore_notfound=False):
     :rtype: Dict | OrderedDict | None
     """
 
+    preloaded = _preloaded.pop((filename, ordered), None)
+    if preloaded is not None and preloaded[0] == _file_signature(filename):
+        return preloaded[1]
+
     dict_type = 'dict'
     if ordered:
         dict_type = 'OrderedDict'
@@ -113,10 +307,7 @@ def yaml_load(filename, ordered=False, ignore_notfound=False):
         with open(filename, 'r', encoding='utf8') as stream:
             sdata = stream.read()
         sdata = sdata.replace('\n', '\n\n')
-        if ordered:
-            y = _ordered_load(sdata, yaml.SafeLoader)
-        else:
-            y = yaml.load(sdata, yaml.SafeLoader)
+        y = _safe_load(sdata, ordered)
     except Exception as e:
         estr = str(e)
         if "found character '\\t'" in estr:
@@ -140,6 +331,140 @@ def yaml_load(filename, ordered=False, ignore_notfound=False):
     return y
 
 
+# ==================================================================================
+#   Loading yaml files in parallel
+#
+
+_preloaded = {}     # (filename, ordered) -> (file signature, loaded data) - consumed by yaml_load()
+
+PRELOAD_MIN_FILES = 4   # preloading fewer files does not pay off the start of the worker processes
+
+
+def _file_signature(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class _RecordCollector(logging.Handler):
+    """
+    Collects the log records of a worker process, to be handled by the main process
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        # make the record picklable
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+_collector = None
+
+
+def _init_preload_worker():
+    global _collector
+    _collector = _RecordCollector()
+    # yaml_load() only logs to the logger of this module
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(_collector)
+    logger.propagate = False
+
+
+def _preload_worker(filename, ordered):
+    signature = _file_signature(filename)
+    data = yaml_load(filename, ordered)
+    records = _collector.records
+    _collector.records = []
+    return signature, data, records
+
+
+def yaml_preload(filenames, ordered=False, processes=None):
+    """
+    Load yaml files in a pool of processes, for later calls of yaml_load()
+
+    The files are parsed in parallel. The results are handed to the next call of yaml_load() for
+    the same file (if the file has not been changed in between). Log messages of the worker
+    processes are handled by the main process in the order of the filenames.
+
+    If the files cannot be loaded in parallel, nothing is preloaded and yaml_load() parses the
+    files itself. The worker processes are forked, because a spawned process would import the
+    main script of SmartHomeNG: without the 'fork' start method, nothing is preloaded. Forking a
+    multithreaded process may deadlock the worker processes, so nothing is preloaded, if other
+    threads are running (SmartHomeNG preloads the item files at startup, before threads are started).
+    Files, that are already preloaded, are skipped.
+
+    Preloaded files, that are not loaded afterwards, are dropped with yaml_preload_discard().
+
+    :param filenames: list of names of the yaml files to load
+    :param ordered: load to an OrderedDict? Default=False
+    :param processes: number of worker processes (default: number of CPUs, 1 disables preloading)
+    :type filenames: list
+    :type ordered: bool
+    :type processes: int
+
+    :return: number of files preloaded
+    :rtype: int
+    """
+    filenames = [filename for filename in dict.fromkeys(filenames) if (filename, ordered) not in _preloaded]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(filenames))
+    if processes <= 1 or len(filenames) < PRELOAD_MIN_FILES:
+        return 0
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return 0
+    if threading.active_count() > 1:
+        logger.debug(f"yaml_preload: {threading.active_count()} threads are running, the files are loaded one after another")
+        return 0
+
+    try:
+        context = multiprocessing.get_context('fork')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_preload_worker) as executor:
+            results = list(executor.map(_preload_worker, filenames, [ordered] * len(filenames), chunksize=max(1, len(filenames) // (processes * 4))))
+    except Exception as e:
+        logger.warning(f"yaml_preload: Could not load files in parallel, loading them one after another: {e}")
+        return 0
+
+    for filename, (signature, data, records) in zip(filenames, results):
+        for record in records:
+            logging.getLogger(record.name).handle(record)
+        if signature is not None:
+            _preloaded[(filename, ordered)] = (signature, data)
+    return len(filenames)
+
+
+def yaml_preload_discard(filenames=None):
+    """
+    Drop the preloaded files, that have not been loaded by yaml_load()
+
+    :param filenames: names of the files to drop (default: all preloaded files)
+    :type filenames: list
+
+    :return: number of files dropped
+    :rtype: int
+    """
+    if filenames is None:
+        count = len(_preloaded)
+        _preloaded.clear()
+        return count
+    count = 0
+    for filename in filenames:
+        for ordered in (False, True):
+            if _preloaded.pop((filename, ordered), None) is not None:
+                count += 1
+    return count
+
+
 def yaml_load_fromstring(string, ordered=False):
     """
     Load contents of a string into an dict/OrderedDict structure. The string has to be valid yaml
@@ -163,10 +488,7 @@ def yaml_load_fromstring(string, ordered=False):
     try:
         sdata = string
 #        sdata = sdata.replace('\n', '\n\n')
-        if ordered:
-            y = _ordered_load(sdata, yaml.SafeLoader)
-        else:
-            y = yaml.load(sdata, yaml.SafeLoader)
+        y = _safe_load(sdata, ordered)
     except Exception as e:
         estr = str(e)
         if "found character '\\t'" in estr:
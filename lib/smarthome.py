@@ -78,17 +78,22 @@ PIDFILE = os.path.join(BASE, 'var', 'run', 'smarthome.pid')
 #####################################################################
 # Import SmartHomeNG Modules
 #####################################################################
+import lib.asyncloop
 import lib.config
 import lib.connection
 import lib.daemon
 import lib.item
+import lib.lazyimport
 import lib.log
+import lib.metadata
 import lib.logic
+import lib.logicprocess
 import lib.module
 import lib.network
 import lib.plugin
 import lib.scene
 import lib.scheduler
+import lib.startupprofile
 import lib.tools
 import lib.utils
 import lib.orb
@@ -122,9 +127,22 @@ class SmartHome():
     _threadinfo_export = False
     _default_logtext = None
 
+    # for plugins
+    _plugins_parallel_init = False
+    _plugins_parallel_workers = 8
+    _plugins_init_timeout = 120
+
     # for scheduler
     _restart_on_num_workers = 30
 
+    # for logics
+    _logic_processes = None             # number of worker processes for logics with 'run_in_process' (None: number of CPUs)
+
+    # for network
+    _tcp_shared_reactor = False         # Tcp_client instances receive in one shared reactor thread (if not set by the plugin)
+    _tcp_send_queue = False             # Tcp_client instances send through a send queue (if not set by the plugin)
+    _connection_statistics_items = False    # write the traffic statistics of all connections to the item env.core.connections
+
     # ---
 
     BASE = os.path.sep.join(os.path.realpath(__file__).split(os.path.sep)[:-2])
@@ -283,6 +301,9 @@ class SmartHome():
             exit(1)
         if hasattr(self, '_module_paths'):
             sys.path.extend(self._module_paths if type(self._module_paths) is list else [self._module_paths])
+        lib.network.Tcp_client.shared_reactor_default = lib.utils.Utils.to_bool(self._tcp_shared_reactor, default=False)
+        lib.network.Tcp_client.send_queue_default = lib.utils.Utils.to_bool(self._tcp_send_queue, default=False)
+        self._connection_statistics_items = lib.utils.Utils.to_bool(self._connection_statistics_items, default=False)
 
         #############################################################
         # Setting (local) tz if set in smarthome.yaml
@@ -694,19 +715,37 @@ class SmartHome():
 
         threading.currentThread().name = 'Main'
 
+        # record the duration of the startup phases (written to ../var/run/startup_profile.json)
+        profiler = lib.startupprofile.get_startup_profiler()
+        profiler.start()
+
         #############################################################
         # Prepare TriggerTimes for Scheduler
         #############################################################
         self.triggertimes = TriggerTimes(self)
 
+        #############################################################
+        # Start the worker processes for logics
+        #############################################################
+        # the worker processes are forked before the scheduler and the plugins start their threads
+        if lib.logic.uses_process_pool(self._logic_conf_basename, self._env_logic_conf_basename):
+            lib.logicprocess.start_process_pool(self._logic_processes)
+
+        # the item files are parsed in parallel by forked processes, while no other threads are running
+        # (the items are loaded after the initialization of the plugins)
+        with profiler.phase('items_preload'):
+            lib.config.preload_itemsdir(self._env_dir)
+            lib.config.preload_itemsdir(self._items_dir)
+
         #############################################################
         # Start Scheduler
         #############################################################
-        self.scheduler = lib.scheduler.Scheduler.get_instance()
-        if self.scheduler is None:
-            self.scheduler = lib.scheduler.Scheduler(self)
-        self.trigger = self.scheduler.trigger
-        self.scheduler.start()
+        with profiler.phase('scheduler'):
+            self.scheduler = lib.scheduler.Scheduler.get_instance()
+            if self.scheduler is None:
+                self.scheduler = lib.scheduler.Scheduler(self)
+            self.trigger = self.scheduler.trigger
+            self.scheduler.start()
 
         # set warn level to a higher number of workers on fast cpus
         if self.cpu_speed_class == 'fast':
@@ -730,13 +769,15 @@ class SmartHome():
         self.shng_status = {'code': 11, 'text': 'Starting: Initializing and starting loadable modules'}
 
         self._logger.info("Init loadable Modules")
-        self.modules = lib.module.Modules(self, configfile=self._module_conf_basename)
-        self.modules.start()
+        with profiler.phase('modules'):
+            self.modules = lib.module.Modules(self, configfile=self._module_conf_basename)
+            self.modules.start()
 
         #############################################################
         # Init and import user-functions
         #############################################################
-        uf.init_lib(self.get_basedir(), self)
+        with profiler.phase('userfunctions'):
+            uf.init_lib(self.get_basedir(), self)
 
         #############################################################
         # Init Item-Wrapper
@@ -752,7 +793,8 @@ class SmartHome():
         if self._mode != 'default':
             print("---> Start initialization of plugins")
         self._logger.info("Start initialization of plugins")
-        self.plugins = lib.plugin.Plugins(self, configfile=self._plugin_conf_basename)
+        with profiler.phase('plugins_init'):
+            self.plugins = lib.plugin.Plugins(self, configfile=self._plugin_conf_basename)
         self.plugin_load_complete = True
 
         #############################################################
@@ -763,7 +805,8 @@ class SmartHome():
         if self._mode != 'default':
             print("---> Start initialization of items")
         self._logger.info("Start initialization of items")
-        self.items.load_itemdefinitions(self._env_dir, self._items_dir, self._etc_dir, self._plugins_dir)
+        with profiler.phase('items'):
+            self.items.load_itemdefinitions(self._env_dir, self._items_dir, self._etc_dir, self._plugins_dir)
 
         self.item_count = self.items.item_count()
         if self._mode != 'default':
@@ -776,13 +819,15 @@ class SmartHome():
         #############################################################
         self.shng_status = {'code': 15, 'text': 'Starting: Initializing logics'}
 
-        self.logics = lib.logic.Logics(self, self._logic_conf_basename, self._env_logic_conf_basename)
+        with profiler.phase('logics'):
+            self.logics = lib.logic.Logics(self, self._logic_conf_basename, self._env_logic_conf_basename)
         # signal.signal(signal.SIGHUP, self.logics.reload_logics)
 
         #############################################################
         # Init Scenes
         #############################################################
-        self.scenes = lib.scene.Scenes(self)
+        with profiler.phase('scenes'):
+            self.scenes = lib.scene.Scenes(self)
 
         #############################################################
         # Start Connections - remove with lib.connection
@@ -795,7 +840,8 @@ class SmartHome():
         #############################################################
         self.shng_status = {'code': 16, 'text': 'Starting: Starting plugins'}
 
-        self.plugins.start()
+        with profiler.phase('plugins_start'):
+            self.plugins.start()
         self.plugin_start_complete = True
 
         #############################################################
@@ -814,6 +860,7 @@ class SmartHome():
         # Main Loop
         #############################################################
         self.shng_status = {'code': 20, 'text': 'Running'}
+        self._finish_startup_profile(profiler)
         if self._mode != 'default':
             print("--------------------   SmartHomeNG initialization finished   --------------------")
         self._logger_main.notice("--------------------   SmartHomeNG initialization finished   --------------------")
@@ -826,6 +873,37 @@ class SmartHome():
                 self._logger.exception(f"Connection polling failed: {e}")
 
 
+    def _finish_startup_profile(self, profiler):
+        """
+        Write the profile of the startup to ../var/run and log a summary
+
+        :param profiler: startup profiler
+        """
+        profiler.add_info('version', self.version)
+        profiler.add_info('item_count', self.item_count)
+        metadata_cache = lib.metadata.get_metadata_cache().get_statistics()
+        attribute_checks = lib.metadata.get_attribute_check_statistics()
+        profiler.add_info('metadata_cache', metadata_cache)
+        profiler.add_info('attribute_checks', attribute_checks)
+        logics_bytecode = lib.logic.get_bytecode_cache_statistics()
+        profiler.add_info('logics_bytecode', logics_bytecode)
+        profiler.add_info('libraries', {'rss': lib.lazyimport.get_rss(),
+                                        'imported_on_first_use': lib.lazyimport.get_loaded_libraries(),
+                                        'imported': lib.lazyimport.get_imported_packages()})
+        profile = profiler.finish(os.path.join(self.get_vardir(), 'run', lib.startupprofile.STARTUP_PROFILE_FILE))
+        if profile is None:
+            return
+        phases = ', '.join(f"{phase['name']}={phase['wall']:.2f}s" for phase in profile['phases'] if phase.get('parent') is None)
+        self._logger.notice(f"Startup finished in {profile['total']['wall']:.2f} sec (cpu {profile['total']['cpu']:.2f} sec): {phases}")
+        slowest = ', '.join(f"{phase['name']}={phase['wall']:.2f}s" for phase in profiler.get_slowest('plugins_init', 3))
+        if slowest:
+            self._logger.info(f"Slowest plugin initializations: {slowest}")
+        self._logger.notice(f"Metadata files: {metadata_cache['hits']} of {metadata_cache['lookups']} read from cache, saved {metadata_cache['saved']:.2f} sec - "
+                            f"Item attribute checks: {attribute_checks['memoized']} of {attribute_checks['checks']} reused, saved {attribute_checks['saved']:.2f} sec")
+        self._logger.notice(f"Logics: {logics_bytecode['hits']} of {logics_bytecode['loads']} compiled logics read from cache, saved {logics_bytecode['saved']:.2f} sec")
+        return
+
+
     def stop(self, signum=None, frame=None):
         """
         This method is used to stop SmartHomeNG and all it's threads
@@ -839,12 +917,15 @@ class SmartHome():
             self.items.stop()
         if self.scheduler is not None:
             self.scheduler.stop()
+        lib.logicprocess.shutdown_process_pool()
         if self.plugins is not None:
             self.plugins.stop()
         if self.modules is not None:
             self.modules.stop()
         if self.connections is not None:
             self.connections.close()
+        # plugins, modules and network servers may use the core event loop until they are stopped
+        lib.asyncloop.stop_core_loop()
 
         self.shng_status = {'code': 32, 'text': 'Stopping: Stopping threads'}
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG.
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+
+"""
+This library records the duration of the phases of the SmartHomeNG startup
+(loading modules, initializing plugins, loading items, ...).
+
+For every phase the wall time and the CPU time of the thread executing the phase
+are recorded. Phases can be nested (e.g. the initialization of a single plugin
+within the phase 'plugins_init'). At the end of the startup, the profile is written
+to ../var/run/startup_profile.json and can be read through the admin API.
+
+:Warning: This library is part of the core of SmartHomeNG. It **should not be called directly** from plugins!
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PROFILE_FILE = 'startup_profile.json'
+
+
+class StartupProfiler:
+    """
+    Records the phases of the startup of SmartHomeNG
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = False
+        self._phases = []
+        self._info = {}
+        self._profile = None
+        self._start_wall = 0.0
+        self._start_cpu = 0.0
+        self._started = None
+
+    def start(self):
+        """
+        Start recording (at the beginning of the startup)
+        """
+        with self._lock:
+            self._active = True
+            self._phases = []
+            self._info = {}
+            self._profile = None
+            self._started = datetime.now()
+            self._start_wall = time.perf_counter()
+            self._start_cpu = time.process_time()
+
+    @property
+    def active(self):
+        """
+        True, while the startup is recorded
+        """
+        return self._active
+
+    @contextlib.contextmanager
+    def phase(self, name, parent=None, **details):
+        """
+        Context manager to record a phase of the startup
+
+        Nothing is recorded, if the profiler is not active (e.g. when items or plugins are
+        reloaded while SmartHomeNG is running).
+
+        :param name: name of the phase (e.g. 'items_parse' or the name of a plugin)
+        :param parent: name of the enclosing phase (e.g. 'plugins_init')
+        :param details: additional information to store with the phase (e.g. the plugin name)
+        """
+        if not self._active:
+            yield
+            return
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start_wall, time.thread_time() - start_cpu,
+                           start=start_wall - self._start_wall, parent=parent, **details)
+
+    def add_phase(self, name, wall, cpu, start=None, parent=None, **details):
+        """
+        Add a phase, which has been measured by the caller
+
+        :param name: name of the phase
+        :param wall: wall time of the phase (in seconds)
+        :param cpu: CPU time of the phase (in seconds)
+        :param start: start of the phase (in seconds since the start of the profiler)
+        :param parent: name of the enclosing phase
+        """
+        if not self._active:
+            return
+        entry = {'name': name, 'start': round(start, 6) if start is not None else None,
+                 'wall': round(wall, 6), 'cpu': round(cpu, 6)}
+        if parent is not None:
+            entry['parent'] = parent
+        entry.update(details)
+        with self._lock:
+            self._phases.append(entry)
+
+    def add_info(self, key, value):
+        """
+        Add additional information to the profile (must be serializable to json)
+
+        :param key: key of the information in the profile
+        :param value: information
+        """
+        with self._lock:
+            self._info[key] = value
+
+    def finish(self, filename=None):
+        """
+        Stop recording (at the end of the startup) and write the profile to a file
+
+        :param filename: name of the file to write the profile to (None: do not write)
+
+        :return: the profile
+        :rtype: dict
+        """
+        if not self._active:
+            return self._profile
+        with self._lock:
+            self._active = False
+            profile = {'started': self._started.isoformat(),
+                       'total': {'wall': round(time.perf_counter() - self._start_wall, 6),
+                                 'cpu': round(time.process_time() - self._start_cpu, 6)},
+                       'phases': self._phases,
+                       }
+            profile.update(self._info)
+            self._profile = profile
+
+        if filename is not None:
+            try:
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                with open(filename, 'w') as f:
+                    json.dump(profile, f, indent=2, default=str)
+            except Exception as e:
+                logger.warning(f"Startup profile could not be written to {filename}: {e}")
+        return profile
+
+    def get_profile(self):
+        """
+        Returns the profile of the last startup (None, if the startup has not finished)
+
+        :rtype: dict
+        """
+        return self._profile
+
+    def get_slowest(self, parent, count=5):
+        """
+        Returns the slowest phases within a phase (e.g. the slowest plugins)
+
+        :param parent: name of the enclosing phase
+        :param count: number of phases to return
+
+        :return: list of phases, sorted by wall time
+        :rtype: list
+        """
+        with self._lock:
+            phases = [phase for phase in self._phases if phase.get('parent') == parent]
+        return sorted(phases, key=lambda phase: phase['wall'], reverse=True)[:count]
+
+
+_profiler = StartupProfiler()
+
+
+def get_startup_profiler():
+    """
+    Returns the startup profiler of SmartHomeNG
+    """
+    return _profiler
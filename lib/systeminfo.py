@@ -30,7 +30,9 @@ try:
     import cpuinfo
 except:
     import lib.utils as utils
-    import lib.cpuinfo as cpuinfo
+    from lib.lazyimport import lazy_import
+    # cpuinfo is imported, when the cpu information is needed for the first time
+    cpuinfo = lazy_import('lib.cpuinfo')
 
 try:
     import lib.shyaml as shyaml
@@ -62,6 +62,11 @@ class ItemsController(RESTResource):
             #self.logger.notice(f"ItemsController.root(): result = {result}")
             return json.dumps(result)
 
+        if id == 'memory':
+            # /api/items/memory
+            self.logger.info(f"ItemsController GET /api/items/{id}")
+            return json.dumps(self.items.get_memory_report())
+
             #raise cherrypy.NotFound
             #self.logger.info("LogController (GET): logfiles = {}".format(logs))
             #return json.dumps({'logs':logs, 'default': self.root_logname})
@@ -71,6 +76,32 @@ class ItemsController(RESTResource):
     read.expose_resource = True
     read.authentication_needed = True
 
+
+    # ======================================================================
+    #  POST /api/items
+    #
+    def add(self, id=None):
+        """
+        Handle POST requests
+        """
+
+        if self.items is None:
+            self.items = Items.get_instance()
+
+        if id == 'reload':
+            # /api/items/reload
+            self.logger.info(f"ItemsController POST /api/items/{id}")
+            result = self.items.reload_itemdefinitions()
+            if result is None:
+                return json.dumps({'result': 'error', 'description': 'Item definitions have not been loaded yet'})
+            result['result'] = 'ok'
+            return json.dumps(result)
+
+        return None
+
+    add.expose_resource = True
+    add.authentication_needed = True
+
 class ItemsListController(RESTResource):
 
     def __init__(self, module):
@@ -305,6 +305,45 @@ class LogicsController(RESTResource):
         return json.dumps(logic_conf)
 
 
+    def get_logic_statistics(self, logicname=None):
+        """
+        Get the execution statistics of a logic or of all loaded logics
+        """
+        if logicname is not None:
+            if not self.logics.is_logic_loaded(logicname):
+                return json.dumps({'result': 'error', 'description': f"No loaded logic with name '{logicname}' found"})
+            return json.dumps(self.logics.return_logic(logicname)._statistics.get_statistics())
+
+        result = {}
+        for name in self.logics.return_loaded_logics():
+            statistics = self.logics.return_logic(name)._statistics.get_statistics(top=3)
+            statistics.pop('profile', None)
+            result[name] = statistics
+        return json.dumps(result)
+
+
+    def set_logic_statistics(self, logicname, action, params):
+        """
+        Start the profiling of the next runs of a logic or reset its statistics
+
+        valid actions are: 'profile' (params: {'runs': <number of runs>}), 'resetstatistics'
+        """
+        if not self.logics.is_logic_loaded(logicname):
+            return json.dumps({'result': 'error', 'description': f"No loaded logic with name '{logicname}' found"})
+        statistics = self.logics.return_logic(logicname)._statistics
+        if action == 'profile':
+            runs = 1
+            if isinstance(params, dict):
+                runs = params.get('runs', 1)
+            try:
+                statistics.start_profiling(int(runs))
+            except ValueError:
+                return json.dumps({'result': 'error', 'description': f"Invalid number of runs '{runs}'"})
+        else:
+            statistics.reset()
+        return json.dumps({'result': 'ok'})
+
+
     # ======================================================================
     #  /api/logics/<logicname>?action=<action>
     #
@@ -503,6 +542,8 @@ class LogicsController(RESTResource):
             return self.get_groups_info()
         elif infotype == 'status':
             return self.get_logic_state(logicname)
+        elif infotype == 'statistics':
+            return self.get_logic_statistics(logicname)
 
 
     read.expose_resource = True
@@ -535,6 +576,9 @@ class LogicsController(RESTResource):
             elif action == 'deletegroup':
                 self.logger.info(f"LogicsController.update: group={name}, action={action}, params={params}")
                 return self.delete_group(name, params)
+            elif action in ['profile', 'resetstatistics']:
+                self.logger.info(f"LogicsController.update: logic={name}, action={action}, params={params}")
+                return self.set_logic_statistics(name, action, params)
             else:
                 self.logger.info(f"LogicsController.update: group={name}, action={action}, filename={filename}")
                 return self.set_logic_state(name, action, filename)
@@ -92,10 +92,10 @@ class SchedulersController(RESTResource):
         """
         schedule_list = []
 
-        # handle all defined schedulers
-        for entry in self._sh.scheduler._scheduler:
+        # handle all defined schedulers and armed one-shot timers
+        entries = list(self._sh.scheduler._scheduler.items()) + self._sh.scheduler.get_timers()
+        for entry, s in entries:
             schedule = dict()
-            s = self._sh.scheduler._scheduler[entry]
             if s['next'] != None and s['cycle'] != '' and s['cron'] != '':
                 schedule['fullname'] = entry
                 schedule['name'] = entry
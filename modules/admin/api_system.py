@@ -39,6 +39,7 @@ from .rest import RESTResource
 #import bin.shngversion
 import lib.daemon
 import lib.backup as backup
+import lib.startupprofile
 from lib.shpypi import Shpypi
 from lib.shtime import Shtime
 from lib.utils import Utils
@@ -361,6 +362,25 @@ class SystemController(RESTResource):
     #     return json.dumps(response)
     #
     #
+    # ======================================================================
+    #  /api/system/startup_profile
+    #
+    def startup_profile(self):
+        """
+        returns the durations of the phases of the last startup of SmartHomeNG
+        """
+        profile = lib.startupprofile.get_startup_profiler().get_profile()
+        if profile is None:
+            # startup not finished yet: return the profile of the previous startup (if any)
+            filename = os.path.join(self._sh.get_vardir(), 'run', lib.startupprofile.STARTUP_PROFILE_FILE)
+            try:
+                with open(filename) as f:
+                    profile = json.load(f)
+            except Exception:
+                profile = {}
+        return json.dumps(profile)
+
+
     # ======================================================================
     #  GET /api/system/
     #
@@ -376,6 +396,8 @@ class SystemController(RESTResource):
         #     return self.status()
         elif id == 'info':
             return self.info()
+        elif id == 'startup_profile':
+            return self.startup_profile()
 
         return None
 
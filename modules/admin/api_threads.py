@@ -26,6 +26,7 @@ import logging
 import json
 import cherrypy
 
+import lib.connectionstatistics
 from .rest import RESTResource
 
 
@@ -112,6 +113,14 @@ class ThreadsController(RESTResource):
         return thread
 
 
+    def get_connection_statistics(self):
+        """
+        get the traffic statistics of all connections (lib.network, lib.connection, SmartDevicePlugin)
+        """
+        return json.dumps({'totals': lib.connectionstatistics.get_totals(),
+                           'connections': lib.connectionstatistics.get_all_statistics()})
+
+
     # ======================================================================
     #  GET /api/threads
     #
@@ -119,8 +128,10 @@ class ThreadsController(RESTResource):
         """
         Handle GET requests for threads API
         """
-        self.logger.info("ThreadsController.read()")
+        self.logger.info(f"ThreadsController.read('{id}')")
 
+        if id == 'connections':
+            return self.get_connection_statistics()
         return self.get_thread_list()
 
     read.expose_resource = True
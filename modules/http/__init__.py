@@ -27,11 +27,14 @@ import threading
 from collections import OrderedDict
 
 import cherrypy
-from jinja2 import Environment, FileSystemLoader
 
+from lib.lazyimport import lazy_import
 from lib.utils import Utils
 from lib.model.module import Module
 
+# jinja2 is imported, when the first template environment is initialized
+jinja2 = lazy_import('jinja2')
+
 
 class CherryPyFilter(logging.Filter):
     """
@@ -395,7 +398,7 @@ class Http(Module):
         """
         mytemplates = os.path.join(self.webif_dir, 'templates')
         globaltemplates = self.gtemplates_dir
-        tplenv = Environment(loader=FileSystemLoader([mytemplates, globaltemplates]))
+        tplenv = jinja2.Environment(loader=jinja2.FileSystemLoader([mytemplates, globaltemplates]))
 
         tplenv.globals['isfile'] = self.is_staticfile
         tplenv.globals['_'] = self.translate        # use translate method of webinterface class
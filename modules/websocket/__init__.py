@@ -33,6 +33,7 @@ import socket
 import logging
 
 from lib.model.module import Module
+import lib.asyncloop
 
 from lib.shtime import Shtime
 from lib.utils import Utils
@@ -68,6 +69,7 @@ class Websocket(Module):
         self.use_tls = self.get_parameter_value('use_tls')
         self.tls_cert = self.get_parameter_value('tls_cert')
         self.tls_key = self.get_parameter_value('tls_key')
+        self.core_loop = self.get_parameter_value('core_loop')
 
         self.ssl_context = None
         if self.use_tls:
@@ -95,6 +97,10 @@ class Websocket(Module):
         self.logger.info(f"certificate .....: key: ../etc/{self.tls_cert} / ../etc/{self.tls_key}")
 
         self.loop = None    # Var to hold the event loop for asyncio
+        self._ws_servers = []           # started websocket servers
+        self._core_future = None        # future of _ws_server_main(), if the servers run on the core event loop
+        self._stop_event = None         # created by _ws_server_main() on the core event loop
+        self._stop_requested = False
 
         self.initialize_payload_protocols()
         return
@@ -108,6 +114,15 @@ class Websocket(Module):
         """
         self.logger.dbghigh(self.translate("Methode '{method}' aufgerufen", {'method': 'start()'}))
 
+        if self.core_loop:
+            core_loop = lib.asyncloop.get_core_loop()
+            self.loop = core_loop.loop
+            self._stop_requested = False
+            self._core_future = core_loop.run_coroutine(self._ws_server_main(), kind='module')
+            core_loop.add_component('modules.' + self.get_fullname())
+            self.logger.dbghigh("Starting websocket server(s) on the core event loop...")
+            return
+
         _name = 'modules.' + self.get_fullname() + '.websocket_server'
         try:
             self._server_thread = threading.Thread(target=self._ws_server_thread, name=_name)
@@ -128,6 +143,18 @@ class Websocket(Module):
         self.logger.dbghigh(self.translate("Methode '{method}' aufgerufen", {'method': 'stop()'}))
 
         self.logger.info("Shutting down websocket server(s)...")
+        if self._core_future is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._stop_ws_server_main)
+                self._core_future.result(timeout=10)
+                self.logger.info("Websocket Server(s): Stopped")
+            except Exception as err:
+                self._core_future.cancel()
+                self.logger.info(f"Stopping websocket error: {err!r}")
+            self._core_future = None
+            lib.asyncloop.get_core_loop().remove_component('modules.' + self.get_fullname())
+            return
+
         self.loop.call_soon_threadsafe(self.loop.stop)
         time.sleep(5)
 
@@ -227,6 +254,63 @@ class Websocket(Module):
         The websocket server itself is using asyncio
         """
         self.loop = asyncio.new_event_loop()
+        self._start_ws_tasks()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            #self.logger.warning("_ws_server_thread: finally")
+            try:
+                self.loop.shutdown_asyncgens()
+                #if python_version >= '3.9':
+                #    self.loop.shutdown_default_executor()
+                #time.sleep(3)
+                #self.logger.notice(f"all_tasks: {self.loop.Task.all_tasks()}")
+                #self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            except Exception as e:
+                self.logger.warning(f"_ws_server_thread: finally - Exception on loop.shutdown_asyncgens(): {e}")
+            try:
+                self.loop.close()
+            except Exception as e:
+                self.logger.warning(f"_ws_server_thread: finally - Exception on loop.close(): {e}")
+
+    async def _ws_server_main(self):
+        """
+        Run the websocket server(s) on the shared core event loop (parameter 'core_loop')
+
+        Runs until the stop event is set, then the servers and the tasks started for them are stopped
+        """
+        # the event is created here, because it has to be bound to the core event loop (Python < 3.10)
+        self._stop_event = asyncio.Event()
+        if self._stop_requested:
+            self._stop_event.set()
+        tasks_before = asyncio.all_tasks()
+        self._start_ws_tasks()
+        tasks = asyncio.all_tasks() - tasks_before
+        try:
+            await self._stop_event.wait()
+        finally:
+            for server in self._ws_servers:
+                server.close()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for server in self._ws_servers:
+                await server.wait_closed()
+            self._ws_servers = []
+
+    def _stop_ws_server_main(self):
+        """
+        Stop _ws_server_main() (called in the thread of the core event loop)
+        """
+        self._stop_requested = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def _start_ws_tasks(self):
+        """
+        Create the tasks of the websocket server(s) and the global tasks of the payload protocols in self.loop
+        """
         python_version = str(sys.version_info[0]) + '.' + str(sys.version_info[1])
 
         if python_version == '3.6':
@@ -248,24 +332,6 @@ class Websocket(Module):
         for path in self.protocols:
             self.protocols[path]['protocol'].start_global_tasks(self.loop)
 
-        try:
-            self.loop.run_forever()
-        finally:
-            #self.logger.warning("_ws_server_thread: finally")
-            try:
-                self.loop.shutdown_asyncgens()
-                #if python_version >= '3.9':
-                #    self.loop.shutdown_default_executor()
-                #time.sleep(3)
-                #self.logger.notice(f"all_tasks: {self.loop.Task.all_tasks()}")
-                #self.loop.run_until_complete(self.loop.shutdown_asyncgens())
-            except Exception as e:
-                self.logger.warning(f"_ws_server_thread: finally - Exception on loop.shutdown_asyncgens(): {e}")
-            try:
-                self.loop.close()
-            except Exception as e:
-                self.logger.warning(f"_ws_server_thread: finally - Exception on loop.close(): {e}")
-
     USERS = set()
 
     async def ws_server(self, ip, port, ssl_context=None):
@@ -275,13 +341,13 @@ class Websocket(Module):
         if ssl_context:
             self.logger.info("Secure websocket server started")
             try:
-                await websockets.serve(self.handle_new_connection, ip, port, ssl=ssl_context)
+                self._ws_servers.append(await websockets.serve(self.handle_new_connection, ip, port, ssl=ssl_context))
             except OSError as e:
                 self.logger.error(f"Cannot start secure websocket server - error: {e}")
         else:
             self.logger.info("Websocket server started")
             try:
-                await websockets.serve(self.handle_new_connection, ip, port)
+                self._ws_servers.append(await websockets.serve(self.handle_new_connection, ip, port))
             except OSError as e:
                 self.logger.error(f"Cannot start websocket server - error: {e}")
 
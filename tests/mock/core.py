@@ -1,5 +1,6 @@
 
 import os
+import tempfile
 
 import datetime
 import dateutil.tz
@@ -49,6 +50,12 @@ class MockScheduler():
     def remove(self, name):
         logger.warning('MockScheduler (remove): {}'.format( name ))
 
+    def add_timer(self, name, obj, delay, value=None, prio=3):
+        logger.warning('MockScheduler (add_timer): {}, delay={}, value={}'.format( name, str(delay), str(value) ))
+
+    def remove_timer(self, name):
+        logger.warning('MockScheduler (remove_timer): {}'.format( name ))
+
 
 class MockSmartHome():
 
@@ -67,7 +74,8 @@ class MockSmartHome():
 
     _etc_dir = os.path.join(_base_dir, 'tests', 'resources', 'etc')
     _structs_dir = os.path.join(_base_dir, 'tests', 'resources', 'structs')
-    _var_dir = os.path.join(_base_dir, 'var')
+    # the caches written by the tests (e.g. the compiled logics) are not written to the var directory of the repo
+    _var_dir = tempfile.mkdtemp(prefix='shng_test_var_')
     _lib_dir = os.path.join(_base_dir, 'lib')
     _env_dir = os.path.join(_lib_dir, 'env' + os.path.sep)
 
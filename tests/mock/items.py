@@ -0,0 +1,98 @@
+
+
+"""
+Mock objects for tests, that need the items of SmartHomeNG (without plugins, modules and logics)
+"""
+
+import logging
+import os
+
+import lib.item.item
+import lib.item.items
+import lib.plugin
+import lib.shtime
+from lib.item import Items
+from lib.shtime import Shtime
+
+from tests.common import BASE
+
+
+# log levels of SmartHomeNG, that are used by the items (normally added by lib.log)
+logging.addLevelName(29, 'NOTICE')
+for _name in ('notice', 'dbghigh', 'dbgmed', 'dbglow'):
+    if not hasattr(logging.Logger, _name):
+        setattr(logging.Logger, _name, lambda self, msg, *args, **kwargs: None)
+
+
+class MockPlugins:
+
+    def return_plugins(self):
+        return []
+
+
+class MockModules:
+
+    def get_module(self, name):
+        return None
+
+
+class MockScheduler:
+
+    def add(self, *args, **kwargs):
+        pass
+
+    def remove(self, *args, **kwargs):
+        pass
+
+    def add_timer(self, *args, **kwargs):
+        pass
+
+    def remove_timer(self, *args, **kwargs):
+        pass
+
+
+class MockSmartHome:
+    """ smarthome object with the items, without plugins, modules and logics """
+
+    shng_status = {'code': 20, 'text': 'Running'}
+    _use_conditional_triggers = 'False'
+    _ignore_item_collision = False
+    _default_logtext = None
+
+    def __init__(self, var_dir):
+        self._base_dir = BASE
+        self._etc_dir = os.path.join(BASE, 'tests', 'resources', 'etc')
+        self._structs_dir = os.path.join(BASE, 'tests', 'resources', 'structs')
+        self._var_dir = var_dir
+        os.makedirs(os.path.join(var_dir, 'run'), exist_ok=True)
+        self.scheduler = MockScheduler()
+        self.modules = MockModules()
+        lib.plugin._plugins_instance = self.plugins = MockPlugins()
+        if lib.shtime._shtime_instance is None:
+            self.shtime = Shtime(self)
+        else:
+            self.shtime = Shtime.get_instance()
+        lib.item.items._items_instance = None
+        lib.item.item._items_instance = None
+        self.items = Items(self)
+
+    def get_config_dir(self, config):
+        return getattr(self, f'_{config}_dir', '')
+
+    def get_defaultlogtext(self):
+        return self._default_logtext
+
+    def get_vardir(self):
+        return self._var_dir
+
+    def trigger(self, *args, **kwargs):
+        pass
+
+
+def create_item(sh, path, config):
+    """
+    Create an item outside of the item tree, with the update routine selected like for a loaded item
+    """
+    item = lib.item.item.Item(sh, sh, path, config)
+    item._select_update_routine()
+    return item
@@ -0,0 +1,47 @@
+
+
+"""
+Logic objects for tests of the scheduler, that are not loaded from a logic configuration
+"""
+
+import ast
+import logging
+import threading
+import time
+import types
+from collections import deque
+
+from lib.logic import Logic, get_async_mode
+from lib.logicstatistics import LogicStatistics
+
+
+def compile_logic(code):
+    return compile(code, 'test_logic.py', 'exec', flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+
+
+def create_logic(code=None, max_concurrency=None, coalesce=None, name='test_logic'):
+    """
+    Create a logic with the attributes, that the scheduler uses to run it
+
+    The values appended to logic.results by the code of the logic are kept for the test.
+    """
+    logic = Logic.__new__(Logic)
+    logic._name = name
+    logic.logger = logging.getLogger('logics.' + name)
+    logic._enabled = True
+    logic._logics = None
+    logic._statistics = LogicStatistics()
+    logic._max_concurrency = max_concurrency
+    logic._coalesce = coalesce
+    logic._run_lock = threading.Lock()
+    logic._running = 0
+    logic._pending = deque()
+    logic._last_run = None
+    logic.shtime = types.SimpleNamespace(now=time.time)
+    logic._Logic__methods_to_trigger = []
+    logic._check_concurrency_attributes()
+    if code is not None:
+        logic._bytecode = compile_logic(code)
+        logic._async_mode = get_async_mode(logic._bytecode)
+    logic.results = []
+    return logic
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import types
+
+from lib.asyncloop import CoreEventLoop
+import lib.item.item
+import lib.item.items
+from lib.logic import get_async_mode
+from lib.scheduler import Scheduler
+import lib.asyncloop
+
+from tests.mock.items import MockSmartHome, create_item
+from tests.mock.logic import compile_logic, create_logic
+
+
+class ItemTestCase(unittest.TestCase):
+    """ tests with real items, that are updated through item(value) """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix='shng_test_')
+        self.sh = MockSmartHome(self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        lib.item.items._items_instance = None
+        lib.item.item._items_instance = None
+
+    def create_item(self, value=0):
+        return create_item(self.sh, 'test.item', {'type': 'num', 'initial_value': value})
+
+
+class LibAsyncLogicTest(ItemTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.scheduler = Scheduler.__new__(Scheduler)
+        self.scheduler._sh = types.SimpleNamespace(shng_status={'code': 20})
+        self.scheduler.shtime = None
+        self.scheduler.items = None
+        self.scheduler.mqtt = 'mqtt'
+
+    def tearDown(self):
+        lib.asyncloop.stop_core_loop()
+        # a stopped core loop is not started again on use
+        lib.asyncloop._core_loop = None
+        super().tearDown()
+
+    def wait_until(self, condition, timeout=5):
+        end = time.monotonic() + timeout
+        while not condition() and time.monotonic() < end:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_async_mode(self):
+        self.assertIsNone(get_async_mode(compile_logic("x = 1\n")))
+        self.assertEqual('await', get_async_mode(compile_logic("await asyncio.sleep(0)\n")))
+        self.assertEqual('main', get_async_mode(compile_logic("async def main():\n    pass\n")))
+        # logics, that run their coroutine themselves, are synchronous logics
+        self.assertIsNone(get_async_mode(compile_logic("async def main():\n    pass\nasyncio.run(main())\n")))
+        self.assertIsNone(get_async_mode(compile_logic("async def helper():\n    pass\n")))
+
+    def test_top_level_await(self):
+        logic = create_logic("await asyncio.sleep(0)\nlogic.results.append(trigger['value'])\n")
+        self.scheduler._run_logic(logic, 'Test', None, None, 1)
+        self.wait_until(lambda: logic._statistics.get_statistics()['runs'] == 1)
+        self.assertEqual([1], logic.results)
+        self.assertIsNotNone(logic._last_run)
+
+    def test_entry_point(self):
+        logic = create_logic("async def main():\n    await asyncio.sleep(0)\n    logic.results.append(trigger['value'])\n")
+        self.scheduler._run_logic(logic, 'Test', None, None, 2)
+        self.wait_until(lambda: logic._statistics.get_statistics()['runs'] == 1)
+        self.assertEqual([2], logic.results)
+
+    def test_exception(self):
+        logic = create_logic("await asyncio.sleep(0)\nraise ValueError('test')\n")
+        with self.assertLogs('logics.test_logic', level='ERROR'):
+            self.scheduler._run_logic(logic, 'Test', None, None, 1)
+            self.wait_until(lambda: logic._statistics.get_statistics()['runs'] == 1)
+        self.assertEqual(1, logic._statistics.get_statistics()['exceptions'])
+
+    def test_waiting_logics_do_not_block_workers(self):
+        item = self.create_item(-1)
+        logic = create_logic("logic.results.append(await item.wait_for(trigger['value']))\n")
+        self.scheduler._get_logic_namespace(logic)['item'] = item
+        for value in range(1, 101):
+            self.scheduler._run_logic(logic, 'Test', None, None, value % 3)
+        # all runs have been started and are waiting on the event loop
+        self.wait_until(lambda: len(item._waiters) == 100)
+        self.assertEqual(100, self.scheduler.get_logic_coroutine_count())
+        self.assertEqual(100, logic._statistics.get_statistics()['coroutines_in_flight'])
+        item(1, 'Test')
+        item(2, 'Test')
+        self.wait_until(lambda: self.scheduler.get_logic_coroutine_count() == 33)
+        item(0, 'Test')
+        self.wait_until(lambda: logic._statistics.get_statistics()['runs'] == 100)
+        self.assertEqual([1] * 34 + [2] * 33 + [0] * 33, logic.results)
+        self.assertEqual(0, logic._statistics.get_statistics()['coroutines_in_flight'])
+
+    def test_concurrency_limit(self):
+        item = self.create_item()
+        logic = create_logic("logic.results.append(await item.wait_for())\n", max_concurrency=1)
+        self.scheduler._get_logic_namespace(logic)['item'] = item
+        for value in range(3):
+            self.scheduler._run_logic(logic, 'Test', None, None, value)
+        for value in (1, 2, 3):
+            self.wait_until(lambda: len(item._waiters) == 1)
+            self.assertEqual(1, self.scheduler.get_logic_coroutine_count())
+            item(value, 'Test')
+            self.wait_until(lambda: len(logic.results) == value)
+        self.assertEqual([1, 2, 3], logic.results)
+        self.assertEqual(0, logic._running)
+
+
+class LibItemWaitForTest(ItemTestCase):
+
+    def test_wait_for_value(self):
+        item = self.create_item(5)
+        # the waiters are woken up by the update routine for items without special features
+        self.assertEqual('__update_simple', item._update_routine.__name__)
+
+        async def wait():
+            self.assertEqual(5, await item.wait_for('5'))
+            with self.assertRaises(asyncio.TimeoutError):
+                await item.wait_for(6, timeout=0.01)
+            self.assertEqual([], item._waiters)
+            task = asyncio.ensure_future(item.wait_for(6))
+            await asyncio.sleep(0)
+            threading.Thread(target=item, args=(7, 'Test')).start()
+            threading.Thread(target=item, args=(6, 'Test')).start()
+            return await task
+
+        self.assertEqual(6, asyncio.run(wait()))
+        self.assertEqual([], item._waiters)
+
+    def test_core_loop(self):
+        core_loop = CoreEventLoop()
+
+        async def add(a, b):
+            await asyncio.sleep(0)
+            return a + b
+
+        self.assertFalse(core_loop.is_running())
+        self.assertEqual(3, core_loop.run_coroutine(add(1, 2), kind='test').result(5))
+        self.assertTrue(core_loop.is_running())
+        statistics = core_loop.get_statistics()
+        self.assertEqual((True, {'test': 0}, {'test': 1}), (statistics['running'], statistics['in_flight'], statistics['started']))
+        core_loop.stop()
+        self.assertFalse(core_loop.is_running())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,7 +1,13 @@
 import unittest
+import collections
+import os
 import pathlib
+import shutil
+import tempfile
+from unittest import mock
 from . import common
 import lib.config
+import lib.item.structs
 
 verbose = True
 
@@ -146,5 +152,151 @@ class TestConfigYaml(unittest.TestCase,ConfigBaseTests):
         self.assertEqual(conf['section']['key_multiline_quotes'], 'line1line2')
 
 
+class TestItemsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.itemsdir = os.path.join(self.tmp, 'items') + os.path.sep
+        os.makedirs(self.itemsdir)
+        with open(self.itemsdir + 'test.yaml', 'w') as f:
+            f.write('room:\n    light:\n        type: bool\n')
+        self.cache_file = os.path.join(self.tmp, 'run', 'items_config.cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def key(self, structs=None):
+        return lib.config.items_cache_key([(self.itemsdir, True)], structs or {}, {'version': 'test'})
+
+    def test_cache_roundtrip(self):
+        key = self.key()
+        conf, reason = lib.config.load_items_cache(self.cache_file, key)
+        self.assertIsNone(conf)
+        self.assertEqual(reason, 'no cache file')
+        conf = lib.config.parse_itemsdir(self.itemsdir, None, addfilenames=True)
+        self.assertTrue(lib.config.save_items_cache(self.cache_file, key, conf))
+        cached, reason = lib.config.load_items_cache(self.cache_file, key)
+        self.assertEqual(cached, conf)
+        self.assertEqual(cached['room']['light']['type'], 'bool')
+
+    def test_key_changes(self):
+        key = self.key()
+        self.assertEqual(key, self.key())
+        self.assertNotEqual(key, self.key({'my_struct': {'type': 'num'}}))
+        with open(self.itemsdir + 'test.yaml', 'a') as f:
+            f.write('        visu_acl: rw\n')
+        self.assertNotEqual(key, self.key())
+        key = self.key()
+        with open(self.itemsdir + 'other.yaml', 'w') as f:
+            f.write('other:\n    type: num\n')
+        self.assertNotEqual(key, self.key())
+
+    def test_parallel_parsing(self):
+        for i in range(6):
+            with open(self.itemsdir + f'file{i}.yaml', 'w') as f:
+                f.write(f'room:\n    last_file: {i}\n    item{i}:\n        type: num\n')
+        serial = lib.config.parse_itemsdir(self.itemsdir, None, addfilenames=True, processes=1)
+        parallel = lib.config.parse_itemsdir(self.itemsdir, None, addfilenames=True, processes=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(list(serial['room']), list(parallel['room']))
+        self.assertEqual(parallel['room']['last_file'], '5')
+
+    def test_changed_configuration_is_not_loaded(self):
+        lib.config.save_items_cache(self.cache_file, self.key(), {'room': {}})
+        conf, reason = lib.config.load_items_cache(self.cache_file, self.key({'my_struct': {}}))
+        self.assertIsNone(conf)
+        self.assertEqual(reason, 'configuration changed')
+
+
+class FakeSmartHome:
+
+    def get_config_dir(self, config):
+        return ''
+
+
+def od(**kwargs):
+    return collections.OrderedDict(**kwargs)
+
+
+class TestStructTemplates(unittest.TestCase):
+
+    def setUp(self):
+        lib.config.clear_struct_templates()
+        self.structs = {
+            'light': od(type='bool', knx_dpt='1', knx_listen=['1/1/1'],
+                        level=od(type='num', **{'database@instance': 'init'})),
+            'scene': od(type='scene', knx_listen=['1/1/2'], __struct_is_optional=False),
+        }
+
+    def add(self, path, struct_names, instance=''):
+        template = collections.OrderedDict()
+        lib.config.struct_merging_active = True
+        for struct_name in struct_names:
+            lib.config.add_struct_to_item_template(path, struct_name, template, self.structs, instance)
+        lib.config.struct_merging_active = False
+        return template
+
+    def test_instances_are_independent(self):
+        first = self.add('room.light1', ['light'], 'knx1')
+        second = self.add('room.light2', ['light'], '')
+        light1 = first['room']['light1']
+        light2 = second['room']['light2']
+        self.assertEqual(light1['type'], 'bool')
+        self.assertEqual(light1['level']['database@knx1'], 'init')
+        self.assertEqual(light2['level']['database'], 'init')
+        self.assertEqual(light1['level']['_struct_name'], 'light')
+        self.assertNotIn('__struct_is_optional', light1)
+
+        light1['knx_listen'].append('1/1/9')
+        light1['level']['type'] = 'str'
+        third = self.add('room.light3', ['light'], 'knx1')
+        self.assertEqual(third['room']['light3']['knx_listen'], ['1/1/1'])
+        self.assertEqual(third['room']['light3']['level']['type'], 'num')
+        self.assertEqual(self.structs['light']['knx_listen'], ['1/1/1'])
+
+    def test_multiple_structs(self):
+        template = self.add('room.light', ['light', 'scene'], 'knx1')
+        light = template['room']['light']
+        self.assertEqual(light['type'], 'scene')
+        self.assertEqual(light['knx_listen'], ['1/1/1', '1/1/2'])
+        self.assertEqual(light['level']['database@knx1'], 'init')
+
+    def test_changed_struct_is_not_cached(self):
+        self.add('room.light', ['light'])
+        self.structs['light'] = od(type='num')
+        template = self.add('room.light', ['light'])
+        self.assertEqual(template['room']['light']['type'], 'num')
+
+
+class TestStructResolution(unittest.TestCase):
+
+    def setUp(self):
+        self.structs = lib.item.structs.Structs(FakeSmartHome())
+        self.structs.logger = mock.MagicMock()
+        self.structs._struct_definitions = collections.OrderedDict()
+        self.structs._finalized_structs = set()
+        self.structs._resolving_structs = set()
+
+    def test_resolve_in_dependency_order(self):
+        # 'outer' references 'middle', which is defined later and references 'inner'
+        self.structs.add_struct_definition('', 'test.outer', od(struct='test.middle', a='1'))
+        self.structs.add_struct_definition('', 'test.middle', od(struct='test.inner', b='2', child=od(struct='.inner')))
+        self.structs.add_struct_definition('', 'test.inner', od(c='3'))
+        for struct_name in list(self.structs._struct_definitions):
+            self.structs.resolve_struct(struct_name)
+
+        outer = self.structs._struct_definitions['test.outer']
+        self.assertNotIn('struct', outer)
+        self.assertEqual((outer['a'], outer['b'], outer['c']), ('1', '2', '3'))
+        self.assertEqual(outer['child']['c'], '3')
+        self.assertNotIn('struct', outer['child'])
+
+    def test_struct_referencing_itself(self):
+        self.structs.add_struct_definition('', 'test.loop', od(a='1', child=od(struct='test.loop')))
+        self.assertTrue(self.structs.resolve_struct('test.loop'))
+        self.assertEqual(self.structs._struct_definitions['test.loop']['child'], od())
+        self.structs.logger.error.assert_called()
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import logging
+import select
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import iowait
+
+import lib.connection
+from lib.connection import Connections, Stream
+
+
+def create_stream(terminator=b'\r\n', frame_views=False):
+    stream = Stream()
+    stream.socket, stream.peer = socket.socketpair()
+    stream.connected = True
+    stream.frame_views = frame_views
+    stream.terminator = terminator
+    stream.frames = []
+    stream.found_terminator = lambda data: stream.frames.append(bytes(data))
+    stream.found_balance = lambda data: stream.frames.append(bytes(data))
+    return stream
+
+
+def receive(stream, *blocks):
+    for block in blocks:
+        stream.peer.sendall(block)
+        stream._in()
+
+
+class LibConnectionStreamTest(unittest.TestCase):
+
+    def tearDown(self):
+        # close() of the stream deletes its socket
+        self.stream.close()
+        self.stream.peer.close()
+
+    def test_terminator(self):
+        self.stream = create_stream()
+        receive(self.stream, b'one\r', b'\ntwo\r\nthr', b'ee', b'\r\n\r\nfour')
+        self.assertEqual([b'one', b'two', b'three', b''], self.stream.frames)
+        self.assertEqual(b'four', self.stream.inbuffer)
+        self.assertEqual(0, self.stream._in_offset)
+
+    def test_fixed_length(self):
+        self.stream = create_stream(terminator=4)
+
+        def found_terminator(data):
+            # the header is followed by a line
+            self.stream.frames.append(bytes(data))
+            self.stream.terminator = b'\n'
+
+        self.stream.found_terminator = found_terminator
+        receive(self.stream, b'hea', b'derline\nrest')
+        self.assertEqual([b'head', b'erline'], self.stream.frames)
+        self.assertEqual(b'rest', self.stream.inbuffer)
+
+    def test_balance(self):
+        self.stream = create_stream(terminator=None)
+        self.stream.balance('{', '}')
+        receive(self.stream, b'{"a": {"b": 1', b'}}{"c"', b': 2}{"d": {')
+        self.assertEqual([b'{"a": {"b": 1}}', b'{"c": 2}'], self.stream.frames)
+        # the search resumes with the nesting depth of the incomplete object
+        self.assertEqual(2, self.stream._balance_depth)
+        receive(self.stream, b'}}')
+        self.assertEqual(b'{"d": {}}', self.stream.frames[-1])
+        self.assertEqual(b'', self.stream.inbuffer)
+
+    def test_unbalanced(self):
+        self.stream = create_stream(terminator=None)
+        self.stream.balance('{', '}')
+        with self.assertLogs('lib.connection', logging.WARNING):
+            receive(self.stream, b'}{')
+        self.assertFalse(self.stream.connected)
+        self.assertEqual([], self.stream.frames)
+
+    def test_frame_views(self):
+        self.stream = create_stream(frame_views=True)
+        views = []
+
+        def found_terminator(data):
+            self.assertIsInstance(data, memoryview)
+            views.append(data)
+            self.stream.frames.append(bytes(data))
+
+        self.stream.found_terminator = found_terminator
+        receive(self.stream, b'one\r\ntwo\r\nth', b'ree\r\n')
+        self.assertEqual([b'one', b'two', b'three'], self.stream.frames)
+        # the views are released after the call, so the buffer can be resized
+        with self.assertRaises(ValueError):
+            bytes(views[0])
+
+
+class LibConnectionsPollTest(unittest.TestCase):
+
+    def setUp(self):
+        self.connections = Connections()
+        self.connections._poll_timeout = 0.3
+        self.stream = Stream()
+        self.stream.socket, self.peer = socket.socketpair()
+        self.stream.socket.setblocking(False)
+        self.stream._connected()
+
+    def tearDown(self):
+        self.connections.close()
+        self.peer.close()
+        lib.connection.Base._poller = None
+
+    def poll_duration(self):
+        start = time.perf_counter()
+        self.connections.poll()
+        return time.perf_counter() - start
+
+    def test_idle_poll_blocks(self):
+        self.assertGreater(self.poll_duration(), 0.25)
+
+    def test_wakeup(self):
+        threading.Timer(0.05, self.connections.wakeup).start()
+        self.assertLess(self.poll_duration(), 0.25)
+        # the wakeup has been consumed
+        self.assertGreater(self.poll_duration(), 0.25)
+
+    def test_write_interest(self):
+        data = b'x' * (4 * 1024 * 1024)
+        self.stream.send(data)
+        # the socket buffer is full, the rest is sent when the socket becomes writable
+        self.assertTrue(self.stream.outbuffer)
+        received = bytearray()
+        while len(received) < len(data):
+            try:
+                received += self.peer.recv(1024 * 1024, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                pass
+            self.connections.poll()
+        self.assertEqual(data, received)
+        self.assertFalse(self.stream.outbuffer)
+        # the write interest has been removed, the idle connection does not wake up poll()
+        self.assertGreater(self.poll_duration(), 0.25)
+
+
+    def test_send_while_write_interest_is_removed(self):
+        fileno = self.stream.socket.fileno()
+        set_write_interest = self.connections._set_write_interest
+        interest = []
+
+        def send_in_between(fileno, write):
+            set_write_interest(fileno, write)
+            interest.append(write)
+            if not write and len(interest) == 1:
+                # another thread's send() could not send the data at once, after the outbuffer has been found empty
+                self.stream.outbuffer.appendleft(b'late')
+                self.connections.trigger(fileno)
+        with mock.patch.object(self.connections, '_set_write_interest', send_in_between):
+            self.connections._handle_event(fileno, False, True, False)
+        self.assertEqual([False, True, True], interest)
+        self.connections.poll()
+        self.assertEqual(b'late', self.peer.recv(1024))
+
+
+class LibConnectionsIOWaitTest(unittest.TestCase):
+
+    def setUp(self):
+        # select module without epoll and kqueue, IOWait based on select()
+        self.patchers = [mock.patch.object(lib.connection, 'select', SimpleNamespace(select=select.select)),
+                         mock.patch.object(lib.connection, 'IOWait', iowait.SelectIOWait)]
+        for patcher in self.patchers:
+            patcher.start()
+        self.connections = Connections()
+        self.connections._poll_timeout = 1
+        self.stream = Stream()
+        self.stream.socket, self.peer = socket.socketpair()
+        self.stream.socket.setblocking(False)
+        self.stream._connected()
+
+    def tearDown(self):
+        self.connections.close()
+        self.peer.close()
+        for patcher in self.patchers:
+            patcher.stop()
+        lib.connection.Base._poller = None
+
+    def test_send_wakes_up_poll(self):
+        self.connections.poll()     # the wakeup of the registration has been consumed
+
+        def send():
+            # a send(), that could not send the data at once
+            self.stream.outbuffer.appendleft(b'data')
+            self.connections.trigger(self.stream.socket.fileno())
+        threading.Timer(0.1, send).start()
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.9:
+            self.connections.poll()
+            self.peer.setblocking(False)
+            try:
+                if self.peer.recv(1024) == b'data':
+                    break
+            except BlockingIOError:
+                pass
+        self.assertLess(time.perf_counter() - start, 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import gc
+import logging
+import socket
+import time
+
+import lib.connectionstatistics
+from lib.connectionstatistics import ConnectionStatistics
+from lib.connection import Stream
+from lib.network import Tcp_client
+
+# log levels of SmartHomeNG, that are used by Tcp_client (normally added by lib.log)
+for _name in ('dbghigh', 'dbgmed', 'dbglow'):
+    if not hasattr(logging.Logger, _name):
+        setattr(logging.Logger, _name, lambda self, msg, *args, **kwargs: None)
+
+
+def find(kind, name):
+    for statistics in lib.connectionstatistics.get_all_statistics(kind):
+        if statistics['name'] == name:
+            return statistics
+    return None
+
+
+class LibConnectionStatisticsTest(unittest.TestCase):
+
+    def test_counters(self):
+        statistics = ConnectionStatistics('test', 'counters')
+        statistics.connected()
+        statistics.connected()      # no new connection
+        statistics.received(10, 2)
+        statistics.sent(5)
+        statistics.disconnected()
+        statistics.disconnected()   # already disconnected
+        statistics.connected()
+        statistics.record_latency(0.1)
+        statistics.record_latency(0.3)
+        result = statistics.get_statistics()
+        self.assertEqual((True, 2, 1, 1), (result['connected'], result['connects'], result['reconnects'], result['disconnects']))
+        self.assertEqual((10, 2, 5, 1), (result['bytes_in'], result['messages_in'], result['bytes_out'], result['messages_out']))
+        self.assertLess(result['since_last_receive'], 1)
+        self.assertEqual((0.3, 0.2, 0.3), (result['latency_last'], result['latency_avg'], result['latency_max']))
+
+    def test_registry_is_weak(self):
+        statistics = lib.connectionstatistics.register('test', 'weak')
+        self.assertIsNotNone(find('test', 'weak'))
+        del statistics
+        gc.collect()
+        self.assertIsNone(find('test', 'weak'))
+
+    def test_tcp_client(self):
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+        client = Tcp_client('127.0.0.1', port, name='statistics', terminator=b'\n', autoreconnect=False)
+        client._process_received(b'one\ntwo\nthr')
+        self.assertTrue(client.connect())
+        connection = server.accept()[0]
+        for _ in range(100):
+            if client.connected():
+                break
+            time.sleep(0.05)
+        self.assertTrue(client.send(b'hello\n'))
+        self.assertEqual(b'hello\n', connection.recv(100))
+        client.close()
+        connection.close()
+        server.close()
+
+        result = client._statistics.get_statistics()
+        self.assertIsNotNone(find('Tcp_client', client._id))
+        self.assertEqual((11, 2), (result['bytes_in'], result['messages_in']))
+        self.assertEqual((6, 1), (result['bytes_out'], result['messages_out']))
+        self.assertEqual((False, 1, 1), (result['connected'], result['connects'], result['disconnects']))
+
+    def test_stream(self):
+        stream = Stream()
+        stream.socket, peer = socket.socketpair()
+        stream.connected = True
+        stream.address = 'stream_statistics'
+        stream.terminator = b'\n'
+        peer.sendall(b'one\ntwo\nthree')
+        stream._in()
+        result = stream._statistics.get_statistics()
+        stream.close()
+        peer.close()
+        self.assertEqual((13, 2), (result['bytes_in'], result['messages_in']))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
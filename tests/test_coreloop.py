@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import asyncio
+import logging
+import socket
+import threading
+import time
+
+import lib.asyncloop
+from lib.asyncloop import CoreEventLoop
+from lib.model.smartplugin import SmartPlugin
+from lib.network import Tcp_server, Udp_server
+
+# log levels of SmartHomeNG, that are used by lib.network (normally added by lib.log)
+for _name in ('dbghigh', 'dbgmed', 'dbglow'):
+    if not hasattr(logging.Logger, _name):
+        setattr(logging.Logger, _name, lambda self, msg, *args, **kwargs: None)
+
+
+def free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until(condition, timeout=5):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        time.sleep(0.01)
+    return condition()
+
+
+class LibCoreEventLoopTest(unittest.TestCase):
+
+    def setUp(self):
+        self.core_loop = CoreEventLoop()
+
+    def tearDown(self):
+        self.core_loop.stop()
+
+    def test_run_coroutine_wait(self):
+
+        async def in_loop_thread():
+            return self.core_loop.in_loop_thread()
+
+        self.assertTrue(self.core_loop.run_coroutine_wait(in_loop_thread(), timeout=5))
+        self.assertFalse(self.core_loop.in_loop_thread())
+
+        async def nested():
+            # waiting for a coroutine in the loop thread would dead-lock
+            with self.assertRaises(RuntimeError):
+                self.core_loop.run_coroutine_wait(asyncio.sleep(0))
+            return True
+
+        self.assertTrue(self.core_loop.run_coroutine_wait(nested(), timeout=5))
+
+    def test_run_in_loop_and_call_later(self):
+        self.assertNotEqual(threading.get_ident(), self.core_loop.run_in_loop(threading.get_ident, timeout=5))
+        called = threading.Event()
+        self.core_loop.call_later(0.05, called.set)
+        self.assertTrue(called.wait(5))
+
+    def test_components(self):
+        self.core_loop.add_component('a')
+        self.core_loop.add_component('b')
+        self.core_loop.add_component('a')
+        self.core_loop.remove_component('a')
+        self.core_loop.remove_component('b')
+        self.assertEqual(['a'], self.core_loop.get_statistics()['components'])
+
+    def test_lag(self):
+        interval = lib.asyncloop.LAG_INTERVAL
+        lib.asyncloop.LAG_INTERVAL = 0.05
+        try:
+            with self.assertLogs('lib.asyncloop', logging.WARNING) as logs:
+                self.core_loop.call_soon(time.sleep, 0.7)     # blocks the loop
+                self.assertTrue(wait_until(lambda: self.core_loop.get_statistics()['lag_max'] > 0.5))
+        finally:
+            lib.asyncloop.LAG_INTERVAL = interval
+        self.assertIn('lagged', logs.output[0])
+        self.assertGreater(self.core_loop.get_lag(), 0.5)
+        # the maximum lag of the period is reset by get_lag(), the overall maximum is kept
+        self.assertLess(self.core_loop.get_lag(), 0.5)
+        self.assertGreater(self.core_loop.get_statistics()['lag_max'], 0.5)
+
+    def test_no_restart_after_stop(self):
+        self.assertEqual(3, self.core_loop.run_in_loop(sum, [1, 2], timeout=5))
+        self.core_loop.stop()
+        with self.assertRaises(RuntimeError):
+            self.core_loop.call_soon(print)
+        with self.assertRaises(RuntimeError):
+            self.core_loop.run_in_loop(sum, [1, 2], timeout=5)
+        self.assertFalse(self.core_loop.is_running())
+        # an explicit start() starts the loop again
+        self.core_loop.start()
+        self.assertEqual(3, self.core_loop.run_in_loop(sum, [1, 2], timeout=5))
+
+
+class LibSmartPluginCoreLoopTest(unittest.TestCase):
+
+    def setUp(self):
+        lib.asyncloop._core_loop = None
+        self.core_loop = lib.asyncloop.get_core_loop()
+        self.plugin = SmartPlugin.__new__(SmartPlugin)
+        self.plugin.logger = logging.getLogger(__name__)
+        self.plugin._asyncio_loop = self.core_loop.loop
+        self.plugin._asyncio_core_loop = True
+
+    def tearDown(self):
+        lib.asyncloop.stop_core_loop()
+        lib.asyncloop._core_loop = None
+
+    def test_run_asyncio_coro(self):
+
+        async def double(value):
+            await asyncio.sleep(0)
+            return 2 * value
+
+        self.assertEqual(4, self.plugin.run_asyncio_coro(double(2), timeout=5))
+
+        async def in_loop_thread():
+            # the coroutine is only scheduled, waiting would block the core event loop
+            start = time.perf_counter()
+            result = self.plugin.run_asyncio_coro(double(3), timeout=5)
+            return result, time.perf_counter() - start
+
+        result, duration = self.core_loop.run_coroutine_wait(in_loop_thread(), timeout=10)
+        self.assertIsNone(result)
+        self.assertLess(duration, 1)
+
+
+class LibNetworkCoreLoopTest(unittest.TestCase):
+
+    def setUp(self):
+        lib.asyncloop._core_loop = None
+
+    def tearDown(self):
+        lib.asyncloop.stop_core_loop()
+        lib.asyncloop._core_loop = None
+
+    def test_tcp_server(self):
+        port = free_port()
+        server = Tcp_server(port, host='127.0.0.1', name='test', core_loop=True)
+        received = []
+        clients = []
+
+        def data_received(server, client, data):
+            received.append(data)
+            client.send(data.upper() + '\n')
+
+        server.set_callbacks(incoming_connection=lambda s, c: clients.append(c), data_received=data_received)
+        threads = threading.active_count()
+        self.assertTrue(server.start())
+        self.assertTrue(server.listening())
+        self.assertIn(f'Tcp_server {server._id}', lib.asyncloop.get_core_loop().get_statistics()['components'])
+
+        with socket.create_connection(('127.0.0.1', port), timeout=5) as sock:
+            sock.sendall(b'hello\n')
+            self.assertEqual(b'HELLO\n', sock.recv(100))
+            # send from another thread than the loop thread
+            self.assertTrue(clients[0].send('from thread\n'))
+            self.assertEqual(b'from thread\n', sock.recv(100))
+            # no own thread for the server
+            self.assertLessEqual(threading.active_count(), threads + 1)
+
+            server.close()
+            self.assertFalse(server.listening())
+            self.assertEqual(b'', sock.recv(100))
+        self.assertEqual(['hello'], received)
+        self.assertNotIn(f'Tcp_server {server._id}', lib.asyncloop.get_core_loop().get_statistics()['components'])
+
+    def test_close_after_loop_stopped(self):
+        server = Tcp_server(free_port(), host='127.0.0.1', name='test', core_loop=True)
+        self.assertTrue(server.start())
+        lib.asyncloop.stop_core_loop()
+        with self.assertLogs('lib.network', logging.WARNING):
+            server.close()
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name == lib.asyncloop.THREAD_NAME])
+        self.assertNotIn(f'Tcp_server {server._id}', lib.asyncloop.get_core_loop().get_statistics()['components'])
+
+    def test_udp_server(self):
+        port = free_port(socket.SOCK_DGRAM)
+        server = Udp_server(port, host='127.0.0.1', name='test', core_loop=True)
+        received = []
+        server.set_callbacks(data_received=lambda addr, data: received.append(data))
+        self.assertTrue(server.start())
+        self.assertTrue(server.listening())
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b'datagram', ('127.0.0.1', port))
+            self.assertTrue(wait_until(lambda: received == ['datagram']))
+
+            server.close()
+            self.assertFalse(server.listening())
+            sock.sendto(b'after close', ('127.0.0.1', port))
+            time.sleep(0.1)
+        self.assertEqual(['datagram'], received)
+        # the port can be used again
+        server = Udp_server(port, host='127.0.0.1', name='test', core_loop=True)
+        self.assertTrue(server.start())
+        server.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
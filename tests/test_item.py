@@ -482,6 +482,26 @@ class TestItem(unittest.TestCase):
         self.assertEqual(100, item._value)
 
 
+    def test_fade_started_while_waiting_for_lock(self):
+        # an update, that waits for the lock of a simple item, has to stop a fade started meanwhile
+        sh = MockSmartHome()
+        conf = {'type': 'num'}
+        item = self.create_item(smarthome=sh, parent=sh, path='test_item01', config=conf)
+        item._select_update_routine()
+        item(10)
+
+        item._lock.acquire()
+        updater = threading.Thread(target=item, args=(20, 'Logic'))
+        updater.start()
+        updater.join(0.2)
+        item._fadingdetails = {}
+        item._fading = True
+        item._lock.release()
+        updater.join()
+        self.assertFalse(item._fading)
+        self.assertEqual(20, item._value)
+
+
     def test_set(self):
 
         if verbose == True:
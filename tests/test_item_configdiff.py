@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+from collections import OrderedDict
+
+from lib.item.configdiff import ItemConfigDiff, build_fingerprints, get_item_config, references_parent
+
+
+def config():
+    return OrderedDict([
+        ('living', OrderedDict([
+            ('name', 'Living room'),
+            ('light', OrderedDict([('type', 'bool'), ('name', '{..:name} light'),
+                                   ('level', OrderedDict([('type', 'num')]))])),
+            ('temp', OrderedDict([('type', 'num')])),
+        ])),
+        ('kitchen', OrderedDict([('name', 'Kitchen'), ('light', OrderedDict([('type', 'bool')]))])),
+    ])
+
+
+class LibItemConfigDiffTest(unittest.TestCase):
+
+    def test_fingerprints(self):
+        fingerprints = build_fingerprints(config())
+        self.assertEqual(['living', 'living.light', 'living.light.level', 'living.temp', 'kitchen', 'kitchen.light'], list(fingerprints))
+        # the fingerprint of an item does not depend on its children
+        changed = config()
+        changed['living']['temp']['type'] = 'str'
+        self.assertEqual(fingerprints['living'], build_fingerprints(changed)['living'])
+        self.assertNotEqual(fingerprints['living.temp'], build_fingerprints(changed)['living.temp'])
+
+    def test_unchanged(self):
+        diff = ItemConfigDiff(build_fingerprints(config()), config())
+        self.assertFalse(diff)
+        self.assertEqual([], diff.changes)
+        self.assertEqual([], diff.removed)
+
+    def test_changed_created_removed(self):
+        changed = config()
+        changed['living']['temp']['type'] = 'str'
+        changed['living']['light']['dimmer'] = OrderedDict([('type', 'num'), ('sub', OrderedDict([('type', 'bool')]))])
+        del changed['kitchen']
+        changed['garden'] = OrderedDict([('name', 'Garden')])
+
+        diff = ItemConfigDiff(build_fingerprints(config()), changed)
+        self.assertTrue(diff)
+        self.assertEqual([('create', 'living.light.dimmer'), ('replace', 'living.temp'), ('create', 'garden')], diff.changes)
+        self.assertEqual(['living.light.dimmer', 'garden'], diff.created)
+        self.assertEqual(['living.temp'], diff.replaced)
+        # only the topmost item of a removed branch
+        self.assertEqual(['kitchen'], diff.removed)
+        self.assertEqual(build_fingerprints(changed), diff.fingerprints)
+
+    def test_parent_reference(self):
+        self.assertTrue(references_parent({'name': '{..:name} light'}))
+        self.assertTrue(references_parent({'eval': '..:name'}))
+        self.assertFalse(references_parent({'name': 'Light', 'eval': 'sh..self()'}))
+
+        changed = config()
+        changed['living']['name'] = 'Lounge'
+        diff = ItemConfigDiff(build_fingerprints(config()), changed)
+        # living.light references the name of its parent, living.temp does not
+        self.assertEqual(['living', 'living.light'], diff.replaced)
+
+    def test_get_item_config(self):
+        conf = config()
+        self.assertIs(conf['living']['light']['level'], get_item_config(conf, 'living.light.level'))
+        self.assertIsNone(get_item_config(conf, 'living.name'))
+        self.assertIsNone(get_item_config(conf, 'cellar'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import json
+
+from lib.item.conftemplates import ConfTemplates, ItemConf
+
+
+class LibItemConfTemplatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.templates = ConfTemplates()
+
+    def test_identical_confs_are_shared(self):
+        conf1 = self.templates.share({'knx_dpt': '1', 'visu_acl': 'rw'})
+        conf2 = self.templates.share({'knx_dpt': '1', 'visu_acl': 'rw'})
+        self.assertIsInstance(conf1, ItemConf)
+        self.assertTrue(conf1.shared)
+        self.assertIs(conf1._data, conf2._data)
+        self.assertEqual(conf1, {'knx_dpt': '1', 'visu_acl': 'rw'})
+        self.assertEqual(self.templates.get_statistics(), {'templates': 1, 'lookups': 2, 'reused': 1})
+
+    def test_copy_on_write(self):
+        conf1 = self.templates.share({'knx_dpt': '1'})
+        conf2 = self.templates.share({'knx_dpt': '1'})
+        conf1['knx_dpt'] = '5.001'
+        self.assertFalse(conf1.shared)
+        self.assertEqual(conf1['knx_dpt'], '5.001')
+        self.assertEqual(conf2['knx_dpt'], '1')
+        del conf2['knx_dpt']
+        self.assertEqual(len(conf2), 0)
+        self.assertEqual(self.templates.share({'knx_dpt': '1'})['knx_dpt'], '1')
+
+    def test_types_are_distinguished(self):
+        conf1 = self.templates.share({'attr': 1})
+        conf2 = self.templates.share({'attr': True})
+        self.assertIsNot(conf1._data, conf2._data)
+        self.assertIs(conf2['attr'], True)
+
+    def test_mutable_values_are_not_shared(self):
+        conf1 = self.templates.share({'attr': ['a', 'b']})
+        conf2 = self.templates.share({'attr': ['a', 'b']})
+        # configurations, that are not shared, stay plain dicts
+        self.assertIs(type(conf1), dict)
+        self.assertIsNot(conf1, conf2)
+        self.assertEqual(json.dumps(conf1), '{"attr": ["a", "b"]}')
+
+    def test_dict_behaviour(self):
+        conf = self.templates.share({'b': '2', 'a': '1'})
+        self.assertEqual(list(conf), ['b', 'a'])
+        self.assertIn('a', conf)
+        self.assertEqual(conf.get('c', 'x'), 'x')
+        self.assertEqual(dict(conf.items()), {'a': '1', 'b': '2'})
+        self.assertEqual(json.dumps(dict(conf), sort_keys=True), '{"a": "1", "b": "2"}')
+        copied = conf.copy()
+        copied['c'] = '3'
+        self.assertNotIn('c', conf)
+        self.assertEqual(conf | {'c': '3'}, {'a': '1', 'b': '2', 'c': '3'})
+        self.assertEqual({'a': '0', 'c': '3'} | conf, {'a': '1', 'b': '2', 'c': '3'})
+        conf |= {'c': '3'}
+        self.assertIsInstance(conf, ItemConf)
+        self.assertFalse(conf.shared)
+        self.assertEqual(conf['c'], '3')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import logging
+
+from lib.item.logchange import LogChangeRules
+
+
+class FakeProperty:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeItem:
+    def __init__(self, path, type='num', log_rules=None, log_level='INFO', value=None):
+        self._path = path
+        self._type = type
+        self._log_rules = log_rules or {}
+        self._log_level_attrib = log_level
+        self.property = FakeProperty(value)
+
+    def get_absolutepath(self, relativepath, attribute=''):
+        if relativepath.startswith('.'):
+            return self._path.rpartition('.')[0] + '.' + relativepath.lstrip('.')
+        return relativepath
+
+
+class FakeItems:
+    def __init__(self, *items):
+        self._items = {item._path: item for item in items}
+
+    def return_item(self, path):
+        return self._items.get(path)
+
+
+class LibItemLogChangeRulesTest(unittest.TestCase):
+
+    def test_no_rules(self):
+        rules = LogChangeRules(FakeItem('a.b'), FakeItems())
+        cache = rules.get_cache(1)
+        self.assertEqual(cache, {'issues': [], 'filter': [], 'exclude': [], 'lowlimit': None, 'highlimit': None})
+        self.assertTrue(rules.accepts(1, cache))
+
+    def test_limits(self):
+        rules = LogChangeRules(FakeItem('a.b', log_rules={'lowlimit': 10, 'highlimit': '20'}), FakeItems())
+        cache = rules.get_cache(15)
+        self.assertEqual(cache['lowlimit'], 10.0)
+        self.assertEqual(cache['highlimit'], 20.0)
+        self.assertTrue(rules.accepts(15, cache))
+        self.assertFalse(rules.accepts(5, cache))
+        self.assertFalse(rules.accepts(20, cache))
+
+    def test_limit_from_item(self):
+        limit_item = FakeItem('a.limit', value=50)
+        rules = LogChangeRules(FakeItem('a.b', log_rules={'lowlimit': '.limit'}), FakeItems(limit_item))
+        self.assertFalse(rules.accepts(40, rules.get_cache(40)))
+        limit_item.property.value = 30
+        self.assertTrue(rules.accepts(40, rules.get_cache(40)))
+
+    def test_invalid_limit(self):
+        rules = LogChangeRules(FakeItem('a.b', log_rules={'lowlimit': 'abc'}), FakeItems())
+        cache = rules.get_cache(1)
+        self.assertIsNone(cache['lowlimit'])
+        self.assertEqual(len(cache['issues']), 1)
+
+    def test_filter_and_exclude(self):
+        rules = LogChangeRules(FakeItem('a.b', log_rules={'filter': [1, 2], 'exclude': [3]}), FakeItems())
+        cache = rules.get_cache(1)
+        self.assertEqual(cache['filter'], [1, 2])
+        self.assertEqual(cache['exclude'], [])
+        self.assertIn("Defining filter AND exclude does not work - ignoring exclude list", cache['issues'])
+        self.assertTrue(rules.accepts(2, cache))
+        self.assertFalse(rules.accepts(3, cache))
+
+    def test_filter_type_mismatch(self):
+        rules = LogChangeRules(FakeItem('a.b', type='str', log_rules={'exclude': ['off', 1]}), FakeItems())
+        cache = rules.get_cache('on')
+        self.assertEqual(cache['exclude'], ['off'])
+        self.assertEqual(len(cache['issues']), 1)
+        self.assertFalse(rules.accepts('off', cache))
+        self.assertTrue(rules.accepts('on', cache))
+
+    def test_compiled_from(self):
+        item = FakeItem('a.b', log_rules={'lowlimit': 1})
+        rules = LogChangeRules(item, FakeItems())
+        self.assertTrue(rules.compiled_from(item))
+        item._log_rules = {'lowlimit': 2}
+        self.assertFalse(rules.compiled_from(item))
+
+    def test_log_level(self):
+        rules = LogChangeRules(FakeItem('a.b', log_level='warning'), FakeItems())
+        self.assertIsNone(rules.log_level_code)
+        self.assertEqual(rules.get_level(rules.log_level_value), ('WARNING', logging.WARNING))
+        self.assertEqual(rules.get_level('10'), ('DEBUG', logging.DEBUG))
+        self.assertIsNone(rules.get_level('NOLEVEL'))
+
+        rules = LogChangeRules(FakeItem('a.b', log_level="{'DEBUG' if value > 5 else 'INFO'}"), FakeItems())
+        value = 10
+        self.assertEqual(eval(rules.log_level_code), 'DEBUG')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
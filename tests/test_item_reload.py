@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import lib.item.item
+import lib.item.items
+
+from tests.mock.items import MockSmartHome
+
+
+class LibItemReloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix='shng_test_')
+        self.itemsdir = os.path.join(self.tmpdir, 'items') + os.sep
+        self.envdir = os.path.join(self.tmpdir, 'env') + os.sep
+        os.makedirs(self.itemsdir)
+        os.makedirs(self.envdir)
+        for i in range(4):
+            self.write_room(i)
+        self.sh = self.load()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        lib.item.items._items_instance = None
+        lib.item.item._items_instance = None
+
+    def write_room(self, i, level_type='num', light_acl='rw'):
+        with open(os.path.join(self.itemsdir, f'room_{i}.yaml'), 'w') as f:
+            f.write(f"room{i}:\n    name: Room {i}\n")
+            for l in range(2):
+                f.write(f"    light{l}:\n        type: bool\n        visu_acl: {light_acl}\n")
+                f.write(f"        level:\n            type: {level_type}\n            eval_trigger: room{i}.light{l}\n")
+
+    def load(self):
+        sh = MockSmartHome(tempfile.mkdtemp(dir=self.tmpdir))
+        sh.items.load_itemdefinitions(self.envdir, self.itemsdir, sh._etc_dir, '')
+        return sh
+
+    def tree(self, items):
+        return {item._path: (item._type, dict(item.conf), sorted(i._path for i in item._items_to_trigger),
+                             [c._path for c in item.return_children()])
+                for item in items.return_items()}
+
+    def test_reload_equals_fresh_load(self):
+        self.write_room(0, level_type='str')
+        self.write_room(4)
+        os.remove(os.path.join(self.itemsdir, 'room_1.yaml'))
+        result = self.sh.items.reload_itemdefinitions()
+
+        self.assertEqual(['room4'], result['created'])
+        self.assertEqual(['room0.light0.level', 'room0.light1.level'], result['replaced'])
+        self.assertEqual(['room1'], result['removed'])
+        self.assertIsNone(self.sh.items.return_item('room1.light0'))
+        self.assertFalse(hasattr(self.sh, 'room1'))
+        self.assertIs(self.sh.room4, self.sh.items.return_item('room4'))
+        self.assertEqual(self.tree(self.load().items), self.tree(self.sh.items))
+
+    def test_unchanged(self):
+        room = self.sh.items.return_item('room2')
+        result = self.sh.items.reload_itemdefinitions()
+        self.assertEqual(([], [], []), (result['created'], result['replaced'], result['removed']))
+        self.assertIs(room, self.sh.items.return_item('room2'))
+
+    def test_replaced_item_takes_over_triggers_and_children(self):
+        old = self.sh.items.return_item('room2.light0')
+        level = self.sh.items.return_item('room2.light0.level')
+        self.assertIn(level, old._items_to_trigger)
+        self.write_room(2, light_acl='ro')
+        result = self.sh.items.reload_itemdefinitions()
+
+        self.assertEqual(['room2.light0', 'room2.light1'], result['replaced'])
+        new = self.sh.items.return_item('room2.light0')
+        self.assertIsNot(old, new)
+        self.assertEqual('ro', new.conf['visu_acl'])
+        # the unchanged child is moved to the new item and is still triggered by it
+        self.assertIs(level, self.sh.items.return_item('room2.light0.level'))
+        self.assertIs(level, new.level)
+        self.assertEqual([level], list(new.return_children()))
+        self.assertIn(level, new._items_to_trigger)
+        self.assertIs(new, self.sh.items.return_item('room2').light0)
+
+    def test_value_kept_or_dropped(self):
+        self.sh.items.return_item('room3.light0')(True)
+        self.sh.items.return_item('room3.light0.level')(42)
+        self.write_room(3, level_type='str', light_acl='ro')
+        self.sh.items.reload_itemdefinitions()
+        # same type: the value is taken over
+        self.assertTrue(self.sh.items.return_item('room3.light0')())
+        # changed type: the new item starts with the default value
+        self.assertEqual('', self.sh.items.return_item('room3.light0.level')())
+
+    def test_failed_item_is_created_on_next_reload(self):
+        self.write_room(4)
+        item_class = lib.item.items.Item
+
+        def create_item(smarthome, parent, path, config, items_instance=None):
+            if path == 'room4':
+                raise ValueError('test')
+            return item_class(smarthome, parent, path, config, items_instance=items_instance)
+
+        with mock.patch.object(lib.item.items, 'Item', side_effect=create_item):
+            with self.assertLogs('lib.item.items', logging.ERROR):
+                result = self.sh.items.reload_itemdefinitions()
+        self.assertEqual(['room4'], result['created'])
+        self.assertIsNone(self.sh.items.return_item('room4'))
+
+        result = self.sh.items.reload_itemdefinitions()
+        self.assertEqual(['room4'], result['created'])
+        self.assertIsNotNone(self.sh.items.return_item('room4.light1.level'))
+        self.assertEqual(self.tree(self.load().items), self.tree(self.sh.items))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
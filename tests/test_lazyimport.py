@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import sys
+
+import lib.lazyimport
+from lib.lazyimport import lazy_import, is_imported
+
+
+class LibLazyImportTest(unittest.TestCase):
+
+    def test_not_installed(self):
+        self.assertIsNone(lazy_import('lib.not_existing_library'))
+
+    def test_already_imported(self):
+        self.assertIs(lazy_import('lib.lazyimport'), lib.lazyimport)
+
+    def test_import_on_first_use(self):
+        module = lazy_import('json.tool')
+        if 'json.tool' in sys.modules:
+            self.skipTest('json.tool already imported')
+        self.assertFalse(is_imported(module))
+        self.assertNotIn('json.tool', sys.modules)
+        self.assertTrue(callable(module.main))
+        self.assertTrue(is_imported(module))
+        self.assertIn('json.tool', sys.modules)
+        loaded = [entry for entry in lib.lazyimport.get_loaded_libraries() if entry['name'] == 'json.tool']
+        self.assertEqual(1, len(loaded))
+        self.assertGreaterEqual(loaded[0]['time'], 0)
+        # the library is only recorded once
+        lazy_import('json.tool').main
+        self.assertEqual(1, len([entry for entry in lib.lazyimport.get_loaded_libraries() if entry['name'] == 'json.tool']))
+
+    def test_rss(self):
+        rss = lib.lazyimport.get_rss()
+        if rss is not None:
+            self.assertGreater(rss, 0)
+
+    def test_imported_packages(self):
+        packages = lib.lazyimport.get_imported_packages()
+        self.assertIn('lib', packages)
+        self.assertNotIn('os', packages)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import os
+import shutil
+import tempfile
+
+import lib.logic
+from lib.logic import load_logic_bytecode, get_bytecode_cache_statistics, LOGICS_BYTECODE_DIR
+
+
+class LibLogicBytecodeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(prefix='shng_test_')
+        self.vardir = os.path.join(self.tmpdir, 'var')
+        self.pathname = os.path.join(self.tmpdir, 'test_logic.py')
+        self.write_logic("\ufeffresult = 'first'\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_logic(self, code):
+        with open(self.pathname, 'w', encoding='UTF-8') as f:
+            f.write(code)
+
+    def run_code(self, code):
+        namespace = {}
+        exec(code, namespace)
+        return namespace['result']
+
+    def test_cache_hit(self):
+        hits = get_bytecode_cache_statistics()['hits']
+        code = load_logic_bytecode(self.pathname, self.vardir)
+        self.assertEqual('first', self.run_code(code))
+        self.assertEqual(1, len(os.listdir(os.path.join(self.vardir, 'run', LOGICS_BYTECODE_DIR))))
+        self.assertEqual(hits, get_bytecode_cache_statistics()['hits'])
+
+        cached = load_logic_bytecode(self.pathname, self.vardir)
+        self.assertEqual(hits + 1, get_bytecode_cache_statistics()['hits'])
+        self.assertEqual(code, cached)
+        self.assertEqual(self.pathname, cached.co_filename)
+
+    def test_changed_file(self):
+        load_logic_bytecode(self.pathname, self.vardir)
+        hits = get_bytecode_cache_statistics()['hits']
+        self.write_logic("result = 'second, longer'\n")
+        self.assertEqual('second, longer', self.run_code(load_logic_bytecode(self.pathname, self.vardir)))
+        self.assertEqual(hits, get_bytecode_cache_statistics()['hits'])
+
+    def test_corrupt_cache_file(self):
+        load_logic_bytecode(self.pathname, self.vardir)
+        filename = lib.logic._bytecode_filename(self.vardir, self.pathname)
+        with open(filename, 'wb') as f:
+            f.write(b'garbage')
+        self.assertEqual('first', self.run_code(load_logic_bytecode(self.pathname, self.vardir)))
+
+    def test_without_cache(self):
+        self.assertEqual('first', self.run_code(load_logic_bytecode(self.pathname)))
+        self.assertFalse(os.path.exists(self.vardir))
+
+    def test_syntax_error(self):
+        self.write_logic("result = \n")
+        with self.assertRaises(SyntaxError):
+            load_logic_bytecode(self.pathname, self.vardir)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
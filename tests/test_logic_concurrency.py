@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import logging
+
+from lib.scheduler import Scheduler
+
+from tests.mock.logic import create_logic
+
+
+class LibLogicConcurrencyTest(unittest.TestCase):
+
+    def test_attributes(self):
+        self.assertIsNone(create_logic()._max_concurrency)
+        logic = create_logic(max_concurrency='2')
+        self.assertEqual((2, 'queue'), (logic._max_concurrency, logic._coalesce))
+        logic = create_logic(coalesce='Latest')
+        self.assertEqual((1, 'latest'), (logic._max_concurrency, logic._coalesce))
+        logic = create_logic(max_concurrency='none', coalesce='sometimes')
+        self.assertEqual((1, 'queue'), (logic._max_concurrency, logic._coalesce))
+
+    def test_unlimited(self):
+        logic = create_logic()
+        for i in range(10):
+            self.assertTrue(logic._begin_run(i))
+        self.assertIsNone(logic._end_run())
+
+    def test_queue(self):
+        logic = create_logic(max_concurrency=2)
+        self.assertTrue(logic._begin_run(1))
+        self.assertTrue(logic._begin_run(2))
+        self.assertFalse(logic._begin_run(3))
+        self.assertFalse(logic._begin_run(4))
+        self.assertEqual(3, logic._end_run())
+        self.assertEqual(4, logic._end_run())
+        self.assertIsNone(logic._end_run())
+        self.assertIsNone(logic._end_run())
+        self.assertEqual(0, logic._running)
+        self.assertEqual(2, logic._statistics.get_statistics()['triggers_queued'])
+
+    def test_drop(self):
+        logic = create_logic(coalesce='drop')
+        self.assertTrue(logic._begin_run(1))
+        self.assertFalse(logic._begin_run(2))
+        self.assertFalse(logic._begin_run(3))
+        self.assertIsNone(logic._end_run())
+        self.assertTrue(logic._begin_run(4))
+        self.assertEqual(2, logic._statistics.get_statistics()['triggers_skipped'])
+
+    def test_latest(self):
+        logic = create_logic(coalesce='latest')
+        self.assertTrue(logic._begin_run(1))
+        for i in range(2, 6):
+            self.assertFalse(logic._begin_run(i))
+        self.assertEqual(5, logic._end_run())
+        self.assertIsNone(logic._end_run())
+        statistics = logic._statistics.get_statistics()
+        self.assertEqual((1, 3), (statistics['triggers_queued'], statistics['triggers_coalesced']))
+
+    def test_scheduler_runs_pending_triggers(self):
+        logic = create_logic(coalesce='latest')
+        runs = []
+        scheduler = Scheduler.__new__(Scheduler)
+
+        def execute(logic, by, source, dest, value, wait=None):
+            runs.append(value)
+            if value == 1:
+                # triggers arriving while the logic runs
+                for value in range(2, 5):
+                    scheduler._run_logic(logic, 'Test', None, None, value)
+
+        scheduler._execute_logic_task = execute
+        scheduler._run_logic(logic, 'Test', None, None, 1)
+        self.assertEqual([1, 4], runs)
+        self.assertEqual(0, logic._running)
+
+
+    def test_scheduler_releases_slot_on_exception(self):
+        logic = create_logic(max_concurrency=1)
+        runs = []
+        scheduler = Scheduler.__new__(Scheduler)
+
+        def execute(logic, by, source, dest, value, wait=None):
+            runs.append(value)
+            if value == 1:
+                scheduler._run_logic(logic, 'Test', None, None, 2)
+                # e.g. building the namespace of the logic failed
+                raise KeyError('mqtt')
+
+        scheduler._execute_logic_task = execute
+        with self.assertLogs('lib.scheduler.tasks', logging.ERROR):
+            scheduler._run_logic(logic, 'Test', None, None, 1)
+        self.assertEqual([1, 2], runs)
+        self.assertEqual(0, logic._running)
+        scheduler._run_logic(logic, 'Test', None, None, 3)
+        self.assertEqual([1, 2, 3], runs)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
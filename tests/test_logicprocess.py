@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import logging
+import marshal
+import types
+from unittest import mock
+
+import lib.logicprocess
+from lib.logicstatistics import LogicStatistics
+from lib.scheduler import Scheduler
+from lib.logicprocess import LogicProcessException, execute_logic, get_logic_parameters, _run
+
+
+SNAPSHOT = {
+    'living.light': (True, 'bool', None, None, False),
+    'living.temp': (21.5, 'num', None, None, 20.0),
+    'living.config': ({'mode': 'auto'}, 'dict', None, None, {}),
+}
+
+
+def run(code, trigger=None, parameters=None):
+    bytecode = marshal.dumps(compile(code, 'test_logic.py', 'exec'))
+    return _run('test_logic', bytecode, parameters or {}, trigger or {'value': 1}, dict(SNAPSHOT))
+
+
+class LeaveLogic(Exception):
+    pass
+
+
+class Item:
+
+    def __init__(self, path, value):
+        self._path = path
+        self._value = value
+        self._type = 'num'
+        self.calls = []
+
+    def __call__(self, value=None, caller='Logic', source=None, dest=None):
+        self.calls.append((value, caller, source, dest))
+
+    def last_change(self):
+        return None
+
+    def last_update(self):
+        return None
+
+    def prev_value(self):
+        return None
+
+
+class Items:
+
+    def __init__(self, items):
+        self._items = {item._path: item for item in items}
+
+    def return_items(self):
+        return self._items.values()
+
+    def return_item(self, path):
+        return self._items.get(path)
+
+
+class LibLogicProcessTest(unittest.TestCase):
+
+    def test_read_and_write_items(self):
+        result = run("x = sh.living.temp() * 2\n"
+                     "sh.living.temp(x)\n"
+                     "logger.info('temp %s %s', sh.living.temp(), items.return_item('living.light').property.prev_value)\n"
+                     "sh.return_item('living.light')(trigger['value'] == 1, 'Heating', 'living.temp', 'knx')\n"
+                     "logger.warning(sh.living.config(key='mode') + ' ' + sh.living.temp.property.path)\n")
+        self.assertIsNone(result['exception'])
+        self.assertEqual([('living.temp', 43.0, 'Logic', None, None), ('living.light', True, 'Heating', 'living.temp', 'knx')], result['writes'])
+        self.assertEqual([(logging.INFO, 'temp 43.0 False'), (logging.WARNING, 'auto living.temp')], result['records'])
+
+    def test_api_subset_is_enforced(self):
+        for code in ("sh.scheduler.add('x')", "sh.living.temp.timer(5, 0)", "items.match_items('*')", "logic.trigger()",
+                     "sh.cellar.light()", "sh.living.temp.property.last_change_by", "sh.living.config(1, key='mode')"):
+            result = run(code)
+            self.assertIsNotNone(result['exception'], code)
+            self.assertTrue(result['exception']['exception'].startswith('ProcessLogicError'), code)
+            self.assertEqual([], result['writes'])
+
+    def test_logic_parameters_and_leave(self):
+        result = run("logger.info(logic.name + ' ' + str(logic.limit))\nraise LeaveLogic('done')\nsh.living.temp(0)\n", parameters={'limit': 500})
+        self.assertEqual('done', result['left'])
+        self.assertEqual([(logging.INFO, 'test_logic 500')], result['records'])
+        self.assertEqual([], result['writes'])
+
+    def test_exception(self):
+        result = run("a = 1\nb = a / 0\n")
+        self.assertEqual('ZeroDivisionError: division by zero', result['exception']['exception'])
+        self.assertEqual(('test_logic.py', 2, '<module>'), (result['exception']['file'], result['exception']['line'], result['exception']['function']))
+
+    def test_get_logic_parameters(self):
+        logic = types.SimpleNamespace(_name='x', limit=5, names=['a'], sh=object(), logger=logging.getLogger(__name__))
+        self.assertEqual({'limit': 5, 'names': ['a']}, get_logic_parameters(logic))
+
+    def test_execute_in_worker_process(self):
+        item = Item('bench.value', 2)
+        items = Items([item])
+        logic = types.SimpleNamespace(name='test_logic', _bytecode=compile("sh.bench.value(sh.bench.value() ** 10)\n", 'test_logic.py', 'exec'))
+        logic_globals = {'items': items, 'logger': logging.getLogger(__name__), 'trigger': {'value': None}, 'LeaveLogic': LeaveLogic}
+        try:
+            cpu = execute_logic(logic, logic_globals, processes=1)
+            self.assertEqual([(1024, 'Logic', None, None)], item.calls)
+            self.assertIsInstance(cpu, float)
+
+            logic._bytecode = compile("raise LeaveLogic('reason')\n", 'test_logic.py', 'exec')
+            with self.assertRaises(LeaveLogic) as cm:
+                execute_logic(logic, logic_globals)
+            self.assertIsInstance(cm.exception.process_cpu, float)
+            logic._bytecode = compile("1 / 0\n", 'test_logic.py', 'exec')
+            with self.assertRaises(LogicProcessException) as cm:
+                execute_logic(logic, logic_globals)
+            self.assertIsInstance(cm.exception.process_cpu, float)
+        finally:
+            lib.logicprocess.shutdown_process_pool()
+
+    def test_cpu_time_of_worker_process(self):
+        logic = types.SimpleNamespace(name='test_logic', _bytecode=compile("x = sum(i * i for i in range(2000000))\n", 'test_logic.py', 'exec'))
+        logic_globals = {'items': Items([]), 'logger': logging.getLogger(__name__), 'trigger': {'value': None}, 'LeaveLogic': LeaveLogic}
+        try:
+            lib.logicprocess.start_process_pool(1)
+            pool = lib.logicprocess.get_process_pool()
+            self.assertEqual(1, len(pool._processes))
+            self.assertGreater(execute_logic(logic, logic_globals), 0.01)
+            self.assertIs(pool, lib.logicprocess.get_process_pool())
+
+            # the scheduler records the CPU time of the worker process in the statistics of the logic
+            logic._run_in_process = True
+            scheduler = types.SimpleNamespace(_sh=types.SimpleNamespace(_logic_processes=1))
+            scheduler._exec_logic = types.MethodType(Scheduler._exec_logic, scheduler)
+            statistics = LogicStatistics()
+            Scheduler._execute_logic_code(scheduler, logic, logic_globals, statistics, None, 'Logic', None)
+            self.assertGreater(statistics.get_statistics()['cpu_total'], 0.01)
+        finally:
+            lib.logicprocess.shutdown_process_pool()
+
+
+    def test_shutdown_on_python_38(self):
+        # Python 3.8: Executor.shutdown() has no argument cancel_futures
+        calls = []
+        lib.logicprocess._pool = types.SimpleNamespace(shutdown=lambda wait=True: calls.append(wait))
+        with mock.patch.object(lib.logicprocess.sys, 'version_info', (3, 8, 10)):
+            lib.logicprocess.shutdown_process_pool()
+        self.assertEqual([False], calls)
+        self.assertIsNone(lib.logicprocess._pool)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
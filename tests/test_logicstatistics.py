@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import types
+
+from lib.logicstatistics import LogicStatistics, write_statistics_items
+
+
+class LibLogicStatisticsTest(unittest.TestCase):
+
+    def test_record_run(self):
+        statistics = LogicStatistics()
+        statistics.record_run(0.002, 0.001, wait=0.5, by='Item', source='living.light')
+        statistics.record_run(0.2, 0.1, wait=1.5, by='Item', source='living.light')
+        statistics.record_run(12, 0.0, by='Scheduler', source='cycle', exception=True)
+
+        result = statistics.get_statistics()
+        self.assertEqual(3, result['runs'])
+        self.assertEqual(1, result['exceptions'])
+        self.assertEqual(12, result['duration_max'])
+        self.assertEqual(12, result['duration_last'])
+        self.assertAlmostEqual(0.101, result['cpu_total'])
+        self.assertAlmostEqual(1.0, result['wait_avg'])
+        self.assertEqual(1.5, result['wait_max'])
+        self.assertEqual({'<0.01s': 1, '<0.1s': 0, '<1.0s': 1, '<10.0s': 0, '>=10.0s': 1}, result['histogram'])
+        self.assertEqual([('Item:living.light', 2), ('Scheduler:cycle', 1)], result['top_triggers'])
+        self.assertFalse(result['profiling'])
+
+        statistics.reset()
+        self.assertEqual(0, statistics.get_statistics()['runs'])
+        self.assertIsNone(statistics.get_statistics()['duration_avg'])
+
+    def test_profiling(self):
+        statistics = LogicStatistics()
+        self.assertIsNone(statistics.get_profiler())
+        statistics.start_profiling(2)
+        self.assertTrue(statistics.get_statistics()['profiling'])
+        for run in range(3):
+            profile = statistics.get_profiler()
+            if run == 2:
+                self.assertIsNone(profile)
+                break
+            # a second worker thread does not get the profiler while it is in use
+            self.assertIsNone(statistics.get_profiler())
+            profile.runcall(sorted, range(100))
+            statistics.end_profiled_run(profile)
+
+        result = statistics.get_statistics()
+        self.assertFalse(result['profiling'])
+        self.assertEqual(2, result['profile']['runs'])
+        self.assertIn('sorted', result['profile']['result'])
+
+    def test_write_statistics_items(self):
+        values = []
+        logic = types.SimpleNamespace(statistics_item='logics.test', _statistics=LogicStatistics())
+        logic._statistics.record_run(0.1, 0.1)
+        logics = types.SimpleNamespace(return_loaded_logics=lambda: ['test', 'other'],
+                                       return_logic=lambda name: logic if name == 'test' else types.SimpleNamespace(_statistics=LogicStatistics()))
+        items = types.SimpleNamespace(return_item=lambda path: (lambda value, caller, source: values.append(value)))
+
+        self.assertEqual(1, write_statistics_items(logics, items))
+        self.assertEqual(1, values[0]['runs'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
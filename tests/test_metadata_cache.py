@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import os
+import shutil
+import tempfile
+import types
+
+import lib.log
+import lib.metadata
+from lib.metadata import Metadata, MetadataCache
+
+
+META_YAML = """
+plugin:
+    version: 1.0.0
+
+item_attributes:
+    bench_int:
+        type: int
+        valid_min: 0
+        valid_max: 100
+"""
+
+
+class LibMetadataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.metafile = os.path.join(self.tmp, 'plugin.yaml')
+        with open(self.metafile, 'w') as f:
+            f.write(META_YAML)
+        self.cachefile = os.path.join(self.tmp, 'run', 'metadata.cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def load(self, cache):
+        data = cache.get(self.metafile)
+        if data is None:
+            data = lib.metadata.shyaml.yaml_load(self.metafile, ordered=True)
+            cache.put(self.metafile, lib.metadata._file_signature(self.metafile), data, 0.1)
+        return data
+
+    def test_cache_roundtrip(self):
+        cache = MetadataCache(self.cachefile, 'key')
+        data = self.load(cache)
+        self.assertTrue(cache.save())
+        self.assertFalse(cache.save())
+
+        cache = MetadataCache(self.cachefile, 'key')
+        self.assertTrue(cache.is_cached(self.metafile))
+        cached = cache.get(self.metafile)
+        self.assertEqual(data, cached)
+        # every lookup returns a new copy
+        cached['plugin']['version'] = '2.0.0'
+        self.assertEqual('1.0.0', cache.get(self.metafile)['plugin']['version'])
+        stats = cache.get_statistics()
+        self.assertEqual(2, stats['hits'])
+        self.assertGreater(stats['saved'], 0)
+
+    def test_cache_invalidation(self):
+        cache = MetadataCache(self.cachefile, 'key')
+        self.load(cache)
+        cache.save()
+
+        # other version of SmartHomeNG
+        self.assertIsNone(MetadataCache(self.cachefile, 'other key').get(self.metafile))
+
+        # changed file
+        with open(self.metafile, 'a') as f:
+            f.write("\nlogic_parameters: NONE\n")
+        cache = MetadataCache(self.cachefile, 'key')
+        self.assertFalse(cache.is_cached(self.metafile))
+        self.assertIsNone(cache.get(self.metafile))
+        self.assertEqual('NONE', self.load(cache)['logic_parameters'])
+
+    def test_unreadable_cache(self):
+        os.makedirs(os.path.dirname(self.cachefile))
+        with open(self.cachefile, 'wb') as f:
+            f.write(b'no pickle')
+        cache = MetadataCache(self.cachefile, 'key')
+        self.assertIsNone(cache.get(self.metafile))
+        self.load(cache)
+        self.assertTrue(cache.save())
+        self.assertTrue(MetadataCache(self.cachefile, 'key').is_cached(self.metafile))
+
+
+class LibAttributeCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.saved_definitions = dict(lib.metadata.all_itemdefinitions)
+        lib.metadata.all_itemdefinitions['bench_int'] = {'type': 'int', 'valid_min': 0, 'valid_max': 100, 'listtype': ['foo'], 'listlen': 0,
+                                                        '_name': 'bench_int', '_type': 'attribute'}
+        lib.metadata.all_itemdefinitions['bench_list'] = {'type': 'list', 'listtype': ['foo'], 'listlen': 0,
+                                                         '_name': 'bench_list', '_type': 'attribute'}
+        lib.metadata.clear_attribute_checks()
+        self.meta = Metadata.__new__(Metadata)
+        self.meta._log_premsg = ''
+        self.item = types.SimpleNamespace(property=types.SimpleNamespace(path='test.item'))
+
+    def tearDown(self):
+        lib.metadata.all_itemdefinitions.clear()
+        lib.metadata.all_itemdefinitions.update(self.saved_definitions)
+        lib.metadata.clear_attribute_checks()
+
+    def test_memoized(self):
+        before = lib.metadata.get_attribute_check_statistics()
+        self.assertEqual(42, self.meta.check_itemattribute(self.item, 'bench_int', '42'))
+        self.assertEqual(42, self.meta.check_itemattribute(self.item, 'bench_int', '42'))
+        self.assertEqual(43, self.meta.check_itemattribute(self.item, 'bench_int', 43))
+        after = lib.metadata.get_attribute_check_statistics()
+        self.assertEqual(3, after['checks'] - before['checks'])
+        self.assertEqual(1, after['memoized'] - before['memoized'])
+
+    def test_warnings_not_memoized(self):
+        # an invalid value is logged for every item
+        for i in range(2):
+            with self.assertLogs('lib.metadata', level='WARNING'):
+                self.assertEqual(100, self.meta.check_itemattribute(self.item, 'bench_int', '142'))
+        with self.assertLogs('lib.metadata', level='WARNING'):
+            self.meta.check_itemattribute(self.item, 'bench_int', 'abc')
+        with self.assertLogs('lib.metadata', level='WARNING'):
+            self.meta.check_itemattribute(self.item, 'bench_int', 'abc')
+
+    def test_mutable_results_not_shared(self):
+        first = self.meta.check_itemattribute(self.item, 'bench_list', 'a | b')
+        second = self.meta.check_itemattribute(self.item, 'bench_list', 'a | b')
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_value_type(self):
+        self.assertEqual(1, self.meta.check_itemattribute(self.item, 'bench_int', True))
+        self.assertIs(type(self.meta.check_itemattribute(self.item, 'bench_int', 1.0)), int)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
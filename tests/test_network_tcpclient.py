@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import logging
+import socket
+import threading
+import time
+
+from lib.network import Tcp_client, Tcp_reactor
+
+# log levels of SmartHomeNG, that are used by Tcp_client (normally added by lib.log)
+for _name in ('dbghigh', 'dbgmed', 'dbglow'):
+    if not hasattr(logging.Logger, _name):
+        setattr(logging.Logger, _name, lambda self, msg, *args, **kwargs: None)
+
+
+def create_client(terminator=b'\r\n', binary=True, port=1, **kwargs):
+    client = Tcp_client('127.0.0.1', port, name='test', terminator=terminator, binary=binary, autoreconnect=False, **kwargs)
+    client.received = []
+    client.set_callbacks(data_received=lambda c, message: c.received.append(message))
+    return client
+
+
+class LibNetworkTcpClientBufferTest(unittest.TestCase):
+
+    def test_terminator(self):
+        client = create_client()
+        for block in (b'one\r', b'\ntwo\r\nthr', b'ee', b'\r\n\r\nfour'):
+            client._process_received(block)
+        self.assertEqual([b'one\r\n', b'two\r\n', b'three\r\n', b'\r\n'], client.received)
+        self.assertEqual(b'four', bytes(client._rx_buffer))
+        # 'four' has been searched, except for the last byte (a terminator may begin there)
+        self.assertEqual(3, client._rx_scanned)
+
+    def test_str_terminator_text_mode(self):
+        client = create_client(terminator='\n', binary=False)
+        client._process_received('eins \nzwei\nä'.encode('utf-8'))
+        client._process_received(b'\n')
+        self.assertEqual(['eins', 'zwei', 'ä'], client.received)
+
+    def test_fixed_size(self):
+        client = create_client(terminator=3)
+        client._process_received(b'abcdefg')
+        client._process_received(b'hi')
+        self.assertEqual([b'abc', b'def', b'ghi'], client.received)
+        self.assertEqual(b'', bytes(client._rx_buffer))
+
+    def test_terminator_changed_by_callback(self):
+        client = create_client(terminator=b'\n')
+
+        def received(c, message):
+            c.received.append(message)
+            if message == b'LEN\n':
+                c.terminator = 3
+            elif len(c.received) == 3:
+                c.terminator = b'\n'
+        client.set_callbacks(data_received=received)
+        client._process_received(b'LEN\nabcdef\nghi\nj')
+        self.assertEqual([b'LEN\n', b'abc', b'def', b'\n', b'ghi\n'], client.received)
+        self.assertEqual(b'j', bytes(client._rx_buffer))
+
+    def test_no_terminator(self):
+        client = create_client(terminator=None)
+        client._process_received(b'abc\r\n')
+        self.assertEqual([b'abc\r\n'], client.received)
+
+
+class ServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(10)
+        self.port = self.server.getsockname()[1]
+        self.connections = []
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.close()
+        self.server.close()
+
+    def wait_until(self, condition, timeout=5):
+        end = time.monotonic() + timeout
+        while not condition() and time.monotonic() < end:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+
+class LibNetworkTcpReactorTest(ServerTestCase):
+
+    def test_clients_share_one_thread(self):
+        clients = [create_client(port=self.port, shared_reactor=True) for i in range(5)]
+        for client in clients:
+            client.connect()
+            self.connections.append(self.server.accept()[0])
+        self.wait_until(lambda: all(client._is_receiving for client in clients))
+        self.assertFalse([t for t in threading.enumerate() if t.name.startswith('TCP_Client')])
+
+        for i, connection in enumerate(self.connections):
+            connection.sendall(b'hello ')
+            connection.sendall(f'{i}\r\nbye\r\n'.encode())
+        self.wait_until(lambda: all(len(client.received) == 2 for client in clients))
+        for i, client in enumerate(clients):
+            self.assertEqual([f'hello {i}\r\n'.encode(), b'bye\r\n'], client.received)
+
+        for client in clients:
+            client.close()
+        self.assertEqual(0, Tcp_reactor.get_instance().client_count())
+
+    def test_closed_by_peer(self):
+        disconnected = threading.Event()
+        client = create_client(port=self.port, shared_reactor=True)
+        client.set_callbacks(disconnected=lambda c: disconnected.set())
+        client.connect()
+        self.connections.append(self.server.accept()[0])
+        self.wait_until(lambda: client._is_receiving)
+        self.connections[0].close()
+        self.assertTrue(disconnected.wait(5))
+        self.assertFalse(client.connected())
+        self.wait_until(lambda: Tcp_reactor.get_instance().client_count() == 0)
+        client.close()
+
+    def test_reconnect_does_not_block_reactor(self):
+        disconnected = threading.Event()
+        client = Tcp_client('127.0.0.1', self.port, name='reconnect', terminator=b'\n', binary=True, shared_reactor=True, rate_limit=1)
+        client.set_callbacks(disconnected=lambda c: disconnected.set())
+        client.connect()
+        self.connections.append(self.server.accept()[0])
+        other = create_client(port=self.port, terminator=b'\n', shared_reactor=True)
+        other.connect()
+        self.connections.append(self.server.accept()[0])
+        self.wait_until(lambda: client._is_receiving and other._is_receiving)
+
+        # the reconnect of the client waits for the rate limit (1 second after the last connect)
+        self.connections[0].close()
+        self.assertTrue(disconnected.wait(5))
+        self.connections[1].sendall(b'still served\n')
+        self.wait_until(lambda: other.received == [b'still served\n'], timeout=0.5)
+
+        self.server.settimeout(5)
+        self.connections.append(self.server.accept()[0])
+        self.wait_until(lambda: client._is_receiving)
+        client.close()
+        other.close()
+
+
+class LibNetworkTcpClientSendQueueTest(ServerTestCase):
+
+    def connect(self, **kwargs):
+        client = create_client(port=self.port, send_queue=True, **kwargs)
+        client.connect()
+        peer = self.server.accept()[0]
+        self.connections.append(peer)
+        self.wait_until(lambda: client._is_receiving)
+        return client, peer
+
+    def receive(self, peer, size):
+        data = bytearray()
+        peer.settimeout(5)
+        while len(data) < size:
+            block = peer.recv(65536)
+            if not block:
+                break
+            data += block
+        return bytes(data)
+
+    def test_messages_in_order(self):
+        client, peer = self.connect()
+        futures = [client.send_async(f'message {i}\n') for i in range(200)]
+        self.assertTrue(client.send(b'last\n'))
+        expected = ''.join(f'message {i}\n' for i in range(200)).encode() + b'last\n'
+        self.assertEqual(expected, self.receive(peer, len(expected)))
+        self.assertEqual([len(f'message {i}\n') for i in range(200)], [future.result(5) for future in futures])
+        self.assertTrue(client.flush(5))
+        self.assertEqual((0, 0), client.send_queue_depth())
+        statistics = client._statistics.get_statistics()
+        self.assertEqual(len(expected), statistics['bytes_out'])
+        self.assertEqual(201, statistics['messages_out'])
+        client.close()
+
+    def test_close_sends_queued_messages(self):
+        client, peer = self.connect(send_queue_limit=16 * 1024 * 1024)
+        message = bytes(range(256)) * 32 * 1024
+        received = []
+        reader = threading.Thread(target=lambda: received.append(self.receive(peer, len(message))))
+        self.assertTrue(client.send(message))
+        reader.start()
+        client.close()
+        reader.join(5)
+        self.assertEqual([message], received)
+
+    def test_send_queue_limit(self):
+        client, peer = self.connect(send_queue_limit=1024 * 1024)
+        block_size = 256 * 1024
+        accepted = 0
+        for i in range(200):
+            future = client.send_async(bytes([i]) * block_size)
+            if future.done() and future.exception() is not None:
+                break
+            accepted += 1
+        self.assertLess(accepted, 200)
+        self.assertIsInstance(future.exception(), BufferError)
+
+        # the peer receives the accepted messages completely, although they are written in parts
+        data = self.receive(peer, accepted * block_size)
+        self.assertEqual(b''.join(bytes([i]) * block_size for i in range(accepted)), data)
+        self.assertTrue(client.flush(5))
+        client.close()
+
+    def test_connection_lost(self):
+        client, peer = self.connect(send_queue_limit=64 * 1024 * 1024)
+        future = client.send_async(b'x' * 32 * 1024 * 1024)
+        peer.close()
+        self.assertIsInstance(future.exception(5), ConnectionError)
+        self.wait_until(lambda: not client.connected())
+        self.assertEqual((0, 0), client.send_queue_depth())
+        self.assertFalse(client.send(b'too late'))
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
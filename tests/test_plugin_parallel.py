@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import lib.metadata
+import lib.plugin
+from lib.plugin import Plugins, run_with_dependencies, dependency_order
+
+
+class LibPluginParallelTest(unittest.TestCase):
+
+    def test_dependencies_are_processed_first(self):
+        finished = []
+        lock = threading.Lock()
+
+        def func(name):
+            time.sleep(0.01 if name == 'db' else 0.0)
+            with lock:
+                finished.append(name)
+            return name.upper()
+
+        names = ['a', 'b', 'db', 'c']
+        results, timed_out = run_with_dependencies(names, {'a': {'db'}, 'c': {'db', 'b'}}, func, 2, 5)
+        self.assertEqual(results, {'a': 'A', 'b': 'B', 'db': 'DB', 'c': 'C'})
+        self.assertEqual(timed_out, set())
+        self.assertLess(finished.index('db'), finished.index('a'))
+        self.assertLess(finished.index('db'), finished.index('c'))
+        self.assertLess(finished.index('b'), finished.index('c'))
+
+    def test_bounded_number_of_threads(self):
+        running = []
+        maximum = []
+        lock = threading.Lock()
+
+        def func(name):
+            with lock:
+                running.append(name)
+                maximum.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.remove(name)
+
+        run_with_dependencies([str(i) for i in range(10)], {}, func, 3, 5)
+        self.assertLessEqual(max(maximum), 3)
+
+    def test_exception_and_timeout(self):
+        def func(name):
+            if name == 'fail':
+                raise ValueError('failed')
+            if name == 'hang':
+                time.sleep(0.5)
+            return name
+
+        with self.assertLogs('lib.plugin', level='ERROR'):
+            results, timed_out = run_with_dependencies(['fail', 'hang', 'after_hang'], {'after_hang': {'hang'}}, func, 3, 0.1)
+        self.assertEqual(timed_out, {'hang'})
+        self.assertIsNone(results['fail'])
+        self.assertEqual(results['after_hang'], 'after_hang')
+        self.assertNotIn('hang', results)
+
+    def test_dependency_loop(self):
+        with self.assertLogs('lib.plugin', level='ERROR'):
+            results, timed_out = run_with_dependencies(['a', 'b'], {'a': {'b'}, 'b': {'a'}}, lambda name: name, 2, 5)
+        self.assertEqual(results, {'a': 'a', 'b': 'b'})
+
+    def test_dependency_order(self):
+        self.assertEqual(dependency_order(['a', 'b', 'c', 'd'], {'a': {'c'}, 'b': {'d'}}), ['c', 'a', 'd', 'b'])
+        self.assertEqual(dependency_order(['a', 'b'], {'a': {'b'}, 'b': {'a'}}), ['a', 'b'])
+        self.assertEqual(dependency_order(['a', 'b'], {}), ['a', 'b'])
+
+
+class FakePlugin():
+    """ Plugin, that looks up the plugins it depends on in its __init__ method """
+
+    def __init__(self, configname, depends_on):
+        self._configname = configname
+        self._shortname = configname
+        self._metadata = SimpleNamespace(logic_parameters=None)
+        time.sleep(0.05)
+        self.found = {name: Plugins.get_instance().return_plugin(name) for name in depends_on}
+
+    def get_configname(self):
+        return self._configname
+
+
+class FakePluginWrapper():
+
+    def __init__(self, smarthome, configname, classname, classpath, args, instance, meta, configfile):
+        self.plugin = FakePlugin(configname, args['depends_on'])
+        self._init_complete = True
+
+
+class LibPluginsParallelLoadTest(unittest.TestCase):
+
+    # section -> (startorder, sections the plugin depends on)
+    CONF = {
+        'visu': ('normal', ['database', 'knx']),
+        'knx': ('early', []),
+        'database': ('normal', []),
+        'other': ('normal', []),
+        'report': ('late', ['database']),
+    }
+
+    def setUp(self):
+        self.saved = (Plugins._plugins, Plugins._threads, Plugins._plugindict, lib.plugin._plugins_instance, lib.metadata._metadata_cache)
+        Plugins._plugins = []
+        Plugins._threads = []
+        Plugins._plugindict = {}
+        lib.plugin._plugins_instance = None
+        # the metadata cache is not written to a file
+        lib.metadata._metadata_cache = lib.metadata.MetadataCache()
+
+    def tearDown(self):
+        Plugins._plugins, Plugins._threads, Plugins._plugindict, lib.plugin._plugins_instance, lib.metadata._metadata_cache = self.saved
+
+    def prepare_plugin(self, plugins, configname, conf):
+        startorder, depends_on = self.CONF[configname]
+        return {'configname': configname, 'classname': 'Fake', 'classpath': f'plugins.{configname}',
+                'args': {'depends_on': depends_on}, 'instance': '', 'meta': None, 'plugin_version': 'v1.0.0',
+                'shortname': configname, 'startorder': startorder, 'depends_on': depends_on}
+
+    def load_plugins(self, parallel):
+        sh = SimpleNamespace(_base_dir=os.getcwd(), get_basedir=lambda: common.BASE, version='test', shng_status={},
+                             _plugins_parallel_init=parallel, _plugins_parallel_workers=4, _plugins_init_timeout=5)
+        conf = {configname: {'plugin_name': configname} for configname in self.CONF}
+        with mock.patch('lib.config.parse_basename', return_value=conf), \
+                mock.patch.object(Plugins, '_prepare_plugin', lambda plugins, configname, conf: self.prepare_plugin(plugins, configname, conf)), \
+                mock.patch.object(lib.plugin, 'PluginWrapper', FakePluginWrapper):
+            return Plugins(sh, os.path.join(common.BASE, 'tests', 'resources', 'plugin_parallel_test'))
+
+    def test_dependencies_found_in_init(self):
+        plugins = self.load_plugins(parallel=True)
+        loaded = {plugin.get_configname(): plugin for plugin in plugins.return_plugins()}
+        self.assertEqual(set(self.CONF), set(loaded))
+        for configname, plugin in loaded.items():
+            depends_on = self.CONF[configname][1]
+            self.assertEqual({name: loaded[name] for name in depends_on}, plugin.found, configname)
+
+    def test_order_of_configuration(self):
+        sequential = [plugin.get_configname() for plugin in self.load_plugins(parallel=False).return_plugins()]
+        self.setUp()
+        parallel = self.load_plugins(parallel=True)
+        # 'visu' follows the plugins it depends on
+        self.assertEqual(['knx', 'database', 'visu', 'other', 'report'], [plugin.get_configname() for plugin in parallel.return_plugins()])
+        self.assertEqual(['visu', 'knx', 'database', 'other', 'report'], sequential)
+        self.assertEqual(['database', 'visu', 'other'], [thread.plugin.get_configname() for thread in parallel._threads[1:-1]])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+
+import types
+
+from lib.scheduler import Scheduler, _TimerWheel
+
+
+class TimerWheel(_TimerWheel):
+    """ timer wheel with a manually advanced clock """
+
+    def __init__(self, tick=0.5, slots=8):
+        self.clock = 0.0
+        super().__init__(tick=tick, slots=slots)
+
+    def _now_tick(self):
+        return int(self.clock / self._tick)
+
+
+class LibSchedulerTimerWheelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.wheel = TimerWheel()
+        self.wheel._start = 0.0
+
+    def add(self, name, delay, value=None):
+        # add() uses time.monotonic(), so shift the wheel start to emulate the wheel clock
+        import time
+        self.wheel._start = time.monotonic() - self.wheel.clock
+        self.wheel.add(name, 'obj', delay, value=value)
+
+    def test_timer_fires_when_due(self):
+        self.add('items.a-Timer', 2, value={'value': 1})
+        self.wheel.clock = 1.5
+        self.assertEqual(self.wheel.pop_due(), [])
+        self.wheel.clock = 2.5
+        due = self.wheel.pop_due()
+        self.assertEqual([t.name for t in due], ['items.a-Timer'])
+        self.assertEqual(due[0].value, {'value': 1})
+        self.assertEqual(self.wheel.qsize(), 0)
+
+    def test_rearm_replaces_timer(self):
+        self.add('items.a-Timer', 1)
+        self.add('items.a-Timer', 3)
+        self.assertEqual(self.wheel.qsize(), 1)
+        self.wheel.clock = 2.0
+        self.assertEqual(self.wheel.pop_due(), [])
+        self.wheel.clock = 3.5
+        self.assertEqual(len(self.wheel.pop_due()), 1)
+
+    def test_remove(self):
+        self.add('items.a-Timer', 1)
+        self.assertTrue(self.wheel.remove('items.a-Timer'))
+        self.assertFalse(self.wheel.remove('items.a-Timer'))
+        self.wheel.clock = 5.0
+        self.assertEqual(self.wheel.pop_due(), [])
+
+    def test_timer_longer_than_one_revolution(self):
+        # wheel with 8 slots of 0.5s has a revolution of 4 seconds
+        self.add('items.long-Timer', 9.8)
+        self.wheel.clock = 6.0
+        self.assertEqual(self.wheel.pop_due(), [])
+        self.wheel.clock = 9.5
+        self.assertEqual(self.wheel.pop_due(), [])
+        self.wheel.clock = 10.0
+        self.assertEqual(len(self.wheel.pop_due()), 1)
+
+    def test_skipped_revolutions(self):
+        self.add('items.a-Timer', 1)
+        self.add('items.b-Timer', 3)
+        self.wheel.clock = 100.0
+        self.assertEqual(sorted(t.name for t in self.wheel.pop_due()), ['items.a-Timer', 'items.b-Timer'])
+
+    def test_zero_delay(self):
+        self.wheel.clock = 1.0
+        self.wheel.pop_due()
+        self.add('items.a-Timer', 0)
+        self.wheel.clock = 1.5
+        self.assertEqual(len(self.wheel.pop_due()), 1)
+
+    def test_dump(self):
+        self.add('items.a-Timer', 1, value={'value': True, 'caller': 'Autotimer'})
+        name, entry = self.wheel.dump()[0]
+        self.assertEqual(name, 'items.a-Timer')
+        self.assertEqual(entry['value'], {'value': True, 'caller': 'Autotimer'})
+        self.assertIsNone(entry['cron'])
+        self.assertTrue(entry['active'])
+
+
+class Logic:
+    """ minimal logic object """
+
+    name = 'test_logic'
+    _enabled = True
+    _logics = None
+
+    def __init__(self, code):
+        self._bytecode = compile(code, 'test_logic.py', 'exec')
+        self.results = []
+
+    def set_last_run(self):
+        pass
+
+    def get_method_triggers(self):
+        return []
+
+
+class LibSchedulerLogicNamespaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler.__new__(Scheduler)
+        self.scheduler._sh = types.SimpleNamespace(shng_status={'code': 20})
+        self.scheduler.shtime = None
+        self.scheduler.items = None
+        self.scheduler.mqtt = 'mqtt'
+
+    def run_logic(self, logic, value):
+        self.scheduler._execute_logic_task(logic, 'Test', 'test.item', None, value)
+
+    def test_namespace_is_reused(self):
+        logic = Logic("logic.results.append((trigger['value'], logic, sh, mqtt, math.pi))")
+        self.run_logic(logic, 1)
+        namespace = logic._namespace
+        self.run_logic(logic, 2)
+        self.assertIs(namespace, logic._namespace)
+        self.assertNotIn('trigger', namespace)
+        self.assertEqual([1, 2], [result[0] for result in logic.results])
+        self.assertIs(logic, logic.results[1][1])
+        self.assertIs(self.scheduler._sh, logic.results[1][2])
+        self.assertEqual('mqtt', logic.results[1][3])
+
+    def test_module_level_state_does_not_leak(self):
+        logic = Logic("try:\n    counter += 1\nexcept NameError:\n    counter = 0\nlogic.results.append(counter)\n")
+        for value in range(3):
+            self.run_logic(logic, value)
+        self.assertEqual([0, 0, 0], logic.results)
+        self.assertNotIn('counter', logic._namespace)
+
+    def test_namespace_rebuilt_for_mqtt(self):
+        logic = Logic("logic.results.append(mqtt)")
+        self.run_logic(logic, 1)
+        self.scheduler.mqtt = 'mqtt2'
+        self.run_logic(logic, 2)
+        self.assertEqual(['mqtt', 'mqtt2'], logic.results)
+
+    def test_statistics(self):
+        from lib.logicstatistics import LogicStatistics
+        logic = Logic("if trigger['value'] == 2:\n    raise ValueError('test')\n")
+        logic._statistics = LogicStatistics()
+        for value in range(3):
+            self.run_logic(logic, value)
+        self.scheduler._execute_logic_task(logic, 'Test', 'test.item', None, 3, wait=0.25)
+        statistics = logic._statistics.get_statistics()
+        self.assertEqual(4, statistics['runs'])
+        self.assertEqual(1, statistics['exceptions'])
+        self.assertEqual(0.25, statistics['wait_max'])
+        self.assertEqual([('Test:test.item', 4)], statistics['top_triggers'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import glob
+import multiprocessing
+import os
+import tempfile
+from unittest import mock
+
+import lib.shyaml as shyaml
+
+
+SCALARS = """
+bool_12: true
+bool_11: yes
+on_off: on
+octal_11: 010
+octal_12: 0o10
+sexagesimal: 1:20
+underscore: 1_000
+hex: 0x1F
+binary: -0b101
+exp: 1e3
+float: 1.0e+3
+inf: -.inf
+nan: .NaN
+null_1: ~
+null_2:
+date: 2020-01-01
+timestamp: 2001-12-14t21:59:43.10-05:00
+quoted: "5"
+tagged: !!str 5
+anchor: &A {a: 1, b: 2}
+merged: {<<: *A, c: 3}
+list: [1, two, 3.0]
+block: |
+    line 1
+    line 2
+"""
+
+
+@unittest.skipIf('libyaml' not in shyaml.get_load_backends(), "libyaml is not installed")
+class LibShyamlBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = shyaml.get_load_backend()
+
+    def tearDown(self):
+        shyaml.set_load_backend(self.backend)
+
+    def load_both(self, load, *args):
+        shyaml.set_load_backend('libyaml')
+        libyaml_data = load(*args)
+        shyaml.set_load_backend('ruamel')
+        ruamel_data = load(*args)
+        return libyaml_data, ruamel_data
+
+    def assertSameResult(self, load, *args):
+        libyaml_data, ruamel_data = self.load_both(load, *args)
+        # repr() compares the types of the (ordered) dicts and of the scalars, too
+        self.assertEqual(repr(libyaml_data), repr(ruamel_data), args[0])
+
+    def test_scalars(self):
+        for ordered in (False, True):
+            self.assertSameResult(shyaml.yaml_load_fromstring, SCALARS, ordered)
+
+    def test_errors(self):
+        for data in ['a: 1\na: 2\n', 'a: [1, 2\n', 'a: =\n', 'a: 1\n b: 2\n']:
+            for ordered in (False, True):
+                self.assertSameResult(shyaml.yaml_load_fromstring, data, ordered)
+
+    def test_yaml_11_directive(self):
+        data = '%YAML 1.1\n---\na: yes\nb: 010\n'
+        self.assertSameResult(shyaml.yaml_load_fromstring, data, False)
+
+    def test_repository_files(self):
+        for filename in sorted(glob.glob(os.path.join(common.BASE, '**', '*.yaml'), recursive=True)):
+            for ordered in (False, True):
+                self.assertSameResult(shyaml.yaml_load, filename, ordered)
+
+    def test_set_load_backend(self):
+        with self.assertRaises(ValueError):
+            shyaml.set_load_backend('unknown')
+
+
+@unittest.skipIf('fork' not in multiprocessing.get_all_start_methods(), "fork is not available")
+class LibShyamlPreloadTest(unittest.TestCase):
+
+    def setUp(self):
+        # other tests may have left threads running, the preload is tested as in a single threaded process
+        self.patcher = mock.patch.object(shyaml.threading, 'active_count', return_value=1)
+        self.patcher.start()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filenames = []
+        for i in range(shyaml.PRELOAD_MIN_FILES):
+            filename = os.path.join(self.tmpdir.name, f'items_{i}.yaml')
+            with open(filename, 'w') as f:
+                f.write(f'item_{i}:\n    type: num\n    initial_value: {i}\n')
+            self.filenames.append(filename)
+
+    def tearDown(self):
+        shyaml.yaml_preload_discard()
+        self.tmpdir.cleanup()
+        self.patcher.stop()
+
+    def test_preload(self):
+        self.assertEqual(len(self.filenames), shyaml.yaml_preload(self.filenames, ordered=True, processes=2))
+        self.assertEqual({'item_0': {'type': 'num', 'initial_value': 0}}, shyaml.yaml_load(self.filenames[0], ordered=True))
+        # the preloaded data is consumed by yaml_load(), the remaining files are dropped
+        self.assertEqual(len(self.filenames) - 1, shyaml.yaml_preload_discard())
+        self.assertEqual(0, shyaml.yaml_preload_discard())
+
+    def test_no_preload_with_threads(self):
+        with mock.patch.object(shyaml.threading, 'active_count', return_value=2):
+            self.assertEqual(0, shyaml.yaml_preload(self.filenames, processes=2))
+        self.assertEqual(0, shyaml.yaml_preload_discard())
+
+    def test_preloaded_files_are_skipped(self):
+        self.assertEqual(len(self.filenames), shyaml.yaml_preload(self.filenames, ordered=True, processes=2))
+        self.assertEqual(0, shyaml.yaml_preload(self.filenames, ordered=True, processes=2))
+        # only the given files are dropped
+        self.assertEqual(1, shyaml.yaml_preload_discard(self.filenames[:1]))
+        self.assertEqual(len(self.filenames) - 1, shyaml.yaml_preload_discard())
+
+    def test_changed_file_is_loaded_again(self):
+        shyaml.yaml_preload(self.filenames, processes=2)
+        with open(self.filenames[1], 'w') as f:
+            f.write('changed: 1234\n')
+        self.assertEqual({'changed': 1234}, shyaml.yaml_load(self.filenames[1]))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
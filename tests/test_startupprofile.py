@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+from . import common
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from lib.startupprofile import StartupProfiler
+
+
+class LibStartupProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_inactive(self):
+        profiler = StartupProfiler()
+        with profiler.phase('items'):
+            pass
+        self.assertIsNone(profiler.finish())
+
+    def test_phases(self):
+        profiler = StartupProfiler()
+        profiler.start()
+        with profiler.phase('plugins_init'):
+            with profiler.phase('fast', parent='plugins_init', plugin_name='fastplugin'):
+                pass
+            with profiler.phase('slow', parent='plugins_init'):
+                time.sleep(0.02)
+        with self.assertRaises(ValueError):
+            with profiler.phase('failing'):
+                raise ValueError
+        profiler.add_info('item_count', 42)
+
+        filename = os.path.join(self.tmp, 'run', 'startup_profile.json')
+        profile = profiler.finish(filename)
+        self.assertEqual([phase['name'] for phase in profile['phases']], ['fast', 'slow', 'plugins_init', 'failing'])
+        self.assertEqual(profile['phases'][0]['plugin_name'], 'fastplugin')
+        self.assertEqual(profile['phases'][1]['parent'], 'plugins_init')
+        self.assertGreaterEqual(profile['phases'][2]['wall'], profile['phases'][1]['wall'])
+        self.assertEqual(profile['item_count'], 42)
+        self.assertEqual([phase['name'] for phase in profiler.get_slowest('plugins_init', 1)], ['slow'])
+
+        with open(filename) as f:
+            self.assertEqual(json.load(f), profile)
+
+        # phases after the end of the startup are not recorded
+        with profiler.phase('reload'):
+            pass
+        self.assertEqual(len(profiler.get_profile()['phases']), 4)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Logics waiting for an item value, run in worker threads and as async logics
+
+The given number of logic runs wait for an item to be set to 1. The synchronous logic polls
+the item in a worker thread (one thread per waiting run, like scheduler workers), the async
+logic awaits ``item.wait_for(1)`` on the core event loop. For both, the number of threads,
+the growth of the resident memory while the runs are waiting and the time from setting the
+item until all runs have finished are reported.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_async_logic.py [number of waiting runs]
+"""
+
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+
+from benchenv import BenchSmartHome, quiet_logging
+
+import lib.asyncloop
+import lib.scheduler
+from lib.lazyimport import get_rss
+from lib.logic import get_async_mode, load_logic_bytecode
+from lib.scheduler import Scheduler
+
+VERSION = '1.0.0'
+
+ITEMS = {'bench': {'door': {'type': 'num'}}}
+
+SYNC_LOGIC = "while sh.bench.door() != 1:\n    time.sleep(0.01)\n"
+ASYNC_LOGIC = "await sh.bench.door.wait_for(1)\n"
+
+
+class BenchLogic:
+    """ Minimal logic object, as used by Scheduler._execute_logic_task() """
+
+    name = 'bench_logic'
+    _enabled = True
+    _logics = None
+    _statistics = None
+
+    def __init__(self, pathname):
+        self._bytecode = load_logic_bytecode(pathname)
+        self._async_mode = get_async_mode(self._bytecode)
+        self.runs = 0
+
+    def set_last_run(self):
+        self.runs += 1
+
+    def get_method_triggers(self):
+        return []
+
+
+def create_logic(sh, name, code):
+    pathname = os.path.join(sh.get_vardir(), name)
+    with open(pathname, 'w') as f:
+        f.write(code)
+    return BenchLogic(pathname)
+
+
+def wait_until(condition):
+    while not condition():
+        time.sleep(0.01)
+
+
+def run_sync(sh, scheduler, number):
+    logic = create_logic(sh, 'sync_logic.py', SYNC_LOGIC)
+    sh.bench.door(0)
+    rss = get_rss()
+    threads = threading.active_count()
+    workers = [threading.Thread(target=scheduler._execute_logic_task, args=(logic, 'Item', 'bench.door', None, i))
+               for i in range(number)]
+    for worker in workers:
+        worker.start()
+    time.sleep(1)
+    result = (threading.active_count() - threads, get_rss() - rss)
+    start = time.perf_counter()
+    sh.bench.door(1)
+    for worker in workers:
+        worker.join()
+    return result + (time.perf_counter() - start, logic.runs)
+
+
+def run_async(sh, scheduler, number):
+    logic = create_logic(sh, 'async_logic.py', ASYNC_LOGIC)
+    sh.bench.door(0)
+    lib.asyncloop.get_core_loop().start()
+    rss = get_rss()
+    threads = threading.active_count()
+    futures = [scheduler._execute_logic_task(logic, 'Item', 'bench.door', None, i) for i in range(number)]
+    wait_until(lambda: len(sh.bench.door._waiters) == number)
+    time.sleep(1)
+    result = (threading.active_count() - threads, get_rss() - rss)
+    start = time.perf_counter()
+    sh.bench.door(1)
+    concurrent.futures.wait(futures)
+    return result + (time.perf_counter() - start, logic.runs)
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    quiet_logging()
+    sh = BenchSmartHome()
+    sh.add_items(ITEMS)
+    sh.bench = sh.items.return_item('bench')
+    lib.scheduler._lib_modules_found = False
+    scheduler = Scheduler(sh)
+
+    results = {'worker threads': run_sync(sh, scheduler, number), 'async logic': run_async(sh, scheduler, number)}
+    lib.asyncloop.stop_core_loop()
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} waiting logic runs')
+    print('')
+    print(f"{'':16} {'threads':>8} {'memory':>10} {'wake up all':>12} {'runs':>6}")
+    for name, (threads, rss, duration, runs) in results.items():
+        print(f"{name:16} {threads:8} {rss / 1024 / 1024:7.1f} MB {duration * 1000:9.1f} ms {runs:6}")
+    print()
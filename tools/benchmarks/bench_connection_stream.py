@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Framing of received data in lib.connection.Stream
+
+1 MB of small JSON frames (as sent by a device at 1 MB/s) arrives in blocks of 4096 bytes and is
+split into frames by a terminator (b'\n') and by balanced brackets ('{' / '}'). A large JSON
+object of 20 kB, that arrives in 5 blocks, is split by balanced brackets.
+
+The previous implementation (copying the rest of the buffer after every frame and counting the
+brackets on a stack, that is searched for every closing bracket) is compared with the read
+offset into the buffer and the resumable bracket counter. The time per MB is the share of a CPU,
+that is needed to receive 1 MB/s.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_connection_stream.py
+"""
+
+import json
+import os
+import time
+
+from benchenv import quiet_logging
+
+from lib.connection import Stream
+
+VERSION = '1.0.0'
+
+BLOCK_SIZE = 4096
+MB = 1024 * 1024
+
+
+class PreviousStream(Stream):
+    """ Framing of lib.connection.Stream before the read offset and the resumable bracket counter """
+
+    def _process_input(self):
+        while True:
+            terminator = self.terminator
+            buffer_len = len(self.inbuffer)
+            if not terminator:
+                if not self._balance_open:
+                    break
+                index = self._is_balanced()
+                if index:
+                    data = self.inbuffer[:index]
+                    self.inbuffer = self.inbuffer[index:]
+                    self.found_balance(data)
+                else:
+                    break
+            elif isinstance(terminator, int):
+                if buffer_len < terminator:
+                    break
+                else:
+                    data = self.inbuffer[:terminator]
+                    self.inbuffer = self.inbuffer[terminator:]
+                    self.terminator = 0
+                    self.found_terminator(data)
+            else:
+                if terminator not in self.inbuffer:
+                    break
+                index = self.inbuffer.find(terminator)
+                data = self.inbuffer[:index]
+                cut = index + len(terminator)
+                self.inbuffer = self.inbuffer[cut:]
+                self.found_terminator(data)
+
+    def _is_balanced(self):
+        stack = []
+        for index, char in enumerate(self.inbuffer):
+            if char == self._balance_open:
+                stack.append(char)
+            elif char == self._balance_close:
+                stack.append(char)
+                if stack.count(self._balance_open) < stack.count(self._balance_close):
+                    return False
+                if stack.count(self._balance_open) == stack.count(self._balance_close):
+                    return index + 1
+        return False
+
+
+def create_stream(cls, terminator, frame_views=False):
+    stream = cls()
+    stream.connected = True
+    stream.frames = 0
+    stream.frame_views = frame_views
+    if terminator is None:
+        stream.terminator = None
+        stream.balance('{', '}')
+    else:
+        stream.terminator = terminator
+
+    def found(data):
+        stream.frames += 1
+
+    stream.found_terminator = found
+    stream.found_balance = found
+    return stream
+
+
+def measure(cls, blocks, terminator, frame_views=False, repeat=5):
+    best = None
+    for _ in range(repeat):
+        stream = create_stream(cls, terminator, frame_views)
+        start = time.perf_counter()
+        for block in blocks:
+            stream.inbuffer += block
+            stream._process_input()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, stream.frames
+
+
+def split_blocks(data):
+    return [data[i:i + BLOCK_SIZE] for i in range(0, len(data), BLOCK_SIZE)]
+
+
+def small_frames(separator):
+    frames = []
+    size = i = 0
+    while size < MB:
+        frame = json.dumps({'item': f'living.light.{i % 100}', 'value': i, 'source': 'bench'}).encode() + separator
+        frames.append(frame)
+        size += len(frame)
+        i += 1
+    return b''.join(frames), len(frames)
+
+
+if __name__ == '__main__':
+    quiet_logging()
+
+    lines, count = small_frames(b'\n')
+    objects, _ = small_frames(b'')
+    large = json.dumps({'items': [{'path': f'item.{i}', 'value': {'v': i}} for i in range(500)]}).encode()
+    scenarios = [
+        (f'1 MB, {count} frames, terminator', split_blocks(lines), b'\n', MB),
+        (f'1 MB, {count} frames, balanced', split_blocks(objects), None, MB),
+        (f'{len(large) // 1024} kB JSON object, balanced', split_blocks(large), None, len(large)),
+    ]
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION)
+    print('')
+    print(f"{'':36} {'previous':>12} {'offset':>12} {'memoryview':>12} {'ms per MB':>22}")
+    for name, blocks, terminator, size in scenarios:
+        previous, frames_previous = measure(PreviousStream, blocks, terminator, repeat=1 if size < MB else 3)
+        current, frames_current = measure(Stream, blocks, terminator)
+        views, frames_views = measure(Stream, blocks, terminator, frame_views=True)
+        assert frames_previous == frames_current == frames_views
+        per_mb = MB / size * 1000
+        print(f"{name:36} {previous * 1000:9.1f} ms {current * 1000:9.1f} ms {views * 1000:9.1f} ms {previous * per_mb:9.1f} -> {current * per_mb:7.1f}")
+    print()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: CPU usage of the main loop of SmartHomeNG (lib.connection.Connections.poll())
+
+The main loop calls Connections.poll() while SmartHomeNG is running. The CPU time of a thread
+running this loop for some seconds is measured with the previous implementation of poll()
+(a short sleep, epoll.modify() for every connection, epoll wait with a timeout of 1 second,
+writes only handled together with reads) and with the blocking wait, where the write interest
+is only set while data is waiting in the outbuffer:
+
+1) no connections
+2) 20 idle connections
+3) one connection, that has to send 4 MB to a slow peer (the peer reads 256 kB every 100 ms)
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_connections_poll.py [seconds]
+"""
+
+import logging
+import os
+import select
+import socket
+import sys
+import threading
+import time
+
+from benchenv import quiet_logging
+
+import lib.connection
+from lib.connection import Connections, Stream
+
+VERSION = '1.0.0'
+
+
+class PreviousConnections(Connections):
+    """ Main loop polling of lib.connection.Connections before the blocking wait (epoll only) """
+
+    def poll(self):
+        time.sleep(0.0000000001)  # give epoll.modify a chance
+        if not self._connections:
+            time.sleep(1)
+            return
+        for fileno in self._connections:
+            if fileno not in self._servers:
+                try:
+                    self._epoll.modify(fileno, self._rw if self._connections[fileno].outbuffer else self._ro)
+                except OSError:
+                    pass
+        for fileno, event in self._epoll.poll(timeout=1):
+            if fileno == self._wakeup_in.fileno():
+                self._clear_wakeup()
+            elif fileno in self._connections and event & select.EPOLLIN:
+                con = self._connections[fileno]
+                con._in()
+                if event & select.EPOLLOUT:
+                    con._out()
+
+
+def run_main_loop(connections, seconds):
+    """ Run the main loop in a thread and return the CPU time used by the thread """
+    alive = True
+    result = {}
+
+    def main_loop():
+        start = time.thread_time()
+        while alive:
+            connections.poll()
+        result['cpu'] = time.thread_time() - start
+
+    thread = threading.Thread(target=main_loop)
+    thread.start()
+    time.sleep(seconds)
+    alive = False
+    connections.wakeup()
+    thread.join()
+    return result['cpu']
+
+
+def create_streams(number):
+    streams = []
+    for i in range(number):
+        stream = Stream()
+        stream.socket, stream.peer = socket.socketpair()
+        stream.socket.setblocking(False)
+        stream._connected()
+        streams.append(stream)
+    return streams
+
+
+def close_streams(connections, streams):
+    for stream in streams:
+        stream.close()
+        stream.peer.close()
+    connections._connections.clear()
+
+
+def measure(cls, scenario, seconds):
+    connections = cls()
+    streams = []
+    slow_peer = None
+    if scenario == 'idle':
+        streams = create_streams(20)
+    elif scenario == 'send':
+        streams = create_streams(1)
+        peer = streams[0].peer
+
+        def slow_reader():
+            while streams[0].connected:
+                try:
+                    peer.recv(256 * 1024, socket.MSG_DONTWAIT)
+                except (BlockingIOError, OSError):
+                    pass
+                time.sleep(0.1)
+
+        streams[0].send(b'x' * (4 * 1024 * 1024))
+        slow_peer = threading.Thread(target=slow_reader)
+        slow_peer.start()
+    cpu = run_main_loop(connections, seconds)
+    close_streams(connections, streams)
+    if slow_peer is not None:
+        slow_peer.join()
+    connections.close()
+    return cpu
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    quiet_logging()
+    logging.getLogger('lib.connection').setLevel(logging.ERROR)   # deprecation warnings
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION)
+    print('')
+    print(f"CPU time of the main loop in {seconds:.0f} seconds:")
+    print(f"{'':40} {'previous':>10} {'blocking':>10}")
+    for name, scenario in (('no connections', None), ('20 idle connections', 'idle'), ('4 MB to a slow peer', 'send')):
+        previous = measure(PreviousConnections, scenario, seconds)
+        current = measure(Connections, scenario, seconds)
+        print(f"{name:40} {previous * 1000:7.1f} ms {current * 1000:7.1f} ms")
+    print()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Reloading changed item definitions
+
+A synthetic items directory is created in a temporary directory and loaded. Then one room
+is changed, one room is added and one room is removed, and the item definitions are reloaded.
+The time of the reload is compared with the time of the initial load. (That the reloaded item
+tree is identical to a fresh load is checked by tests/test_item_reload.py.)
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_item_reload.py [number of rooms]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from benchenv import BenchSmartHome, quiet_logging
+
+VERSION = '1.0.0'
+
+
+def write_room(itemsdir, i, level_type='num'):
+    with open(os.path.join(itemsdir, f'room_{i:05}.yaml'), 'w') as f:
+        f.write(f"room{i}:\n    name: Room {i}\n")
+        for l in range(4):
+            f.write(f"    light{l}:\n        type: bool\n        visu_acl: rw\n")
+            f.write(f"        level:\n            type: {level_type}\n            eval_trigger: room{i}.light{l}\n")
+
+
+def load(itemsdir, envdir):
+    sh = BenchSmartHome()
+    sh._var_dir = tempfile.mkdtemp(prefix='shng_bench_')
+    os.makedirs(os.path.join(sh._var_dir, 'run'), exist_ok=True)
+    start = time.perf_counter()
+    sh.items.load_itemdefinitions(envdir, itemsdir, sh._etc_dir, '')
+    return sh, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    quiet_logging()
+    itemsdir = tempfile.mkdtemp(prefix='shng_bench_items_') + os.sep
+    envdir = tempfile.mkdtemp(prefix='shng_bench_env_') + os.sep
+    try:
+        for i in range(number):
+            write_room(itemsdir, i)
+        sh, load_time = load(itemsdir, envdir)
+        item_count = len(list(sh.items.return_items()))
+
+        write_room(itemsdir, 0, level_type='str')
+        write_room(itemsdir, number)
+        os.remove(os.path.join(itemsdir, f'room_{1:05}.yaml'))
+        start = time.perf_counter()
+        result = sh.items.reload_itemdefinitions()
+        reload_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(itemsdir)
+        shutil.rmtree(envdir)
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} rooms, {item_count} items')
+    print('')
+    print(f"initial load        : {load_time:7.3f} sec")
+    print(f"reload              : {reload_time:7.3f} sec  ({load_time / reload_time:5.1f} x faster)")
+    print(f"changes             : {len(result['created'])} created, {len(result['replaced'])} replaced, {len(result['removed'])} removed")
+    print()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Cost of an item update for plain num/bool/str items and for items using features
+that need the full update routine (threshold, autotimer)
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_item_update.py [number of updates]
+"""
+
+import os
+import sys
+
+from benchenv import BenchSmartHome, measure, quiet_logging
+
+VERSION = '1.0.0'
+
+
+ITEMS = {
+    'bench': {
+        'num': {'type': 'num'},
+        'bool': {'type': 'bool'},
+        'str': {'type': 'str'},
+        'threshold': {'type': 'num', 'threshold': '10:20'},
+        'autotimer': {'type': 'num', 'autotimer': '10 = 0'},
+    }
+}
+
+UPDATES = {
+    'num': lambda i: i,
+    'bool': lambda i: i % 2 == 0,
+    'str': lambda i: str(i),
+    'threshold': lambda i: i,
+    'autotimer': lambda i: i,
+}
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    quiet_logging()
+    sh = BenchSmartHome()
+    sh.add_items(ITEMS)
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} updates per item')
+    print('')
+    for name, value in UPDATES.items():
+        item = sh.items.return_item('bench.' + name)
+        # best of 5 runs, to reduce the influence of other load on the system
+        changed = min(measure(lambda i: item(value(i), caller='Bench'), number) for _ in range(5))
+        unchanged = min(measure(lambda i: item(value(0), caller='Bench'), number) for _ in range(5))
+        routine = getattr(getattr(item, '_update_routine', None), '__name__', 'update').replace('_Item__', '')
+        print(f"item bench.{name:<10}: {changed:7.2f} µs/change  {unchanged:7.2f} µs/update without change  ({routine})")
+    print()
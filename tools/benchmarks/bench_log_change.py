@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Cost of an item update for items with and without the attribute log_change
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_log_change.py [number of updates]
+"""
+
+import os
+import sys
+import logging
+
+from benchenv import BenchSmartHome, measure, quiet_logging
+
+from lib.item.logchange import stop_log_change_writer
+
+VERSION = '1.0.0'
+
+
+ITEMS = {
+    'bench': {
+        'plain': {'type': 'num'},
+        'log': {'type': 'num', 'log_change': 'bench'},
+        'log_rules': {'type': 'num', 'log_change': 'bench',
+                      'log_rules': [{'lowlimit': -1000}, {'highlimit': 1000000}, {'exclude': [7, 8, 9]}]},
+        'log_rules_text': {'type': 'num', 'log_change': 'bench', 'log_text': '{id} = {mvalue} (was {lvalue}) by {caller}',
+                           'log_rules': [{'lowlimit': -1000}, {'highlimit': 1000000}, {'exclude': [7, 8, 9]}]},
+        'log_filtered': {'type': 'num', 'log_change': 'bench', 'log_rules': [{'lowlimit': 10000000}]},
+    }
+}
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    quiet_logging()
+    sh = BenchSmartHome()
+
+    # log_change entries are written to a file, like with a typical logging.yaml configuration
+    handler = logging.FileHandler(os.path.join(sh.get_vardir(), 'bench_log_change.log'))
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-8s %(name)-19s %(message)s'))
+    bench_logger = logging.getLogger('items.bench')
+    bench_logger.addHandler(handler)
+    bench_logger.propagate = False
+
+    sh.add_items(ITEMS)
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} updates per item')
+    print('')
+    results = {}
+    for name in ('plain', 'log', 'log_rules', 'log_rules_text', 'log_filtered'):
+        item = sh.items.return_item('bench.' + name)
+        results[name] = measure(lambda i: item(i, caller='Bench'), number)
+    stop_log_change_writer()
+    handler.close()
+
+    base = results['plain']
+    for name, usec in results.items():
+        print(f"item bench.{name:<16}: {usec:8.2f} µs/update  ({usec / base:5.2f} x plain item)")
+    print()
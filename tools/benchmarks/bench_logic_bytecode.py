@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Loading the compiled code of logics with and without the bytecode cache
+
+The given number of logic files (with a few hundred lines each) are created in a temporary
+directory and loaded three times: without cache, filling the cache and from the cache. The
+code loaded from the cache has to be identical to the compiled code.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_logic_bytecode.py [number of logics]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from benchenv import quiet_logging
+
+from lib.logic import load_logic_bytecode, get_bytecode_cache_statistics
+
+VERSION = '1.0.0'
+
+
+def create_logics(logicsdir, number):
+    pathnames = []
+    for i in range(number):
+        pathname = os.path.join(logicsdir, f'logic_{i:03}.py')
+        with open(pathname, 'w') as f:
+            f.write(f"# logic {i}\n")
+            for n in range(40):
+                f.write(f"def function_{n}(value, factor={n}):\n")
+                f.write(f"    result = [v * factor for v in range(value) if v % {n + 2}]\n")
+                f.write(f"    if sum(result) > {n * 100}:\n        logger.info(f'function_{n}: {{result}}')\n")
+                f.write(f"    return {{'value': value, 'result': result}}\n\n")
+            f.write("function_1(trigger['value'])\n")
+        pathnames.append(pathname)
+    return pathnames
+
+
+def load(pathnames, vardir):
+    start = time.perf_counter()
+    codes = [load_logic_bytecode(pathname, vardir) for pathname in pathnames]
+    return time.perf_counter() - start, codes
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    quiet_logging()
+    tmpdir = tempfile.mkdtemp(prefix='shng_bench_logics_')
+    try:
+        pathnames = create_logics(tmpdir, number)
+        vardir = os.path.join(tmpdir, 'var')
+        compile_time, compiled = load(pathnames, None)
+        fill_time, filled = load(pathnames, vardir)
+        cached_time, cached = load(pathnames, vardir)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} logics')
+    print('')
+    print(f"compile (no cache)  : {compile_time * 1000:8.1f} ms")
+    print(f"compile, fill cache : {fill_time * 1000:8.1f} ms")
+    print(f"from cache          : {cached_time * 1000:8.1f} ms  ({compile_time / cached_time:5.1f} x faster)")
+    print(f"cache statistics    : {get_bytecode_cache_statistics()}")
+    print(f"identical code      : {compiled == cached}")
+    print()
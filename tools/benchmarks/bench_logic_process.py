@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Latency of item updates and evals while a CPU-heavy logic runs
+
+Every 2 milliseconds an item is updated and an eval expression is evaluated in the main
+thread, like a worker thread does it for an eval trigger. The latency (from the time the
+update is due until it is done, including the wait for the GIL) is measured
+
+1. while no logic runs
+2. while a CPU-heavy logic runs in a thread (like a normal logic)
+3. while the same logic runs in a worker process (logic attribute 'run_in_process')
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_logic_process.py [seconds per measurement]
+"""
+
+import os
+import sys
+import time
+import threading
+import types
+import logging
+
+from benchenv import BenchSmartHome, quiet_logging
+
+import lib.logicprocess
+
+VERSION = '1.0.0'
+
+ITEMS = {'bench': {'input': {'type': 'num'}, 'result': {'type': 'num'}}}
+
+LOGIC_CODE = """
+total = 0
+for i in range(2000000):
+    total += i * i % 7
+sh.bench.result(total)
+"""
+
+
+def measure_latency(sh, seconds):
+    item = sh.items.return_item('bench.input')
+    expression = compile("sh.bench.input() * 2 + 1", 'eval', 'eval')
+    latencies = []
+    end = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < end:
+        # the update is due, when the sleep ends - the latency includes the wait for the GIL
+        due = time.perf_counter() + 0.002
+        time.sleep(0.002)
+        item(i, caller='Bench')
+        eval(expression, {'sh': sh})
+        latencies.append(time.perf_counter() - due)
+        i += 1
+    latencies.sort()
+    return latencies
+
+
+def run_logic_loop(run, stop):
+    runs = 0
+    while not stop.is_set():
+        run()
+        runs += 1
+    return runs
+
+
+def measure(sh, seconds, run=None):
+    stop = threading.Event()
+    thread = None
+    if run is not None:
+        thread = threading.Thread(target=run_logic_loop, args=(run, stop))
+        thread.start()
+        time.sleep(0.2)
+    latencies = measure_latency(sh, seconds)
+    stop.set()
+    if thread is not None:
+        thread.join()
+    return latencies
+
+
+def report(name, latencies):
+    median = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{name:22}: median {median:7.3f} ms   p99 {p99:7.3f} ms   max {latencies[-1] * 1000:7.3f} ms   ({len(latencies)} updates)")
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    quiet_logging()
+    sh = BenchSmartHome()
+    sh.add_items(ITEMS)
+    sh.bench = sh.items.return_item('bench')
+
+    code = compile(LOGIC_CODE, 'bench_logic.py', 'exec')
+    logic = types.SimpleNamespace(name='bench_logic', _bytecode=code)
+    logic_globals = {'sh': sh, 'items': sh.items, 'logger': logging.getLogger('logics.bench_logic'),
+                     'trigger': {'value': None}, 'LeaveLogic': Exception}
+    lib.logicprocess.get_process_pool()
+
+    try:
+        idle = measure(sh, seconds)
+        in_thread = measure(sh, seconds, lambda: exec(code, dict(logic_globals)))
+        in_process = measure(sh, seconds, lambda: lib.logicprocess.execute_logic(logic, logic_globals))
+    finally:
+        lib.logicprocess.shutdown_process_pool()
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {seconds} sec per measurement, {os.cpu_count()} CPUs')
+    print('')
+    report('no logic running', idle)
+    report('logic in thread', in_thread)
+    report('logic in process', in_process)
+    print()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Overhead of the scheduler for the execution of a trivial logic
+
+A logic, that only reads the trigger dict, is executed by the scheduler like it is done for
+a logic triggered by an item (without the queueing of the task). The logic is executed
+without and with recording of the execution statistics.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_logic_run.py [number of runs]
+"""
+
+import os
+import sys
+
+from benchenv import BenchSmartHome, measure, quiet_logging
+
+import lib.scheduler
+from lib.scheduler import Scheduler
+from lib.logicstatistics import LogicStatistics
+
+VERSION = '1.0.0'
+
+LOGIC_CODE = "value = trigger['value']\n"
+
+
+class BenchLogic:
+    """ Minimal logic object, as used by Scheduler._execute_logic_task() """
+
+    name = 'bench_logic'
+    _enabled = True
+    _logics = None
+
+    def __init__(self, statistics=None):
+        self._bytecode = compile(LOGIC_CODE, 'bench_logic.py', 'exec')
+        self._statistics = statistics
+        self.runs = 0
+
+    def set_last_run(self):
+        self.runs += 1
+
+    def get_method_triggers(self):
+        return []
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    quiet_logging()
+    sh = BenchSmartHome()
+    lib.scheduler._lib_modules_found = False
+    scheduler = Scheduler(sh)
+    logic = BenchLogic()
+    logic_stats = BenchLogic(LogicStatistics())
+
+    def run(i):
+        scheduler._execute_logic_task(logic, 'Item', 'bench.item', None, i)
+
+    def run_stats(i):
+        scheduler._execute_logic_task(logic_stats, 'Item', 'bench.item', None, i, wait=0.001)
+
+    # best of 5 runs, to reduce the influence of other load on the system
+    per_run = min(measure(run, number) for _ in range(5))
+    per_run_stats = min(measure(run_stats, number) for _ in range(5))
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} runs')
+    print('')
+    print(f"trivial logic       : {per_run:7.2f} µs/run  ({logic.runs} runs)")
+    print(f"  with statistics   : {per_run_stats:7.2f} µs/run  ({logic_stats._statistics.get_statistics()['runs']} runs recorded)")
+    print()
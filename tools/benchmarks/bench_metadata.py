@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Reading metadata files and checking item attributes
+
+1. The metadata files of the modules are read without cache (parsed with lib.shyaml) and
+   from the metadata cache. The data has to be identical.
+2. The given number of items with the same attributes (like items created from a struct)
+   are checked against the attribute definitions, like Item.__init__() does it.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_metadata.py [number of items]
+"""
+
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import time
+import types
+
+from benchenv import BASE, measure, quiet_logging
+
+import lib.shyaml as shyaml
+import lib.metadata
+from lib.metadata import Metadata, MetadataCache
+
+VERSION = '1.0.0'
+
+ATTRIBUTES = {'knx_dpt': '1', 'knx_send': '1/1/1', 'visu_acl': 'rw', 'bench_level': '50', 'bench_mode': 'Auto'}
+
+
+def read_files(filenames, cache):
+    result = []
+    for filename in filenames:
+        data = cache.get(filename)
+        if data is None:
+            signature = lib.metadata._file_signature(filename)
+            start = time.perf_counter()
+            data = shyaml.yaml_load(filename, ordered=True)
+            cache.put(filename, signature, data, time.perf_counter() - start)
+        result.append(data)
+    return result
+
+
+def check_items(number):
+    meta = Metadata.__new__(Metadata)
+    meta._log_premsg = ''
+    items = [types.SimpleNamespace(property=types.SimpleNamespace(path=f'room{i}.light')) for i in range(number)]
+
+    def check(i):
+        for attr, value in ATTRIBUTES.items():
+            meta.check_itemattribute(items[i], attr, value)
+
+    return measure(check, number)
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    quiet_logging()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        filenames = sorted(glob.glob(os.path.join(BASE, 'modules', '*', 'module.yaml')))
+        cachefile = os.path.join(tmp, 'metadata.cache')
+        cache = MetadataCache(cachefile, 'bench')
+        start = time.perf_counter()
+        parsed = read_files(filenames, cache)
+        parse_time = time.perf_counter() - start
+        cache.save()
+        cache = MetadataCache(cachefile, 'bench')
+        start = time.perf_counter()
+        cached = read_files(filenames, cache)
+        cache_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmp)
+
+    lib.metadata.all_itemdefinitions.update({
+        'knx_dpt': {'type': 'str', 'listtype': ['foo'], 'listlen': 0, '_name': 'knx_dpt', '_type': 'attribute'},
+        'knx_send': {'type': 'knx_ga', 'listtype': ['foo'], 'listlen': 0, '_name': 'knx_send', '_type': 'attribute'},
+        'visu_acl': {'type': 'str', 'valid_list': ['ro', 'rw', 'no'], 'listtype': ['foo'], 'listlen': 0, '_name': 'visu_acl', '_type': 'attribute'},
+        'bench_level': {'type': 'int', 'valid_min': 0, 'valid_max': 100, 'listtype': ['foo'], 'listlen': 0, '_name': 'bench_level', '_type': 'attribute'},
+        'bench_mode': {'type': 'str', 'valid_list_ci': ['auto', 'manual'], 'listtype': ['foo'], 'listlen': 0, '_name': 'bench_mode', '_type': 'attribute'},
+        })
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {len(filenames)} metadata files, {number} items')
+    print('')
+    print(f"metadata files parsed    : {parse_time * 1000:8.2f} ms")
+    print(f"metadata files from cache: {cache_time * 1000:8.2f} ms  ({parse_time / cache_time:5.1f} x faster)")
+    print(f"identical data           : {repr(parsed) == repr(cached)}")
+    # without memo: no result is immutable, so no result is kept
+    lib.metadata._IMMUTABLE_TYPES, immutable = (), lib.metadata._IMMUTABLE_TYPES
+    uncached = check_items(number)
+    lib.metadata._IMMUTABLE_TYPES = immutable
+    memoized = check_items(number)
+    print(f"attribute checks per item: {uncached:8.2f} µs without memo, {memoized:8.2f} µs memoized ({uncached / memoized:5.1f} x faster)")
+    print(f"statistics               : {lib.metadata.get_attribute_check_statistics()}")
+    print()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Parsing an items directory serially and with a pool of processes
+
+A synthetic items directory is created in a temporary directory. The item tree
+that results from the parallel parsing has to be identical to the serial result.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_parse_items.py [number of files] [number of processes]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import collections
+
+from benchenv import quiet_logging
+
+import lib.config
+
+VERSION = '1.0.0'
+
+
+STRUCTS = {
+    'bench.light': collections.OrderedDict(
+        type='bool', visu_acl='rw',
+        level=collections.OrderedDict(type='num', visu_acl='rw', knx_dpt='5')),
+}
+
+
+def create_itemsdir(number):
+    itemsdir = tempfile.mkdtemp(prefix='shng_bench_items_') + os.sep
+    for i in range(number):
+        with open(os.path.join(itemsdir, f'items_{i:04}.yaml'), 'w') as f:
+            for r in range(3):
+                f.write(f"room{i}_{r}:\n    name: Room {r} in file {i}\n")
+                for l in range(4):
+                    f.write(f"    light{l}:\n        type: bool\n        visu_acl: rw\n        knx_dpt: 1\n        knx_send: 1/{r}/{l}\n")
+                    f.write(f"        knx_listen:\n          - 1/{r}/{l + 10}\n          - 1/{r}/{l + 20}\n")
+                f.write(f"    ceiling:\n        struct: bench.light\n")
+                # same item in every file, to test the merge order
+                f.write(f"common:\n    last_file: {i}\n    room{i}_{r}:\n        type: num\n")
+    return itemsdir
+
+
+def parse(itemsdir, processes):
+    start = time.perf_counter()
+    item_conf = lib.config.parse_itemsdir(itemsdir, None, addfilenames=True, struct_dict=STRUCTS, processes=processes)
+    return time.perf_counter() - start, item_conf
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    quiet_logging()
+    itemsdir = create_itemsdir(number)
+    try:
+        serial_time, serial_conf = parse(itemsdir, 1)
+        parallel_time, parallel_conf = parse(itemsdir, processes)
+    finally:
+        shutil.rmtree(itemsdir)
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} files, {os.cpu_count()} CPUs')
+    print('')
+    print(f"serial              : {serial_time:7.2f} sec")
+    print(f"parallel ({processes:2} proc.) : {parallel_time:7.2f} sec  ({serial_time / parallel_time:4.2f} x faster)")
+    print(f"identical item tree : {serial_conf == parallel_conf and list(serial_conf) == list(parallel_conf)}")
+    print()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Sequential and parallel initialization of plugins
+
+The given number of plugins is created in a temporary directory. Every plugin simulates
+a connection to a device by sleeping in __init__ (default 0.1 sec). Every 10th plugin
+depends on the first plugin, two plugins have the startorder 'early' and one plugin
+raises an exception. lib.plugin.Plugins loads the plugins sequentially and in
+parallel mode.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_plugin_init.py [number of plugins] [latency] [workers]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from benchenv import BenchSmartHome, quiet_logging
+
+import lib.plugin
+
+VERSION = '1.0.0'
+
+
+PLUGIN_CODE = """
+import time
+
+class BenchPlugin:
+
+    def __init__(self, smarthome, latency='0.1', fail='False'):
+        # simulated connection to a device (classic plugins get the parameters as quoted strings)
+        time.sleep(float(latency.strip("'")))
+        if fail.strip("'") == 'True':
+            raise ConnectionError('device not reachable')
+"""
+
+PLUGIN_META = """
+plugin:
+    type: interface
+    description:
+        de: 'Benchmark Plugin'
+        en: 'Benchmark plugin'
+    version: 1.0.0
+    classname: BenchPlugin
+    startorder: {startorder}
+    depends_on: {depends_on}
+
+parameters:
+    latency:
+        type: num
+        default: 0.1
+    fail:
+        type: bool
+        default: False
+"""
+
+
+def create_plugins(base_dir, number, latency):
+    package = 'benchplugins' + str(os.getpid())
+    os.makedirs(os.path.join(base_dir, package))
+    open(os.path.join(base_dir, package, '__init__.py'), 'w').close()
+    with open(os.path.join(base_dir, 'plugin.yaml'), 'w') as conf:
+        for i in range(number):
+            name = f'bench{i:02}'
+            plugin_dir = os.path.join(base_dir, package, name)
+            os.makedirs(plugin_dir)
+            with open(os.path.join(plugin_dir, '__init__.py'), 'w') as f:
+                f.write(PLUGIN_CODE)
+            startorder = 'early' if i in (1, 2) else 'normal'
+            depends_on = "[bench00]" if i % 10 == 5 else "[]"
+            with open(os.path.join(plugin_dir, 'plugin.yaml'), 'w') as f:
+                f.write(PLUGIN_META.format(startorder=startorder, depends_on=depends_on))
+            conf.write(f"{name}:\n    class_path: {package}.{name}\n    latency: {latency}\n")
+            if i == 3:
+                conf.write("    fail: True\n")
+    return os.path.join(base_dir, 'plugin')
+
+
+def load(sh, configfile, parallel, workers):
+    sh._plugins_parallel_init = parallel
+    sh._plugins_parallel_workers = workers
+    lib.plugin._plugins_instance = None
+    lib.plugin.Plugins._plugins = []
+    lib.plugin.Plugins._plugindict = {}
+    lib.plugin.Plugins._threads = []
+    start = time.perf_counter()
+    plugins = lib.plugin.Plugins(sh, configfile)
+    return time.perf_counter() - start, [thread.name for thread in plugins._threads]
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    quiet_logging()
+    tmp = tempfile.mkdtemp(prefix='shng_bench_plugins_')
+    try:
+        configfile = create_plugins(tmp, number, latency)
+        sys.path.insert(0, tmp)
+        sh = BenchSmartHome()
+        sh._base_dir = tmp
+        sh.get_basedir = lambda: tmp
+        sh.version = sh.plugins_version = 'bench'
+        sh.shng_status = {'code': 12, 'text': 'Starting: Initializing plugins'}
+
+        serial_time, serial_threads = load(sh, configfile, False, workers)
+        parallel_time, parallel_threads = load(sh, configfile, True, workers)
+    finally:
+        shutil.rmtree(tmp)
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} plugins, {latency} sec latency, {workers} workers')
+    print('')
+    print(f"sequential         : {serial_time:7.2f} sec  ({len(serial_threads)} plugins loaded)")
+    print(f"parallel           : {parallel_time:7.2f} sec  ({len(parallel_threads)} plugins loaded, {serial_time / parallel_time:4.1f} x faster)")
+    print(f"same plugins       : {sorted(serial_threads) == sorted(parallel_threads)}")
+    print(f"dependencies first : {all(parallel_threads.index('bench00') < parallel_threads.index(name) for name in parallel_threads if name.endswith('5'))}")
+    print()
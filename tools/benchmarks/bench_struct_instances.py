@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Loading item definitions with many instances of a deep struct
+
+A struct definition file with nested structs (4 levels) and an items directory with
+the given number of items referencing the top level struct are created in a
+temporary directory. The struct definitions are resolved and the items directory
+is parsed, like Items.load_itemdefinitions() does it.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_struct_instances.py [number of instances]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from benchenv import BenchSmartHome, quiet_logging
+
+import lib.config
+
+VERSION = '1.0.0'
+
+
+STRUCTS = """
+base:
+    visu_acl: ro
+    enforce_updates: true
+    database@instance: init
+    last_change:
+        type: num
+        eval: sh..last_change_age()
+
+value:
+    struct: .base
+    type: num
+    cache: true
+    knx_dpt: 9
+    limits:
+        struct: .base
+        min:
+            type: num
+            initial_value: 0
+        max:
+            type: num
+            initial_value: 100
+
+channel:
+    name: Channel
+    state:
+        struct: .value
+        type: bool
+    level:
+        struct: .value
+    temperature:
+        struct: .value
+        log_change: temperatures
+
+device:
+    struct:
+      - .base
+    online:
+        type: bool
+    channel1:
+        struct: .channel
+    channel2:
+        struct: .channel
+    channel3:
+        struct: .channel
+"""
+
+
+def create_config(number):
+    tmp = tempfile.mkdtemp(prefix='shng_bench_structs_')
+    os.makedirs(os.path.join(tmp, 'structs'))
+    os.makedirs(os.path.join(tmp, 'items'))
+    with open(os.path.join(tmp, 'structs', 'bench.yaml'), 'w') as f:
+        f.write(STRUCTS)
+    with open(os.path.join(tmp, 'items', 'devices.yaml'), 'w') as f:
+        for i in range(number):
+            f.write(f"device{i:04}:\n    struct: my.bench.device@inst{i % 3}\n    name: Device {i}\n")
+    return tmp
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    quiet_logging()
+    tmp = create_config(number)
+    try:
+        sh = BenchSmartHome()
+        sh._etc_dir = tmp
+        sh._structs_dir = os.path.join(tmp, 'structs')
+        structs = sh.items.structs
+        structs.structs_dir = sh._structs_dir
+
+        start = time.perf_counter()
+        structs.load_struct_definitions()
+        resolve_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        item_conf = lib.config.parse_itemsdir(os.path.join(tmp, 'items') + os.sep, None, addfilenames=True,
+                                              struct_dict=structs._struct_definitions, processes=1)
+        parse_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(tmp)
+
+    item_count = 0
+    nodes = list(item_conf.values())
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, dict):
+            item_count += 1
+            nodes.extend(node.values())
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} struct instances, {item_count} items')
+    print('')
+    print(f"resolve struct definitions : {resolve_time * 1000:8.1f} ms")
+    print(f"parse items directory      : {parse_time * 1000:8.1f} ms  ({parse_time / number * 1000000:6.0f} µs per instance)")
+    print()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Memory used by an item tree, that consists of many struct instances
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_struct_memory.py [number of struct instances]
+"""
+
+import os
+import sys
+import collections
+import tracemalloc
+
+from benchenv import BenchSmartHome, quiet_logging
+
+import lib.config
+
+VERSION = '1.0.0'
+
+
+def odict(**kwargs):
+    return collections.OrderedDict(**kwargs)
+
+
+STRUCTS = {
+    'bench.light': odict(
+        type='bool', visu_acl='rw', enforce_updates='true',
+        dimmer=odict(type='num', visu_acl='rw', dpt='5.001', status_cycle='300',
+                     min=odict(type='num', visu_acl='ro', dpt='5.001'),
+                     max=odict(type='num', visu_acl='ro', dpt='5.001')),
+        status=odict(type='bool', visu_acl='ro', dpt='1', status_cycle='300'),
+    ),
+    'bench.shutter': odict(
+        type='num', visu_acl='rw', dpt='5.001',
+        move=odict(type='bool', visu_acl='rw', dpt='1', enforce_updates='true'),
+        stop=odict(type='bool', visu_acl='rw', dpt='1', enforce_updates='true'),
+        position=odict(type='num', visu_acl='ro', dpt='5.001', status_cycle='300'),
+    ),
+}
+
+
+def build_config(number):
+    """
+    Build an item tree with number instances of each struct, like lib.config.parse_yaml() does
+    """
+    items = odict()
+    for i in range(number):
+        items[f'room{i}'] = odict(light=odict(struct='bench.light'), shutter=odict(struct='bench.shutter'))
+    config = odict()
+    lib.config.search_for_struct_in_items(items, STRUCTS, config, 'bench_struct_memory.yaml')
+    return config
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    quiet_logging()
+    sh = BenchSmartHome()
+    config = build_config(number)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    sh.add_items(config)
+    del config
+    after = tracemalloc.take_snapshot()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    tracemalloc.stop()
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} instances of {len(STRUCTS)} structs')
+    print('')
+    print(f"items: {sh.items.item_count()}, allocated by item tree: {allocated / 1024:.0f} KiB  ({allocated / sh.items.item_count():.0f} bytes/item)")
+    if hasattr(sh.items, 'get_memory_report'):
+        report = sh.items.get_memory_report()
+        print(f"memory report: {report['bytes'] / 1024:.0f} KiB, {report['shared_conf']} items share their attribute dict, {report['conf_templates']}")
+        for struct_name, entry in report['structs'].items():
+            print(f"  struct {struct_name or '(none)':<15}: {entry['items']:6} items  {entry['bytes'] / 1024:8.0f} KiB  {entry['shared_conf']:6} shared")
+    print()
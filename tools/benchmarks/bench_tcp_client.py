@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Threads and receive buffer handling of lib.network.Tcp_client
+
+1) Number of threads for 30 connected clients, with a receive thread per connection and
+   with the shared reactor thread.
+2) Splitting received blocks of 4096 bytes into lines, with the previous implementation
+   (bytes buffer, that is searched from the start and copied for every line) and with the
+   bytearray buffer and incremental terminator search: short lines and a 1 MB message, that
+   arrives in 256 blocks.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_tcp_client.py [number of clients]
+"""
+
+import os
+import socket
+import sys
+import threading
+import time
+
+from benchenv import quiet_logging
+
+from lib.network import Tcp_client, Tcp_reactor
+
+VERSION = '1.0.0'
+
+BLOCK_SIZE = 4096
+
+
+def previous_split(client, buffer, msg):
+    """ Receive buffer handling of Tcp_client before the bytearray buffer """
+    buffer += msg
+    while True:
+        i = buffer.find(client.terminator)
+        if i == -1:
+            break
+        i += len(client.terminator)
+        line = buffer[:i]
+        buffer = buffer[i:]
+        client._data_received_callback(client, line)
+    return buffer
+
+
+def split_blocks(data):
+    return [data[i:i + BLOCK_SIZE] for i in range(0, len(data), BLOCK_SIZE)]
+
+
+def measure_split(client, blocks, repeat=5):
+    best_previous = best_current = None
+    for _ in range(repeat):
+        buffer = b''
+        start = time.perf_counter()
+        for block in blocks:
+            buffer = previous_split(client, buffer, block)
+        duration = time.perf_counter() - start
+        best_previous = duration if best_previous is None else min(best_previous, duration)
+
+        client._reset_receive_buffer()
+        start = time.perf_counter()
+        for block in blocks:
+            client._process_received(block)
+        duration = time.perf_counter() - start
+        best_current = duration if best_current is None else min(best_current, duration)
+    return best_previous, best_current
+
+
+def count_client_threads(number, shared_reactor):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(number)
+    port = server.getsockname()[1]
+    threads = threading.active_count()
+    clients = []
+    connections = []
+    for i in range(number):
+        client = Tcp_client('127.0.0.1', port, name=f'bench{i}', terminator=b'\n', autoreconnect=False, shared_reactor=shared_reactor)
+        client.connect()
+        connections.append(server.accept()[0])
+        clients.append(client)
+    while not all(client._is_receiving for client in clients):
+        time.sleep(0.01)
+    # the connect threads end after the connection has been established
+    time.sleep(0.5)
+    result = threading.active_count() - threads
+    for client in clients:
+        client.close()
+    for connection in connections:
+        connection.close()
+    server.close()
+    return result
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    quiet_logging()
+    Tcp_reactor.get_instance()
+
+    threads_per_connection = count_client_threads(number, False)
+    threads_reactor = count_client_threads(number, True)
+
+    client = Tcp_client('127.0.0.1', 1, name='bench', terminator=b'\r\n', binary=True, autoreconnect=False)
+    client.set_callbacks(data_received=lambda c, line: None)
+    lines = split_blocks(b''.join(b'item.value.%06d = %d\r\n' % (i, i) for i in range(50000)))
+    message = split_blocks(b'x' * (1024 * 1024) + b'\r\n')
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION)
+    print('')
+    print(f"threads for {number} clients:  receive thread per connection: {threads_per_connection}, shared reactor: {threads_reactor} (plus the reactor thread)")
+    print('')
+    print(f"{'':28} {'previous':>10} {'bytearray':>10}")
+    for name, blocks in (('50000 short lines', lines), ('1 MB message in 256 blocks', message)):
+        previous, current = measure_split(client, blocks)
+        print(f"{name:28} {previous * 1000:7.1f} ms {current * 1000:7.1f} ms")
+    print()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Sending with lib.network.Tcp_client, directly and through the send queue
+
+1) Many short messages to a peer, that reads continuously: time until all messages have been
+   received and number of send system calls. Without send queue every message is sent with one
+   system call in the calling thread, with send queue the messages queued while the socket is busy
+   are written together with one vectored send by the shared reactor thread.
+2) A peer, that does not read for 2 seconds: longest time a call of send() blocks the calling
+   thread and number of bytes received by the peer.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_tcp_send.py [number of messages]
+"""
+
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+from benchenv import quiet_logging
+
+from lib.network import Tcp_client, Tcp_reactor
+
+VERSION = '1.0.0'
+
+
+def connect(send_queue, server, **kwargs):
+    client = Tcp_client('127.0.0.1', server.getsockname()[1], name='bench', autoreconnect=False, send_queue=send_queue, **kwargs)
+    client.connect()
+    peer = server.accept()[0]
+    while not client._is_receiving:
+        time.sleep(0.01)
+    return client, peer
+
+
+def read_all(peer, size, delay, result):
+    time.sleep(delay)
+    received = 0
+    peer.settimeout(5)
+    try:
+        while received < size:
+            data = peer.recv(1024 * 1024)
+            if not data:
+                break
+            received += len(data)
+    except OSError:
+        pass
+    result.append(received)
+
+
+def count_send_calls(client):
+    """ Count the system calls used for sending """
+    calls = [0]
+    if client._send_queue_enabled:
+        reactor_send = client._reactor_send
+
+        def counting_send(sock):
+            calls[0] += 1
+            return reactor_send(sock)
+        client._reactor_send = counting_send
+    else:
+        sock_send = client._socket.send
+
+        class CountingSocket():
+            def __init__(self, sock):
+                self.__sock = sock
+
+            def send(self, data):
+                calls[0] += 1
+                return sock_send(data)
+
+            def __getattr__(self, name):
+                return getattr(self.__sock, name)
+        client._socket = CountingSocket(client._socket)
+    return calls
+
+
+def measure_short_messages(send_queue, server, number):
+    client, peer = connect(send_queue, server)
+    calls = count_send_calls(client)
+    messages = [b'item.value.%06d = %d\r\n' % (i, i) for i in range(number)]
+    size = sum(len(message) for message in messages)
+    result = []
+    reader = threading.Thread(target=read_all, args=(peer, size, 0, result))
+    reader.start()
+    start = time.perf_counter()
+    for message in messages:
+        client.send(message)
+    reader.join()
+    duration = time.perf_counter() - start
+    client.close()
+    peer.close()
+    return duration, calls[0], result[0] == size
+
+
+def measure_slow_peer(send_queue, server):
+    client, peer = connect(send_queue, server, send_queue_limit=64 * 1024 * 1024)
+    message = b'x' * 65536
+    number = 256
+    result = []
+    reader = threading.Thread(target=read_all, args=(peer, number * len(message), 2, result))
+    reader.start()
+    longest = 0
+    for i in range(number):
+        start = time.perf_counter()
+        client.send(message)
+        longest = max(longest, time.perf_counter() - start)
+    reader.join()
+    # closing the peer first ends the receive thread of a client, that has been disconnected by a send timeout
+    peer.close()
+    client.close()
+    return longest, result[0], number * len(message)
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    quiet_logging()
+    # the direct send logs the messages, that cannot be sent
+    logging.getLogger('lib.network').setLevel(logging.CRITICAL)
+    Tcp_reactor.get_instance()
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(5)
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION)
+    print('')
+    print(f"{number} short messages:")
+    for name, send_queue in (('direct send', False), ('send queue', True)):
+        duration, calls, complete = measure_short_messages(send_queue, server, number)
+        print(f"  {name:12} {duration * 1000:8.1f} ms, {calls:6} send calls{'' if complete else ', INCOMPLETE'}")
+    print('')
+    print("16 MB in messages of 64 kB, peer starts reading after 2 seconds:")
+    for name, send_queue in (('direct send', False), ('send queue', True)):
+        longest, received, size = measure_slow_peer(send_queue, server)
+        print(f"  {name:12} longest send() call {longest * 1000:8.1f} ms, received {received / 1024 / 1024:5.1f} of {size / 1024 / 1024:.0f} MB")
+    print('')
+    server.close()
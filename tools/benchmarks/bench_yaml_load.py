@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Benchmark: Loading yaml data with the available backends of lib.shyaml
+
+An item definition with the given number of rooms is loaded (ordered, like item files)
+by each backend. The loaded data has to be identical for all backends.
+
+Usage (from the base directory of SmartHomeNG):
+
+    python3 tools/benchmarks/bench_yaml_load.py [number of rooms]
+"""
+
+import os
+import sys
+import time
+
+from benchenv import quiet_logging
+
+import lib.shyaml as shyaml
+
+VERSION = '1.0.0'
+
+
+def create_yaml(number):
+    lines = []
+    for r in range(number):
+        lines.append(f"room{r}:\n    name: Room {r}\n")
+        for l in range(4):
+            lines.append(f"    light{l}:\n        type: bool\n        visu_acl: rw\n        knx_dpt: 1\n        knx_send: 1/{r}/{l}\n")
+            lines.append(f"        knx_listen:\n          - 1/{r}/{l + 10}\n          - 1/{r}/{l + 20}\n")
+            lines.append(f"        level:\n            type: num\n            cache: yes\n            enforce_updates: true\n")
+            lines.append(f"            eval: round(value * 2.55, 1)\n            autotimer: 10m = 0\n")
+    return ''.join(lines)
+
+
+def load(data, backend):
+    shyaml.set_load_backend(backend)
+    start = time.perf_counter()
+    result = shyaml.yaml_load_fromstring(data, ordered=True)
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    quiet_logging()
+    data = create_yaml(number)
+
+    print('')
+    print(os.path.basename(__file__) + ' v' + VERSION + f' - {number} rooms, {len(data) // 1024} KB')
+    print('')
+    results = {}
+    for backend in shyaml.get_load_backends():
+        duration, results[backend] = load(data, backend)
+        results[backend] = (duration, results[backend])
+        print(f"{backend:8}: {duration:7.3f} sec  ({results['ruamel'][0] / duration:5.2f} x ruamel)")
+    print(f"identical data : {len(set(repr(r) for d, r in results.values())) == 1}")
+    print()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#  https://github.com/smarthomeNG/smarthome
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG. If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+Minimal SmartHomeNG environment for the benchmarks in this directory
+
+The environment creates the core objects (shtime, items) without loading plugins, modules or
+a configuration, so that core functions can be measured without a running SmartHomeNG.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import logging
+
+BASE = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import lib.plugin
+import lib.shtime
+import lib.item.items
+import lib.item.item
+from lib.shtime import Shtime
+from lib.item import Items
+from lib.item.item import Item
+
+
+class BenchPlugins:
+    """ Replaces lib.plugin.Plugins: no plugins are loaded """
+
+    def return_plugins(self):
+        return []
+
+
+class BenchModules:
+    """ Replaces lib.module.Modules: no modules are loaded """
+
+    def get_module(self, name):
+        return None
+
+
+class BenchScheduler:
+    """ Replaces lib.scheduler.Scheduler: scheduler calls are ignored """
+
+    def add(self, *args, **kwargs):
+        pass
+
+    def remove(self, *args, **kwargs):
+        pass
+
+    def add_timer(self, *args, **kwargs):
+        pass
+
+    def remove_timer(self, *args, **kwargs):
+        pass
+
+
+class BenchSmartHome:
+    """ Minimal smarthome object """
+
+    shng_status = {'code': 20, 'text': 'Running'}
+    _use_conditional_triggers = 'False'
+    _ignore_item_collision = False
+    _default_logtext = None
+
+    def __init__(self):
+        self._base_dir = BASE
+        self._etc_dir = os.path.join(BASE, 'tests', 'resources', 'etc')
+        self._structs_dir = os.path.join(BASE, 'tests', 'resources', 'structs')
+        self._var_dir = tempfile.mkdtemp(prefix='shng_bench_')
+        self._cache_dir = os.path.join(self._var_dir, 'cache')
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self.scheduler = BenchScheduler()
+        self.modules = BenchModules()
+
+        lib.plugin._plugins_instance = self.plugins = BenchPlugins()
+        if lib.shtime._shtime_instance is None:
+            self.shtime = Shtime(self)
+        else:
+            self.shtime = Shtime.get_instance()
+        lib.item.items._items_instance = None
+        lib.item.item._items_instance = None
+        self.items = Items(self)
+
+    def get_config_dir(self, config):
+        return getattr(self, f'_{config}_dir', '')
+
+    def get_defaultlogtext(self):
+        return self._default_logtext
+
+    def get_vardir(self):
+        return self._var_dir
+
+    def trigger(self, *args, **kwargs):
+        pass
+
+    def add_items(self, config):
+        """
+        Create the items of an item configuration (dict of top level items)
+        """
+        for path, conf in config.items():
+            item = Item(self, self.items, path, conf, items_instance=self.items)
+            self.items.add_item(path, item)
+        # prepare the items for the run phase, like Items.load_itemdefinitions()
+        for item in self.items.return_items():
+            item._init_prerun()
+        return self.items
+
+
+def measure(func, number):
+    """
+    Call func number times and return the time per call in microseconds
+    """
+    start = time.perf_counter()
+    for i in range(number):
+        func(i)
+    return (time.perf_counter() - start) / number * 1000000
+
+
+def quiet_logging():
+    logging.basicConfig(level=logging.WARNING)
+    logging.addLevelName(29, 'NOTICE')
+    logging.addLevelName(13, 'DBGHIGH')
+    for name in ('notice', 'dbghigh', 'dbgmed', 'dbglow'):
+        if not hasattr(logging.Logger, name):
+            setattr(logging.Logger, name, lambda self, msg, *args, **kwargs: None)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# vim: set encoding=utf-8 tabstop=4 softtabstop=4 shiftwidth=4 expandtab
+#########################################################################
+#  This file is part of SmartHomeNG
+#
+#  SmartHomeNG is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  SmartHomeNG is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with SmartHomeNG  If not, see <http://www.gnu.org/licenses/>.
+#########################################################################
+
+"""
+This script shows, which imports take the most time when the SmartHomeNG core is loaded.
+
+The given modules (default: lib.smarthome and the core modules) are imported in a new
+Python interpreter with the option '-X importtime'. The output of Python is summarized:
+
+1) the import time of each top level package (sum of the time spent in its modules)
+2) the modules with the longest cumulative import time (including the modules they import)
+
+Usage:
+
+    python3 tools/importtime_audit.py [-t TOP] [module ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+sh_basedir = os.sep.join(os.path.realpath(__file__).split(os.sep)[:-2])
+
+DEFAULT_MODULES = ['lib.smarthome', 'modules.admin', 'modules.http']
+
+
+def run_importtime(modules):
+    """
+    Import the modules in a new interpreter and return the lines written by '-X importtime'
+    """
+    code = '\n'.join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=sh_basedir,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+    if result.returncode != 0:
+        print('\n'.join(errors))
+        print(f"Import of {modules} failed")
+    return result.stderr.splitlines()
+
+
+def parse_importtime(lines):
+    """
+    Parse the lines written by '-X importtime'
+
+    :return: list of tuples (module name, self time in µs, cumulative time in µs)
+    """
+    result = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # header line
+            continue
+        result.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return result
+
+
+def summarize(imports, top):
+    packages = {}
+    for name, self_us, cumulative_us in imports:
+        package = name.split('.')[0]
+        count, total = packages.get(package, (0, 0))
+        packages[package] = (count + 1, total + self_us)
+    total = sum(self_us for name, self_us, cumulative_us in imports)
+
+    print()
+    print(f"{len(imports)} modules imported in {total / 1000:.1f} ms")
+    print()
+    print(f"Top {top} packages (time spent in the modules of the package):")
+    print(f"  {'package':30} {'modules':>7} {'ms':>9} {'%':>6}")
+    for package, (count, package_us) in sorted(packages.items(), key=lambda p: p[1][1], reverse=True)[:top]:
+        print(f"  {package:30} {count:7} {package_us / 1000:9.1f} {package_us / total * 100:6.1f}")
+    print()
+    print(f"Top {top} modules (cumulative time, including the modules imported by the module):")
+    print(f"  {'module':50} {'ms':>9} {'self ms':>9}")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda i: i[2], reverse=True)[:top]:
+        print(f"  {name:50} {cumulative_us / 1000:9.1f} {self_us / 1000:9.1f}")
+    print()
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Summarize the import times of the SmartHomeNG core')
+    parser.add_argument('-t', '--top', type=int, default=20, help='number of packages/modules to show (default: 20)')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES, help=f"modules to import (default: {' '.join(DEFAULT_MODULES)})")
+    args = parser.parse_args()
+
+    summarize(parse_importtime(run_importtime(args.modules)), args.top)